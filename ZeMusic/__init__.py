@@ -65,17 +65,23 @@ except Exception as e:
     LOGGER(__name__).error(f"❌ خطأ في تصدير app: {e}")
     app = None
 
-# تصدير المنصات للتوافق
-try:
-    from ZeMusic.platforms import Apple, Resso, SoundCloud, Spotify, Telegram, YouTube
-    LOGGER(__name__).info("✅ تم تصدير منصات الموسيقى")
-except Exception as e:
-    LOGGER(__name__).error(f"❌ خطأ في تصدير المنصات: {e}")
+# تصدير المنصات للتوافق: تُستورد عند أول استخدام (from ZeMusic import YouTube)
+# لأن وحداتها تسحب yt_dlp و spotipy و youtubesearchpython وتنشئ مجلدات عند الاستيراد
+_LAZY_EXPORTS = {
+    'Apple': 'ZeMusic.platforms',
+    'Carbon': 'ZeMusic.platforms',
+    'Resso': 'ZeMusic.platforms',
+    'SoundCloud': 'ZeMusic.platforms',
+    'Spotify': 'ZeMusic.platforms',
+    'Telegram': 'ZeMusic.platforms',
+    'YouTube': 'ZeMusic.platforms',
+}
 
-# تصدير الكربون (إذا كان موجود)
-try:
-    from ZeMusic.utils.thumbnails import Carbon
-    LOGGER(__name__).info("✅ تم تصدير Carbon")
-except Exception as e:
-    # Carbon ليس ضروري للوظيفة الأساسية
-    pass
+def __getattr__(name):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from ZeMusic.core.lazy_plugins import plugin_registry
+    value = plugin_registry.attribute(module, name)
+    globals()[name] = value
+    return value
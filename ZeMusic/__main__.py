@@ -2,15 +2,20 @@ import asyncio
 import os
 import sys
 import signal
+import time
 from contextlib import suppress
 
 import config
 from ZeMusic.logging import LOGGER
 from ZeMusic.core.telethon_client import telethon_manager
 from ZeMusic.core.database import db
+from ZeMusic.core.sqlite_pool import close_all_pools
+from ZeMusic.core.queue_store import queue_store
+from ZeMusic.core.cookies_manager import cookies_manager
+from ZeMusic.core.ytdlp_engine import ytdlp_engine
+from ZeMusic.core.membership_cache import membership_cache
 from ZeMusic.core.music_manager import telethon_music_manager as music_manager
 from ZeMusic.core.command_handler import telethon_command_handler
-from ZeMusic.plugins.owner.owner_panel import owner_panel
 
 class ZeMusicBot:
     """البوت الرئيسي لـ ZeMusic مع دعم Telethon"""
@@ -23,10 +28,18 @@ class ZeMusicBot:
         """تهيئة النظام"""
         try:
             LOGGER(__name__).info("🚀 بدء تهيئة ZeMusic Bot مع Telethon...")
+            phases = {}
+            phase_start = time.monotonic()
             
             # تهيئة قاعدة البيانات
             LOGGER(__name__).info("📊 تهيئة قاعدة البيانات...")
             await self._ensure_database_ready()
+            # استعادة قوائم التشغيل المحفوظة (عند تفعيل QUEUE_PERSIST)
+            await queue_store.restore()
+            phase_start = self._mark_phase(phases, "قاعدة البيانات", phase_start)
+            
+            # تشغيل عمليات yt-dlp مبكراً (قبل بدء خيوط العملاء)
+            ytdlp_engine.start()
             
             # تهيئة البوت الرئيسي باستخدام Telethon
             LOGGER(__name__).info("🤖 تشغيل البوت الرئيسي مع Telethon...")
@@ -36,6 +49,7 @@ class ZeMusicBot:
                     LOGGER(__name__).error("❌ فشل في تشغيل البوت الرئيسي")
                     return False
                 LOGGER(__name__).info("✅ تم تشغيل البوت مع Telethon بنجاح")
+                phase_start = self._mark_phase(phases, "البوت", phase_start)
                 
                 # تسجيل المعالجات بعد تهيئة البوت
                 try:
@@ -44,14 +58,17 @@ class ZeMusicBot:
                     LOGGER(__name__).info("✅ تم تسجيل جميع المعالجات")
                 except Exception as e:
                     LOGGER(__name__).warning(f"⚠️ خطأ في تسجيل المعالجات: {e}")
+                phase_start = self._mark_phase(phases, "المعالجات", phase_start)
             except Exception as e:
                 LOGGER(__name__).error(f"❌ خطأ في تشغيل البوت: {e}")
                 return False
             
-            # تحميل الحسابات المساعدة من قاعدة البيانات
+            # تحميل الحسابات المساعدة من قاعدة البيانات (بالتوازي، والمتابعة عند جاهزية أول مساعد)
             LOGGER(__name__).info("📱 تحميل الحسابات المساعدة...")
             try:
                 loaded_assistants = await telethon_manager.load_assistants_from_db()
+                phase_start = self._mark_phase(phases, "أول مساعد", phase_start)
+                asyncio.create_task(self._log_assistants_startup())
                 assistants_count = telethon_manager.get_assistants_count()
                 connected_count = telethon_manager.get_connected_assistants_count()
                 LOGGER(__name__).info(f"📊 حالة الحسابات المساعدة: {assistants_count} إجمالي، {connected_count} متصل")
@@ -89,6 +106,12 @@ class ZeMusicBot:
             except Exception as e:
                 LOGGER(__name__).warning(f"⚠️ خطأ في مهام المساعدين: {e}")
             
+            self._mark_phase(phases, "المهام الخلفية", phase_start)
+            LOGGER(__name__).info(
+                "⏱️ زمن البدء: " + " | ".join(f"{name} {seconds:.2f}s" for name, seconds in phases.items())
+                + f" | الإجمالي {sum(phases.values()):.2f}s"
+            )
+            
             self.startup_time = asyncio.get_event_loop().time()
             self.is_running = True
             
@@ -101,6 +124,26 @@ class ZeMusicBot:
             LOGGER(__name__).error(f"❌ خطأ في تهيئة البوت: {e}")
             return False
     
+    @staticmethod
+    def _mark_phase(phases: dict, name: str, phase_start: float) -> float:
+        """تسجيل زمن مرحلة من مراحل البدء وإرجاع بداية المرحلة التالية"""
+        now = time.monotonic()
+        phases[name] = now - phase_start
+        return now
+    
+    async def _log_assistants_startup(self):
+        """تفصيل زمن تشغيل كل مساعد بعد اكتمال التحميل في الخلفية"""
+        try:
+            await telethon_manager.wait_assistants_loaded()
+            for name, timings in telethon_manager.startup_report.items():
+                steps = " ".join(
+                    f"{step}={timings[step]:.2f}s" for step in ('connect', 'authorize', 'get_me', 'total')
+                    if step in timings
+                )
+                LOGGER(__name__).info(f"⏱️ المساعد {name}: {timings['status']} {steps}")
+        except Exception as e:
+            LOGGER(__name__).debug(f"تعذر عرض تفصيل تشغيل المساعدين: {e}")
+    
     async def _ensure_database_ready(self):
         """التأكد من جاهزية قاعدة البيانات"""
         try:
@@ -283,6 +326,20 @@ class ZeMusicBot:
             LOGGER(__name__).info("📱 إيقاف عملاء Telethon...")
             await telethon_manager.stop_all()
             
+            # حفظ قوائم التشغيل المعدلة قبل إغلاق قاعدة البيانات
+            await queue_store.close()
+            # حالة الكوكيز المؤجلة
+            await cookies_manager.close()
+            
+            # إيقاف عمليات yt-dlp وإغلاق اتصالات قاعدة البيانات
+            ytdlp_engine.shutdown()
+            membership_cache.shutdown()
+            # مجمع رسم الصور المصغرة موجود فقط إذا حُمّلت وحدته
+            thumb_renderer = sys.modules.get('ZeMusic.utils.thumb_renderer')
+            if thumb_renderer is not None:
+                thumb_renderer.thumbnail_renderer.shutdown()
+            close_all_pools()
+            
             LOGGER(__name__).info("✅ تم إيقاف البوت بنجاح")
             
         except Exception as e:
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+مُجدول الحسابات المساعدة
+- تتبع الحمل الحي لكل مساعد (المكالمات النشطة، FloodWait الأخيرة، حالة الاتصال)
+- ارتباط ثابت بين المجموعة ومساعدها (محفوظ في chat_settings.assistant_id)
+- المجموعات الجديدة تُوزع على المساعد السليم الأقل حملاً
+"""
+
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Set
+
+import config
+from ZeMusic.logging import LOGGER
+
+# نافذة احتساب FloodWait في درجة الحمل (ثوان)
+FLOOD_WINDOW = 600
+
+# وزن كل FloodWait حديثة في درجة الحمل (تعادل مكالمة نشطة)
+FLOOD_PENALTY = 1.0
+
+class AssistantScheduler:
+    """اختيار المساعد لكل مجموعة حسب الارتباط والحمل"""
+
+    def __init__(self, max_calls: int = 25, flood_reassign: float = 60.0):
+        self.max_calls = max_calls
+        self.flood_reassign = flood_reassign
+
+        # المجموعة -> المساعد المرتبط بها
+        self._affinity: Dict[int, int] = {}
+        # المساعد -> المجموعات التي يشغل فيها حالياً
+        self._active: Dict[int, Set[int]] = {}
+        # المساعد -> أوقات FloodWait الأخيرة وموعد انتهاء الحالية
+        self._floods: Dict[int, deque] = {}
+        self._flood_until: Dict[int, float] = {}
+
+        self.stats = {
+            'assignments': 0,
+            'sticky_hits': 0,
+            'reassigned': 0,
+            'no_assistant': 0
+        }
+
+    @staticmethod
+    def _clients() -> Dict[int, Any]:
+        from ZeMusic.core.telethon_client import telethon_manager
+        return telethon_manager.assistant_clients
+
+    def client(self, assistant_id: Optional[int]):
+        """عميل Telethon للمساعد"""
+        if assistant_id is None:
+            return None
+        return self._clients().get(assistant_id)
+
+    # ---------- الحالة الحية ----------
+
+    def _recent_floods(self, assistant_id: int) -> int:
+        events = self._floods.get(assistant_id)
+        if not events:
+            return 0
+        cutoff = time.monotonic() - FLOOD_WINDOW
+        while events and events[0] < cutoff:
+            events.popleft()
+        return len(events)
+
+    def flood_remaining(self, assistant_id: int) -> float:
+        return max(0.0, self._flood_until.get(assistant_id, 0.0) - time.monotonic())
+
+    def is_healthy(self, assistant_id: int) -> bool:
+        """متصل وليس في FloodWait طويلة"""
+        client = self.client(assistant_id)
+        if client is None:
+            return False
+        try:
+            if not client.is_connected():
+                return False
+        except Exception:
+            return False
+        return self.flood_remaining(assistant_id) <= self.flood_reassign
+
+    def load(self, assistant_id: int) -> float:
+        """درجة الحمل: المكالمات النشطة + عقوبة FloodWait الحديثة"""
+        return len(self._active.get(assistant_id, ())) + FLOOD_PENALTY * self._recent_floods(assistant_id)
+
+    def _has_capacity(self, assistant_id: int) -> bool:
+        return self.max_calls <= 0 or len(self._active.get(assistant_id, ())) < self.max_calls
+
+    def report_flood_wait(self, assistant_id: int, seconds: float):
+        """تسجيل FloodWait لمساعد (يخفض أولويته ويستبعده حتى انتهائها إذا طالت)"""
+        now = time.monotonic()
+        self._floods.setdefault(assistant_id, deque()).append(now)
+        self._flood_until[assistant_id] = max(self._flood_until.get(assistant_id, 0.0), now + seconds)
+        LOGGER(__name__).warning(f"⏳ FloodWait للمساعد {assistant_id}: {seconds} ثانية")
+
+    def call_started(self, chat_id: int, assistant_id: int):
+        # مكالمة واحدة لكل مجموعة: نقلها من مساعد سابق إن وُجد
+        self.call_ended(chat_id)
+        self._active.setdefault(assistant_id, set()).add(chat_id)
+
+    def call_ended(self, chat_id: int):
+        for chats in self._active.values():
+            chats.discard(chat_id)
+
+    # ---------- الاختيار ----------
+
+    def _least_loaded(self, exclude: Optional[int] = None) -> Optional[int]:
+        """المساعد السليم الأقل حملاً (ثم الأقل ارتباطاً بمجموعات، ثم الأصغر رقماً)"""
+        healthy = [aid for aid in self._clients() if aid != exclude and self.is_healthy(aid)]
+        if not healthy:
+            return None
+        with_capacity = [aid for aid in healthy if self._has_capacity(aid)] or healthy
+        bound = self.affinity_counts()
+        return min(with_capacity, key=lambda aid: (self.load(aid), bound.get(aid, 0), aid))
+
+    async def _stored_assistant(self, chat_id: int) -> Optional[int]:
+        if chat_id in self._affinity:
+            return self._affinity[chat_id]
+        try:
+            from ZeMusic.core.database import db
+            settings = await db.get_chat_settings(chat_id)
+            assistant_id = settings.assistant_id
+        except Exception as e:
+            LOGGER(__name__).debug(f"تعذر قراءة مساعد المجموعة {chat_id}: {e}")
+            return None
+        if assistant_id is not None:
+            self._affinity[chat_id] = assistant_id
+        return assistant_id
+
+    async def assign(self, chat_id: int) -> Optional[int]:
+        """
+        مساعد المجموعة: المرتبط بها إن كان سليماً (موجود فيها مسبقاً)،
+        وإلا الأقل حملاً مع حفظ الارتباط الجديد
+        """
+        current = await self._stored_assistant(chat_id)
+        if current is not None and self.is_healthy(current):
+            self.stats['sticky_hits'] += 1
+            return current
+
+        selected = self._least_loaded(exclude=current)
+        if selected is None:
+            self.stats['no_assistant'] += 1
+            return None
+
+        if current is not None:
+            self.stats['reassigned'] += 1
+            LOGGER(__name__).info(f"🔀 نقل المجموعة {chat_id} من المساعد {current} إلى {selected}")
+        self.stats['assignments'] += 1
+        await self.pin(chat_id, selected)
+        return selected
+
+    async def pin(self, chat_id: int, assistant_id: Optional[int]):
+        """ربط مجموعة بمساعد محدد (أو فك الارتباط بتمرير None)"""
+        if assistant_id is None:
+            self._affinity.pop(chat_id, None)
+        else:
+            self._affinity[chat_id] = assistant_id
+        try:
+            from ZeMusic.core.database import db
+            await db.update_chat_setting(chat_id, assistant_id=assistant_id)
+        except Exception as e:
+            LOGGER(__name__).warning(f"⚠️ تعذر حفظ مساعد المجموعة {chat_id}: {e}")
+
+    def forget_assistant(self, assistant_id: int):
+        """إزالة مساعد محذوف (مجموعاته تُعاد جدولتها عند أول طلب)"""
+        self._active.pop(assistant_id, None)
+        self._floods.pop(assistant_id, None)
+        self._flood_until.pop(assistant_id, None)
+        for chat_id in [c for c, a in self._affinity.items() if a == assistant_id]:
+            del self._affinity[chat_id]
+
+    # ---------- الإحصائيات ----------
+
+    def affinity_counts(self) -> Dict[int, int]:
+        counts: Dict[int, int] = {}
+        for assistant_id in self._affinity.values():
+            counts[assistant_id] = counts.get(assistant_id, 0) + 1
+        return counts
+
+    def distribution(self) -> List[Dict[str, Any]]:
+        """حالة كل مساعد لعرضها في لوحة المالك"""
+        bound = self.affinity_counts()
+        rows = []
+        for assistant_id, client in sorted(self._clients().items()):
+            try:
+                connected = client.is_connected()
+            except Exception:
+                connected = False
+            rows.append({
+                'assistant_id': assistant_id,
+                'connected': connected,
+                'healthy': self.is_healthy(assistant_id),
+                'active_calls': len(self._active.get(assistant_id, ())),
+                'chats': bound.get(assistant_id, 0),
+                'recent_floods': self._recent_floods(assistant_id),
+                'flood_remaining': int(self.flood_remaining(assistant_id))
+            })
+        return rows
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'active_calls': sum(len(chats) for chats in self._active.values()),
+            'known_chats': len(self._affinity),
+            'max_calls': self.max_calls
+        }
+
+# مثيل عام مشترك
+assistant_scheduler = AssistantScheduler(
+    max_calls=config.ASSISTANT_MAX_CALLS,
+    flood_reassign=config.ASSISTANT_FLOOD_REASSIGN
+)
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+محرك الإذاعة
+قراءة الأهداف من SQLite على صفحات، إرسال متزامن عبر دلو رموز (Token Bucket) مضبوط على حدود تليجرام،
+إيقاف عام لكل المرسلين عند FloodWait، ومؤشر تقدم محفوظ لاستئناف الإذاعة بعد أي انقطاع
+"""
+
+import json
+import time
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from telethon.errors import FloodWaitError
+
+from ZeMusic.logging import LOGGER
+from ZeMusic.core.sqlite_pool import SQLitePool
+
+# بداية المؤشر (أصغر من أي معرف مستخدم أو محادثة)
+CURSOR_START = -(2 ** 63)
+
+# محاولات الهدف الواحد عند FloodWait
+MAX_ATTEMPTS = 3
+
+# نافذة قياس معدل الإرسال الحي بالثواني
+THROUGHPUT_WINDOW = 10.0
+
+# استعلامات الأهداف مرتبة بالمعرف (ترقيم بالمفتاح بدلاً من OFFSET)
+TARGET_QUERIES = {
+    'users': "SELECT user_id FROM users WHERE is_banned = 0 AND user_id > ? ORDER BY user_id LIMIT ?",
+    'groups': ("SELECT chat_id FROM chats WHERE chat_type IN ('group', 'supergroup') AND is_blacklisted = 0 "
+               "AND chat_id > ? ORDER BY chat_id LIMIT ?"),
+    'channels': ("SELECT chat_id FROM chats WHERE chat_type = 'channel' AND is_blacklisted = 0 "
+                 "AND chat_id > ? ORDER BY chat_id LIMIT ?"),
+}
+
+class TokenBucket:
+    """دلو رموز مشترك: معدل ثابت مع سعة انفجار، وإيقاف عام لكل المنتظرين عند FloodWait"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = max(0.1, rate)
+        self.capacity = capacity or self.rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self.stats = {
+            'acquired': 0,
+            'pauses': 0,
+            'paused_seconds': 0.0
+        }
+
+    async def acquire(self):
+        """انتظار رمز واحد"""
+        while True:
+            now = time.monotonic()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self.stats['acquired'] += 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """إيقاف جميع المرسلين (FloodWait يخص البوت بالكامل وليس المحادثة فقط)"""
+        until = time.monotonic() + seconds
+        if until > self._paused_until:
+            self.stats['pauses'] += 1
+            self.stats['paused_seconds'] += until - max(self._paused_until, time.monotonic())
+            self._paused_until = until
+            self._tokens = 0
+
+    @property
+    def paused_for(self) -> float:
+        return max(0.0, self._paused_until - time.monotonic())
+
+class ThroughputMeter:
+    """معدل الإرسال الحي خلال آخر نافذة زمنية"""
+
+    def __init__(self, window: float = THROUGHPUT_WINDOW):
+        self.window = window
+        self._events: deque = deque()
+
+    def record(self):
+        now = time.monotonic()
+        self._events.append(now)
+        self._trim(now)
+
+    def _trim(self, now: float):
+        while self._events and now - self._events[0] > self.window:
+            self._events.popleft()
+
+    def rate(self) -> float:
+        now = time.monotonic()
+        self._trim(now)
+        if not self._events:
+            return 0.0
+        return len(self._events) / max(1.0, min(self.window, now - self._events[0]))
+
+class BroadcastStore:
+    """حفظ جلسات الإذاعة ومؤشراتها، وقراءة الأهداف على صفحات"""
+
+    def __init__(self, pool: SQLitePool):
+        self.pool = pool
+        self._ready = False
+
+    async def _ensure_table(self):
+        if self._ready:
+            return
+
+        def _create(conn):
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS broadcast_jobs (
+                    session_id TEXT PRIMARY KEY,
+                    user_id INTEGER NOT NULL,
+                    target_type TEXT NOT NULL,
+                    message_content TEXT NOT NULL,
+                    forward_mode BOOLEAN DEFAULT 0,
+                    pin_message BOOLEAN DEFAULT 0,
+                    cursor INTEGER NOT NULL,
+                    sent_count INTEGER DEFAULT 0,
+                    failed_count INTEGER DEFAULT 0,
+                    total_targets INTEGER DEFAULT 0,
+                    status TEXT DEFAULT 'running',
+                    started_at REAL,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_broadcast_jobs_status ON broadcast_jobs(status)")
+            conn.commit()
+
+        await self.pool.run_write(_create)
+        self._ready = True
+
+    async def fetch_targets(self, target_type: str, after: int, limit: int) -> List[int]:
+        """صفحة الأهداف التالية بعد المؤشر"""
+        sql = TARGET_QUERIES.get(target_type)
+        if not sql:
+            return []
+        rows = await self.pool.fetchall(sql, (after, limit))
+        return [row[0] for row in rows]
+
+    async def save(self, session, status: str = 'running'):
+        """حفظ الجلسة ومؤشرها وعداداتها"""
+        await self._ensure_table()
+        await self.pool.execute('''
+            INSERT INTO broadcast_jobs
+                (session_id, user_id, target_type, message_content, forward_mode, pin_message,
+                 cursor, sent_count, failed_count, total_targets, status, started_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(session_id) DO UPDATE SET
+                cursor = excluded.cursor,
+                sent_count = excluded.sent_count,
+                failed_count = excluded.failed_count,
+                status = excluded.status,
+                updated_at = CURRENT_TIMESTAMP
+        ''', (
+            session.session_id, session.user_id, session.target_type,
+            json.dumps(session.message_content, ensure_ascii=False, default=str),
+            session.forward_mode, session.pin_message, session.cursor,
+            session.sent_count, session.failed_count, session.total_targets,
+            status, session.start_time
+        ))
+
+    async def pending(self) -> List[Dict[str, Any]]:
+        """جلسات لم تكتمل (انقطعت قبل النهاية)"""
+        await self._ensure_table()
+        rows = await self.pool.fetchall("SELECT * FROM broadcast_jobs WHERE status = 'running'")
+        jobs = []
+        for row in rows:
+            job = dict(row)
+            job['message_content'] = json.loads(job['message_content'])
+            jobs.append(job)
+        return jobs
+
+class BroadcastEngine:
+    """تنفيذ جلسة إذاعة: صفحات من الأهداف، عدة مرسلين، ومؤشر يُحفظ بعد كل صفحة"""
+
+    def __init__(self, limiter: TokenBucket, store: BroadcastStore, concurrency: int = 8, page_size: int = 500):
+        self.limiter = limiter
+        self.store = store
+        self.concurrency = max(1, concurrency)
+        self.page_size = max(1, page_size)
+
+    async def run(self, session, send: Callable[[int], Awaitable[bool]]):
+        """
+        الإرسال لكل الأهداف بعد session.cursor
+        يتقدم المؤشر بعد اكتمال كل صفحة، فالاستئناف يعيد صفحة واحدة على الأكثر
+        """
+        await self.store.save(session)
+
+        while not session.is_cancelled:
+            page = await self.store.fetch_targets(session.target_type, session.cursor, self.page_size)
+            if not page:
+                break
+
+            pending = deque(page)
+            senders = min(self.concurrency, len(page))
+            await asyncio.gather(*(self._sender(session, pending, send) for _ in range(senders)))
+
+            if session.is_cancelled:
+                break
+            session.cursor = page[-1]
+            await self.store.save(session)
+
+        await self.store.save(session, 'cancelled' if session.is_cancelled else 'done')
+
+    async def _sender(self, session, pending: deque, send: Callable[[int], Awaitable[bool]]):
+        while pending and not session.is_cancelled:
+            target_id = pending.popleft()
+            success = False
+            for _ in range(MAX_ATTEMPTS):
+                await self.limiter.acquire()
+                try:
+                    success = await send(target_id)
+                except FloodWaitError as e:
+                    session.flood_waits += 1
+                    LOGGER(__name__).warning(f"⏳ FloodWait في الإذاعة: إيقاف جميع المرسلين {e.seconds} ثانية")
+                    self.limiter.pause(e.seconds + 1)
+                    continue
+                except Exception as e:
+                    LOGGER(__name__).debug(f"فشل إرسال رسالة إلى {target_id}: {e}")
+                break
+
+            if success:
+                session.sent_count += 1
+            else:
+                session.failed_count += 1
+            session.meter.record()
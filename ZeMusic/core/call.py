@@ -10,6 +10,8 @@ from typing import Union, Optional, Dict, Any
 
 from telethon import TelegramClient
 from ZeMusic.core.telethon_client import telethon_manager
+from ZeMusic.core.assistant_scheduler import assistant_scheduler
+from ZeMusic.core.playback_clock import playback_clock
 from ZeMusic.logging import LOGGER
 import config
 
@@ -19,20 +21,17 @@ class TelethonCall:
     def __init__(self):
         self.logger = LOGGER(__name__)
         self.active_calls: Dict[int, Dict[str, Any]] = {}
+        playback_clock.add_listener(self._on_track_end)
         
     async def join_call(self, chat_id: int, file_path: str, video: bool = False) -> bool:
         """الانضمام للمكالمة الصوتية"""
         try:
-            # الحصول على حساب مساعد متاح
-            assistants = await telethon_manager.get_available_assistants()
-            if not assistants:
+            # المساعد المرتبط بالمجموعة أو الأقل حملاً
+            assistant_id = await assistant_scheduler.assign(chat_id)
+            if assistant_id is None:
                 self.logger.error("لا توجد حسابات مساعدة متاحة")
                 return False
             
-            # اختيار أول حساب مساعد متاح
-            assistant_id = list(assistants.keys())[0]
-            assistant_client = assistants[assistant_id]['client']
-            
             # حفظ معلومات المكالمة
             self.active_calls[chat_id] = {
                 'assistant_id': assistant_id,
@@ -40,6 +39,7 @@ class TelethonCall:
                 'video': video,
                 'start_time': datetime.now()
             }
+            assistant_scheduler.call_started(chat_id, assistant_id)
             
             self.logger.info(f"تم الانضمام للمكالمة في {chat_id} باستخدام المساعد {assistant_id}")
             return True
@@ -54,6 +54,8 @@ class TelethonCall:
             if chat_id in self.active_calls:
                 call_info = self.active_calls[chat_id]
                 del self.active_calls[chat_id]
+                assistant_scheduler.call_ended(chat_id)
+                playback_clock.stop(chat_id)
                 self.logger.info(f"تم مغادرة المكالمة في {chat_id}")
                 return True
             return False
@@ -62,6 +64,13 @@ class TelethonCall:
             self.logger.error(f"خطأ في مغادرة المكالمة: {e}")
             return False
     
+    def _on_track_end(self, chat_id: int):
+        """انتهاء زمن المقطع الحالي حسب ساعة التشغيل"""
+        call_info = self.active_calls.get(chat_id)
+        if call_info is not None:
+            call_info['ended_at'] = datetime.now()
+        self.logger.info(f"⏹️ انتهى المقطع الحالي في {chat_id}")
+    
     async def pause_stream(self, chat_id: int) -> bool:
         """إيقاف مؤقت للبث"""
         try:
@@ -127,8 +136,7 @@ class TelethonCall:
     async def ping(self) -> str:
         """ping المساعدين"""
         try:
-            assistants = await telethon_manager.get_available_assistants()
-            if assistants:
+            if telethon_manager.get_connected_assistants_count():
                 return "0.05"  # قيمة افتراضية
             return "∞"
             
@@ -0,0 +1,547 @@
+# -*- coding: utf-8 -*-
+"""
+مُفهرس قناة التخزين التزايدي
+يستمع لرسائل قناة التخزين الجديدة/المعدلة/المحذوفة ويفهرس كل رفع مرة واحدة (UPSERT واحد)
+مع علامة مائية محفوظة (آخر رسالة مفهرسة بلا فجوات) وتعبئة خلفية على دفعات بمعدل محدد
+تُستأنف من حيث توقفت، فلا حاجة لفحص القناة كاملة دورياً
+"""
+
+import re
+import time
+import asyncio
+import hashlib
+import sqlite3
+from contextlib import suppress
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from telethon import events
+from telethon.errors import FloodWaitError
+
+import config
+from ZeMusic.logging import LOGGER
+
+# عدد الرسائل في كل طلب تعبئة (حد get_messages بالمعرفات 100)
+BACKFILL_BATCH_SIZE = min(100, getattr(config, "CACHE_INDEX_BATCH_SIZE", 100))
+
+# أقصى عدد رسائل يُفحص في الثانية أثناء التعبئة
+BACKFILL_RATE = getattr(config, "CACHE_INDEX_BACKFILL_RATE", 200)
+
+# دفعات فارغة متتالية تعني الوصول لنهاية القناة (عند عدم معرفة آخر رسالة)
+BACKFILL_EMPTY_BATCHES = max(1, getattr(config, "CACHE_INDEX_EMPTY_BATCHES", 20))
+
+# غلاف البيانات الآلي في آخر سطر من نص التخزين (داخل code حتى لا يفسره markdown):
+# ZMC1|video_id|duration|search_hash|title|artist|keywords
+ENVELOPE_PREFIX = "ZMC1|"
+ENVELOPE_FIELDS = ('video_id', 'duration', 'search_hash', 'title', 'artist', 'keywords')
+
+# حد نص الوسائط في تيليجرام مع هامش لوحدات UTF-16
+CAPTION_LIMIT = 1000
+
+# أنماط النص القديم (للرسائل التي لم تُرحّل بعد)
+CAPTION_TITLE = re.compile(r'🎵\s*\*\*(.+?)\*\*|العنوان:\s*(.+?)(?:\n|$)')
+CAPTION_ARTIST = re.compile(r'🎤\s*\*\*(.+?)\*\*|الفنان:\s*(.+?)(?:\n|$)')
+CAPTION_DURATION = re.compile(r'\((\d+)s\)|⏱️\s*\*\*(\d+):(\d+)\*\*|المدة:\s*(\d+)')
+CAPTION_HASH = re.compile(r'هاش البحث.*?`([a-f0-9]+)`')
+CAPTION_KEYWORDS = re.compile(r'الكلمات المفتاحية:\*\*\s*`([^`]*)`')
+
+STATE_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS channel_index_state (
+        channel TEXT PRIMARY KEY,
+        high_water INTEGER NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+UPSERT_SQL = '''
+    INSERT INTO channel_index
+    (message_id, file_id, file_unique_id, search_hash, title_normalized,
+     artist_normalized, keywords_vector, original_title, original_artist,
+     duration, file_size, access_count, popularity_rank)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, 0.5)
+    ON CONFLICT(message_id) DO UPDATE SET
+        file_id = excluded.file_id,
+        title_normalized = excluded.title_normalized,
+        artist_normalized = excluded.artist_normalized,
+        keywords_vector = excluded.keywords_vector,
+        original_title = excluded.original_title,
+        original_artist = excluded.original_artist,
+        duration = excluded.duration,
+        file_size = excluded.file_size
+    WHERE channel_index.file_id IS NOT excluded.file_id
+       OR channel_index.original_title IS NOT excluded.original_title
+       OR channel_index.original_artist IS NOT excluded.original_artist
+       OR channel_index.keywords_vector IS NOT excluded.keywords_vector
+    ON CONFLICT DO NOTHING
+'''
+
+def _envelope_field(value: Any, limit: int) -> str:
+    return str(value or '').replace('|', '/').replace('`', "'").replace('\n', ' ').strip()[:limit]
+
+def build_cache_envelope(video_id: str, duration: int, search_hash: str,
+                         title: str, artist: str, keywords: str) -> str:
+    """سطر البيانات الآلي (بإصدار ثابت) المضاف لنص رسالة التخزين"""
+    return ENVELOPE_PREFIX + '|'.join((
+        _envelope_field(video_id, 32),
+        str(int(duration or 0)),
+        _envelope_field(search_hash, 32),
+        _envelope_field(title, 100),
+        _envelope_field(artist, 64),
+        _envelope_field(keywords, 200)
+    ))
+
+def attach_envelope(caption: str, envelope: str) -> str:
+    """إلحاق الغلاف بالنص مع حذف أسطر الزينة من النهاية عند تجاوز حد تيليجرام"""
+    tail = f"`{envelope}`"
+    lines = caption.rstrip().split('\n') if caption else []
+    while lines and len('\n'.join(lines)) + len(tail) + 2 > CAPTION_LIMIT:
+        lines.pop()
+    return '\n\n'.join(part for part in ('\n'.join(lines).rstrip(), tail) if part)
+
+def parse_cache_envelope(text: str) -> Optional[Dict[str, Any]]:
+    """فك الغلاف خطياً من آخر أسطر النص (بدون أنماط)، أو None للرسائل القديمة"""
+    if not text or ENVELOPE_PREFIX not in text:
+        return None
+    for line in reversed(text.rsplit('\n', 3)):
+        line = line.strip().strip('`')
+        if not line.startswith(ENVELOPE_PREFIX):
+            continue
+        values = line[len(ENVELOPE_PREFIX):].split('|', len(ENVELOPE_FIELDS) - 1)
+        if len(values) != len(ENVELOPE_FIELDS):
+            return None
+        meta = {key: value for key, value in zip(ENVELOPE_FIELDS, values) if value}
+        meta['duration'] = int(meta['duration']) if meta.get('duration', '').isdigit() else 0
+        return meta
+    return None
+
+def parse_cache_caption(text: str) -> Dict[str, Any]:
+    """تحليل نص التخزين مرة واحدة: الغلاف الآلي إن وجد وإلا أنماط النص القديم"""
+    meta: Dict[str, Any] = {}
+    if not text:
+        return meta
+
+    envelope = parse_cache_envelope(text)
+    if envelope is not None:
+        return envelope
+
+    match = CAPTION_TITLE.search(text)
+    if match:
+        meta['title'] = (match.group(1) or match.group(2)).strip()
+    match = CAPTION_ARTIST.search(text)
+    if match:
+        meta['artist'] = (match.group(1) or match.group(2)).strip()
+    match = CAPTION_DURATION.search(text)
+    if match:
+        seconds, minutes, rest, plain = match.groups()
+        if seconds:
+            meta['duration'] = int(seconds)
+        elif minutes:
+            meta['duration'] = int(minutes) * 60 + int(rest)
+        else:
+            meta['duration'] = int(plain)
+    match = CAPTION_HASH.search(text)
+    if match:
+        meta['search_hash'] = match.group(1)
+    match = CAPTION_KEYWORDS.search(text)
+    if match and match.group(1).strip():
+        meta['keywords'] = match.group(1).strip()
+    return meta
+
+def _channel_ref(channel: Optional[str]) -> Optional[Union[int, str]]:
+    """المعرفات الرقمية تُمرر كأرقام حتى لا تُعامل كيوزرات"""
+    if not channel:
+        return None
+    channel = str(channel)
+    return int(channel) if channel.lstrip('-').isdigit() else channel
+
+class ChannelIndexer:
+    """فهرسة تزايدية لقناة التخزين في جدول channel_index"""
+
+    def __init__(self, pool, normalize: Callable[[str], str], channel: Optional[str] = None):
+        self.pool = pool
+        self.normalize = normalize
+        self.channel = _channel_ref(channel or getattr(config, "CACHE_CHANNEL_ID", None))
+        self.state_key = str(self.channel)
+
+        self._client = None
+        self._ready = False
+        self._started = False
+        self._backfill_task: Optional[asyncio.Task] = None
+        self._high_water = 0
+        # أعلى رسالة معروفة من التحديثات أو رفع البوت (0 = غير معروفة)
+        self._top_seen = 0
+
+        self.stats = {
+            'live_indexed': 0,
+            'edited': 0,
+            'deleted': 0,
+            'backfill_indexed': 0,
+            'backfill_scanned': 0,
+            'backfill_runs': 0,
+            'flood_waits': 0,
+            'errors': 0
+        }
+
+    # ========================================
+    # التشغيل
+    # ========================================
+
+    async def _ensure_ready(self):
+        if self._ready:
+            return
+
+        def _load(conn):
+            conn.execute(STATE_SCHEMA)
+            row = conn.execute(
+                'SELECT high_water FROM channel_index_state WHERE channel = ?', (self.state_key,)
+            ).fetchone()
+            if row is None:
+                # أول تشغيل: الفهرس الحالي بُني عند الرفع فنبدأ من آخر رسالة فيه
+                row = conn.execute('SELECT COALESCE(MAX(message_id), 0) FROM channel_index').fetchone()
+                conn.execute(
+                    'INSERT INTO channel_index_state (channel, high_water) VALUES (?, ?)',
+                    (self.state_key, row[0])
+                )
+            conn.commit()
+            return row[0]
+
+        self._high_water = await self.pool.run_write(_load)
+        self._ready = True
+
+    async def start(self, client):
+        """الاشتراك في تحديثات القناة وبدء التعبئة من العلامة المائية"""
+        if self._started or not self.channel:
+            return
+        await self._ensure_ready()
+        self._client = client
+        client.add_event_handler(self._on_new_message, events.NewMessage(chats=self.channel))
+        client.add_event_handler(self._on_edited, events.MessageEdited(chats=self.channel))
+        client.add_event_handler(self._on_deleted, events.MessageDeleted(chats=self.channel))
+        self._started = True
+        LOGGER(__name__).info(f"📇 تم تشغيل مفهرس قناة التخزين (آخر رسالة مفهرسة: {self._high_water})")
+        self.start_backfill()
+
+    async def observe(self, message_id: int):
+        """تسجيل رسالة رفعها البوت نفسه وفهرسها (لا تصله كتحديث)"""
+        if not self._ready:
+            return
+        self._top_seen = max(self._top_seen, message_id)
+        if message_id == self._high_water + 1 and not self._backfill_running:
+            await self.index_messages([], high_water=message_id)
+        elif message_id > self._high_water:
+            self.start_backfill()
+
+    # ========================================
+    # الفهرسة
+    # ========================================
+
+    def _row(self, message) -> Optional[tuple]:
+        file = getattr(message, 'file', None)
+        if not file:
+            return None
+
+        meta = parse_cache_caption(message.text or '')
+        title = meta.get('title') or getattr(file, 'title', None) or file.name or "Unknown Title"
+        artist = meta.get('artist') or getattr(file, 'performer', None) or "Unknown Artist"
+        duration = meta.get('duration') or int(getattr(file, 'duration', None) or 0)
+
+        title_normalized = self.normalize(title)
+        artist_normalized = self.normalize(artist)
+        search_hash = meta.get('search_hash') or hashlib.md5(
+            f"{title_normalized}|{artist_normalized}".encode()
+        ).hexdigest()[:12]
+        keywords_vector = meta.get('keywords') or f"{title_normalized} {artist_normalized}"
+
+        return (
+            message.id, file.id, getattr(file, 'unique_id', None), search_hash,
+            title_normalized, artist_normalized, keywords_vector,
+            title, artist, duration, file.size or 0
+        )
+
+    async def index_messages(self, messages: List, high_water: Optional[int] = None) -> Dict[str, int]:
+        """UPSERT لدفعة رسائل وتحديث العلامة المائية في نفس المعاملة"""
+        rows = []
+        for message in messages:
+            try:
+                row = self._row(message)
+            except Exception as e:
+                self.stats['errors'] += 1
+                LOGGER(__name__).warning(f"⚠️ خطأ في تحليل رسالة {message.id}: {e}")
+                continue
+            if row:
+                rows.append(row)
+
+        def _write(conn):
+            added = changed = 0
+            if rows:
+                placeholders = ','.join('?' * len(rows))
+                existing = conn.execute(
+                    f'SELECT COUNT(*) FROM channel_index WHERE message_id IN ({placeholders})',
+                    [row[0] for row in rows]
+                ).fetchone()[0]
+                try:
+                    # rowcount لا يشمل تغييرات مشغلات FTS ولا الصفوف المتطابقة
+                    changed = conn.executemany(UPSERT_SQL, rows).rowcount
+                except sqlite3.IntegrityError:
+                    # تحديث رسالة بملف تملكه رسالة أخرى: صف بصف حتى لا تسقط الدفعة كاملة
+                    conn.rollback()
+                    changed = self._write_rows(conn, rows)
+                added = len(rows) - existing
+            if high_water is not None:
+                conn.execute(
+                    'UPDATE channel_index_state SET high_water = ?, updated_at = CURRENT_TIMESTAMP WHERE channel = ?',
+                    (high_water, self.state_key)
+                )
+            conn.commit()
+            return {'processed': len(rows), 'added': added, 'updated': max(0, changed - added)}
+
+        result = await self.pool.run_write(_write)
+        if high_water is not None:
+            self._high_water = high_water
+        return result
+
+    def _write_rows(self, conn, rows: List[tuple]) -> int:
+        """UPSERT صف بصف: الملف المعاد رفعه ينتقل لأحدث رسالة بدل رفض الصف"""
+        changed = 0
+        for row in rows:
+            try:
+                changed += conn.execute(UPSERT_SQL, row).rowcount
+            except sqlite3.IntegrityError:
+                conn.execute(
+                    'DELETE FROM channel_index WHERE file_id = ? AND message_id != ?', (row[1], row[0])
+                )
+                try:
+                    changed += conn.execute(UPSERT_SQL, row).rowcount
+                except sqlite3.IntegrityError as e:
+                    self.stats['errors'] += 1
+                    LOGGER(__name__).warning(f"⚠️ تعذرت فهرسة الرسالة {row[0]}: {e}")
+        return changed
+
+    async def _latest_message_id(self, client) -> int:
+        """آخر رسالة في القناة (0 إذا تعذر: حسابات البوت لا تقرأ السجل)"""
+        try:
+            messages = await client.get_messages(self.channel, limit=1)
+        except Exception as e:
+            LOGGER(__name__).debug(f"تعذر معرفة آخر رسالة في قناة التخزين: {e}")
+            return 0
+        return messages[0].id if messages else 0
+
+    @property
+    def _backfill_running(self) -> bool:
+        return self._backfill_task is not None and not self._backfill_task.done()
+
+    async def _on_new_message(self, event):
+        try:
+            message = event.message
+            self._top_seen = max(self._top_seen, message.id)
+            # رسالة متصلة بالعلامة المائية تدفعها مباشرة، والفجوة تُملأ بالتعبئة
+            contiguous = message.id == self._high_water + 1 and not self._backfill_running
+            await self.index_messages([message], high_water=message.id if contiguous else None)
+            self.stats['live_indexed'] += 1
+            if not contiguous and message.id > self._high_water:
+                self.start_backfill()
+        except Exception as e:
+            self.stats['errors'] += 1
+            LOGGER(__name__).warning(f"⚠️ خطأ في فهرسة رسالة قناة التخزين: {e}")
+
+    async def _on_edited(self, event):
+        try:
+            await self.index_messages([event.message])
+            self.stats['edited'] += 1
+        except Exception as e:
+            self.stats['errors'] += 1
+            LOGGER(__name__).warning(f"⚠️ خطأ في تحديث فهرس رسالة معدلة: {e}")
+
+    async def _on_deleted(self, event):
+        try:
+            ids = [(message_id,) for message_id in event.deleted_ids]
+
+            def _delete(conn):
+                conn.executemany('DELETE FROM channel_index WHERE message_id = ?', ids)
+                conn.commit()
+
+            await self.pool.run_write(_delete)
+            self.stats['deleted'] += len(ids)
+        except Exception as e:
+            self.stats['errors'] += 1
+            LOGGER(__name__).warning(f"⚠️ خطأ في حذف رسائل من الفهرس: {e}")
+
+    # ========================================
+    # التعبئة الخلفية
+    # ========================================
+
+    def start_backfill(self) -> Optional[asyncio.Task]:
+        """تشغيل التعبئة إن لم تكن جارية (تعيد المهمة الجارية)"""
+        if self._client is None:
+            return None
+        if not self._backfill_running:
+            self._backfill_task = asyncio.create_task(self._backfill())
+        return self._backfill_task
+
+    async def backfill(self, client=None, from_start: bool = False) -> Dict[str, Any]:
+        """
+        تعبئة الفهرس من العلامة المائية حتى آخر رسالة
+        from_start: إعادة بناء كاملة من أول القناة (تبقى قابلة للاستئناف)
+        """
+        if client is not None:
+            self._client = client
+        if self._client is None or not self.channel:
+            return {'error': 'قناة التخزين غير محددة'}
+        await self._ensure_ready()
+
+        if from_start:
+            if self._backfill_running:
+                self._backfill_task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await self._backfill_task
+            await self.index_messages([], high_water=0)
+
+        return await asyncio.shield(self.start_backfill())
+
+    async def _backfill(self) -> Dict[str, Any]:
+        started = time.time()
+        self.stats['backfill_runs'] += 1
+        summary = {'processed': 0, 'added': 0, 'updated': 0, 'errors': 0, 'new_messages': 0}
+        errors_before = self.stats['errors']
+        delay = BACKFILL_BATCH_SIZE / max(1, BACKFILL_RATE)
+        position = self._high_water
+        empty_batches = 0
+        self._top_seen = max(self._top_seen, await self._latest_message_id(self._client))
+
+        LOGGER(__name__).info(f"🔄 بدء تعبئة فهرس قناة التخزين من الرسالة {position + 1}")
+        while True:
+            ids = list(range(position + 1, position + 1 + BACKFILL_BATCH_SIZE))
+            try:
+                messages = await self._client.get_messages(self.channel, ids=ids)
+            except FloodWaitError as e:
+                self.stats['flood_waits'] += 1
+                LOGGER(__name__).warning(f"⏳ FloodWait أثناء تعبئة الفهرس: {e.seconds}s")
+                await asyncio.sleep(e.seconds + 1)
+                continue
+            except Exception as e:
+                self.stats['errors'] += 1
+                LOGGER(__name__).error(f"❌ خطأ في جلب رسائل قناة التخزين: {e}")
+                break
+
+            found = [message for message in messages if message]
+            self.stats['backfill_scanned'] += len(ids)
+            empty_batches = 0 if found else empty_batches + 1
+
+            # لا تتجاوز العلامة آخر رسالة معروفة حتى لا تُفوَّت رسائل لم تُنشر بعد
+            last_found = max((message.id for message in found), default=0)
+            high_water = max(self._high_water, last_found, min(self._top_seen, ids[-1]))
+
+            result = await self.index_messages(found, high_water=high_water)
+            for key in ('processed', 'added', 'updated'):
+                summary[key] += result[key]
+            summary['new_messages'] += result['added']
+            self.stats['backfill_indexed'] += result['processed']
+
+            position = ids[-1]
+            reached_top = self._top_seen and position >= self._top_seen
+            if reached_top or empty_batches >= BACKFILL_EMPTY_BATCHES:
+                break
+            await asyncio.sleep(delay)
+
+        summary['errors'] = self.stats['errors'] - errors_before
+        summary['duration'] = time.time() - started
+        summary['high_water'] = self._high_water
+        LOGGER(__name__).info(
+            f"✅ اكتملت تعبئة فهرس قناة التخزين: "
+            f"معالج={summary['processed']} | جديد={summary['added']} | "
+            f"محدث={summary['updated']} | آخر رسالة={self._high_water} | "
+            f"مدة={summary['duration']:.2f}s"
+        )
+        return summary
+
+    # ========================================
+    # ترحيل الرسائل القديمة إلى الغلاف الآلي
+    # ========================================
+
+    async def migrate_captions(self, client=None) -> Dict[str, Any]:
+        """
+        إضافة الغلاف لرسائل القناة القديمة بتعديل نصها (رسائل البوت فقط)
+        يُحفظ موضع الترحيل بعد كل دفعة فيُستأنف من حيث توقف
+        """
+        client = client or self._client
+        if client is None or not self.channel:
+            return {'error': 'قناة التخزين غير محددة'}
+        await self._ensure_ready()
+
+        state_key = f"{self.state_key}:migration"
+
+        def _load(conn):
+            row = conn.execute('SELECT high_water FROM channel_index_state WHERE channel = ?', (state_key,)).fetchone()
+            if row is None:
+                conn.execute('INSERT INTO channel_index_state (channel, high_water) VALUES (?, 0)', (state_key,))
+                conn.commit()
+            return row[0] if row else 0
+
+        def _save(conn, position):
+            conn.execute(
+                'UPDATE channel_index_state SET high_water = ?, updated_at = CURRENT_TIMESTAMP WHERE channel = ?',
+                (position, state_key)
+            )
+            conn.commit()
+
+        started = time.time()
+        summary = {'scanned': 0, 'migrated': 0, 'skipped': 0, 'failed': 0}
+        position = await self.pool.run_write(_load)
+        self._top_seen = max(self._top_seen, await self._latest_message_id(client))
+        last_position = max(self._high_water, self._top_seen)
+        delay = BACKFILL_BATCH_SIZE / max(1, BACKFILL_RATE)
+        empty_batches = 0
+
+        LOGGER(__name__).info(f"🔁 بدء ترحيل نصوص قناة التخزين من الرسالة {position + 1}")
+        while position < last_position or empty_batches < BACKFILL_EMPTY_BATCHES:
+            ids = list(range(position + 1, position + 1 + BACKFILL_BATCH_SIZE))
+            try:
+                messages = await client.get_messages(self.channel, ids=ids)
+            except FloodWaitError as e:
+                self.stats['flood_waits'] += 1
+                await asyncio.sleep(e.seconds + 1)
+                continue
+
+            found = [message for message in messages if message and message.file]
+            empty_batches = 0 if found else empty_batches + 1
+            for message in found:
+                summary['scanned'] += 1
+                if parse_cache_envelope(message.raw_text) is not None:
+                    summary['skipped'] += 1
+                    continue
+                row = self._row(message)
+                meta = parse_cache_caption(message.text or '')
+                envelope = build_cache_envelope(
+                    meta.get('video_id', ''), row[9], row[3], row[7], row[8], row[6]
+                )
+                while True:
+                    try:
+                        await client.edit_message(self.channel, message.id, attach_envelope(message.text or '', envelope))
+                        summary['migrated'] += 1
+                        break
+                    except FloodWaitError as e:
+                        self.stats['flood_waits'] += 1
+                        await asyncio.sleep(e.seconds + 1)
+                    except Exception as e:
+                        summary['failed'] += 1
+                        LOGGER(__name__).warning(f"⚠️ تعذر ترحيل الرسالة {message.id}: {e}")
+                        break
+
+            position = ids[-1]
+            await self.pool.run_write(_save, position)
+            await asyncio.sleep(delay)
+
+        summary['position'] = position
+        summary['duration'] = time.time() - started
+        LOGGER(__name__).info(
+            f"✅ اكتمل ترحيل نصوص قناة التخزين: مُرحّل={summary['migrated']} | "
+            f"موجود={summary['skipped']} | فشل={summary['failed']}"
+        )
+        return summary
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'high_water': self._high_water,
+            'top_seen': self._top_seen,
+            'backfill_running': self._backfill_running
+        }
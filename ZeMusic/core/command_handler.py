@@ -4,12 +4,12 @@ from typing import Dict, Any, Callable, Optional
 
 import config
 from ZeMusic.logging import LOGGER
-from ZeMusic.core.telethon_client import telethon_manager
+from ZeMusic.core.command_router import CommandRouter, lazy_handler
+from ZeMusic.core.membership_cache import membership_cache
 from ZeMusic.plugins.bot.basic_commands import command_handler as basic_commands
 from ZeMusic.plugins.owner.admin_panel import admin_panel
 from ZeMusic.plugins.owner.stats_handler import stats_handler
 from ZeMusic.plugins.owner.broadcast_handler import broadcast_handler
-from ZeMusic.plugins.owner.owner_panel import owner_panel
 
 # فئات مشتركة لتجنب التكرار
 class MockChat:
@@ -43,6 +43,20 @@ class MockMessage:
         if reply_to_msg_id:
             self.reply_to_message = MockMessage(event)
 
+class MockUpdate:
+    def __init__(self, event):
+        self.message = MockMessage(event)
+        self.effective_chat = MockChat(event.chat_id)
+        self.effective_user = MockUser(event.sender_id)
+        self.effective_message = self.message
+        self.sender_id = event.sender_id
+        self.chat_id = event.chat_id
+        self.event = event
+        
+    async def reply(self, text, **kwargs):
+        """إضافة دالة reply للتوافق"""
+        return await self.event.reply(text, **kwargs)
+
 class MockCallback:
     def __init__(self, event):
         self.data = event.data.decode('utf-8') if isinstance(event.data, bytes) else str(event.data)
@@ -57,6 +71,8 @@ class TelethonCommandHandler:
         self.commands = {}
         self.callback_handlers = {}
         self.message_handlers = {}
+        # يوزر البوت يُضبط من get_me بعد تشغيل البوت
+        self.router = CommandRouter()
         self.setup_handlers()
     
     def setup_handlers(self):
@@ -77,6 +93,29 @@ class TelethonCommandHandler:
             '/admin': self.handle_admin,
         }
         
+        # /start و /help من إضافات البوت (تُسجل أولاً فتأخذ الأولوية على المعالجات المحلية)
+        self.router.add(['start'], lazy_handler('ZeMusic.plugins.bot.telethon_start', 'handle_start_command'))
+        help_handler = lazy_handler('ZeMusic.plugins.bot.telethon_help', 'handle_help_command')
+        self.router.add(['help', 'مساعده'], help_handler, name='help')
+        self.router.add(['المساعده'], help_handler, name='help', slash=False, bare=True)
+        
+        # أوامر البوت الأساسية (تستقبل التحديث المتوافق)
+        for command, handler in self.commands.items():
+            self.router.add([command], handler, pass_event=False)
+        
+        # أوامر التشغيل المباشرة: "شغل اسم الأغنية" أو "/vplay اسم الأغنية"
+        self.router.add(
+            ['play', 'تشغيل', 'شغل', 'vplay', 'cplay'], self._handle_play_trigger,
+            name='play', bare=True, pass_event=False, with_query=True
+        )
+        
+        # كلمات تدل على استخدام البوت في المجموعات (لقواعد الاشتراك الإجباري)
+        self.router.set_keywords([
+            'شغل', 'تشغيل', 'play', 'ايقاف', 'وقف', 'stop', 'pause', 'resume',
+            'تخطي', 'skip', 'next', 'تالي', 'قائمة', 'queue', 'موسيقى', 'music',
+            'صوت', 'audio', 'video', 'فيديو', 'بحث', 'search'
+        ])
+        
         # تسجيل معالجات الcallbacks
         self.callback_handlers = {
             'admin_': self.handle_admin_callback,
@@ -94,8 +133,8 @@ class TelethonCommandHandler:
             sender_id = event.sender_id
             message_id = message.id
             
-            # تحويل للتنسيق المتوافق
-            mock_update = self._create_mock_update_from_telethon(event)
+            # تصنيف الرسالة مرة واحدة (المسار المطابق أو None)
+            matched = self.router.classify(text)
             
             # فحص الاشتراك الإجباري
             should_check_subscription = False
@@ -117,21 +156,25 @@ class TelethonCommandHandler:
                 is_bot_mention = f"@{config.BOT_USERNAME}" in text if config.BOT_USERNAME else False
                 is_reply_to_bot = message.reply_to_msg_id and hasattr(message.reply_to, 'sender_id') and message.reply_to.sender_id == int(config.BOT_ID)
                 
-                bot_keywords = [
-                    'شغل', 'تشغيل', 'play', 'ايقاف', 'وقف', 'stop', 'pause', 'resume',
-                    'تخطي', 'skip', 'next', 'تالي', 'قائمة', 'queue', 'موسيقى', 'music',
-                    'صوت', 'audio', 'video', 'فيديو', 'بحث', 'search'
-                ]
-                is_using_bot_keywords = any(keyword in text.lower() for keyword in bot_keywords)
-                
-                should_check_subscription = is_bot_command or is_bot_mention or is_reply_to_bot or is_using_bot_keywords
+                should_check_subscription = (
+                    is_bot_command or is_bot_mention or is_reply_to_bot or
+                    matched is not None or self.router.has_keyword(text)
+                )
+            
+            # التحديث المتوافق يُنشأ فقط عند الحاجة إليه
+            mock_update = None
+            
+            def make_update():
+                nonlocal mock_update
+                if mock_update is None:
+                    mock_update = self._create_mock_update_from_telethon(event)
+                return mock_update
             
             # فحص الاشتراك إذا لزم الأمر
             if should_check_subscription and config.FORCE_SUB_CHANNEL:
-                from ZeMusic.core.database import db
                 is_subscribed = await self._check_subscription(sender_id, config.FORCE_SUB_CHANNEL)
                 if not is_subscribed:
-                    await self._send_subscription_message(mock_update)
+                    await self._send_subscription_message(make_update())
                     return
             
             # إضافة المستخدم والمحادثة لقاعدة البيانات
@@ -139,48 +182,31 @@ class TelethonCommandHandler:
             await db.add_user(sender_id)
             await db.add_chat(chat_id)
             
-            # معالجة الأوامر
-            if text.startswith('/'):
-                command = text.split()[0].lower()
-                if command in self.commands:
-                    await self.commands[command](mock_update)
-                    return
-            
-            # معالجة أوامر التشغيل المباشرة
-            play_commands = ['play', 'تشغيل', 'شغل', 'vplay', 'cplay']
-            first_word = text.split()[0].lower() if text.split() else ""
-            
-            if any(cmd in first_word for cmd in play_commands) or text.startswith('/play') or text.startswith('/تشغيل') or text.startswith('/شغل'):
-                try:
-                    # استخراج الاستعلام
-                    if text.startswith('/'):
-                        parts = text.split(None, 1)
-                        query = parts[1] if len(parts) > 1 else ""
-                    else:
-                        # إزالة كلمة الأمر والحصول على الاستعلام
-                        parts = text.split(None, 1)
-                        query = parts[1] if len(parts) > 1 else ""
-                    
-                    if query.strip():
-                        LOGGER(__name__).info(f"🎵 معالجة أمر تشغيل: {query}")
-                        from ZeMusic.plugins.play.download import download_song_smart
-                        await download_song_smart(mock_update, query)
-                        return
-                    else:
-                        await event.respond("❌ يرجى كتابة اسم الأغنية بعد الأمر")
-                        return
-                        
-                except Exception as e:
-                    LOGGER(__name__).error(f"❌ خطأ في معالجة أمر التشغيل: {e}")
-                    await event.respond("❌ حدث خطأ في معالجة طلبك")
-                    return
+            # توجيه الأمر لمعالج واحد فقط
+            if matched is not None:
+                await self.router.dispatch(matched, event, make_update)
+                return
             
             # معالجة الرسائل العادية
-            await self._handle_normal_message(mock_update)
+            await self._handle_normal_message(make_update())
             
         except Exception as e:
             LOGGER(__name__).error(f"خطأ في معالج الرسائل: {e}")
     
+    async def _handle_play_trigger(self, update, query: str):
+        """أوامر التشغيل المباشرة: تحميل الأغنية المطلوبة"""
+        try:
+            if query:
+                LOGGER(__name__).info(f"🎵 معالجة أمر تشغيل: {query}")
+                from ZeMusic.plugins.play.download import download_song_smart
+                await download_song_smart(update, query)
+            else:
+                await update.event.respond("❌ يرجى كتابة اسم الأغنية بعد الأمر")
+                
+        except Exception as e:
+            LOGGER(__name__).error(f"❌ خطأ في معالجة أمر التشغيل: {e}")
+            await update.event.respond("❌ حدث خطأ في معالجة طلبك")
+    
     async def handle_callback_query(self, event):
         """معالج الاستعلامات المضمنة من Telethon"""
         try:
@@ -210,22 +236,7 @@ class TelethonCommandHandler:
     
     def _create_mock_update_from_telethon(self, event):
         """تحويل حدث Telethon إلى تنسيق متوافق"""
-        class MockUpdate:
-            def __init__(self, event):
-                self.message = MockMessage(event)
-                self.effective_chat = MockChat(event.chat_id)
-                self.effective_user = MockUser(event.sender_id)
-                self.effective_message = self.message
-                self.sender_id = event.sender_id
-                self.chat_id = event.chat_id
-                self.event = event
-                
-            async def reply(self, text, **kwargs):
-                """إضافة دالة reply للتوافق"""
-                return await self.event.reply(text, **kwargs)
-        
         # استخدام الفئات المشتركة المعرفة أعلاه
-        
         return MockUpdate(event)
     
     def _create_mock_callback_from_telethon(self, event):
@@ -235,25 +246,9 @@ class TelethonCommandHandler:
         return MockCallback(event)
     
     async def _check_subscription(self, user_id: int, channel: str) -> bool:
-        """فحص اشتراك المستخدم في القناة"""
+        """فحص اشتراك المستخدم في القناة (عبر كاش العضوية المشترك)"""
         try:
-            if not telethon_manager.bot_client:
-                return True
-            
-            # محاولة الحصول على عضوية المستخدم
-            try:
-                member = await telethon_manager.bot_client.get_entity(user_id)
-                if member:
-                    # فحص العضوية في القناة
-                    try:
-                        participants = await telethon_manager.bot_client.get_participants(channel, limit=1, search=str(user_id))
-                        return len(participants) > 0
-                    except:
-                        return True  # في حالة الخطأ، نسمح بالوصول
-                return False
-            except:
-                return True
-                
+            return await membership_cache.is_member(channel, user_id)
         except Exception as e:
             LOGGER(__name__).error(f"خطأ في فحص الاشتراك: {e}")
             return True
@@ -432,6 +427,8 @@ class TelethonCommandHandler:
     async def handle_owner(self, update):
         """معالج أمر /owner"""
         try:
+            # لوحة المالك (3 آلاف سطر) تُستورد عند أول استخدام
+            from ZeMusic.plugins.owner.owner_panel import owner_panel
             await owner_panel.handle_owner_command(update)
         except Exception as e:
             LOGGER(__name__).error(f"خطأ في معالج /owner: {e}")
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+موجّه الأوامر المُجمّع
+شجرة بادئات (Trie) لكل مشغلات الأوامر العربية والإنجليزية تُصنّف الرسالة مرة واحدة
+وتوجهها لمعالج واحد فقط، بدلاً من فحص قوائم الكلمات وتشغيل عدة معالجات regex لكل رسالة
+"""
+
+import re
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Pattern, Tuple
+
+# علامة نهاية المشغل داخل عقد الشجرة (لا تتعارض مع أي حرف)
+_END = None
+
+# محارف تفصل المشغل عن بقية الرسالة
+_BOUNDARY = frozenset(' \t\n@')
+
+def lazy_handler(module: str, attribute: str) -> Callable[..., Awaitable[Any]]:
+    """معالج يستورد وحدته عند أول استدعاء (عبر سجل الإضافات الكسولة)"""
+    from ZeMusic.core.lazy_plugins import plugin_registry
+    return plugin_registry.handler(module, attribute)
+
+class Route:
+    """مسار أمر: المعالج وطريقة استدعائه"""
+    __slots__ = ('name', 'handler', 'pass_event', 'with_query', 'pattern')
+
+    def __init__(self, name: str, handler: Callable[..., Awaitable[Any]], pass_event: bool = True,
+                 with_query: bool = False, pattern: Optional[Pattern] = None):
+        self.name = name
+        self.handler = handler
+        # True: المعالج يستقبل حدث Telethon، False: يستقبل التحديث المتوافق
+        self.pass_event = pass_event
+        # تمرير نص الاستعلام بعد المشغل كمعامل ثانٍ
+        self.with_query = with_query
+        # نمط يُطبق على المسار المختار فقط لتعبئة event.pattern_match للمعالجات القديمة
+        self.pattern = pattern
+
+class TriggerTrie:
+    """شجرة بادئات: أطول مشغل يطابق بداية النص وينتهي عند حد كلمة"""
+
+    def __init__(self):
+        self._root: Dict = {}
+        self.max_length = 0
+
+    def insert(self, trigger: str, value: Any) -> bool:
+        """إضافة مشغل (المشغل المسجل أولاً له الأولوية)"""
+        node = self._root
+        for char in trigger:
+            node = node.setdefault(char, {})
+        if _END in node:
+            return False
+        node[_END] = value
+        self.max_length = max(self.max_length, len(trigger))
+        return True
+
+    def longest_prefix(self, text: str, start: int = 0) -> Tuple[Any, int]:
+        """(القيمة، موضع نهاية المشغل) أو (None, -1)"""
+        node = self._root
+        found, found_end = None, -1
+        end = min(len(text), start + self.max_length)
+        index = start
+        while index < end:
+            node = node.get(text[index])
+            if node is None:
+                break
+            index += 1
+            if _END in node and (index == len(text) or text[index] in _BOUNDARY):
+                found, found_end = node[_END], index
+        return found, found_end
+
+    def __len__(self) -> int:
+        count, stack = 0, [self._root]
+        while stack:
+            node = stack.pop()
+            count += _END in node
+            stack.extend(child for key, child in node.items() if key is not _END)
+        return count
+
+class RouteMatch:
+    __slots__ = ('route', 'trigger', 'query', 'pattern_match')
+
+    def __init__(self, route: Route, trigger: str, query: str, pattern_match=None):
+        self.route = route
+        self.trigger = trigger
+        self.query = query
+        self.pattern_match = pattern_match
+
+class CommandRouter:
+    """تصنيف الرسالة مرة واحدة وتوجيهها لمعالج واحد"""
+
+    def __init__(self, bot_username: Optional[str] = None):
+        self.set_bot_username(bot_username)
+        self._slash = TriggerTrie()
+        self._bare = TriggerTrie()
+        self._keywords: Optional[Pattern] = None
+        self.stats = {
+            'classified': 0,
+            'routed': 0
+        }
+
+    def add(self, triggers: Iterable[str], handler: Callable[..., Awaitable[Any]], *, name: str = None,
+            slash: bool = True, bare: bool = False, pass_event: bool = True,
+            with_query: bool = False, pattern: Optional[str] = None) -> Route:
+        """
+        تسجيل مسار لعدة مشغلات
+        slash: يطابق "/trigger" ، bare: يطابق "trigger" بدون شرطة
+        """
+        triggers = [trigger.lstrip('/').lower() for trigger in triggers]
+        route = Route(name or triggers[0], handler, pass_event, with_query,
+                      re.compile(pattern) if pattern else None)
+        for trigger in triggers:
+            if slash:
+                self._slash.insert(trigger, route)
+            if bare:
+                self._bare.insert(trigger, route)
+        return route
+
+    def set_bot_username(self, bot_username: Optional[str]):
+        """يوزر البوت لتمييز /command@username (فارغ = غير معروف فلا يُرفض أي أمر)"""
+        self.bot_username = (bot_username or '').lstrip('@').lower()
+
+    def set_keywords(self, keywords: Iterable[str]):
+        """كلمات تدل على استخدام البوت (لقواعد الاشتراك الإجباري) في نمط واحد مجمّع"""
+        ordered = sorted({keyword.lower() for keyword in keywords}, key=len, reverse=True)
+        self._keywords = re.compile('|'.join(map(re.escape, ordered)), re.IGNORECASE) if ordered else None
+
+    def has_keyword(self, text: str) -> bool:
+        """هل يحتوي النص على أي كلمة من كلمات البوت (مسح واحد)"""
+        return bool(text and self._keywords and self._keywords.search(text))
+
+    def classify(self, text: str) -> Optional[RouteMatch]:
+        """تصنيف الرسالة: المسار المطابق مع نص الاستعلام أو None"""
+        self.stats['classified'] += 1
+        if not text:
+            return None
+
+        slash = text[0] == '/'
+        trie = self._slash if slash else self._bare
+        start = 1 if slash else 0
+        head = text[:start + trie.max_length + 1].lower()
+        route, end = trie.longest_prefix(head, start)
+        if route is None:
+            return None
+        trigger = head[start:end]
+
+        # /command@username: تجاهل الأوامر الموجهة لبوت آخر (إذا عُرف يوزر البوت)
+        if end < len(text) and text[end] == '@':
+            mention_end = end + 1
+            while mention_end < len(text) and text[mention_end] not in _BOUNDARY:
+                mention_end += 1
+            if slash and self.bot_username and text[end + 1:mention_end].lower() != self.bot_username:
+                return None
+            end = mention_end
+
+        pattern_match = None
+        if route.pattern is not None:
+            pattern_match = route.pattern.match(text)
+            if pattern_match is None:
+                return None
+
+        return RouteMatch(route, trigger, text[end:].strip(), pattern_match)
+
+    async def dispatch(self, matched: RouteMatch, event, make_update: Callable[[], Any]) -> Any:
+        """استدعاء معالج المسار المطابق"""
+        route = matched.route
+        self.stats['routed'] += 1
+        if route.pass_event:
+            if route.pattern is not None:
+                event.pattern_match = matched.pattern_match
+            target = event
+        else:
+            target = make_update()
+        if route.with_query:
+            return await route.handler(target, matched.query)
+        return await route.handler(target)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'slash_triggers': len(self._slash),
+            'bare_triggers': len(self._bare)
+        }
@@ -1,7 +1,11 @@
 # -*- coding: utf-8 -*-
 """
 مدير ملفات Cookies الذكي
-نظام متطور لإدارة ملفات cookies مع التدوير والكشف عن المحظورة
+مجمع موحد لملفات cookies يستخدمه Youtube.py و download.py:
+- تسليم فوري للـ cookie الأعلى صحة (نسبة النجاح، الإخفاقات الحديثة، الاستخدام الجاري)
+- فترات تبريد متصاعدة بعد الإخفاقات المتتالية وتبريد طويل عند الحظر
+- حد للاستخدامات المتزامنة لكل cookie (الحجز يُحرر عند تسجيل النتيجة أو بعد مهلة)
+- حفظ الحالة مؤجل ومجمّع بدل إعادة كتابة cookies_status.json عند كل تقرير
 """
 
 import os
@@ -11,96 +15,169 @@ import random
 import asyncio
 from pathlib import Path
 from typing import List, Optional, Dict, Any
-from itertools import cycle
 import aiofiles
 
+import config
 from ZeMusic.logging import LOGGER
 
+# كلمات تدل على حظر الـ cookie أو انتهاء صلاحيته (تبريد طويل مباشرة)
+BLOCKED_KEYWORDS = (
+    '403', '401', 'forbidden', 'unauthorized', 'blocked', 'banned',
+    'rate limit', 'too many requests', 'quota exceeded',
+    'sign in', 'login required', 'captcha', 'expired'
+)
+
+# الحجز الذي لم تُسجل نتيجته يُعتبر منتهياً بعد هذه المدة (ثوان)
+LEASE_TIMEOUT = 300
+
+# نصف عمر أثر الإخفاقات الحديثة على الصحة (ثوان)
+FAILURE_HALF_LIFE = 600
+
 class CookiesManager:
-    """مدير ملفات cookies ذكي مع نظام تدوير وإدارة الحظر"""
-    
-    def __init__(self, cookies_dir: str = "cookies"):
+    """مجمع cookies بتقييم صحة فوري وحدود تزامن وحفظ مؤجل"""
+
+    def __init__(self, cookies_dir: str = "cookies", max_concurrency: int = 3,
+                 cooldown: int = 60, save_delay: float = 10.0):
         self.cookies_dir = Path(cookies_dir)
         self.cookies_dir.mkdir(exist_ok=True)
-        
+
         # ملف لحفظ حالة الcookies
         self.status_file = self.cookies_dir / "cookies_status.json"
-        
+
         # إعدادات افتراضية
-        self.max_failures = 3  # عدد المحاولات قبل تعطيل cookie
-        self.retry_timeout = 3600  # وقت انتظار قبل إعادة تجربة cookie محظور (ساعة)
-        self.rotation_delay = 2  # تأخير بين التبديل (ثانية)
-        
-        # حالة الcookies
+        self.max_failures = 3  # الإخفاقات المتتالية قبل بدء التبريد
+        self.retry_timeout = 3600  # أقصى تبريد (ومدة تبريد الـ cookie المحظور)
+        self.cooldown = cooldown  # أول فترة تبريد، تتضاعف مع كل إخفاق إضافي
+        self.max_concurrency = max(1, max_concurrency)  # استخدامات متزامنة لكل cookie
+        self.save_delay = save_delay  # تأجيل الحفظ لتجميع التغييرات
+
+        # حالة الcookies (تُحفظ)
         self.cookies_status: Dict[str, Dict] = {}
-        self.available_cookies: List[str] = []
-        self.current_index = 0
-        
+        # أزمنة بدء الاستخدامات الجارية لكل cookie (لا تُحفظ)
+        self._leases: Dict[str, List[float]] = {}
+        self._ready = False
+
+        self._dirty = False
+        self._save_handle: Optional[asyncio.TimerHandle] = None
+        self._save_lock: Optional[asyncio.Lock] = None
+
         # إحصائيات
         self.usage_stats = {
             'total_requests': 0,
             'successful_requests': 0,
             'failed_requests': 0,
             'cookies_blocked': 0,
-            'cookies_recovered': 0
+            'cookies_recovered': 0,
+            'saturated': 0,
+            'saves': 0
         }
-        
+
         LOGGER(__name__).info("🍪 تم تهيئة مدير Cookies الذكي")
-    
+
     async def initialize(self):
         """تهيئة المدير وتحميل حالة الcookies"""
         await self._load_cookies_status()
         await self._scan_cookies_files()
         await self._update_available_cookies()
-        
+        self._ready = True
+
         LOGGER(__name__).info(f"📋 تم العثور على {len(self.available_cookies)} ملف cookies صالح")
-    
+
+    def _ensure_ready(self):
+        """تحميل الحالة وفحص المجلد عند أول استخدام إذا لم تُستدع initialize"""
+        if self._ready:
+            return
+        self._ready = True
+        try:
+            if self.status_file.exists():
+                self._apply_status(json.loads(self.status_file.read_text(encoding='utf-8')))
+        except Exception as e:
+            LOGGER(__name__).warning(f"⚠️ فشل تحميل حالة cookies: {e}")
+        self._scan()
+
+    # ---------- التخزين ----------
+
+    def _apply_status(self, data: Dict[str, Any]):
+        self.cookies_status = data.get('cookies_status', {})
+        self.usage_stats.update(data.get('usage_stats', {}))
+
     async def _load_cookies_status(self):
         """تحميل حالة الcookies من الملف"""
         try:
             if self.status_file.exists():
                 async with aiofiles.open(self.status_file, 'r', encoding='utf-8') as f:
                     content = await f.read()
-                    data = json.loads(content)
-                    self.cookies_status = data.get('cookies_status', {})
-                    self.usage_stats = data.get('usage_stats', self.usage_stats)
+                    self._apply_status(json.loads(content))
         except Exception as e:
             LOGGER(__name__).warning(f"⚠️ فشل تحميل حالة cookies: {e}")
             self.cookies_status = {}
-    
+
     async def _save_cookies_status(self):
-        """حفظ حالة الcookies في الملف"""
+        """حفظ حالة الcookies في الملف (كتابة إلى ملف مؤقت ثم استبدال)"""
+        if self._save_lock is None:
+            self._save_lock = asyncio.Lock()
+        async with self._save_lock:
+            self._dirty = False
+            try:
+                self.usage_stats['saves'] += 1
+                data = {
+                    'cookies_status': self.cookies_status,
+                    'usage_stats': self.usage_stats,
+                    'last_updated': int(time.time())
+                }
+                content = json.dumps(data, indent=2, ensure_ascii=False)
+
+                temp_file = self.status_file.with_suffix('.tmp')
+                async with aiofiles.open(temp_file, 'w', encoding='utf-8') as f:
+                    await f.write(content)
+                os.replace(temp_file, self.status_file)
+            except Exception as e:
+                self._dirty = True
+                LOGGER(__name__).error(f"❌ فشل حفظ حالة cookies: {e}")
+
+    def _mark_dirty(self):
+        """جدولة حفظ مؤجل (التغييرات خلال المهلة تُكتب مرة واحدة)"""
+        self._dirty = True
+        if self._save_handle is not None:
+            return
         try:
-            data = {
-                'cookies_status': self.cookies_status,
-                'usage_stats': self.usage_stats,
-                'last_updated': int(time.time())
-            }
-            
-            async with aiofiles.open(self.status_file, 'w', encoding='utf-8') as f:
-                await f.write(json.dumps(data, indent=2, ensure_ascii=False))
-        except Exception as e:
-            LOGGER(__name__).error(f"❌ فشل حفظ حالة cookies: {e}")
-    
-    async def _scan_cookies_files(self):
-        """فحص ملفات cookies في المجلد مع دعم الإضافة والحذف الديناميكي"""
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # خارج حلقة الأحداث (خيط yt-dlp مثلاً): يُحفظ مع أول تغيير داخلها أو عند flush
+            return
+        self._save_handle = loop.call_later(self.save_delay, lambda: asyncio.ensure_future(self.flush()))
+
+    async def flush(self):
+        """كتابة الحالة إذا تغيرت منذ آخر حفظ"""
+        self._save_handle = None
+        if self._dirty:
+            await self._save_cookies_status()
+
+    async def close(self):
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+        await self.flush()
+
+    # ---------- الملفات ----------
+
+    def _scan(self) -> Dict[str, List[str]]:
         current_files = set()
         new_files = []
-        
+
         # فحص جميع ملفات .txt في المجلد
         for file_path in self.cookies_dir.glob("*.txt"):
             if file_path.name.startswith('.'):
                 continue
-                
+
             try:
                 # التحقق من أن الملف ليس فارغاً
                 if file_path.stat().st_size == 0:
                     LOGGER(__name__).warning(f"🗑️ ملف cookies فارغ: {file_path.name}")
                     continue
-                
+
                 cookie_path = str(file_path)
                 current_files.add(cookie_path)
-                
+
                 # إنشاء حالة افتراضية إذا لم تكن موجودة (ملف جديد)
                 if cookie_path not in self.cookies_status:
                     self.cookies_status[cookie_path] = {
@@ -109,141 +186,203 @@ class CookiesManager:
                         'last_used': 0,
                         'last_failure': 0,
                         'success_count': 0,
+                        'failure_count': 0,
                         'total_requests': 0,
                         'blocked_until': 0,
                         'added_at': int(time.time())
                     }
                     new_files.append(file_path.name)
                     LOGGER(__name__).info(f"🆕 تم اكتشاف ملف cookies جديد: {file_path.name}")
-                    
+
             except Exception as e:
                 LOGGER(__name__).warning(f"⚠️ خطأ في فحص {file_path}: {e}")
-        
+
         # إزالة ملفات محذوفة من القائمة
         removed_files = []
         for cookie_path in list(self.cookies_status.keys()):
             if cookie_path not in current_files:
                 removed_files.append(Path(cookie_path).name)
                 del self.cookies_status[cookie_path]
+                self._leases.pop(cookie_path, None)
                 LOGGER(__name__).info(f"🗑️ تم حذف ملف cookies من النظام: {Path(cookie_path).name}")
-        
+
         # تقرير التغييرات
         if new_files:
             LOGGER(__name__).info(f"📁 تم إضافة {len(new_files)} ملف cookies جديد: {', '.join(new_files)}")
-        
+
         if removed_files:
             LOGGER(__name__).info(f"🗑️ تم إزالة {len(removed_files)} ملف cookies: {', '.join(removed_files)}")
-        
+
+        if new_files or removed_files:
+            self._mark_dirty()
+
         return {'added': new_files, 'removed': removed_files}
-    
+
+    async def _scan_cookies_files(self):
+        """فحص ملفات cookies في المجلد مع دعم الإضافة والحذف الديناميكي"""
+        return self._scan()
+
     async def _update_available_cookies(self):
-        """تحديث قائمة الcookies المتاحة"""
-        current_time = int(time.time())
-        self.available_cookies = []
-        
+        """إعادة تفعيل الcookies التي انتهى تبريدها"""
+        current_time = time.time()
+        for cookie_path, status in self.cookies_status.items():
+            if not status.get('active', True) and status.get('blocked_until', 0) <= current_time:
+                status['active'] = True
+                self.usage_stats['cookies_recovered'] += 1
+                self._mark_dirty()
+
+        LOGGER(__name__).debug(f"🔄 تحديث قائمة cookies: {len(self.available_cookies)} متاح")
+
+    # ---------- التقييم والاختيار ----------
+
+    @property
+    def available_cookies(self) -> List[str]:
+        """الcookies خارج فترة التبريد"""
+        current_time = time.time()
+        return [
+            cookie_path for cookie_path, status in self.cookies_status.items()
+            if status.get('blocked_until', 0) <= current_time
+        ]
+
+    def _active_leases(self, cookie_path: str, now: float) -> List[float]:
+        leases = self._leases.get(cookie_path)
+        if not leases:
+            return []
+        if leases[0] + LEASE_TIMEOUT <= now:
+            # حجوزات لم تُسجل نتيجتها (مسارات لا تبلغ عن النجاح أو الفشل)
+            leases[:] = [started for started in leases if started + LEASE_TIMEOUT > now]
+        return leases
+
+    def _score(self, cookie_path: str, status: Dict, current_time: float, now: float) -> float:
+        """صحة الcookie: نسبة النجاح (مع احتمال مسبق) مخفضة بالإخفاقات الحديثة والاستخدام الجاري"""
+        successes = status.get('success_count', 0)
+        failures = status.get('failure_count', 0)
+        ratio = (successes + 1) / (successes + failures + 2)
+
+        since_failure = max(0.0, current_time - status.get('last_failure', 0))
+        recent = status.get('failures', 0) * 0.5 ** (since_failure / FAILURE_HALF_LIFE)
+
+        load = len(self._active_leases(cookie_path, now))
+        return ratio / (1 + recent) / (1 + load)
+
+    def ranked(self) -> List[str]:
+        """الcookies المتاحة (خارج التبريد ودون حد التزامن) مرتبة من الأعلى صحة"""
+        self._ensure_ready()
+        current_time, now = time.time(), time.monotonic()
+        scored = []
         for cookie_path, status in self.cookies_status.items():
-            # التحقق من وجود الملف
-            if not os.path.exists(cookie_path):
-                continue
-            
-            # التحقق من عدم الحظر
             if status.get('blocked_until', 0) > current_time:
                 continue
-            
-            # التحقق من أن الcookie نشط
-            if not status.get('active', True):
+            if len(self._active_leases(cookie_path, now)) >= self.max_concurrency:
                 continue
-            
-            self.available_cookies.append(cookie_path)
-        
-        # ترتيب عشوائي لتوزيع الحمولة
-        random.shuffle(self.available_cookies)
-        
-        LOGGER(__name__).debug(f"🔄 تحديث قائمة cookies: {len(self.available_cookies)} متاح")
-    
-    async def get_next_cookie(self) -> Optional[str]:
-        """الحصول على ملف cookie التالي"""
-        if not self.available_cookies:
-            await self._update_available_cookies()
-            
-        if not self.available_cookies:
-            LOGGER(__name__).warning("⚠️ لا توجد ملفات cookies متاحة")
-            return None
-        
-        # التدوير مع تأخير خفيف
-        if len(self.available_cookies) > 1:
-            await asyncio.sleep(self.rotation_delay)
-        
-        # اختيار التالي في الدورة
-        cookie_path = self.available_cookies[self.current_index]
-        self.current_index = (self.current_index + 1) % len(self.available_cookies)
-        
-        # تحديث وقت الاستخدام
-        if cookie_path in self.cookies_status:
-            self.cookies_status[cookie_path]['last_used'] = int(time.time())
-            self.cookies_status[cookie_path]['total_requests'] += 1
-        
+            # فرق عشوائي صغير يوزع الحمل بين المتساوية
+            scored.append((self._score(cookie_path, status, current_time, now) + random.random() * 1e-3, cookie_path))
+        scored.sort(reverse=True)
+        return [cookie_path for _, cookie_path in scored]
+
+    def acquire(self, cookie_path: Optional[str] = None) -> Optional[str]:
+        """حجز cookie فوراً: الأعلى صحة، أو المحدد إذا مُرر (يُحرر بـ record أو release)"""
+        if cookie_path is None:
+            ranked = self.ranked()
+            if not ranked:
+                if self.available_cookies:
+                    self.usage_stats['saturated'] += 1
+                    LOGGER(__name__).debug("⏳ جميع cookies المتاحة بلغت حد الاستخدام المتزامن")
+                else:
+                    LOGGER(__name__).warning("⚠️ لا توجد ملفات cookies متاحة")
+                return None
+            cookie_path = ranked[0]
+
+        status = self.cookies_status.get(cookie_path)
+        if status is None:
+            return cookie_path
+
+        self._leases.setdefault(cookie_path, []).append(time.monotonic())
+        status['last_used'] = int(time.time())
+        status['total_requests'] = status.get('total_requests', 0) + 1
         self.usage_stats['total_requests'] += 1
-        
+        self._mark_dirty()
+
         LOGGER(__name__).debug(f"🍪 استخدام cookie: {Path(cookie_path).name}")
         return cookie_path
-    
-    async def report_success(self, cookie_path: str):
-        """تسجيل نجاح استخدام cookie"""
-        if cookie_path in self.cookies_status:
-            status = self.cookies_status[cookie_path]
-            status['success_count'] += 1
+
+    def release(self, cookie_path: str):
+        """تحرير حجز بدون تسجيل نتيجة"""
+        leases = self._leases.get(cookie_path)
+        if leases:
+            leases.pop(0)
+
+    def record(self, cookie_path: str, success: bool, error_message: str = ""):
+        """تسجيل نتيجة استخدام cookie وتحرير حجزه (بدون انتظار، الحفظ مؤجل)"""
+        self.release(cookie_path)
+        status = self.cookies_status.get(cookie_path)
+        if status is None:
+            return
+
+        current_time = time.time()
+        if success:
+            status['success_count'] = status.get('success_count', 0) + 1
             status['failures'] = 0  # إعادة تعيين عداد الفشل
-            
             self.usage_stats['successful_requests'] += 1
-            
+
             # إذا كان محظوراً وعمل الآن، أعده للقائمة
-            if status.get('blocked_until', 0) > int(time.time()):
+            if status.get('blocked_until', 0) > current_time:
                 status['blocked_until'] = 0
                 status['active'] = True
-                await self._update_available_cookies()
                 self.usage_stats['cookies_recovered'] += 1
                 LOGGER(__name__).info(f"✅ تم استرداد cookie: {Path(cookie_path).name}")
-        
-        await self._save_cookies_status()
-    
-    async def report_failure(self, cookie_path: str, error_message: str = ""):
-        """تسجيل فشل استخدام cookie"""
-        if cookie_path not in self.cookies_status:
+            self._mark_dirty()
             return
-        
-        status = self.cookies_status[cookie_path]
-        status['failures'] += 1
-        status['last_failure'] = int(time.time())
-        
+
+        status['failures'] = status.get('failures', 0) + 1
+        status['failure_count'] = status.get('failure_count', 0) + 1
+        status['last_failure'] = int(current_time)
         self.usage_stats['failed_requests'] += 1
-        
+
         # التحقق من نوع الخطأ
-        is_blocked = any(keyword in error_message.lower() for keyword in [
-            '403', '401', 'forbidden', 'unauthorized', 'blocked', 'banned',
-            'rate limit', 'too many requests', 'quota exceeded'
-        ])
-        
-        # إذا فشل كثيراً أو محظور، قم بتعطيله مؤقتاً
-        if status['failures'] >= self.max_failures or is_blocked:
-            status['blocked_until'] = int(time.time()) + self.retry_timeout
+        error = (error_message or "").lower()
+        is_blocked = any(keyword in error for keyword in BLOCKED_KEYWORDS)
+
+        if is_blocked:
+            cooldown = self.retry_timeout
+        elif status['failures'] >= self.max_failures:
+            # تبريد يتضاعف مع كل إخفاق متتالٍ بعد الحد
+            cooldown = min(self.retry_timeout, self.cooldown * 2 ** (status['failures'] - self.max_failures))
+        else:
+            cooldown = 0
+
+        if cooldown:
+            if status.get('blocked_until', 0) <= current_time:
+                self.usage_stats['cookies_blocked'] += 1
+            status['blocked_until'] = int(current_time + cooldown)
             status['active'] = False
-            await self._update_available_cookies()
-            
-            self.usage_stats['cookies_blocked'] += 1
-            
+
             LOGGER(__name__).warning(
                 f"🚫 تم حظر cookie مؤقتاً: {Path(cookie_path).name} "
-                f"(فشل {status['failures']} مرات)"
+                f"(فشل {status['failures']} مرات، تبريد {cooldown}s)"
             )
         else:
             LOGGER(__name__).debug(
                 f"⚠️ فشل cookie: {Path(cookie_path).name} "
                 f"({status['failures']}/{self.max_failures})"
             )
-        
-        await self._save_cookies_status()
-    
+
+        self._mark_dirty()
+
+    # ---------- الواجهة غير المتزامنة (التوافق) ----------
+
+    async def get_next_cookie(self) -> Optional[str]:
+        """الحصول على ملف cookie الأعلى صحة (فوري)"""
+        return self.acquire()
+
+    async def report_success(self, cookie_path: str):
+        """تسجيل نجاح استخدام cookie"""
+        self.record(cookie_path, True)
+
+    async def report_failure(self, cookie_path: str, error_message: str = ""):
+        """تسجيل فشل استخدام cookie"""
+        self.record(cookie_path, False, error_message)
+
     async def remove_invalid_cookie(self, cookie_path: str, reason: str = "غير صالح"):
         """إزالة cookie غير صالح نهائياً"""
         try:
@@ -251,39 +390,38 @@ class CookiesManager:
                 # نقل إلى مجلد احتياطي بدلاً من الحذف
                 backup_dir = self.cookies_dir / "invalid"
                 backup_dir.mkdir(exist_ok=True)
-                
+
                 backup_path = backup_dir / f"{Path(cookie_path).stem}_{int(time.time())}.txt"
                 os.rename(cookie_path, backup_path)
-                
+
                 LOGGER(__name__).info(f"🗑️ تم نقل cookie غير صالح: {Path(cookie_path).name} - {reason}")
-            
+
             # إزالة من القوائم
-            if cookie_path in self.cookies_status:
-                del self.cookies_status[cookie_path]
-            
-            if cookie_path in self.available_cookies:
-                self.available_cookies.remove(cookie_path)
-            
+            self.cookies_status.pop(cookie_path, None)
+            self._leases.pop(cookie_path, None)
+
             await self._save_cookies_status()
-            
+
         except Exception as e:
             LOGGER(__name__).error(f"❌ فشل إزالة cookie: {e}")
-    
+
     async def get_statistics(self) -> Dict[str, Any]:
         """الحصول على إحصائيات الاستخدام"""
+        self._ensure_ready()
         await self._update_available_cookies()
-        
+
         # إحصائيات عامة
         total_cookies = len(self.cookies_status)
         active_cookies = len(self.available_cookies)
         blocked_cookies = total_cookies - active_cookies
-        
-        # معدل النجاح
+
+        # معدل النجاح (من النتائج المسجلة)
         success_rate = 0
-        if self.usage_stats['total_requests'] > 0:
-            success_rate = (self.usage_stats['successful_requests'] / 
-                          self.usage_stats['total_requests']) * 100
-        
+        reported = self.usage_stats['successful_requests'] + self.usage_stats['failed_requests']
+        if reported > 0:
+            success_rate = (self.usage_stats['successful_requests'] / reported) * 100
+
+        current_time, now = time.time(), time.monotonic()
         return {
             'total_cookies': total_cookies,
             'active_cookies': active_cookies,
@@ -293,39 +431,59 @@ class CookiesManager:
             'cookies_details': [
                 {
                     'file': Path(path).name,
-                    'active': status.get('active', True),
+                    'active': status.get('blocked_until', 0) <= current_time,
                     'failures': status.get('failures', 0),
                     'success_count': status.get('success_count', 0),
                     'total_requests': status.get('total_requests', 0),
-                    'blocked_until': status.get('blocked_until', 0)
+                    'blocked_until': status.get('blocked_until', 0),
+                    'in_flight': len(self._active_leases(path, now)),
+                    'score': round(self._score(path, status, current_time, now), 3)
                 }
                 for path, status in self.cookies_status.items()
                 if os.path.exists(path)
             ]
         }
-    
-    async def reset_cookie(self, cookie_path: str):
-        """إعادة تعيين حالة cookie محدد"""
+
+    def reset_cookie_status(self, cookie_path: str):
         if cookie_path in self.cookies_status:
             self.cookies_status[cookie_path].update({
                 'active': True,
                 'failures': 0,
                 'blocked_until': 0
             })
-            await self._update_available_cookies()
-            await self._save_cookies_status()
-            
+            self._mark_dirty()
+
             LOGGER(__name__).info(f"🔄 تم إعادة تعيين cookie: {Path(cookie_path).name}")
-    
+
+    async def reset_cookie(self, cookie_path: str):
+        """إعادة تعيين حالة cookie محدد"""
+        self.reset_cookie_status(cookie_path)
+        await self._save_cookies_status()
+
     async def reset_all_cookies(self):
         """إعادة تعيين جميع cookies"""
         for cookie_path in self.cookies_status:
-            await self.reset_cookie(cookie_path)
-        
+            self.reset_cookie_status(cookie_path)
+        await self._save_cookies_status()
+
         LOGGER(__name__).info("🔄 تم إعادة تعيين جميع cookies")
 
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            **self.usage_stats,
+            'cookies': len(self.cookies_status),
+            'available': len(self.available_cookies),
+            'in_flight': sum(len(self._active_leases(path, now)) for path in list(self._leases)),
+            'dirty': self._dirty
+        }
+
 # إنشاء مثيل global
-cookies_manager = CookiesManager()
+cookies_manager = CookiesManager(
+    max_concurrency=config.COOKIE_MAX_CONCURRENCY,
+    cooldown=config.COOKIE_COOLDOWN,
+    save_delay=config.COOKIE_SAVE_DELAY
+)
 
 # دوال مساعدة للتوافق مع الكود الحالي
 async def get_random_cookie() -> Optional[str]:
@@ -338,4 +496,4 @@ async def report_cookie_success(cookie_path: str):
 
 async def report_cookie_failure(cookie_path: str, error: str = ""):
     """تسجيل فشل cookie"""
-    await cookies_manager.report_failure(cookie_path, error)
\ No newline at end of file
+    await cookies_manager.report_failure(cookie_path, error)
@@ -1,7 +1,6 @@
 import sqlite3
 import json
 import asyncio
-import threading
 import time
 from typing import Dict, List, Union, Optional, Any
 from contextlib import contextmanager
@@ -9,7 +8,12 @@ from dataclasses import dataclass, asdict
 from datetime import datetime
 import logging
 
-from config import DATABASE_PATH, ENABLE_DATABASE_CACHE
+from config import (
+    DATABASE_PATH, ENABLE_DATABASE_CACHE, DATABASE_CACHE_SIZE, DATABASE_CACHE_TTL,
+    DB_WRITE_FLUSH_INTERVAL_MS, DB_WRITE_BATCH_SIZE
+)
+from ZeMusic.core.sqlite_pool import get_pool
+from ZeMusic.core.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
@@ -63,21 +67,41 @@ class DatabaseManager:
     
     def __init__(self, db_path: str = DATABASE_PATH):
         self.db_path = db_path
-        self._lock = threading.Lock()
+        self._pool = get_pool(db_path)
         self._init_database()
         
         # كاش في الذاكرة للبيانات المتكررة
         self.cache_enabled = ENABLE_DATABASE_CACHE
         if self.cache_enabled:
             self.cache = {
-                'settings': {},
-                'users': {},
-                'chats': {},
+                'settings': TTLCache(DATABASE_CACHE_SIZE, DATABASE_CACHE_TTL, 'settings'),
+                'users': TTLCache(DATABASE_CACHE_SIZE, DATABASE_CACHE_TTL, 'users'),
+                'chats': TTLCache(DATABASE_CACHE_SIZE, DATABASE_CACHE_TTL, 'chats'),
+                # مجموعات المديرين والمحظورين (تُحمّل كاملة بطلب واحد)
+                'sets': TTLCache(8, DATABASE_CACHE_TTL, 'sets'),
                 'assistants': {},
                 'temp': {}
             }
         else:
             self.cache = {}
+        # جيل كل مجموعة: يزداد عند الإبطال فلا يُعيد تحميل قديم مجموعة متقادمة للكاش
+        self._set_generations: Dict[str, int] = {}
+        
+        # طابور الكتابة المؤجلة لـ add_user/add_chat (مفتاح -> آخر سجل)
+        self._pending_users: Dict[int, tuple] = {}
+        self._pending_chats: Dict[int, tuple] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_now = asyncio.Event()
+        self.write_stats = {
+            'coalesced': 0,
+            'max_queue_depth': 0,
+            'flushes': 0,
+            'failed_flushes': 0,
+            'rows_flushed': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+            'total_flush_ms': 0.0
+        }
         
     def _init_database(self):
         """إنشاء جداول قاعدة البيانات"""
@@ -192,17 +216,19 @@ class DatabaseManager:
 
     @contextmanager
     def _get_connection(self):
-        """الحصول على اتصال آمن بقاعدة البيانات"""
-        with self._lock:
-            conn = sqlite3.connect(self.db_path, timeout=30.0, check_same_thread=False)
-            conn.row_factory = sqlite3.Row
-            conn.execute('PRAGMA journal_mode=WAL')
-            conn.execute('PRAGMA synchronous=NORMAL')
-            conn.execute('PRAGMA busy_timeout=30000')
-            try:
-                yield conn
-            finally:
-                conn.close()
+        """الحصول على اتصال الكتابة من التجمع المشترك"""
+        with self._pool.writer() as conn:
+            yield conn
+
+    async def _run(self, func):
+        """تنفيذ دالة قاعدة البيانات على منفذ التجمع بدلاً من المنفذ الافتراضي"""
+        return await asyncio.get_running_loop().run_in_executor(self._pool.executor, func)
+
+    @contextmanager
+    def _get_reader(self):
+        """الحصول على اتصال قراءة فقط من التجمع المشترك (قراءات متوازية)"""
+        with self._pool.reader() as conn:
+            yield conn
 
     # ========================================
     # وظائف إدارة الحسابات المساعدة (جديد)
@@ -236,7 +262,7 @@ class DatabaseManager:
                 except sqlite3.IntegrityError:
                     return False  # المساعد موجود بالفعل
         
-        return await asyncio.get_event_loop().run_in_executor(None, _add)
+        return await self._run(_add)
     
     async def remove_assistant(self, assistant_id: int) -> bool:
         """إزالة حساب مساعد"""
@@ -253,7 +279,7 @@ class DatabaseManager:
                 
                 return success
         
-        return await asyncio.get_event_loop().run_in_executor(None, _remove)
+        return await self._run(_remove)
     
     async def get_assistant(self, assistant_id: int) -> Optional[Dict]:
         """الحصول على معلومات المساعد"""
@@ -262,7 +288,7 @@ class DatabaseManager:
             return self.cache['assistants'][assistant_id]
         
         def _get():
-            with self._get_connection() as conn:
+            with self._get_reader() as conn:
                 cursor = conn.cursor()
                 cursor.execute('SELECT * FROM assistants WHERE assistant_id = ?', (assistant_id,))
                 row = cursor.fetchone()
@@ -285,12 +311,12 @@ class DatabaseManager:
                     return assistant_data
                 return None
         
-        return await asyncio.get_event_loop().run_in_executor(None, _get)
+        return await self._run(_get)
     
     async def get_all_assistants(self) -> List[Dict]:
         """الحصول على جميع الحسابات المساعدة"""
         def _get_all():
-            with self._get_connection() as conn:
+            with self._get_reader() as conn:
                 cursor = conn.cursor()
                 cursor.execute('SELECT * FROM assistants WHERE is_active = 1 ORDER BY assistant_id')
                 rows = cursor.fetchall()
@@ -314,7 +340,7 @@ class DatabaseManager:
                 
                 return assistants
         
-        return await asyncio.get_event_loop().run_in_executor(None, _get_all)
+        return await self._run(_get_all)
     
     async def update_assistant_usage(self, assistant_id: int):
         """تحديث إحصائيات استخدام المساعد"""
@@ -333,7 +359,7 @@ class DatabaseManager:
                     self.cache['assistants'][assistant_id]['last_used'] = datetime.now().isoformat()
                     self.cache['assistants'][assistant_id]['total_calls'] += 1
         
-        await asyncio.get_event_loop().run_in_executor(None, _update)
+        await self._run(_update)
     
     async def deactivate_assistant(self, assistant_id: int) -> bool:
         """إلغاء تفعيل مساعد"""
@@ -352,7 +378,7 @@ class DatabaseManager:
                 
                 return success
         
-        return await asyncio.get_event_loop().run_in_executor(None, _deactivate)
+        return await self._run(_deactivate)
     
     async def activate_assistant(self, assistant_id: int) -> bool:
         """تفعيل مساعد"""
@@ -371,7 +397,7 @@ class DatabaseManager:
                 
                 return success
         
-        return await asyncio.get_event_loop().run_in_executor(None, _activate)
+        return await self._run(_activate)
 
     # ========================================
     # وظائف إعدادات المجموعات
@@ -380,8 +406,10 @@ class DatabaseManager:
     async def get_chat_settings(self, chat_id: int) -> ChatSettings:
         """الحصول على إعدادات المجموعة"""
         # التحقق من الكاش أولاً
-        if self.cache_enabled and chat_id in self.cache.get('settings', {}):
-            return self.cache['settings'][chat_id]
+        if self.cache_enabled:
+            cached = self.cache['settings'].get(chat_id)
+            if cached is not None:
+                return cached
             
         def _get():
             with self._get_connection() as conn:
@@ -417,11 +445,11 @@ class DatabaseManager:
                 
                 # حفظ في الكاش
                 if self.cache_enabled:
-                    self.cache.setdefault('settings', {})[chat_id] = settings
+                    self.cache['settings'].set(chat_id, settings)
                 
                 return settings
         
-        return await asyncio.get_event_loop().run_in_executor(None, _get)
+        return await self._run(_get)
 
     async def update_chat_setting(self, chat_id: int, **kwargs):
         """تحديث إعداد معين للمجموعة"""
@@ -461,43 +489,150 @@ class DatabaseManager:
                     
                     conn.commit()
                     
-                    # تحديث الكاش
-                    if self.cache_enabled and chat_id in self.cache.get('settings', {}):
-                        for key, value in kwargs.items():
-                            if hasattr(self.cache['settings'][chat_id], key):
-                                setattr(self.cache['settings'][chat_id], key, value)
+                    # تحديث الكاش (كتابة عبر الكاش)
+                    if self.cache_enabled:
+                        cached = self.cache['settings'].pop(chat_id)
+                        if cached is not None:
+                            for key, value in kwargs.items():
+                                if key in valid_fields:
+                                    setattr(cached, key, value)
+                            self.cache['settings'].set(chat_id, cached)
         
-        await asyncio.get_event_loop().run_in_executor(None, _update)
+        await self._run(_update)
 
     # ========================================
     # باقي الوظائف (مشابهة للنسخة السابقة)
     # ========================================
     
     async def add_user(self, user_id: int, first_name: str = "", username: str = ""):
-        """إضافة مستخدم جديد"""
-        def _add():
-            with self._get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT OR REPLACE INTO users (user_id, first_name, username, last_seen)
-                    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-                ''', (user_id, first_name, username))
-                conn.commit()
+        """إضافة مستخدم جديد (كتابة مؤجلة مجمّعة)"""
+        # مستخدم معروف بنفس البيانات خلال مدة الكاش: لا حاجة للكتابة
+        record = (first_name, username)
+        if self.cache_enabled and self.cache['users'].get(user_id) == record:
+            return
         
-        await asyncio.get_event_loop().run_in_executor(None, _add)
+        self._queue_write(self._pending_users, user_id, record)
+        if self.cache_enabled:
+            self.cache['users'].set(user_id, record)
 
     async def add_chat(self, chat_id: int, chat_title: str = "", chat_type: str = ""):
-        """إضافة مجموعة جديدة"""
-        def _add():
+        """إضافة مجموعة جديدة (كتابة مؤجلة مجمّعة)"""
+        record = (chat_title, chat_type)
+        if self.cache_enabled and self.cache['chats'].get(chat_id) == record:
+            return
+        
+        self._queue_write(self._pending_chats, chat_id, record)
+        if self.cache_enabled:
+            self.cache['chats'].set(chat_id, record)
+
+    # ========================================
+    # الكتابة المؤجلة للمستخدمين والمجموعات
+    # ========================================
+    
+    def _queue_write(self, pending: Dict[int, tuple], key: int, record: tuple):
+        """إضافة سجل لطابور الكتابة مع دمج التكرارات (القيم غير الفارغة تبقى)"""
+        previous = pending.get(key)
+        if previous is not None:
+            record = tuple(new or old for new, old in zip(record, previous))
+            self.write_stats['coalesced'] += 1
+        pending[key] = record
+        
+        depth = len(self._pending_users) + len(self._pending_chats)
+        self.write_stats['max_queue_depth'] = max(self.write_stats['max_queue_depth'], depth)
+        
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+        if depth >= DB_WRITE_BATCH_SIZE:
+            self._flush_now.set()
+    
+    async def _flush_loop(self):
+        """تفريغ الطابور كل DB_WRITE_FLUSH_INTERVAL_MS أو عند بلوغ DB_WRITE_BATCH_SIZE"""
+        interval = DB_WRITE_FLUSH_INTERVAL_MS / 1000
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            
+            if self._pending_users or self._pending_chats:
+                await self.flush_writes()
+    
+    async def flush_writes(self) -> int:
+        """كتابة جميع السجلات المعلقة في معاملة واحدة، يعيد عدد الصفوف"""
+        users, self._pending_users = self._pending_users, {}
+        chats, self._pending_chats = self._pending_chats, {}
+        if not users and not chats:
+            return 0
+        
+        def _flush():
             with self._get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT OR REPLACE INTO chats (chat_id, chat_title, chat_type, last_active)
-                    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-                ''', (chat_id, chat_title, chat_type))
+                # UPSERT بدلاً من INSERT OR REPLACE حتى لا تُمسح حالة الحظر/المدير/القائمة السوداء
+                if users:
+                    cursor.executemany('''
+                        INSERT INTO users (user_id, first_name, username, last_seen)
+                        VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                        ON CONFLICT(user_id) DO UPDATE SET
+                            first_name = COALESCE(NULLIF(excluded.first_name, ''), users.first_name),
+                            username = COALESCE(NULLIF(excluded.username, ''), users.username),
+                            last_seen = CURRENT_TIMESTAMP
+                    ''', [(key, *record) for key, record in users.items()])
+                if chats:
+                    cursor.executemany('''
+                        INSERT INTO chats (chat_id, chat_title, chat_type, last_active)
+                        VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                        ON CONFLICT(chat_id) DO UPDATE SET
+                            chat_title = COALESCE(NULLIF(excluded.chat_title, ''), chats.chat_title),
+                            chat_type = COALESCE(NULLIF(excluded.chat_type, ''), chats.chat_type),
+                            last_active = CURRENT_TIMESTAMP
+                    ''', [(key, *record) for key, record in chats.items()])
                 conn.commit()
         
-        await asyncio.get_event_loop().run_in_executor(None, _add)
+        rows = len(users) + len(chats)
+        start = time.perf_counter()
+        try:
+            await self._run(_flush)
+        except Exception as e:
+            # إعادة السجلات للطابور دون الكتابة فوق ما وصل بعدها
+            for key, record in users.items():
+                self._pending_users.setdefault(key, record)
+            for key, record in chats.items():
+                self._pending_chats.setdefault(key, record)
+            self.write_stats['failed_flushes'] += 1
+            logger.error(f"❌ فشل تفريغ طابور الكتابة ({rows} صف): {e}")
+            return 0
+        
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        stats = self.write_stats
+        stats['flushes'] += 1
+        stats['rows_flushed'] += rows
+        stats['last_flush_ms'] = round(elapsed_ms, 2)
+        stats['max_flush_ms'] = round(max(stats['max_flush_ms'], elapsed_ms), 2)
+        stats['total_flush_ms'] += elapsed_ms
+        return rows
+    
+    async def stop_write_behind(self):
+        """إيقاف مهمة التفريغ وكتابة ما تبقى (عند إيقاف البوت)"""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        self._flush_task = None
+        rows = await self.flush_writes()
+        if rows:
+            logger.info(f"💾 تم حفظ {rows} سجل معلق قبل الإيقاف")
+    
+    def get_write_stats(self) -> Dict[str, Any]:
+        """إحصائيات طابور الكتابة المؤجلة"""
+        stats = self.write_stats
+        return {
+            **stats,
+            'queue_depth': len(self._pending_users) + len(self._pending_chats),
+            'avg_flush_ms': round(stats['total_flush_ms'] / stats['flushes'], 2) if stats['flushes'] else 0.0
+        }
 
     async def ban_user(self, user_id: int):
         """حظر مستخدم"""
@@ -509,14 +644,17 @@ class DatabaseManager:
 
     async def is_banned(self, user_id: int) -> bool:
         """التحقق من حظر المستخدم"""
+        if self.cache_enabled:
+            return user_id in await self._get_flag_set('banned')
+        
         def _check():
-            with self._get_connection() as conn:
+            with self._get_reader() as conn:
                 cursor = conn.cursor()
                 cursor.execute('SELECT is_banned FROM users WHERE user_id = ?', (user_id,))
                 row = cursor.fetchone()
                 return bool(row['is_banned']) if row else False
         
-        return await asyncio.get_event_loop().run_in_executor(None, _check)
+        return await self._run(_check)
 
     async def add_sudo(self, user_id: int):
         """إضافة مستخدم كمدير"""
@@ -528,13 +666,16 @@ class DatabaseManager:
 
     async def get_sudoers(self) -> List[int]:
         """الحصول على قائمة المديرين"""
+        if self.cache_enabled:
+            return list(await self._get_flag_set('sudoers'))
+        
         def _get():
-            with self._get_connection() as conn:
+            with self._get_reader() as conn:
                 cursor = conn.cursor()
                 cursor.execute('SELECT user_id FROM users WHERE is_sudo = 1')
                 return [row['user_id'] for row in cursor.fetchall()]
         
-        return await asyncio.get_event_loop().run_in_executor(None, _get)
+        return await self._run(_get)
 
     async def _update_user(self, user_id: int, **kwargs):
         """تحديث بيانات المستخدم"""
@@ -556,39 +697,83 @@ class DatabaseManager:
                     values.append(user_id)
                     query = f"UPDATE users SET {', '.join(set_clause)} WHERE user_id = ?"
                     cursor.execute(query, values)
+                    
+                    # مستخدم لم يُسجل بعد (مثل حظر عام لمستخدم لم يراسل البوت)
+                    if cursor.rowcount == 0:
+                        fields = [key for key in kwargs if key in valid_fields]
+                        cursor.execute(
+                            f"INSERT INTO users (user_id, {', '.join(fields)}) VALUES (?{', ?' * len(fields)})",
+                            [user_id] + [kwargs[key] for key in fields]
+                        )
                     conn.commit()
         
-        await asyncio.get_event_loop().run_in_executor(None, _update)
+        await self._run(_update)
+        
+        # إبطال مجموعات الحظر/المدير لتُعاد قراءتها من القاعدة
+        if self.cache_enabled:
+            if 'is_banned' in kwargs:
+                self._invalidate_flag_set('banned')
+            if 'is_sudo' in kwargs:
+                self._invalidate_flag_set('sudoers')
+    
+    def _invalidate_flag_set(self, name: str):
+        """حذف المجموعة من الكاش وزيادة جيلها لتجاهل أي تحميل جارٍ بدأ قبل التعديل"""
+        self._set_generations[name] = self._set_generations.get(name, 0) + 1
+        self.cache['sets'].pop(name)
+    
+    async def _get_flag_set(self, name: str) -> set:
+        """تحميل مجموعة المحظورين أو المديرين مرة واحدة وحفظها في الكاش"""
+        cached = self.cache['sets'].get(name)
+        if cached is not None:
+            return cached
+        
+        column = 'is_banned' if name == 'banned' else 'is_sudo'
+        
+        def _load():
+            with self._get_reader() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'SELECT user_id FROM users WHERE {column} = 1')
+                return {row['user_id'] for row in cursor.fetchall()}
+        
+        generation = self._set_generations.get(name, 0)
+        result = await self._run(_load)
+        # تعديل حدث أثناء القراءة: النتيجة قد تكون قديمة فلا تُحفظ
+        if self._set_generations.get(name, 0) == generation:
+            self.cache['sets'].set(name, result)
+        return result
     
     async def get_served_users(self) -> List[int]:
         """الحصول على جميع المستخدمين المخدومين"""
         def _get():
-            with self._get_connection() as conn:
+            with self._get_reader() as conn:
                 cursor = conn.cursor()
                 cursor.execute('SELECT user_id FROM users')
                 return [row['user_id'] for row in cursor.fetchall()]
         
-        return await asyncio.get_event_loop().run_in_executor(None, _get)
+        return await self._run(_get)
     
     async def get_served_chats(self) -> List[int]:
         """الحصول على جميع المحادثات المخدومة"""
         def _get():
-            with self._get_connection() as conn:
+            with self._get_reader() as conn:
                 cursor = conn.cursor()
                 cursor.execute('SELECT chat_id FROM chats')
                 return [row['chat_id'] for row in cursor.fetchall()]
         
-        return await asyncio.get_event_loop().run_in_executor(None, _get)
+        return await self._run(_get)
     
     async def get_banned_users(self) -> List[int]:
         """الحصول على جميع المستخدمين المحظورين"""
+        if self.cache_enabled:
+            return list(await self._get_flag_set('banned'))
+        
         def _get():
-            with self._get_connection() as conn:
+            with self._get_reader() as conn:
                 cursor = conn.cursor()
                 cursor.execute('SELECT user_id FROM users WHERE is_banned = 1')
                 return [row['user_id'] for row in cursor.fetchall()]
         
-        return await asyncio.get_event_loop().run_in_executor(None, _get)
+        return await self._run(_get)
 
     async def add_auth_user(self, chat_id: int, user_id: int):
         """إضافة مستخدم للمصرح لهم في المجموعة"""
@@ -601,7 +786,7 @@ class DatabaseManager:
                 ''', (chat_id, user_id))
                 conn.commit()
         
-        await asyncio.get_event_loop().run_in_executor(None, _add)
+        await self._run(_add)
 
     async def remove_auth_user(self, chat_id: int, user_id: int):
         """إزالة مستخدم من المصرح لهم"""
@@ -611,17 +796,17 @@ class DatabaseManager:
                 cursor.execute('DELETE FROM auth_users WHERE chat_id = ? AND user_id = ?', (chat_id, user_id))
                 conn.commit()
         
-        await asyncio.get_event_loop().run_in_executor(None, _remove)
+        await self._run(_remove)
 
     async def is_auth_user(self, chat_id: int, user_id: int) -> bool:
         """التحقق من تصريح المستخدم في المجموعة"""
         def _check():
-            with self._get_connection() as conn:
+            with self._get_reader() as conn:
                 cursor = conn.cursor()
                 cursor.execute('SELECT 1 FROM auth_users WHERE chat_id = ? AND user_id = ?', (chat_id, user_id))
                 return cursor.fetchone() is not None
         
-        return await asyncio.get_event_loop().run_in_executor(None, _check)
+        return await self._run(_check)
 
     async def blacklist_chat(self, chat_id: int):
         """إضافة مجموعة للقائمة السوداء"""
@@ -637,7 +822,7 @@ class DatabaseManager:
                     ''', (chat_id,))
                 conn.commit()
         
-        await asyncio.get_event_loop().run_in_executor(None, _blacklist)
+        await self._run(_blacklist)
 
     async def whitelist_chat(self, chat_id: int):
         """إزالة مجموعة من القائمة السوداء"""
@@ -647,33 +832,33 @@ class DatabaseManager:
                 cursor.execute('UPDATE chats SET is_blacklisted = 0 WHERE chat_id = ?', (chat_id,))
                 conn.commit()
         
-        await asyncio.get_event_loop().run_in_executor(None, _whitelist)
+        await self._run(_whitelist)
 
     async def is_blacklisted_chat(self, chat_id: int) -> bool:
         """التحقق من وجود المجموعة في القائمة السوداء"""
         def _check():
-            with self._get_connection() as conn:
+            with self._get_reader() as conn:
                 cursor = conn.cursor()
                 cursor.execute('SELECT is_blacklisted FROM chats WHERE chat_id = ?', (chat_id,))
                 row = cursor.fetchone()
                 return bool(row['is_blacklisted']) if row else False
         
-        return await asyncio.get_event_loop().run_in_executor(None, _check)
+        return await self._run(_check)
 
     async def get_blacklisted_chats(self) -> List[int]:
         """الحصول على جميع المجموعات المحظورة"""
         def _get():
-            with self._get_connection() as conn:
+            with self._get_reader() as conn:
                 cursor = conn.cursor()
                 cursor.execute('SELECT chat_id FROM chats WHERE is_blacklisted = 1')
                 return [row['chat_id'] for row in cursor.fetchall()]
         
-        return await asyncio.get_event_loop().run_in_executor(None, _get)
+        return await self._run(_get)
 
     async def get_stats(self) -> Dict[str, int]:
         """الحصول على إحصائيات قاعدة البيانات"""
         def _get():
-            with self._get_connection() as conn:
+            with self._get_reader() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('SELECT COUNT(*) as count FROM users')
@@ -699,7 +884,7 @@ class DatabaseManager:
                     'banned': banned_count
                 }
         
-        return await asyncio.get_event_loop().run_in_executor(None, _get)
+        return await self._run(_get)
 
     # وظائف للحالات المؤقتة
     async def set_temp_state(self, key: str, value: Any):
@@ -716,7 +901,7 @@ class DatabaseManager:
                 ''', (key, json.dumps(value)))
                 conn.commit()
         
-        await asyncio.get_event_loop().run_in_executor(None, _save)
+        await self._run(_save)
 
     async def get_temp_state(self, key: str, default=None):
         """الحصول على حالة مؤقتة"""
@@ -739,14 +924,25 @@ class DatabaseManager:
                     return True
                 return default
         
-        return await asyncio.get_event_loop().run_in_executor(None, _get)
+        return await self._run(_get)
 
     async def clear_cache(self):
         """مسح الكاش"""
         if self.cache_enabled:
-            self.cache.clear()
+            for cache in self.cache.values():
+                cache.clear()
             logger.info("تم مسح كاش قاعدة البيانات")
 
+    def get_cache_stats(self) -> Dict[str, Dict]:
+        """إحصائيات إصابة/إخفاق كاش قاعدة البيانات"""
+        if not self.cache_enabled:
+            return {}
+        return {
+            name: cache.get_stats()
+            for name, cache in self.cache.items()
+            if isinstance(cache, TTLCache)
+        }
+
     async def log_usage(self, chat_id: int, assistant_id: int, action_type: str, metadata: Dict = None):
         """تسجيل إحصائيات الاستخدام"""
         def _log():
@@ -758,7 +954,7 @@ class DatabaseManager:
                 ''', (chat_id, assistant_id, action_type, json.dumps(metadata or {})))
                 conn.commit()
         
-        await asyncio.get_event_loop().run_in_executor(None, _log)
+        await self._run(_log)
     
     async def fix_inactive_assistants(self) -> Dict:
         """إصلاح الحسابات غير النشطة"""
@@ -784,7 +980,7 @@ class DatabaseManager:
                 
                 return {'fixed': fixed_count, 'total': total_count}
         
-        return await asyncio.get_event_loop().run_in_executor(None, _fix)
+        return await self._run(_fix)
 
     async def add_assistant(self, assistant_id: int = None, session_string: str = None, name: str = None, user_id: int = None, username: str = None, phone: str = None) -> int:
         """إضافة حساب مساعد جديد (متوافق مع الطرق القديمة والجديدة)"""
@@ -811,7 +1007,7 @@ class DatabaseManager:
                     conn.commit()
                     return cursor.lastrowid
         
-        return await asyncio.get_event_loop().run_in_executor(None, _add)
+        return await self._run(_add)
     
     async def remove_assistant(self, assistant_id: int):
         """حذف حساب مساعد"""
@@ -821,12 +1017,12 @@ class DatabaseManager:
                 cursor.execute('DELETE FROM assistants WHERE assistant_id = ?', (assistant_id,))
                 conn.commit()
         
-        await asyncio.get_event_loop().run_in_executor(None, _remove)
+        await self._run(_remove)
     
     async def get_assistants(self) -> List[Dict]:
         """الحصول على قائمة الحسابات المساعدة"""
         def _get():
-            with self._get_connection() as conn:
+            with self._get_reader() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT assistant_id, session_string, name, is_active, added_date as created_at, last_used as last_activity
@@ -836,12 +1032,12 @@ class DatabaseManager:
                 rows = cursor.fetchall()
                 return [dict(row) for row in rows]
         
-        return await asyncio.get_event_loop().run_in_executor(None, _get)
+        return await self._run(_get)
     
     async def get_assistant_by_id(self, assistant_id: int) -> Optional[Dict]:
         """الحصول على حساب مساعد بالمعرف"""
         def _get():
-            with self._get_connection() as conn:
+            with self._get_reader() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT assistant_id, session_string, name, user_id, username, phone, is_active, added_date as created_at, last_used as last_activity
@@ -851,7 +1047,7 @@ class DatabaseManager:
                 row = cursor.fetchone()
                 return dict(row) if row else None
         
-        return await asyncio.get_event_loop().run_in_executor(None, _get)
+        return await self._run(_get)
     
 
     
@@ -867,7 +1063,7 @@ class DatabaseManager:
                 ''', (datetime.now().isoformat(), assistant_id))
                 conn.commit()
         
-        await asyncio.get_event_loop().run_in_executor(None, _update)
+        await self._run(_update)
 
 # إنشاء مثيل مدير قاعدة البيانات
 db = DatabaseManager()
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+مُجدول التحميل المحدود بالأولوية
+طوابير محدودة بمجمعات عمال منفصلة لكل مرحلة (إرسال من الكاش / تحميل yt-dlp)
+مع عدالة بين المستخدمين، رفض الطلبات عند الامتلاء، وقياس زمن الانتظار والخدمة
+"""
+
+import time
+import asyncio
+from collections import OrderedDict, defaultdict, deque
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from ZeMusic.logging import LOGGER
+
+# عدد العينات المحفوظة لحساب المتوسطات والنسب المئوية
+SAMPLES_WINDOW = 500
+
+class _Job:
+    __slots__ = ('user_id', 'priority', 'factory', 'future', 'queued_at')
+
+    def __init__(self, user_id: int, priority: int, factory: Callable[[], Awaitable[Any]]):
+        self.user_id = user_id
+        self.priority = priority
+        self.factory = factory
+        self.future = asyncio.get_running_loop().create_future()
+        self.queued_at = time.monotonic()
+
+def _summarize(samples: deque) -> Dict[str, float]:
+    """متوسط / p95 / أقصى بالثواني"""
+    if not samples:
+        return {'avg': 0.0, 'p95': 0.0, 'max': 0.0}
+    ordered = sorted(samples)
+    return {
+        'avg': round(sum(ordered) / len(ordered), 3),
+        'p95': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        'max': round(ordered[-1], 3)
+    }
+
+class StagePool:
+    """طابور محدود لمرحلة واحدة مع عدد ثابت من العمال"""
+
+    def __init__(self, name: str, workers: int, max_queue: int, max_per_user: int):
+        self.name = name
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.max_per_user = max_per_user
+
+        # أولوية -> (مستخدم -> طلباته) ؛ التناوب على المستخدمين يضمن العدالة
+        self._levels: Dict[int, "OrderedDict[int, deque]"] = defaultdict(OrderedDict)
+        self._queued = 0
+        self._user_load: Dict[int, int] = defaultdict(int)
+        self._ready: Optional[asyncio.Semaphore] = None
+        self._tasks = []
+        self.active = 0
+
+        self._wait_samples: deque = deque(maxlen=SAMPLES_WINDOW)
+        self._service_samples: deque = deque(maxlen=SAMPLES_WINDOW)
+        self.stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'shed': 0,
+            'shed_user_limit': 0
+        }
+
+    def _ensure_workers(self):
+        if self._ready is None:
+            self._ready = asyncio.Semaphore(0)
+        self._tasks = [task for task in self._tasks if not task.done()]
+        while len(self._tasks) < self.workers:
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    def submit(self, user_id: int, factory: Callable[[], Awaitable[Any]], priority: int = 1) -> Tuple[Optional[asyncio.Future], int]:
+        """
+        إضافة طلب للطابور
+        يعيد (future, موقع الطلب في الطابور) أو (None, -1) عند رفض الطلب
+        """
+        if self._queued >= self.max_queue:
+            self.stats['shed'] += 1
+            return None, -1
+        if self._user_load[user_id] >= self.max_per_user:
+            self.stats['shed_user_limit'] += 1
+            return None, -1
+
+        self._ensure_workers()
+        job = _Job(user_id, priority, factory)
+
+        users = self._levels[priority]
+        user_jobs = users.setdefault(user_id, deque())
+        position = self._position_for(priority, len(user_jobs))
+        user_jobs.append(job)
+
+        self._queued += 1
+        self._user_load[user_id] += 1
+        self.stats['submitted'] += 1
+        self._ready.release()
+
+        # الموقع الفعلي يعتمد على توفر العمال
+        return job.future, max(0, position - (self.workers - self.active))
+
+    def _position_for(self, priority: int, index: int) -> int:
+        """عدد الطلبات التي ستُخدم قبل طلب جديد في الموضع index من طابور مستخدمه"""
+        ahead = 0
+        for level, users in self._levels.items():
+            if level < priority:
+                ahead += sum(len(jobs) for jobs in users.values())
+            elif level == priority:
+                # التناوب: كل مستخدم آخر يُخدم مرة لكل طلب من طلباتنا
+                ahead += sum(min(len(jobs), index + 1) for jobs in users.values())
+        return ahead
+
+    def _pop(self) -> _Job:
+        for level in sorted(self._levels):
+            users = self._levels[level]
+            if not users:
+                continue
+            user_id, jobs = next(iter(users.items()))
+            job = jobs.popleft()
+            if jobs:
+                users.move_to_end(user_id)
+            else:
+                del users[user_id]
+            self._queued -= 1
+            return job
+        raise LookupError("empty scheduler queue")
+
+    async def _worker(self):
+        while True:
+            await self._ready.acquire()
+            job = self._pop()
+            if job.future.cancelled():
+                self._release_user(job.user_id)
+                continue
+
+            started = time.monotonic()
+            self._wait_samples.append(started - job.queued_at)
+            self.active += 1
+            try:
+                result = await job.factory()
+                self.stats['completed'] += 1
+                if not job.future.done():
+                    job.future.set_result(result)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats['failed'] += 1
+                LOGGER(__name__).error(f"❌ خطأ في مهمة {self.name}: {e}")
+                if not job.future.done():
+                    job.future.set_exception(e)
+                    # استرجاع الاستثناء حتى لا يُسجل كاستثناء مهمل
+                    job.future.exception()
+            finally:
+                self.active -= 1
+                self._service_samples.append(time.monotonic() - started)
+                self._release_user(job.user_id)
+
+    def _release_user(self, user_id: int):
+        self._user_load[user_id] -= 1
+        if self._user_load[user_id] <= 0:
+            del self._user_load[user_id]
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'workers': self.workers,
+            'active': self.active,
+            'queued': self._queued,
+            'max_queue': self.max_queue,
+            **self.stats,
+            'wait': _summarize(self._wait_samples),
+            'service': _summarize(self._service_samples)
+        }
+
+class DownloadScheduler:
+    """مجدول بمرحلتين: إرسال من الكاش (رخيص) وتحميل yt-dlp (مكلف)"""
+
+    CACHE = 'cache'
+    DOWNLOAD = 'download'
+
+    def __init__(self, cache_workers: int, download_workers: int, cache_queue: int,
+                 download_queue: int, max_per_user: int):
+        self.stages = {
+            self.CACHE: StagePool(self.CACHE, cache_workers, cache_queue, max_per_user),
+            self.DOWNLOAD: StagePool(self.DOWNLOAD, download_workers, download_queue, max_per_user)
+        }
+
+    def submit(self, stage: str, user_id: int, factory: Callable[[], Awaitable[Any]],
+               priority: int = 1) -> Tuple[Optional[asyncio.Future], int]:
+        """إضافة مهمة لمرحلة معينة"""
+        return self.stages[stage].submit(user_id, factory, priority)
+
+    @property
+    def queued(self) -> int:
+        return sum(pool.queued for pool in self.stages.values())
+
+    @property
+    def active(self) -> int:
+        return sum(pool.active for pool in self.stages.values())
+
+    def get_stats(self) -> Dict[str, Dict]:
+        return {name: pool.get_stats() for name, pool in self.stages.items()}
@@ -2,14 +2,21 @@
 تسجيل جميع معالجات البوت بعد التهيئة
 """
 
+import asyncio
+
 from ZeMusic.logging import LOGGER
+from ZeMusic.core.lazy_plugins import plugin_registry, import_profile_handler
 from telethon import events
 
+# الوحدات الثقيلة تُستورد عند أول استخدام لمعالجاتها
+DOWNLOAD_MODULE = 'ZeMusic.plugins.play.download'
+OWNER_PANEL_MODULE = 'ZeMusic.plugins.owner.owner_panel'
+
 async def register_all_handlers(bot_client):
     """تسجيل جميع معالجات البوت"""
     try:
-        # تسجيل معالج callbacks للمطور
-        from ZeMusic.plugins.owner.owner_panel import handle_owner_callbacks
+        # تسجيل معالج callbacks للمطور (لوحة المالك تُستورد عند أول ضغطة زر)
+        handle_owner_callbacks = plugin_registry.handler(OWNER_PANEL_MODULE, 'handle_owner_callbacks')
         bot_client.add_event_handler(handle_owner_callbacks, events.CallbackQuery)
         LOGGER(__name__).info("✅ تم تسجيل معالج callbacks المطور")
         
@@ -17,64 +24,42 @@ async def register_all_handlers(bot_client):
         LOGGER(__name__).error(f"❌ خطأ في تسجيل معالج المطور: {e}")
     
     try:
-        # تسجيل معالج البحث المباشر مع شروط محددة
-        from ZeMusic.plugins.play.download import smart_download_handler
-        bot_client.add_event_handler(
-            smart_download_handler, 
-            events.NewMessage(pattern=r'^/?(بحث|search|song|يوت|اغنية|تحميل)\s+(.+)$')
-        )
-        LOGGER(__name__).info("✅ تم تسجيل معالج البحث المباشر")
+        # أوامر الرسائل تُسجل في موجّه الأوامر (معالج رسائل واحد يصنف الرسالة مرة واحدة)
+        from ZeMusic.core.command_handler import telethon_command_handler
+        router = telethon_command_handler.router
         
-    except Exception as e:
-        LOGGER(__name__).error(f"❌ خطأ في تسجيل معالج البحث: {e}")
-    
-    try:
-        # تسجيل معالج أمر مزامنة القناة للمطور
-        from ZeMusic.plugins.play.download import force_channel_sync_handler
-        bot_client.add_event_handler(
-            force_channel_sync_handler,
-            events.NewMessage(pattern=r'^/sync_cache$')
-        )
-        LOGGER(__name__).info("✅ تم تسجيل معالج مزامنة القناة")
+        def download_handler(attribute):
+            return plugin_registry.handler(DOWNLOAD_MODULE, attribute)
         
-    except Exception as e:
-        LOGGER(__name__).error(f"❌ خطأ في تسجيل معالج المزامنة: {e}")
-    
-    try:
-        # تسجيل معالج معلومات قناة التخزين للمطور
-        from ZeMusic.plugins.play.download import cache_channel_info_handler
-        bot_client.add_event_handler(
-            cache_channel_info_handler,
-            events.NewMessage(pattern=r'^/cache_info$')
+        # البحث المباشر: "بحث اسم الأغنية" أو "/song اسم الأغنية"
+        router.add(
+            ['بحث', 'search', 'song', 'يوت', 'اغنية', 'تحميل'], download_handler('smart_download_handler'),
+            name='search', bare=True, pattern=r'^/?(بحث|search|song|يوت|اغنية|تحميل)\s+(.+)$'
         )
-        LOGGER(__name__).info("✅ تم تسجيل معالج معلومات قناة التخزين")
+        LOGGER(__name__).info("✅ تم تسجيل معالج البحث المباشر")
         
-    except Exception as e:
-        LOGGER(__name__).error(f"❌ خطأ في تسجيل معالج معلومات القناة: {e}")
-    
-    try:
-        # تسجيل معالج اختبار قناة التخزين للمطور
-        from ZeMusic.plugins.play.download import test_cache_channel_handler
-        bot_client.add_event_handler(
-            test_cache_channel_handler,
-            events.NewMessage(pattern=r'^/test_cache$')
-        )
-        LOGGER(__name__).info("✅ تم تسجيل معالج اختبار قناة التخزين")
+        # أوامر المطور لقناة التخزين وحالة النظام
+        router.add(['sync_cache'], download_handler('force_channel_sync_handler'))
+        router.add(['migrate_cache'], download_handler('migrate_cache_captions_handler'))
+        router.add(['cache_info'], download_handler('cache_channel_info_handler'))
+        router.add(['test_cache'], download_handler('test_cache_channel_handler'))
+        router.add(['system_status'], download_handler('system_status_handler'))
+        router.add(['import_profile'], import_profile_handler)
+        LOGGER(__name__).info("✅ تم تسجيل أوامر المطور لقناة التخزين وحالة النظام")
         
     except Exception as e:
-        LOGGER(__name__).error(f"❌ خطأ في تسجيل معالج اختبار القناة: {e}")
+        LOGGER(__name__).error(f"❌ خطأ في تسجيل أوامر الرسائل: {e}")
+    
+    # تشغيل مفهرس قناة التخزين في الخلفية (يستورد وحدة التحميل دون تأخير جاهزية البوت)
+    asyncio.create_task(_start_channel_indexer(bot_client))
     
     try:
-        # تسجيل معالج حالة النظام الشاملة للمطور
-        from ZeMusic.plugins.play.download import system_status_handler
-        bot_client.add_event_handler(
-            system_status_handler,
-            events.NewMessage(pattern=r'^/system_status$')
-        )
-        LOGGER(__name__).info("✅ تم تسجيل معالج حالة النظام الشاملة")
+        # استئناف الإذاعات التي انقطعت قبل اكتمالها
+        from ZeMusic.plugins.owner.broadcast_handler import broadcast_handler
+        await broadcast_handler.resume_broadcasts()
         
     except Exception as e:
-        LOGGER(__name__).error(f"❌ خطأ في تسجيل معالج حالة النظام: {e}")
+        LOGGER(__name__).error(f"❌ خطأ في استئناف الإذاعات: {e}")
     
     try:
         # تسجيل معالج cookies callbacks
@@ -84,6 +69,15 @@ async def register_all_handlers(bot_client):
     except Exception as e:
         LOGGER(__name__).error(f"❌ خطأ في تسجيل معالج cookies: {e}")
 
+async def _start_channel_indexer(bot_client):
+    """تحديثات القناة + تعبئة من آخر رسالة مفهرسة"""
+    try:
+        start_channel_indexer = plugin_registry.attribute(DOWNLOAD_MODULE, 'start_channel_indexer')
+        await start_channel_indexer(bot_client)
+        
+    except Exception as e:
+        LOGGER(__name__).error(f"❌ خطأ في تشغيل مفهرس قناة التخزين: {e}")
+
 async def handle_cookies_callbacks(event):
     """معالج callbacks أزرار cookies"""
     try:
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+التحميل الكسول للإضافات وقياس زمن الاستيراد
+- معالجات خفيفة تُسجل وقت البدء وتستورد الوحدة الثقيلة عند أول استخدام فقط
+- سجل بزمن استيراد كل وحدة حُملت كسولاً
+- أمر للمالك يقيس زمن استيراد كل وحدة في مفسر جديد (python -X importtime)
+"""
+
+import os
+import sys
+import time
+import asyncio
+import importlib
+from types import ModuleType
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import config
+from ZeMusic.logging import LOGGER
+
+# جذر المشروع (لتشغيل مفسر القياس من نفس المكان)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# مهلة قياس الاستيراد (ثوان)
+PROFILE_TIMEOUT = 120
+
+class LazyPluginRegistry:
+    """استيراد الوحدات الثقيلة عند أول استخدام مع تسجيل زمنه"""
+
+    def __init__(self):
+        # الوحدة -> {loaded, import_ms, first_use}
+        self._modules: Dict[str, Dict[str, Any]] = {}
+
+    def _entry(self, module: str) -> Dict[str, Any]:
+        return self._modules.setdefault(module, {'loaded': False, 'import_ms': 0.0, 'first_use': None})
+
+    def load(self, module: str, used_by: Optional[str] = None) -> ModuleType:
+        """استيراد الوحدة (مرة واحدة) وتسجيل زمن الاستيراد الأول"""
+        entry = self._entry(module)
+        cached = sys.modules.get(module)
+        if cached is not None:
+            entry['loaded'] = True
+            return cached
+
+        start = time.perf_counter()
+        loaded = importlib.import_module(module)
+        entry.update({
+            'loaded': True,
+            'import_ms': (time.perf_counter() - start) * 1000,
+            'first_use': used_by
+        })
+        LOGGER(__name__).info(f"📦 تحميل {module} عند أول استخدام ({entry['import_ms']:.0f}ms)")
+        return loaded
+
+    def handler(self, module: str, attribute: str) -> Callable[..., Awaitable[Any]]:
+        """معالج بديل يستورد وحدته عند أول استدعاء ثم يستدعي المعالج الحقيقي مباشرة"""
+        self._entry(module)
+        resolved = []
+
+        async def stub(*args, **kwargs):
+            if not resolved:
+                resolved.append(getattr(self.load(module, used_by=attribute), attribute))
+            return await resolved[0](*args, **kwargs)
+
+        stub.__name__ = attribute
+        return stub
+
+    def attribute(self, module: str, attribute: str) -> Any:
+        """قيمة من وحدة كسولة (للتصدير عبر __getattr__ على مستوى الحزمة)"""
+        return getattr(self.load(module, used_by=attribute), attribute)
+
+    def is_loaded(self, module: str) -> bool:
+        return module in sys.modules
+
+    def get_stats(self) -> Dict[str, Any]:
+        modules = {name: {**entry, 'loaded': self.is_loaded(name)} for name, entry in self._modules.items()}
+        return {
+            'registered': len(modules),
+            'loaded': sum(1 for entry in modules.values() if entry['loaded']),
+            'import_ms': round(sum(entry['import_ms'] for entry in modules.values()), 1),
+            'modules': modules
+        }
+
+# مثيل عام مشترك
+plugin_registry = LazyPluginRegistry()
+
+# ========================================
+# قياس زمن الاستيراد
+# ========================================
+
+def parse_importtime(output: str) -> List[Tuple[str, int, int]]:
+    """تحليل مخرجات -X importtime إلى [(الوحدة، الزمن الذاتي µs، الزمن التراكمي µs)]"""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        rows.append((parts[2].strip(), int(parts[0]), int(parts[1])))
+    return rows
+
+async def profile_imports(target: str = 'ZeMusic') -> List[Tuple[str, int, int]]:
+    """استيراد target في مفسر جديد وقياس زمن كل وحدة (لا يتأثر بما حُمّل في العملية الحالية)"""
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, '-X', 'importtime', '-c', f'import {target}',
+        cwd=PROJECT_ROOT,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        _, stderr = await asyncio.wait_for(process.communicate(), timeout=PROFILE_TIMEOUT)
+    except asyncio.TimeoutError:
+        process.kill()
+        raise
+    return parse_importtime(stderr.decode('utf-8', 'replace'))
+
+def format_import_profile(rows: List[Tuple[str, int, int]], target: str, top: int = 10) -> str:
+    """تقرير نصي: أثقل وحدات المشروع وأثقل المكتبات الخارجية"""
+    total = next((cumulative for name, _, cumulative in rows if name == target), 0)
+    project = sorted(
+        (row for row in rows if row[0].startswith('ZeMusic.')), key=lambda row: row[2], reverse=True
+    )[:top]
+    # المكتبات الخارجية على مستوى الحزمة فقط (بدون وحداتها الفرعية)
+    libraries = sorted(
+        (row for row in rows if '.' not in row[0] and row[0] not in (target, 'ZeMusic')),
+        key=lambda row: row[2], reverse=True
+    )[:top]
+
+    lines = [f"⏱️ **زمن استيراد `{target}`:** `{total / 1000:.0f}ms` ({len(rows)} وحدة)", "", "📁 **وحدات المشروع:**"]
+    lines += [f"• `{name}`: `{cumulative / 1000:.0f}ms` (ذاتي `{own / 1000:.0f}ms`)" for name, own, cumulative in project]
+    lines += ["", "📚 **المكتبات:**"]
+    lines += [f"• `{name}`: `{cumulative / 1000:.0f}ms`" for name, _, cumulative in libraries]
+
+    stats = plugin_registry.get_stats()
+    lines += ["", f"💤 **الإضافات الكسولة:** `{stats['loaded']}/{stats['registered']}` محملة "
+                  f"(`{stats['import_ms']:.0f}ms` عند أول استخدام)"]
+    for name, entry in stats['modules'].items():
+        status = "✅" if entry['loaded'] else "💤"
+        lines.append(f"{status} `{name}`" + (f" ← `{entry['first_use']}`" if entry['first_use'] else ""))
+    return "\n".join(lines)
+
+async def import_profile_handler(event):
+    """أمر المالك /import_profile [الوحدة]"""
+    if event.sender_id != config.OWNER_ID:
+        return
+
+    parts = (event.raw_text or '').split(maxsplit=1)
+    target = parts[1].strip() if len(parts) > 1 else 'ZeMusic'
+    if not all(part.isidentifier() for part in target.split('.')):
+        await event.reply("❌ اسم وحدة غير صالح")
+        return
+
+    message = await event.reply(f"⏳ قياس زمن استيراد `{target}` في مفسر جديد...")
+    try:
+        rows = await profile_imports(target)
+        if not rows:
+            await message.edit(f"❌ لم يُنتج استيراد `{target}` أي قياسات")
+            return
+        await message.edit(format_import_profile(rows, target))
+    except asyncio.TimeoutError:
+        await message.edit(f"⏱️ انتهت مهلة القياس ({PROFILE_TIMEOUT}s)")
+    except Exception as e:
+        LOGGER(__name__).error(f"❌ خطأ في قياس الاستيراد: {e}")
+        await message.edit(f"❌ خطأ في القياس: {e}")
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+كاش عضوية قنوات الاشتراك الإجباري
+كاش واحد محدود الحجم لكل فحوصات الاشتراك: نتائج إيجابية وسلبية بمدد صلاحية مختلفة،
+دمج الفحوصات المتزامنة لنفس المستخدم، ومُحدّث في الخلفية يحمّل أعضاء القناة على صفحات
+"""
+
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Union
+
+from telethon.errors import FloodWaitError, UserNotParticipantError
+from telethon.tl.functions.channels import GetParticipantRequest, GetParticipantsRequest
+from telethon.tl.types import ChannelParticipantBanned, ChannelParticipantLeft, ChannelParticipantsRecent
+
+import config
+from ZeMusic.logging import LOGGER
+from ZeMusic.core.ttl_cache import TTLCache
+from ZeMusic.core.singleflight import SingleFlight
+
+# الحد الأقصى لعدد الأعضاء في طلب GetParticipants واحد
+PAGE_SIZE = 200
+
+# مهلة بين صفحات التحميل الجماعي (لتجنب FloodWait)
+PAGE_DELAY = 0.5
+
+# إعادة المحاولة للقنوات التي لا يملك البوت فيها صلاحية عرض الأعضاء
+UNSUPPORTED_RETRY = 3600
+
+def channel_key(channel: Union[int, str]) -> Union[int, str]:
+    """توحيد معرف القناة: رقم للمعرفات الرقمية، واسم مستخدم بدون @ بأحرف صغيرة"""
+    if isinstance(channel, int):
+        return channel
+    channel = str(channel).strip()
+    if channel.lstrip('-').isdigit():
+        return int(channel)
+    return channel.lstrip('@').lower()
+
+class MembershipCache:
+    """كاش عضوية مشترك بين معالج الأوامر ومعالج الاشتراك الإجباري"""
+
+    def __init__(self, maxsize: int = 20000, ttl: float = 600.0, negative_ttl: float = 60.0,
+                 refresh_interval: float = 900.0):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.refresh_interval = refresh_interval
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl, name="membership")
+        self._flight = SingleFlight("membership")
+
+        # القنوات المستخدمة في الفحوصات (القناة -> موعد أقرب تحديث جماعي مسموح)
+        self._channels: Dict[Union[int, str], float] = {}
+        self._refresher: Optional[asyncio.Task] = None
+
+        self.stats = {
+            'lookups': 0,
+            'api_checks': 0,
+            'fail_open': 0,
+            'bulk_pages': 0,
+            'bulk_loaded': 0,
+            'refresh_runs': 0
+        }
+
+    @staticmethod
+    def _client():
+        from ZeMusic.core.telethon_client import telethon_manager
+        return telethon_manager.bot_client
+
+    async def is_member(self, channel: Union[int, str], user_id: int,
+                        extra_check: Optional[Callable[[int], Awaitable[bool]]] = None) -> bool:
+        """
+        هل المستخدم عضو في القناة
+        extra_check: فحص إضافي لغير الأعضاء (مثل طلبات الانضمام المعلقة)
+        نتيجته تُحفظ بمفتاح منفصل فلا تتغير إجابة المستدعين بدونه حسب من ملأ الكاش أولاً
+        عند تعذر الفحص يُسمح بالوصول دون حفظ النتيجة
+        """
+        self.stats['lookups'] += 1
+        channel = channel_key(channel)
+        key = (channel, user_id)
+
+        cached = self._cache.get(key)
+        if extra_check is not None and not cached:
+            # غير عضو (أو غير معروف): نتيجة الفحص الإضافي المحفوظة إن وجدت
+            key = (channel, user_id, 'extra')
+            cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        self._track(channel)
+        result, _ = await self._flight.do(key, lambda: self._check(channel, user_id, extra_check))
+        return result
+
+    async def _check(self, channel: Union[int, str], user_id: int,
+                     extra_check: Optional[Callable[[int], Awaitable[bool]]]) -> bool:
+        client = self._client()
+        if not client or not client.is_connected():
+            self.stats['fail_open'] += 1
+            return True
+
+        self.stats['api_checks'] += 1
+        try:
+            result = await client(GetParticipantRequest(channel=channel, participant=user_id))
+            is_member = not isinstance(result.participant, (ChannelParticipantLeft, ChannelParticipantBanned))
+        except UserNotParticipantError:
+            is_member = False
+        except Exception as e:
+            LOGGER(__name__).debug(f"تعذر فحص عضوية {user_id} في {channel}: {e}")
+            self.stats['fail_open'] += 1
+            return True
+
+        self.set(channel, user_id, is_member)
+        if is_member or extra_check is None:
+            return is_member
+
+        try:
+            accepted = await extra_check(user_id)
+        except Exception:
+            accepted = False
+        self._cache.set((channel, user_id, 'extra'), accepted,
+                        ttl=self.ttl if accepted else self.negative_ttl)
+        return accepted
+
+    def set(self, channel: Union[int, str], user_id: int, is_member: bool):
+        """حفظ نتيجة (النتائج السلبية بمدة أقصر حتى لا يُحجب من اشترك للتو)"""
+        self._cache.set((channel_key(channel), user_id), is_member,
+                        ttl=self.ttl if is_member else self.negative_ttl)
+
+    def invalidate(self, channel: Union[int, str], user_id: int):
+        """إبطال نتيجة مستخدم (عند ضغط زر التحقق من الاشتراك مثلاً)"""
+        channel = channel_key(channel)
+        self._cache.pop((channel, user_id))
+        self._cache.pop((channel, user_id, 'extra'))
+
+    def clear(self):
+        """مسح الكاش بالكامل (عند تغيير القناة أو تفعيل/تعطيل النظام)"""
+        self._cache.clear()
+
+    def cached_entries(self):
+        """نسخة من نتائج العضوية الصالحة: [((القناة، المستخدم)، عضو؟)] بدون نتائج الفحص الإضافي"""
+        return [(key, value) for key, value in self._cache.items() if len(key) == 2]
+
+    # ---------- التحديث الجماعي في الخلفية ----------
+
+    def _track(self, channel: Hashable):
+        if channel not in self._channels:
+            self._channels[channel] = 0.0
+        if self.refresh_interval > 0 and (self._refresher is None or self._refresher.done()):
+            try:
+                self._refresher = asyncio.get_running_loop().create_task(self._refresh_loop())
+            except RuntimeError:
+                pass
+
+    async def _refresh_loop(self):
+        while True:
+            now = time.monotonic()
+            for channel, not_before in list(self._channels.items()):
+                if now < not_before:
+                    continue
+                self.stats['refresh_runs'] += 1
+                ok = await self.bulk_load(channel)
+                self._channels[channel] = time.monotonic() + (self.refresh_interval if ok else UNSUPPORTED_RETRY)
+            await asyncio.sleep(self.refresh_interval)
+
+    async def bulk_load(self, channel: Union[int, str], limit: Optional[int] = None) -> bool:
+        """
+        تحميل أعضاء القناة على صفحات وحفظهم كنتائج إيجابية
+        يُحمّل نصف سعة الكاش كحد أقصى حتى لا يُطرد المستخدمون النشطون
+        """
+        client = self._client()
+        if not client or not client.is_connected():
+            return False
+
+        channel = channel_key(channel)
+        limit = limit or self._cache.maxsize // 2
+        offset = loaded = 0
+        try:
+            while loaded < limit:
+                try:
+                    page = await client(GetParticipantsRequest(
+                        channel=channel, filter=ChannelParticipantsRecent(),
+                        offset=offset, limit=min(PAGE_SIZE, limit - loaded), hash=0
+                    ))
+                except FloodWaitError as e:
+                    LOGGER(__name__).warning(f"⏳ FloodWait أثناء تحميل أعضاء {channel}: {e.seconds}s")
+                    await asyncio.sleep(e.seconds)
+                    continue
+
+                participants = getattr(page, 'participants', None) or []
+                if not participants:
+                    break
+                for participant in participants:
+                    user_id = getattr(participant, 'user_id', None)
+                    if user_id is not None:
+                        self.set(channel, user_id, True)
+                self.stats['bulk_pages'] += 1
+                loaded += len(participants)
+                offset += len(participants)
+                if offset >= getattr(page, 'count', 0):
+                    break
+                await asyncio.sleep(PAGE_DELAY)
+        except Exception as e:
+            LOGGER(__name__).debug(f"تعذر تحميل أعضاء {channel} (قد يحتاج البوت صلاحية مدير): {e}")
+            return False
+        finally:
+            self.stats['bulk_loaded'] += loaded
+
+        if loaded:
+            LOGGER(__name__).info(f"👥 تم تحميل {loaded} عضو من {channel} إلى كاش العضوية")
+        return True
+
+    def shutdown(self):
+        if self._refresher and not self._refresher.done():
+            self._refresher.cancel()
+        self._refresher = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'coalesced': self._flight.stats['coalesced'],
+            'channels': len(self._channels),
+            'cache': self._cache.get_stats()
+        }
+
+# مثيل عام مشترك
+membership_cache = MembershipCache(
+    maxsize=config.MEMBERSHIP_CACHE_SIZE,
+    ttl=config.MEMBERSHIP_CACHE_TTL,
+    negative_ttl=config.MEMBERSHIP_NEGATIVE_TTL,
+    refresh_interval=config.MEMBERSHIP_REFRESH_INTERVAL
+)
@@ -0,0 +1,346 @@
+# -*- coding: utf-8 -*-
+"""
+كاش بيانات يوتيوب بطبقتين
+الطبقة الأولى: LRU محدود في الذاكرة
+الطبقة الثانية: مخزن SQLite واحد (مع mmap) بدلاً من ملف JSON لكل استعلام
+مع مدة صلاحية حقيقية لكل نوع، تقديم القيمة القديمة مع التحديث بالخلفية،
+وطرد الأقل استخداماً عند تجاوز الحجم
+"""
+
+import os
+import re
+import json
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import config
+from ZeMusic.logging import LOGGER
+from ZeMusic.core.singleflight import SingleFlight
+from ZeMusic.core.sqlite_pool import get_pool
+from ZeMusic.core.ttl_cache import TTLCache
+
+# النوع: (مدة الصلاحية، نافذة التقديم بعد الانتهاء مع التحديث بالخلفية) بالثواني
+KIND_POLICIES = {
+    'details': (24 * 3600, 7 * 24 * 3600),
+    'track_search': (6 * 3600, 2 * 24 * 3600),
+    'slider': (6 * 3600, 24 * 3600),
+    'playlist': (3600, 6 * 3600),
+    # روابط البث المباشرة تنتهي صلاحيتها عند يوتيوب فلا تُقدم بعد انتهائها
+    'video_url': (4 * 3600, 0),
+    # بيانات رسم الصورة المصغرة (العنوان، المدة، المشاهدات)
+    'thumb_meta': (24 * 3600, 7 * 24 * 3600),
+}
+DEFAULT_POLICY = (6 * 3600, 24 * 3600)
+
+# أنواع تُطبّع روابطها إلى معرف الفيديو
+VIDEO_KEYED_KINDS = ('details', 'video_url', 'thumb_meta')
+
+# الطرد حتى هذه النسبة من الحجم الأقصى لتجنب الطرد مع كل كتابة
+EVICT_TARGET_RATIO = 0.9
+
+# حجم ذاكرة mmap للمخزن
+MMAP_SIZE = 64 * 1024 * 1024
+
+# أقل فترة بين تسجيلين لوقت استخدام نفس العنصر (ثوان)
+TOUCH_INTERVAL = 300
+
+VIDEO_ID_PATTERN = re.compile(r'(?:v=|youtu\.be/|shorts/|embed/|live/)([A-Za-z0-9_-]{11})')
+
+# معرف فيديو مجرد (حساس لحالة الأحرف فلا يُطبّع)
+BARE_VIDEO_ID_PATTERN = re.compile(r'[A-Za-z0-9_-]{11}')
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS metadata_cache (
+        key TEXT PRIMARY KEY,
+        data TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        created_at REAL NOT NULL,
+        expires_at REAL NOT NULL,
+        stale_until REAL NOT NULL,
+        accessed_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_metadata_cache_stale ON metadata_cache(stale_until);
+    CREATE INDEX IF NOT EXISTS idx_metadata_cache_accessed ON metadata_cache(accessed_at);
+'''
+
+def make_key(kind: str, query: str) -> str:
+    """مفتاح مُطبّع: روابط الفيديو تُختصر لمعرفه والنصوص تُوحد حالتها ومسافاتها"""
+    query = str(query).strip()
+    if kind in VIDEO_KEYED_KINDS and query.startswith(('http://', 'https://')):
+        match = VIDEO_ID_PATTERN.search(query)
+        if match:
+            return f"{kind}:{match.group(1)}"
+    elif kind in VIDEO_KEYED_KINDS and BARE_VIDEO_ID_PATTERN.fullmatch(query):
+        return f"{kind}:{query}"
+    elif not query.startswith(('http://', 'https://')):
+        query = ' '.join(query.lower().split())
+    return f"{kind}:{query}"
+
+def _policy(key: str) -> Tuple[int, int]:
+    return KIND_POLICIES.get(key.split(':', 1)[0], DEFAULT_POLICY)
+
+class MetadataCache:
+    """كاش بطبقتين (ذاكرة ← SQLite) مع stale-while-revalidate"""
+
+    def __init__(self, db_path: str, memory_items: int = 2000, max_bytes: int = 64 * 1024 * 1024):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self._pool = None
+        self._ready = False
+        self._total_bytes = 0
+
+        # الذاكرة تحفظ (البيانات، انتهاء الصلاحية، نهاية نافذة التقديم)
+        self._memory = TTLCache(memory_items, ttl=DEFAULT_POLICY[0], name="youtube_metadata")
+        self._flight = SingleFlight("youtube_metadata")
+        self._touched: Dict[str, float] = {}
+        # آخر تسجيل استخدام لكل مفتاح (إصابات الذاكرة تُسجل مرة كل TOUCH_INTERVAL)
+        self._recent_touch = TTLCache(memory_items, ttl=TOUCH_INTERVAL, name="youtube_metadata_touch")
+        self._refreshing = set()
+
+        self.stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'stale_served': 0,
+            'refreshes': 0,
+            'writes': 0,
+            'evicted': 0
+        }
+
+    # ========================================
+    # المخزن
+    # ========================================
+
+    async def _ensure_ready(self):
+        if self._ready:
+            return
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._pool = get_pool(self.db_path, readers=4, mmap_size=MMAP_SIZE)
+
+        def _create(conn):
+            conn.executescript(SCHEMA)
+            conn.commit()
+            return conn.execute('SELECT COALESCE(SUM(size), 0) FROM metadata_cache').fetchone()[0]
+
+        self._total_bytes = await self._pool.run_write(_create)
+        self._ready = True
+
+    def _touch(self, key: str, now: float):
+        """تسجيل وقت الاستخدام ليُكتب مع الكتابة التالية (أساس الطرد والتنظيف)"""
+        if self._recent_touch.get(key) is None:
+            self._recent_touch.set(key, True)
+            self._touched[key] = now
+
+    def _remember(self, key: str, data: Any, expires_at: float, stale_until: float):
+        ttl = stale_until - time.time()
+        if ttl > 0:
+            self._memory.set(key, (data, expires_at, stale_until), ttl=ttl)
+
+    async def lookup(self, key: str) -> Optional[Tuple[Any, bool]]:
+        """(البيانات، هل ما زالت صالحة) أو None إذا لم توجد أو انتهت نافذة تقديمها"""
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            data, expires_at, _ = entry
+            self.stats['memory_hits'] += 1
+            self._touch(key, now)
+            return data, expires_at > now
+
+        await self._ensure_ready()
+
+        def _read(conn):
+            row = conn.execute(
+                'SELECT data, expires_at, stale_until FROM metadata_cache WHERE key = ? AND stale_until > ?',
+                (key, now)
+            ).fetchone()
+            # فك JSON داخل خيط المنفذ
+            return None if row is None else (json.loads(row['data']), row['expires_at'], row['stale_until'])
+
+        row = await self._pool.run_read(_read)
+        if row is None:
+            self.stats['misses'] += 1
+            return None
+
+        data, expires_at, stale_until = row
+        self.stats['disk_hits'] += 1
+        self._touch(key, now)
+        self._remember(key, data, expires_at, stale_until)
+        return data, expires_at > now
+
+    async def get(self, key: str) -> Optional[Any]:
+        """البيانات الصالحة فقط"""
+        found = await self.lookup(key)
+        if found and found[1]:
+            return found[0]
+        return None
+
+    async def set(self, key: str, data: Any, ttl: Optional[int] = None):
+        """حفظ في الطبقتين ثم الطرد إذا تجاوز المخزن حجمه"""
+        await self._ensure_ready()
+        fresh, stale = _policy(key)
+        if ttl is not None:
+            fresh = ttl
+        now = time.time()
+        expires_at = now + fresh
+        stale_until = expires_at + stale
+        payload = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+        size = len(payload.encode('utf-8')) + len(key)
+
+        self._remember(key, data, expires_at, stale_until)
+        touched, self._touched = self._touched, {}
+
+        def _write(conn):
+            old = conn.execute('SELECT size FROM metadata_cache WHERE key = ?', (key,)).fetchone()
+            conn.execute(
+                '''INSERT INTO metadata_cache (key, data, size, created_at, expires_at, stale_until, accessed_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(key) DO UPDATE SET
+                       data = excluded.data,
+                       size = excluded.size,
+                       created_at = excluded.created_at,
+                       expires_at = excluded.expires_at,
+                       stale_until = excluded.stale_until,
+                       accessed_at = excluded.accessed_at''',
+                (key, payload, size, now, expires_at, stale_until, now)
+            )
+            if touched:
+                conn.executemany(
+                    'UPDATE metadata_cache SET accessed_at = ? WHERE key = ?',
+                    [(at, touched_key) for touched_key, at in touched.items()]
+                )
+            conn.commit()
+            return size - (old[0] if old else 0)
+
+        self._total_bytes += await self._pool.run_write(_write)
+        self.stats['writes'] += 1
+        if self._total_bytes > self.max_bytes:
+            await self._evict()
+
+    async def _evict(self):
+        """طرد الأقل استخداماً حتى EVICT_TARGET_RATIO من الحجم الأقصى"""
+        excess = self._total_bytes - int(self.max_bytes * EVICT_TARGET_RATIO)
+
+        def _delete(conn):
+            freed, keys = 0, []
+            cursor = conn.execute('SELECT key, size FROM metadata_cache ORDER BY accessed_at')
+            for row in cursor:
+                if freed >= excess:
+                    break
+                keys.append(row['key'])
+                freed += row['size']
+            cursor.close()
+            conn.executemany('DELETE FROM metadata_cache WHERE key = ?', [(key,) for key in keys])
+            conn.commit()
+            return keys, freed
+
+        keys, freed = await self._pool.run_write(_delete)
+        for key in keys:
+            self._memory.pop(key)
+        self._total_bytes -= freed
+        self.stats['evicted'] += len(keys)
+        LOGGER(__name__).debug(f"🧹 طرد {len(keys)} عنصر من كاش يوتيوب ({freed / 1024:.0f}KB)")
+
+    # ========================================
+    # stale-while-revalidate
+    # ========================================
+
+    async def get_or_fetch(self, kind: str, query: str,
+                           fetch: Callable[[], Awaitable[Optional[Any]]]) -> Optional[Any]:
+        """
+        قراءة من الكاش أو الجلب عند عدم الوجود
+        القيمة المنتهية داخل نافذة التقديم تُعاد فوراً ويُحدَّث العنصر بالخلفية
+        fetch تعيد None عند الفشل فلا يُحفظ شيء
+        """
+        key = make_key(kind, query)
+        found = await self.lookup(key)
+        if found is not None:
+            data, fresh = found
+            if not fresh:
+                self.stats['stale_served'] += 1
+                self._schedule_refresh(key, fetch)
+            return data
+
+        data, _ = await self._flight.do(key, lambda: self._load(key, fetch))
+        return data
+
+    async def _load(self, key: str, fetch: Callable[[], Awaitable[Optional[Any]]]) -> Optional[Any]:
+        data = await fetch()
+        if data:
+            await self.set(key, data)
+        return data
+
+    def _schedule_refresh(self, key: str, fetch: Callable[[], Awaitable[Optional[Any]]]):
+        if key in self._refreshing or self._flight.in_flight(key):
+            return
+        self._refreshing.add(key)
+        self.stats['refreshes'] += 1
+
+        async def _refresh():
+            try:
+                await self._flight.do(key, lambda: self._load(key, fetch))
+            except Exception as e:
+                LOGGER(__name__).debug(f"تعذر تحديث عنصر الكاش {key}: {e}")
+            finally:
+                self._refreshing.discard(key)
+
+        asyncio.create_task(_refresh())
+
+    # ========================================
+    # الصيانة
+    # ========================================
+
+    async def cleanup(self, max_age_hours: Optional[int] = None) -> int:
+        """
+        حذف مفهرس للعناصر المنتهية أو غير المستخدمة منذ أطول من نافذتها
+        (الأطول بين مدة الصلاحية ونافذة التقديم، أو max_age_hours إن كانت أطول)
+        """
+        await self._ensure_ready()
+        now = time.time()
+        min_age = (max_age_hours or 0) * 3600
+        touched, self._touched = self._touched, {}
+
+        def _delete(conn):
+            if touched:
+                conn.executemany(
+                    'UPDATE metadata_cache SET accessed_at = ? WHERE key = ?',
+                    [(at, key) for key, at in touched.items()]
+                )
+            deleted = conn.execute(
+                '''DELETE FROM metadata_cache WHERE stale_until < ?
+                   OR accessed_at < ? - MAX(stale_until - expires_at, expires_at - created_at, ?)''',
+                (now, now, min_age)
+            ).rowcount
+            conn.commit()
+            total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM metadata_cache').fetchone()[0]
+            return deleted, total
+
+        deleted, self._total_bytes = await self._pool.run_write(_delete)
+        return deleted
+
+    async def clear(self):
+        """مسح الطبقتين"""
+        await self._ensure_ready()
+        self._memory.clear()
+        await self._pool.execute('DELETE FROM metadata_cache')
+        self._total_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats['memory_hits'] + self.stats['disk_hits'] + self.stats['misses']
+        hits = lookups - self.stats['misses']
+        return {
+            **self.stats,
+            'memory': self._memory.get_stats(),
+            'disk_bytes': self._total_bytes,
+            'max_bytes': self.max_bytes,
+            'hit_rate': round(hits / lookups * 100, 1) if lookups else 0.0
+        }
+
+# المثيل العام
+metadata_cache = MetadataCache(
+    getattr(config, "YOUTUBE_CACHE_DB", "cache/youtube_cache.db"),
+    memory_items=getattr(config, "YOUTUBE_CACHE_MEMORY_ITEMS", 2000),
+    max_bytes=getattr(config, "YOUTUBE_CACHE_MAX_MB", 64) * 1024 * 1024
+)
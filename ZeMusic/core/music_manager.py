@@ -5,13 +5,12 @@
 
 import asyncio
 import time
-import random
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
 
 import config
 from ZeMusic.logging import LOGGER
-from ZeMusic.core.telethon_client import telethon_manager
+from ZeMusic.core.assistant_scheduler import assistant_scheduler
 
 @dataclass
 class MusicSession:
@@ -82,6 +81,7 @@ class TelethonMusicManager:
             play_result = await self._start_playback(session)
             
             if play_result['success']:
+                assistant_scheduler.call_started(chat_id, session.assistant_id)
                 return {
                     'success': True,
                     'session': session,
@@ -107,6 +107,7 @@ class TelethonMusicManager:
                 session = self.active_sessions[chat_id]
                 session.is_active = False
                 del self.active_sessions[chat_id]
+                assistant_scheduler.call_ended(chat_id)
                 
                 # مسح قائمة التشغيل
                 if chat_id in self.queues:
@@ -264,19 +265,15 @@ class TelethonMusicManager:
     async def _get_available_assistant(self, chat_id: int) -> Optional[Dict[str, Any]]:
         """الحصول على حساب مساعد متاح"""
         try:
-            # الحصول على قائمة المساعدين من telethon_manager
-            assistants = await telethon_manager.get_available_assistants()
-            
-            if not assistants:
+            # المساعد المرتبط بالمجموعة أو الأقل حملاً
+            assistant_id = await assistant_scheduler.assign(chat_id)
+            if assistant_id is None:
                 return None
             
-            # اختيار حساب مساعد عشوائي (يمكن تحسين هذا لاحقاً)
-            assistant = random.choice(list(assistants.values()))
-            
             return {
-                'id': assistant.get('user_id'),
-                'name': assistant.get('username', 'مساعد'),
-                'client': assistant.get('client')
+                'id': assistant_id,
+                'name': f"مساعد {assistant_id}",
+                'client': assistant_scheduler.client(assistant_id)
             }
             
         except Exception as e:
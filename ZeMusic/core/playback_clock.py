@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+ساعة التشغيل المبنية على الأحداث
+- لكل بث: لحظة بدء (monotonic) + موضع المقطع عندها + السرعة وحالة الإيقاف المؤقت
+- الزمن المنقضي (played) يُحسب عند الطلب بدل عدّه كل ثانية لكل مجموعة
+- نهاية المقاطع تُجدول في كومة مواعيد واحدة يخدمها مؤقت واحد على حلقة الأحداث
+  (التكلفة تتناسب مع عدد الأحداث وليس مع المجموعات × الثواني)
+"""
+
+import time
+import heapq
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ZeMusic.logging import LOGGER
+
+class _Stream:
+    """حالة ساعة بث واحد"""
+
+    __slots__ = ('duration', 'position', 'anchor', 'speed', 'paused', 'ended', 'generation')
+
+    def __init__(self, duration: float, position: float, speed: float, generation: int):
+        self.duration = duration
+        # موضع المقطع (ثوان) عند لحظة المرجع anchor
+        self.position = position
+        self.anchor = time.monotonic()
+        self.speed = speed
+        self.paused = False
+        self.ended = False
+        # يُبطل مواعيد النهاية القديمة عند أي تغيير
+        self.generation = generation
+
+    def played(self, now: float) -> float:
+        position = self.position
+        if not self.paused:
+            position += (now - self.anchor) * self.speed
+        if self.duration > 0:
+            position = min(position, self.duration)
+        return max(0.0, position)
+
+    def rebase(self, now: float):
+        """نقل المرجع إلى الآن (قبل تغيير السرعة أو الإيقاف)"""
+        self.position = self.played(now)
+        self.anchor = now
+
+    def deadline(self) -> Optional[float]:
+        """موعد النهاية على الساعة الرتيبة (None إذا كان متوقفاً أو بلا مدة)"""
+        if self.paused or self.ended or self.duration <= 0 or self.speed <= 0:
+            return None
+        return self.anchor + (self.duration - self.position) / self.speed
+
+class PlaybackClock:
+    """ساعات التشغيل لكل المجموعات مع مؤقت نهاية واحد"""
+
+    def __init__(self):
+        self._streams: Dict[int, _Stream] = {}
+        # (الموعد، المجموعة، الجيل)
+        self._deadlines: List[Tuple[float, int, int]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_at: Optional[float] = None
+        self._generation = 0
+        self._listeners: List[Callable[[int], Any]] = []
+
+        self.stats = {
+            'started': 0,
+            'paused': 0,
+            'resumed': 0,
+            'seeks': 0,
+            'speed_changes': 0,
+            'ended': 0,
+            'timer_fires': 0
+        }
+
+    # ---------- الأحداث ----------
+
+    def start(self, chat_id: int, duration: float, position: float = 0.0, speed: float = 1.0):
+        """بدء مقطع جديد (أو إعادة تشغيله) في المجموعة"""
+        self._generation += 1
+        try:
+            duration = float(duration or 0)
+        except (TypeError, ValueError):
+            duration = 0.0
+        stream = _Stream(duration, max(0.0, position), speed, self._generation)
+        self._streams[chat_id] = stream
+        self.stats['started'] += 1
+        self._schedule(chat_id, stream)
+
+    def pause(self, chat_id: int):
+        stream = self._streams.get(chat_id)
+        if stream is None or stream.paused:
+            return
+        stream.rebase(time.monotonic())
+        stream.paused = True
+        self._touch(stream)
+        self.stats['paused'] += 1
+
+    def resume(self, chat_id: int):
+        stream = self._streams.get(chat_id)
+        if stream is None or not stream.paused:
+            return
+        stream.anchor = time.monotonic()
+        stream.paused = False
+        self._touch(stream)
+        self.stats['resumed'] += 1
+        self._schedule(chat_id, stream)
+
+    def seek(self, chat_id: int, position: float):
+        """الانتقال إلى موضع محدد في المقطع (ثوان)"""
+        stream = self._streams.get(chat_id)
+        if stream is None:
+            return
+        stream.position = max(0.0, position)
+        stream.anchor = time.monotonic()
+        stream.ended = False
+        self._touch(stream)
+        self.stats['seeks'] += 1
+        self._schedule(chat_id, stream)
+
+    def set_speed(self, chat_id: int, speed: float):
+        """تغيير سرعة التشغيل (الموضع الحالي محفوظ)"""
+        stream = self._streams.get(chat_id)
+        if stream is None or speed <= 0 or speed == stream.speed:
+            return
+        stream.rebase(time.monotonic())
+        stream.speed = speed
+        self._touch(stream)
+        self.stats['speed_changes'] += 1
+        self._schedule(chat_id, stream)
+
+    def stop(self, chat_id: int):
+        """إزالة ساعة المجموعة (مواعيدها في الكومة تُهمل عند حلولها)"""
+        self._streams.pop(chat_id, None)
+
+    # ---------- القراءة ----------
+
+    def played(self, chat_id: int) -> int:
+        """الثواني المنقضية من المقطع الحالي"""
+        stream = self._streams.get(chat_id)
+        if stream is None:
+            return 0
+        return int(stream.played(time.monotonic()))
+
+    def remaining(self, chat_id: int) -> Optional[int]:
+        stream = self._streams.get(chat_id)
+        if stream is None or stream.duration <= 0:
+            return None
+        return max(0, int(stream.duration - stream.played(time.monotonic())))
+
+    def is_running(self, chat_id: int) -> bool:
+        stream = self._streams.get(chat_id)
+        return stream is not None and not stream.paused and not stream.ended
+
+    # ---------- نهاية المقاطع ----------
+
+    def add_listener(self, callback: Callable[[int], Any]):
+        """دالة تُستدعى بمعرف المجموعة عند انتهاء زمن المقطع (عادية أو غير متزامنة)"""
+        self._listeners.append(callback)
+
+    def _touch(self, stream: _Stream):
+        # أي موعد نهاية سابق لهذا البث لم يعد صالحاً
+        self._generation += 1
+        stream.generation = self._generation
+
+    def _schedule(self, chat_id: int, stream: _Stream):
+        deadline = stream.deadline()
+        if deadline is None:
+            return
+        heapq.heappush(self._deadlines, (deadline, chat_id, stream.generation))
+        self._arm()
+
+    def _arm(self):
+        """ضبط المؤقت الوحيد على أقرب موعد في الكومة"""
+        if not self._deadlines:
+            return
+        head = self._deadlines[0][0]
+        if self._timer is not None and self._timer_at is not None and self._timer_at <= head:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # خارج حلقة الأحداث: played يبقى صحيحاً والمواعيد تُخدم عند أول حدث داخلها
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        # الساعة الرتيبة لـ time وحلقة الأحداث قد تختلفان في الأصل
+        self._timer = loop.call_at(loop.time() + max(0.0, head - time.monotonic()), self._fire)
+        self._timer_at = head
+
+    def _fire(self):
+        self._timer = None
+        self._timer_at = None
+        self.stats['timer_fires'] += 1
+        now = time.monotonic()
+
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _, chat_id, generation = heapq.heappop(self._deadlines)
+            stream = self._streams.get(chat_id)
+            if stream is None or stream.generation != generation:
+                continue
+            stream.rebase(now)
+            stream.ended = True
+            self.stats['ended'] += 1
+            self._notify(chat_id)
+
+        self._arm()
+
+    def _notify(self, chat_id: int):
+        for callback in self._listeners:
+            try:
+                result = callback(chat_id)
+                if asyncio.iscoroutine(result):
+                    asyncio.create_task(result)
+            except Exception as e:
+                LOGGER(__name__).error(f"❌ خطأ في معالج نهاية المقطع ({chat_id}): {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'streams': len(self._streams),
+            'running': sum(1 for chat_id in self._streams if self.is_running(chat_id)),
+            'pending_deadlines': len(self._deadlines)
+        }
+
+# مثيل عام مشترك
+playback_clock = PlaybackClock()
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+التحميل المسبق للمقاطع التالية في الطابور
+- عند أي تغيير في قائمة مجموعة تُحمّل المقاطع التالية للحالي (مع صورها المصغرة) في الخلفية
+- المقطع الجاهز (وكل تكرار له في القائمة) يُستبدل مسار vid_ فيه بالملف المحمّل فيصبح التخطي إليه فورياً
+- حد لكل مجموعة (عدد المقاطع المسبقة) وحد عام للتحميلات المتزامنة مع طابور انتظار محدود
+"""
+
+import asyncio
+from typing import Any, Dict, Optional, Set, Tuple
+
+import config
+from ZeMusic.logging import LOGGER
+from ZeMusic.core.queue_store import QueueEntry, QueueStore, queue_store
+
+# المهام المنتظرة للحد العام (لكل تحميل جارٍ) قبل تأجيل المجموعات الجديدة
+PENDING_FACTOR = 4
+
+class QueuePrefetcher:
+    """تحميل مسبق للمقاطع التالية في قوائم التشغيل ضمن حدود لكل مجموعة وحد عام"""
+
+    def __init__(self, store: QueueStore, ahead: int = 2, concurrency: int = 4):
+        self.store = store
+        self.ahead = max(0, ahead)
+        self.concurrency = max(1, concurrency)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        # (المجموعة، الملف vid_) -> مهمة التحميل
+        self._tasks: Dict[Tuple[int, str], asyncio.Task] = {}
+        self._pending: Set[int] = set()
+        self._deferred: Set[int] = set()
+        self._scheduled = False
+
+        self.stats = {
+            'started': 0,
+            'ready': 0,
+            'failed': 0,
+            'deferred': 0,
+            'cancelled': 0
+        }
+
+        store.add_listener(self.queue_changed)
+
+    # ---------- الجدولة ----------
+
+    def queue_changed(self, chat_id: int):
+        """يُستدعى عند أي تغيير في قائمة مجموعة (التغييرات المتتالية تُعالج مرة واحدة)"""
+        if self.ahead == 0:
+            return
+        self._pending.add(chat_id)
+        if self._scheduled:
+            return
+        try:
+            asyncio.get_running_loop().call_soon(self._run_pending)
+            self._scheduled = True
+        except RuntimeError:
+            # خارج حلقة الأحداث (تحميل القوائم المحفوظة مثلاً)
+            pass
+
+    def _run_pending(self):
+        self._scheduled = False
+        pending, self._pending = self._pending, set()
+        for chat_id in pending:
+            self._schedule_chat(chat_id)
+
+    def _window(self, chat_id: int):
+        """المقاطع التالية للحالي ضمن حد المجموعة"""
+        queue = self.store.get(chat_id)
+        if not queue:
+            return []
+        return [entry for index, entry in enumerate(queue) if 1 <= index <= self.ahead]
+
+    def _schedule_chat(self, chat_id: int):
+        window = self._window(chat_id)
+        wanted = {entry['file'] for entry in window if self._needs_prefetch(entry)}
+
+        # إلغاء تحميلات مقاطع خرجت من النافذة (تُخطيت أو حُذفت القائمة)
+        for key in [key for key in self._tasks if key[0] == chat_id and key[1] not in wanted]:
+            task = self._tasks.pop(key)
+            if not task.done():
+                task.cancel()
+                self.stats['cancelled'] += 1
+
+        for entry in window:
+            if not self._needs_prefetch(entry) or (chat_id, entry['file']) in self._tasks:
+                continue
+            if len(self._tasks) >= self.concurrency * PENDING_FACTOR:
+                # الحد العام ممتلئ: المجموعة تُعاد جدولتها عند انتهاء أي تحميل
+                self._deferred.add(chat_id)
+                self.stats['deferred'] += 1
+                return
+            key = (chat_id, entry['file'])
+            task = asyncio.create_task(self._prefetch(chat_id, entry))
+            self._tasks[key] = task
+            task.add_done_callback(lambda done, key=key: self._finished(key, done))
+            self.stats['started'] += 1
+
+    @staticmethod
+    def _needs_prefetch(entry: QueueEntry) -> bool:
+        file = entry.get('file') or ''
+        return file.startswith('vid_') and not entry.get('prefetched')
+
+    def _finished(self, key: Tuple[int, str], task: asyncio.Task):
+        # مهمة ملغاة قد تنتهي بعد إنشاء بديلتها لنفس المفتاح: لا تُزال البديلة
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if self._deferred:
+            deferred, self._deferred = self._deferred, set()
+            for chat_id in deferred:
+                self.queue_changed(chat_id)
+
+    # ---------- التحميل ----------
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    async def _prefetch(self, chat_id: int, entry: QueueEntry):
+        from ZeMusic import YouTube
+        from ZeMusic.utils.thumbnails import get_thumb
+
+        vidid = entry['vidid']
+        placeholder = entry['file']
+        video = True if str(entry.get('streamtype')) == 'video' else None
+        try:
+            async with self._get_semaphore():
+                result = await YouTube.download(vidid, None, video=video, videoid=True)
+                if not result.success or not result.file_path:
+                    self.stats['failed'] += 1
+                    LOGGER(__name__).debug(f"فشل التحميل المسبق لـ {vidid}: {result.error_message}")
+                    return
+                # الصورة المصغرة تُرسم مرة وتُقرأ من الكاش عند التخطي
+                await get_thumb(vidid)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.stats['failed'] += 1
+            LOGGER(__name__).debug(f"فشل التحميل المسبق لـ {vidid}: {e}")
+            return
+
+        queue = self.store.get(chat_id)
+        if not queue:
+            return
+        # كل تكرارات المقطع بعد الحالي تشترك في نفس التحميل (المفتاح هو الملف vid_)
+        # أما ما بدأ تشغيله أو خرج من القائمة أثناء التحميل فيبقى كما هو
+        swapped = 0
+        for queued in list(queue)[1:]:
+            if queued.get('file') != placeholder:
+                continue
+            queued['file'] = result.file_path
+            queued['prefetched'] = True
+            self.store.files.release(placeholder)
+            self.store.files.acquire(result.file_path)
+            swapped += 1
+        if swapped:
+            self.store.touch(chat_id)
+            self.stats['ready'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'in_flight': len(self._tasks),
+            'deferred_chats': len(self._deferred),
+            'ahead': self.ahead,
+            'concurrency': self.concurrency
+        }
+
+# مثيل عام مشترك
+queue_prefetcher = QueuePrefetcher(
+    queue_store,
+    ahead=config.QUEUE_PREFETCH_AHEAD,
+    concurrency=config.QUEUE_PREFETCH_CONCURRENCY
+)
@@ -0,0 +1,411 @@
+# -*- coding: utf-8 -*-
+"""
+مخزن قوائم التشغيل لكل مجموعة
+- قائمة كل مجموعة deque: السحب من الأول والإدراج في المقدمة O(1)
+- عناصر القائمة بحقول ثابتة (__slots__) مع واجهة القاموس القديمة entry["title"]
+- عداد مراجع للملفات بدل قائمة autoclean (الملف يُحذف عند خروج آخر عنصر يستخدمه)
+- تخطي N مقطع دفعة واحدة
+- حفظ اختياري في SQLite ليبقى الطابور بعد إعادة التشغيل
+"""
+
+import json
+import random
+import asyncio
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+import config
+from ZeMusic.logging import LOGGER
+
+_MISSING = object()
+
+# حقول QueueEntry الثابتة
+_FIELDS = frozenset((
+    'title', 'dur', 'streamtype', 'by', 'user_id', 'chat_id', 'file', 'vidid', 'seconds',
+    'old_dur', 'old_second', 'speed_path', 'speed', 'mystic', 'markup', 'prefetched'
+))
+
+_set_field = object.__setattr__
+
+class QueueEntry:
+    """مقطع في قائمة التشغيل (يُقرأ ويُعدل كقاموس للتوافق مع الإضافات القديمة)"""
+
+    __slots__ = tuple(_FIELDS) + ('_extra',)
+
+    # الحقول التي تُحفظ في SQLite (رسالة mystic وحالة الأزرار لا معنى لها بعد إعادة التشغيل،
+    # والملف المحمّل مسبقاً محفوظ في file)
+    PERSISTED = (
+        'title', 'dur', 'streamtype', 'by', 'user_id', 'chat_id', 'file', 'vidid', 'seconds',
+        'old_dur', 'old_second', 'speed_path', 'speed'
+    )
+
+    def __init__(self, **fields):
+        self._extra = None
+        for key, value in fields.items():
+            if key in _FIELDS:
+                _set_field(self, key, value)
+            else:
+                self[key] = value
+
+    @classmethod
+    def coerce(cls, item) -> 'QueueEntry':
+        if isinstance(item, cls):
+            return item
+        return cls(**item)
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any):
+        if key in _FIELDS:
+            _set_field(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in _FIELDS:
+            return getattr(self, key, default)
+        if self._extra is None:
+            return default
+        return self._extra.get(key, default)
+
+    def to_dict(self, persisted_only: bool = False) -> Dict[str, Any]:
+        keys = self.PERSISTED if persisted_only else _FIELDS
+        data = {key: getattr(self, key) for key in keys if hasattr(self, key)}
+        if self._extra and not persisted_only:
+            data.update(self._extra)
+        return data
+
+    def __repr__(self):
+        return f"QueueEntry({self.get('vidid')!r}, {self.get('title')!r})"
+
+class FileRefs:
+    """عدد عناصر القوائم التي تستخدم كل ملف"""
+
+    def __init__(self):
+        self._counts: Dict[str, int] = {}
+
+    def acquire(self, path: str):
+        self._counts[path] = self._counts.get(path, 0) + 1
+
+    def release(self, path: str) -> int:
+        """إنقاص العداد وإرجاع المتبقي (0 = لم يعد أي عنصر يستخدم الملف)"""
+        remaining = self._counts.get(path, 0) - 1
+        if remaining > 0:
+            self._counts[path] = remaining
+            return remaining
+        self._counts.pop(path, None)
+        return 0
+
+    def count(self, path: str) -> int:
+        return self._counts.get(path, 0)
+
+    def clear(self):
+        self._counts.clear()
+
+    def __len__(self):
+        return len(self._counts)
+
+class ChatQueue(deque):
+    """قائمة مجموعة واحدة: deque بواجهة list القديمة (pop(0) و insert(0, ...))"""
+
+    def __init__(self, chat_id: int, store: 'QueueStore', entries: Iterable = ()):
+        super().__init__(QueueEntry.coerce(entry) for entry in entries)
+        self.chat_id = chat_id
+        self._store = store
+
+    def _changed(self):
+        self._store.touch(self.chat_id)
+
+    def append(self, entry):
+        super().append(QueueEntry.coerce(entry))
+        self._changed()
+
+    def appendleft(self, entry):
+        super().appendleft(QueueEntry.coerce(entry))
+        self._changed()
+
+    def extend(self, entries: Iterable):
+        super().extend(QueueEntry.coerce(entry) for entry in entries)
+        self._changed()
+
+    def insert(self, index: int, entry):
+        if index == 0:
+            self.appendleft(entry)
+        else:
+            super().insert(index, QueueEntry.coerce(entry))
+            self._changed()
+
+    def pop(self, index: int = -1) -> QueueEntry:
+        if index == 0:
+            return self.popleft()
+        if index in (-1, len(self) - 1):
+            entry = super().pop()
+        else:
+            entry = self[index]
+            del self[index]
+        self._changed()
+        return entry
+
+    def popleft(self) -> QueueEntry:
+        entry = super().popleft()
+        self._changed()
+        return entry
+
+    def remove(self, entry):
+        super().remove(entry)
+        self._changed()
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+    def __setitem__(self, index: int, entry):
+        super().__setitem__(index, QueueEntry.coerce(entry))
+        self._changed()
+
+    def __delitem__(self, index: int):
+        super().__delitem__(index)
+        self._changed()
+
+    def skip(self, count: int) -> List[QueueEntry]:
+        """سحب أول count مقطع دفعة واحدة"""
+        popleft = super().popleft
+        popped = [popleft() for _ in range(min(count, len(self)))]
+        if popped:
+            self._changed()
+        return popped
+
+    def shuffle(self, keep_head: bool = True):
+        """خلط القائمة مع إبقاء المقطع الحالي في المقدمة"""
+        items = list(self)
+        head = items[:1] if keep_head else []
+        rest = items[len(head):]
+        random.shuffle(rest)
+        super().clear()
+        super().extend(head + rest)
+        self._changed()
+
+class QueueStore:
+    """قوائم كل المجموعات (بديل القاموس ZeMusic.misc.db بنفس واجهته)"""
+
+    def __init__(self, db_path: str, persist: bool = False, flush_interval: float = 5.0):
+        self.db_path = db_path
+        self.persist = persist
+        self.flush_interval = flush_interval
+        self.files = FileRefs()
+
+        self._queues: Dict[int, ChatQueue] = {}
+        self._dirty: Set[int] = set()
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._pool = None
+        self._listeners: List[Callable[[int], Any]] = []
+
+        self.stats = {
+            'enqueued': 0,
+            'skipped': 0,
+            'flushes': 0,
+            'restored': 0
+        }
+
+    # ---------- واجهة القاموس القديمة ----------
+
+    def get(self, chat_id: int, default=None) -> Optional[ChatQueue]:
+        return self._queues.get(chat_id, default)
+
+    def __getitem__(self, chat_id: int) -> ChatQueue:
+        return self._queues[chat_id]
+
+    def __setitem__(self, chat_id: int, entries: Iterable):
+        self._queues[chat_id] = ChatQueue(chat_id, self, entries)
+        self.touch(chat_id)
+
+    def __delitem__(self, chat_id: int):
+        del self._queues[chat_id]
+        self.touch(chat_id)
+
+    def pop(self, chat_id: int, default=None) -> Optional[ChatQueue]:
+        queue = self._queues.pop(chat_id, default)
+        self.touch(chat_id)
+        return queue
+
+    def __contains__(self, chat_id: int) -> bool:
+        return chat_id in self._queues
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._queues)
+
+    def __len__(self) -> int:
+        return len(self._queues)
+
+    def keys(self):
+        return self._queues.keys()
+
+    def items(self):
+        return self._queues.items()
+
+    def clear(self):
+        for chat_id in self._queues:
+            self.touch(chat_id)
+        self._queues.clear()
+        self.files.clear()
+
+    # ---------- العمليات ----------
+
+    def queue(self, chat_id: int) -> ChatQueue:
+        """قائمة المجموعة (تُنشأ فارغة إن لم توجد)"""
+        queue = self._queues.get(chat_id)
+        if queue is None:
+            queue = self._queues[chat_id] = ChatQueue(chat_id, self)
+        return queue
+
+    def enqueue(self, chat_id: int, entry, front: bool = False) -> QueueEntry:
+        """إضافة مقطع (في النهاية أو المقدمة) مع حجز ملفه"""
+        entry = entry if isinstance(entry, QueueEntry) else QueueEntry(**entry)
+        queue = self.queue(chat_id)
+        if front:
+            deque.appendleft(queue, entry)
+        else:
+            deque.append(queue, entry)
+        self.touch(chat_id)
+        file = entry.get('file')
+        if file:
+            self.files.acquire(file)
+        self.stats['enqueued'] += 1
+        return entry
+
+    def skip(self, chat_id: int, count: int = 1) -> List[QueueEntry]:
+        """سحب أول count مقطع (المتصل يحرر ملفاتها عبر auto_clean)"""
+        queue = self._queues.get(chat_id)
+        if not queue:
+            return []
+        popped = queue.skip(count)
+        self.stats['skipped'] += len(popped)
+        return popped
+
+    def add_listener(self, callback: Callable[[int], Any]):
+        """دالة تُستدعى بمعرف المجموعة عند أي تغيير في قائمتها (يجب أن تكون خفيفة)"""
+        self._listeners.append(callback)
+
+    # ---------- الحفظ في SQLite ----------
+
+    def touch(self, chat_id: int):
+        """تسجيل تغيير في قائمة المجموعة (إبلاغ المستمعين وجدولة الحفظ)"""
+        for callback in self._listeners:
+            callback(chat_id)
+        if not self.persist:
+            return
+        self._dirty.add(chat_id)
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._flush_handle = loop.call_later(self.flush_interval, lambda: asyncio.ensure_future(self.flush()))
+
+    async def _ensure_pool(self):
+        if self._pool is not None:
+            return self._pool
+
+        from ZeMusic.core.sqlite_pool import get_pool
+        pool = get_pool(self.db_path)
+
+        def _create(conn):
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS chat_queues (
+                    chat_id INTEGER NOT NULL,
+                    position INTEGER NOT NULL,
+                    entry TEXT NOT NULL,
+                    PRIMARY KEY (chat_id, position)
+                )
+            ''')
+            conn.commit()
+
+        await pool.run_write(_create)
+        self._pool = pool
+        return pool
+
+    async def flush(self):
+        """كتابة قوائم المجموعات المعدلة منذ آخر حفظ (معاملة واحدة)"""
+        self._flush_handle = None
+        if not self.persist or not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, set()
+        rows = {}
+        for chat_id in dirty:
+            queue = self._queues.get(chat_id) or ()
+            rows[chat_id] = [
+                (chat_id, position, json.dumps(entry.to_dict(persisted_only=True), ensure_ascii=False, default=str))
+                for position, entry in enumerate(queue)
+            ]
+
+        def _write(conn):
+            conn.executemany("DELETE FROM chat_queues WHERE chat_id = ?", [(chat_id,) for chat_id in rows])
+            conn.executemany(
+                "INSERT INTO chat_queues (chat_id, position, entry) VALUES (?, ?, ?)",
+                [row for chat_rows in rows.values() for row in chat_rows]
+            )
+            conn.commit()
+
+        try:
+            pool = await self._ensure_pool()
+            await pool.run_write(_write)
+            self.stats['flushes'] += 1
+        except Exception as e:
+            # إعادة المحاولة في الحفظ التالي
+            self._dirty |= dirty
+            LOGGER(__name__).warning(f"⚠️ تعذر حفظ قوائم التشغيل: {e}")
+
+    async def restore(self) -> int:
+        """تحميل القوائم المحفوظة عند بدء التشغيل (وإعادة بناء عدادات الملفات)"""
+        if not self.persist:
+            return 0
+        try:
+            pool = await self._ensure_pool()
+            rows = await pool.fetchall("SELECT chat_id, entry FROM chat_queues ORDER BY chat_id, position")
+        except Exception as e:
+            LOGGER(__name__).warning(f"⚠️ تعذر تحميل قوائم التشغيل المحفوظة: {e}")
+            return 0
+
+        for chat_id, raw in rows:
+            try:
+                entry = QueueEntry(**json.loads(raw))
+            except (ValueError, TypeError):
+                continue
+            deque.append(self.queue(chat_id), entry)
+            if entry.get('file'):
+                self.files.acquire(entry['file'])
+        self.stats['restored'] = len(rows)
+        if rows:
+            LOGGER(__name__).info(f"📋 تم استعادة {len(rows)} مقطع في {len(self._queues)} قائمة تشغيل")
+        return len(rows)
+
+    async def close(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'chats': len(self._queues),
+            'entries': sum(len(queue) for queue in self._queues.values()),
+            'files': len(self.files),
+            'dirty': len(self._dirty)
+        }
+
+# مثيل عام مشترك
+queue_store = QueueStore(
+    config.DATABASE_PATH,
+    persist=config.QUEUE_PERSIST,
+    flush_interval=config.QUEUE_FLUSH_INTERVAL
+)
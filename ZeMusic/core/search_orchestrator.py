@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+منسق البحث المتحوط عبر عدة مزودين
+- يبدأ بالمزود الأسرع تاريخياً (الزمن المتوقع حتى النجاح من متوسط الزمن ونسبة النجاح)
+- إذا لم يرد خلال p90 من زمنه يُطلق طلب احتياطي للمزود التالي دون إلغاء الأول
+- إخفاق المزود يطلق التالي فوراً، وأول نتيجة ناجحة تلغي البقية
+- الترتيب يُتعلم من مدرجات زمن ونجاح متحركة (آخر WINDOW طلب) لكل مزود
+- الخاسر الملغى بعد تجاوز مهلة تحوطه يُسجل إخفاقاً بزمنه المنقضي حتى يتراجع المزود الذي أصبح بطيئاً
+"""
+
+import asyncio
+from bisect import bisect_left
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from ZeMusic.logging import LOGGER
+
+# حدود خانات مدرج الزمن (ثوان): هندسية من 25ms حتى ~25s
+BUCKET_EDGES = tuple(0.025 * 1.5 ** i for i in range(18))
+
+# عدد الطلبات الأخيرة المحسوبة لكل مزود
+WINDOW = 100
+
+# أقل عدد عينات قبل الوثوق بالمدرج بدل الزمن المبدئي للمزود
+MIN_SAMPLES = 5
+
+class LatencyHistogram:
+    """مدرج زمن متحرك: عدد العينات في كل خانة لآخر window عينة"""
+
+    def __init__(self, window: int = WINDOW):
+        self.window = window
+        self.counts = [0] * (len(BUCKET_EDGES) + 1)
+        self._samples: Deque[Tuple[int, float]] = deque()
+        self._total = 0.0
+
+    def add(self, seconds: float):
+        bucket = bisect_left(BUCKET_EDGES, seconds)
+        self._samples.append((bucket, seconds))
+        self.counts[bucket] += 1
+        self._total += seconds
+        if len(self._samples) > self.window:
+            old_bucket, old_seconds = self._samples.popleft()
+            self.counts[old_bucket] -= 1
+            self._total -= old_seconds
+
+    def mean(self) -> Optional[float]:
+        return self._total / len(self._samples) if self._samples else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        """الحد الأعلى للخانة التي تقع فيها النسبة q (None بلا عينات)"""
+        total = len(self._samples)
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                break
+        return BUCKET_EDGES[min(bucket, len(BUCKET_EDGES) - 1)]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+class SearchProvider:
+    """مزود بحث مع إحصائياته المتحركة"""
+
+    def __init__(self, name: str, func: Callable[[str], Awaitable[Any]], timeout: float, prior: float):
+        self.name = name
+        self.func = func
+        self.timeout = timeout
+        # الزمن المفترض قبل تجمع عينات كافية
+        self.prior = prior
+
+        self.ok_latency = LatencyHistogram()
+        self.fail_latency = LatencyHistogram()
+        self._outcomes: Deque[bool] = deque(maxlen=WINDOW)
+        self._successes = 0
+
+        self.stats = {
+            'calls': 0,
+            'wins': 0,
+            'failures': 0,
+            'timeouts': 0,
+            'cancelled': 0,
+            'late': 0
+        }
+
+    def record(self, seconds: float, success: bool):
+        if len(self._outcomes) == self._outcomes.maxlen:
+            self._successes -= self._outcomes[0]
+        self._outcomes.append(success)
+        self._successes += success
+        (self.ok_latency if success else self.fail_latency).add(seconds)
+
+    def success_rate(self) -> float:
+        # احتمال مسبق (1، 1): المزود الجديد يبدأ من 50%
+        return (self._successes + 1) / (len(self._outcomes) + 2)
+
+    def _quantile(self, histogram: LatencyHistogram, q: float, default: float) -> float:
+        if len(histogram) < MIN_SAMPLES:
+            return default
+        return histogram.quantile(q)
+
+    def p50(self) -> float:
+        return self._quantile(self.ok_latency, 0.5, self.prior)
+
+    def mean(self) -> float:
+        if len(self.ok_latency) < MIN_SAMPLES:
+            return self.prior
+        return self.ok_latency.mean()
+
+    def p90(self) -> float:
+        return self._quantile(self.ok_latency, 0.9, self.prior * 2)
+
+    def expected(self) -> float:
+        """الزمن المتوقع حتى نتيجة: متوسط زمن النجاح (يشمل الذيل البطيء) + الإخفاقات المتوقعة × زمن الفشل"""
+        rate = self.success_rate()
+        if len(self.fail_latency) < MIN_SAMPLES:
+            fail_time = self.timeout / 2
+        else:
+            fail_time = self.fail_latency.mean()
+        return self.mean() + (1 - rate) / rate * fail_time
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'samples': len(self._outcomes),
+            'success_rate': round(self.success_rate(), 3),
+            'mean': round(self.mean(), 3),
+            'p50': round(self.p50(), 3),
+            'p90': round(self.p90(), 3),
+            'expected': round(self.expected(), 3)
+        }
+
+class HedgedSearch:
+    """بحث متحوط: مزود واحد في البداية ثم طلبات احتياطية بمهلة p90 وإلغاء الخاسرين"""
+
+    def __init__(self, name: str = "search", min_delay: float = 0.15, max_delay: float = 3.0):
+        self.name = name
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.providers: List[SearchProvider] = []
+
+        self.stats = {
+            'searches': 0,
+            'hedges': 0,
+            'cancelled': 0,
+            'exhausted': 0
+        }
+
+    def register(self, name: str, func: Callable[[str], Awaitable[Any]], timeout: float = 8.0, prior: float = 1.0):
+        """إضافة مزود (دالة غير متزامنة تعيد نتيجة أو None) بزمن مبدئي prior"""
+        self.providers.append(SearchProvider(name, func, timeout, prior))
+
+    def order(self) -> List[SearchProvider]:
+        """المزودون من الأسرع توقعاً (التساوي يحفظ ترتيب التسجيل)"""
+        return sorted(self.providers, key=SearchProvider.expected)
+
+    def hedge_delay(self, provider: SearchProvider) -> float:
+        return min(self.max_delay, max(self.min_delay, provider.p90()))
+
+    async def _call(self, provider: SearchProvider, query: str) -> Any:
+        try:
+            return await asyncio.wait_for(provider.func(query), provider.timeout)
+        except asyncio.TimeoutError:
+            provider.stats['timeouts'] += 1
+            return None
+
+    async def search(self, query: str) -> Any:
+        """أول نتيجة ناجحة من المزودين (None إذا فشل الجميع)"""
+        queue = deque(self.order())
+        if not queue:
+            return None
+
+        self.stats['searches'] += 1
+        loop = asyncio.get_running_loop()
+        running: Dict[asyncio.Task, Tuple[SearchProvider, float]] = {}
+        won = False
+
+        def launch() -> float:
+            provider = queue.popleft()
+            provider.stats['calls'] += 1
+            task = asyncio.ensure_future(self._call(provider, query))
+            task.add_done_callback(_consume)
+            running[task] = (provider, loop.time())
+            return loop.time() + self.hedge_delay(provider)
+
+        try:
+            hedge_at = launch()
+            while running:
+                timeout = max(0.0, hedge_at - loop.time()) if queue else None
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # الأول تجاوز p90 من زمنه: طلب احتياطي للتالي
+                    self.stats['hedges'] += 1
+                    hedge_at = launch()
+                    continue
+
+                winner = None
+                for task in done:
+                    provider, started = running.pop(task)
+                    result = None
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        LOGGER(__name__).debug(f"⚠️ فشل مزود البحث {provider.name}: {e}")
+                    provider.record(loop.time() - started, bool(result))
+                    if result and winner is None:
+                        winner = provider, result
+                    elif not result:
+                        provider.stats['failures'] += 1
+
+                if winner is not None:
+                    provider, result = winner
+                    provider.stats['wins'] += 1
+                    won = True
+                    return result
+
+                # إخفاق: التالي يبدأ فوراً بدل انتظار مهلة التحوط
+                if queue:
+                    hedge_at = launch()
+
+            self.stats['exhausted'] += 1
+            return None
+        finally:
+            now = loop.time()
+            for task, (provider, started) in running.items():
+                task.cancel()
+                provider.stats['cancelled'] += 1
+                self.stats['cancelled'] += 1
+                # خاسر تجاوز مهلة تحوطه: إخفاق بالزمن المنقضي (حد أدنى لزمنه الفعلي)
+                # أما الاحتياطي الذي سُبق قبل مهلته أو إلغاء البحث نفسه فلا يدلان على بطئه
+                if won and now - started >= self.hedge_delay(provider):
+                    provider.record(now - started, False)
+                    provider.stats['late'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'order': [provider.name for provider in self.order()],
+            'providers': {provider.name: provider.get_stats() for provider in self.providers}
+        }
+
+def _consume(task: asyncio.Task):
+    # استرجاع استثناءات المهام الملغاة أو المنتهية بعد الفوز دون تحذير
+    if not task.cancelled():
+        task.exception()
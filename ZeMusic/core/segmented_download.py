@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+"""
+محمّل مقسّم متوازٍ على asyncio
+- طلبات Range متوازية عبر جلسة aiohttp المشتركة من ConnectionManager
+- ملف محجوز مسبقاً بحجمه الكامل وكتابة كل قطعة في موضعها (لا تداخل بين الأجزاء)
+- إعادة محاولة لكل جزء من آخر بايت كُتب
+- عدد أجزاء متكيف: يُضاف جزء جديد (بتقسيم أكبر جزء متبقٍ) طالما يرتفع المعدل المقاس
+- استئناف من ملف جزئي عبر ملف حالة بجانبه
+- دالة تقدم بنفس توقيع progress(current, total) المستخدم في واجهات التقدم
+"""
+
+import os
+import json
+import time
+import asyncio
+import inspect
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+import aiohttp
+
+import config
+from ZeMusic.logging import LOGGER
+
+# حجم القطعة المقروءة من الشبكة في كل مرة
+CHUNK_SIZE = 256 * 1024
+
+# أصغر جزء يُسمح بتقسيمه (لا فائدة من اتصال جديد لأقل من ذلك)
+MIN_SPLIT_SIZE = 1024 * 1024
+
+# فترة قياس المعدل وحفظ الحالة (ثوان)
+MONITOR_INTERVAL = 1.0
+
+# يُضاف جزء جديد فقط إذا ارتفع المعدل بهذه النسبة منذ آخر إضافة
+GROWTH_THRESHOLD = 1.10
+
+# أقل فترة بين استدعاءات دالة التقدم
+PROGRESS_INTERVAL = 0.5
+
+# لا طلبات Range: مهلة القراءة لكل قطعة بدلاً من مهلة كلية للتحميل
+SEGMENT_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=15, sock_read=30)
+
+ProgressCallback = Callable[[int, int], Union[None, Awaitable[None]]]
+
+class DownloadError(Exception):
+    """فشل تحميل ملف بعد استنفاد المحاولات"""
+
+class _Segment:
+    """نطاق بايتات [pos, end] لم يُكتب بعد (end شامل)"""
+
+    __slots__ = ('pos', 'end')
+
+    def __init__(self, pos: int, end: int):
+        self.pos = pos
+        self.end = end
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.end - self.pos + 1)
+
+class _Job:
+    """حالة تحميل ملف واحد"""
+
+    def __init__(self, url: str, path: str, size: int, validator: str, segments: List[_Segment]):
+        self.url = url
+        self.path = path
+        self.part_path = f"{path}.part"
+        self.state_path = f"{path}.part.json"
+        self.size = size
+        self.validator = validator
+        self.segments = segments
+        self.fd: Optional[int] = None
+        self.started = time.monotonic()
+
+    @property
+    def done_bytes(self) -> int:
+        return self.size - sum(segment.remaining for segment in self.segments)
+
+    def split_largest(self) -> Optional[_Segment]:
+        """أخذ النصف الثاني من أكبر جزء متبقٍ كجزء جديد"""
+        largest = max(self.segments, key=lambda segment: segment.remaining, default=None)
+        if largest is None or largest.remaining < 2 * MIN_SPLIT_SIZE:
+            return None
+        middle = largest.pos + largest.remaining // 2
+        segment = _Segment(middle, largest.end)
+        largest.end = middle - 1
+        self.segments.append(segment)
+        return segment
+
+    def save_state(self):
+        state = {
+            'url': self.url,
+            'size': self.size,
+            'validator': self.validator,
+            'segments': [[s.pos, s.end] for s in self.segments if s.remaining]
+        }
+        temp_path = f"{self.state_path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.state_path)
+
+class SegmentedDownloader:
+    """تحميل ملفات كبيرة بأجزاء Range متوازية مع استئناف"""
+
+    def __init__(self, min_segments: int = 2, max_segments: int = 8, retries: int = 4):
+        self.min_segments = max(1, min_segments)
+        self.max_segments = max(self.min_segments, max_segments)
+        self.retries = max(1, retries)
+        self.stats = {
+            'downloads': 0,
+            'resumed': 0,
+            'single_stream': 0,
+            'segments_added': 0,
+            'segments_stolen': 0,
+            'segment_retries': 0,
+            'failed': 0,
+            'bytes': 0
+        }
+
+    @staticmethod
+    async def get_session() -> aiohttp.ClientSession:
+        from ZeMusic.plugins.play.download import ConnectionManager
+        return await ConnectionManager().get_session()
+
+    # ---------- الفحص الأولي ----------
+
+    async def _probe(self, session: aiohttp.ClientSession, url: str, headers: Dict[str, str]):
+        """(الحجم، يدعم Range؟، معرف النسخة) بطلب أول بايت فقط"""
+        async with session.get(url, headers={**headers, 'Range': 'bytes=0-0'}, timeout=SEGMENT_TIMEOUT) as resp:
+            validator = resp.headers.get('ETag') or resp.headers.get('Last-Modified') or ''
+            if resp.status == 206:
+                content_range = resp.headers.get('Content-Range', '')
+                total = content_range.rsplit('/', 1)[-1]
+                if total.isdigit():
+                    return int(total), True, validator
+            resp.raise_for_status()
+            length = resp.headers.get('Content-Length')
+            return (int(length) if length and length.isdigit() else 0), False, validator
+
+    def _restore(self, url: str, path: str, size: int, validator: str) -> Optional[_Job]:
+        """استعادة تحميل منقطع إذا تطابق الحجم ومعرف النسخة"""
+        state_path = f"{path}.part.json"
+        if not (os.path.exists(state_path) and os.path.exists(f"{path}.part")):
+            return None
+        try:
+            with open(state_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get('size') != size or state.get('validator') != validator:
+            return None
+        segments = [_Segment(pos, end) for pos, end in state.get('segments', [])]
+        return _Job(url, path, size, validator, segments)
+
+    # ---------- التحميل ----------
+
+    async def download(self, url: str, path: str, progress: Optional[ProgressCallback] = None,
+                       headers: Optional[Dict[str, str]] = None) -> str:
+        """
+        تحميل url إلى path وإرجاع المسار
+        progress: دالة (أو coroutine) تستقبل (المُحمّل، الإجمالي)
+        """
+        headers = headers or {}
+        session = await self.get_session()
+        size, ranged, validator = await self._probe(session, url, headers)
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        if not ranged or size < 2 * MIN_SPLIT_SIZE:
+            self.stats['single_stream'] += 1
+            return await self._download_single(session, url, path, size, headers, progress)
+
+        job = self._restore(url, path, size, validator)
+        if job is not None:
+            self.stats['resumed'] += 1
+            LOGGER(__name__).info(f"⏯️ استئناف تحميل {os.path.basename(path)} من {job.done_bytes * 100 // size}%")
+        else:
+            job = _Job(url, path, size, validator, [_Segment(0, size - 1)])
+            with open(job.part_path, 'wb') as f:
+                f.truncate(size)
+
+        job.fd = os.open(job.part_path, os.O_RDWR)
+        try:
+            await self._run(session, job, headers, progress)
+        except BaseException:
+            # الاحتفاظ بالملف الجزئي والحالة للاستئناف لاحقاً
+            self.stats['failed'] += 1
+            job.save_state()
+            raise
+        finally:
+            os.close(job.fd)
+
+        os.replace(job.part_path, path)
+        try:
+            os.remove(job.state_path)
+        except OSError:
+            pass
+        self.stats['downloads'] += 1
+        return path
+
+    async def _run(self, session: aiohttp.ClientSession, job: _Job, headers: Dict[str, str],
+                   progress: Optional[ProgressCallback]):
+        workers: List[asyncio.Task] = []
+
+        def spawn(segment: _Segment):
+            workers.append(asyncio.create_task(self._worker(session, job, segment, headers)))
+
+        # الأجزاء المحفوظة (عند الاستئناف) أو الجزء الكامل مقسماً إلى الحد الأدنى
+        for segment in list(job.segments):
+            spawn(segment)
+        while len(workers) < self.min_segments:
+            segment = job.split_largest()
+            if segment is None:
+                break
+            spawn(segment)
+
+        start_bytes = job.done_bytes
+        last_bytes, last_time = start_bytes, time.monotonic()
+        best_rate = 0.0
+        last_progress = 0.0
+        try:
+            # استئناف بلا أجزاء متبقية: لا عمال (asyncio.wait يرفض المجموعة الفارغة) فننتقل للتجميع مباشرة
+            while workers:
+                done, _ = await asyncio.wait(workers, timeout=MONITOR_INTERVAL)
+                for task in done:
+                    workers.remove(task)
+                    task.result()
+                    # عامل أنهى جزأه: يأخذ نصف أكبر جزء متبقٍ للحفاظ على التوازي
+                    segment = job.split_largest()
+                    if segment is not None:
+                        self.stats['segments_stolen'] += 1
+                        spawn(segment)
+
+                now = time.monotonic()
+                current = job.done_bytes
+                if progress and (now - last_progress >= PROGRESS_INTERVAL or current == job.size):
+                    last_progress = now
+                    await self._report(progress, current, job.size)
+                if not workers:
+                    break
+
+                # المعدل المقاس خلال الفترة الأخيرة: جزء إضافي فقط إذا رفع الجزء السابق المعدل
+                rate = (current - last_bytes) / max(now - last_time, 1e-3)
+                last_bytes, last_time = current, now
+                if len(workers) < self.max_segments and rate > 0 and rate >= best_rate * GROWTH_THRESHOLD:
+                    best_rate = rate
+                    segment = job.split_largest()
+                    if segment is not None:
+                        self.stats['segments_added'] += 1
+                        spawn(segment)
+
+                job.save_state()
+        finally:
+            for task in workers:
+                task.cancel()
+            if workers:
+                await asyncio.gather(*workers, return_exceptions=True)
+
+        self.stats['bytes'] += job.size - start_bytes
+        elapsed = time.monotonic() - job.started
+        LOGGER(__name__).debug(
+            f"📥 {os.path.basename(job.path)}: {job.size / 1024 / 1024:.1f}MB في {elapsed:.1f}s "
+            f"({len(job.segments)} جزء)"
+        )
+
+    async def _worker(self, session: aiohttp.ClientSession, job: _Job, segment: _Segment,
+                      headers: Dict[str, str]):
+        """تحميل جزء واحد مع إعادة المحاولة من آخر بايت كُتب"""
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.retries):
+            if not segment.remaining:
+                return
+            try:
+                range_header = f"bytes={segment.pos}-{segment.end}"
+                async with session.get(job.url, headers={**headers, 'Range': range_header},
+                                       timeout=SEGMENT_TIMEOUT) as resp:
+                    if resp.status != 206:
+                        raise DownloadError(f"استجابة غير متوقعة لطلب Range: {resp.status}")
+                    async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                        # قد يكون الجزء قُسم أثناء القراءة: الكتابة حتى نهايته الحالية فقط
+                        chunk = chunk[:segment.remaining]
+                        if chunk:
+                            await loop.run_in_executor(None, os.pwrite, job.fd, chunk, segment.pos)
+                            segment.pos += len(chunk)
+                        if not segment.remaining:
+                            return
+                if segment.remaining:
+                    raise DownloadError("انقطع الاتصال قبل نهاية الجزء")
+                return
+            except (aiohttp.ClientError, asyncio.TimeoutError, DownloadError) as e:
+                if attempt + 1 >= self.retries:
+                    raise DownloadError(f"فشل الجزء {segment.pos}-{segment.end}: {e}") from e
+                self.stats['segment_retries'] += 1
+                await asyncio.sleep(min(8, 0.5 * 2 ** attempt))
+
+    async def _download_single(self, session: aiohttp.ClientSession, url: str, path: str, size: int,
+                               headers: Dict[str, str], progress: Optional[ProgressCallback]) -> str:
+        """خادم لا يدعم Range أو ملف صغير: اتصال واحد متسلسل"""
+        part_path = f"{path}.part"
+        current = 0
+        last_progress = 0.0
+        try:
+            async with session.get(url, headers=headers, timeout=SEGMENT_TIMEOUT) as resp:
+                resp.raise_for_status()
+                size = size or resp.content_length or 0
+                with open(part_path, 'wb') as f:
+                    async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                        f.write(chunk)
+                        current += len(chunk)
+                        now = time.monotonic()
+                        if progress and now - last_progress >= PROGRESS_INTERVAL:
+                            last_progress = now
+                            await self._report(progress, current, size or current)
+        except BaseException:
+            self.stats['failed'] += 1
+            try:
+                os.remove(part_path)
+            except OSError:
+                pass
+            raise
+        if progress:
+            await self._report(progress, current, current)
+        os.replace(part_path, path)
+        self.stats['downloads'] += 1
+        self.stats['bytes'] += current
+        return path
+
+    @staticmethod
+    async def _report(progress: ProgressCallback, current: int, total: int):
+        try:
+            result = progress(current, total)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            LOGGER(__name__).debug(f"خطأ في دالة التقدم: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'min_segments': self.min_segments,
+            'max_segments': self.max_segments
+        }
+
+# مثيل عام مشترك
+segmented_downloader = SegmentedDownloader(
+    min_segments=config.DOWNLOAD_MIN_SEGMENTS,
+    max_segments=config.DOWNLOAD_MAX_SEGMENTS,
+    retries=config.DOWNLOAD_SEGMENT_RETRIES
+)
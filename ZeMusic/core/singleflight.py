@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+دمج الطلبات المتطابقة المتزامنة (Single-Flight)
+أول طلب لمفتاح معين ينفذ العملية، وبقية الطلبات المتزامنة تنتظر نفس النتيجة
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+class SingleFlight:
+    """تنفيذ عملية واحدة لكل مفتاح في نفس الوقت ومشاركة نتيجتها مع المنتظرين"""
+
+    def __init__(self, name: str = "flight"):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.stats = {
+            'executed': 0,
+            'coalesced': 0
+        }
+
+    def in_flight(self, key: Hashable) -> bool:
+        """هل توجد عملية جارية لهذا المفتاح"""
+        return key in self._inflight
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        تنفيذ factory() مرة واحدة لكل مفتاح جارٍ
+        يعيد (النتيجة، هل كانت مشتركة من طلب آخر)
+        الأخطاء تنتقل لجميع المنتظرين
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats['coalesced'] += 1
+            # shield: إلغاء أحد المنتظرين لا يلغي العملية المشتركة
+            return await asyncio.shield(future), True
+
+        self.stats['executed'] += 1
+        task = asyncio.ensure_future(factory())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._release(key, done))
+        return await asyncio.shield(task), False
+
+    def _release(self, key: Hashable, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def __len__(self) -> int:
+        return len(self._inflight)
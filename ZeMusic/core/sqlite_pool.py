@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+تجمع اتصالات SQLite المشترك
+اتصالات دائمة (قرّاء متعددون + كاتب واحد) مع إعدادات PRAGMA تُطبق مرة واحدة
+وتنفيذ غير متزامن لا يحجب حلقة الأحداث
+"""
+
+import os
+import queue
+import asyncio
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, asynccontextmanager
+from typing import Any, Callable, Dict, Optional
+
+from ZeMusic.logging import LOGGER
+
+# عدد اتصالات القراءة الافتراضي
+DEFAULT_READERS = min(8, (os.cpu_count() or 2) * 2)
+
+# حجم ذاكرة العبارات المحضرة لكل اتصال
+STATEMENT_CACHE_SIZE = 256
+
+class SQLitePool:
+    """تجمع اتصالات SQLite: قرّاء متوازيون وكاتب واحد مُسلسل"""
+
+    def __init__(self, db_path: str, readers: int = DEFAULT_READERS, timeout: float = 30.0,
+                 mmap_size: int = 0):
+        self.db_path = db_path
+        self.timeout = timeout
+        self.mmap_size = mmap_size
+        self.readers_count = max(1, readers)
+
+        self._writer: Optional[sqlite3.Connection] = None
+        self._writer_lock = threading.Lock()
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._created_readers = 0
+        self._init_lock = threading.Lock()
+        self._closed = False
+
+        # منفذ خاص حتى لا تنافس استعلامات القاعدة عمليات التحميل على المنفذ الافتراضي
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.readers_count + 1,
+            thread_name_prefix="SQLitePool"
+        )
+
+        self.stats = {
+            'reads': 0,
+            'writes': 0,
+            'connections': 0
+        }
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """منفذ الخيوط المخصص لعمليات القاعدة"""
+        return self._executor
+
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        """فتح اتصال جديد وتطبيق إعدادات PRAGMA مرة واحدة"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA busy_timeout={int(self.timeout * 1000)}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA cache_size=-8000')
+        if self.mmap_size:
+            conn.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+        if read_only:
+            conn.execute('PRAGMA query_only=ON')
+        self.stats['connections'] += 1
+        return conn
+
+    def _get_writer(self) -> sqlite3.Connection:
+        if self._writer is None:
+            self._writer = self._connect()
+        return self._writer
+
+    def _take_reader(self) -> sqlite3.Connection:
+        """أخذ اتصال قراءة (إنشاء كسول حتى الحد الأقصى)"""
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._init_lock:
+            if self._created_readers < self.readers_count:
+                self._created_readers += 1
+                return self._connect(read_only=True)
+
+        return self._readers.get(timeout=self.timeout)
+
+    # ========================================
+    # الواجهة المتزامنة (للاستخدام داخل خيوط المنفذ)
+    # ========================================
+
+    @contextmanager
+    def reader(self):
+        """اتصال قراءة فقط من التجمع"""
+        if self._closed:
+            raise RuntimeError("SQLitePool is closed")
+        conn = self._take_reader()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self.stats['reads'] += 1
+            self._readers.put(conn)
+
+    @contextmanager
+    def writer(self):
+        """اتصال الكتابة الوحيد (مُسلسل بقفل)"""
+        if self._closed:
+            raise RuntimeError("SQLitePool is closed")
+        with self._writer_lock:
+            conn = self._get_writer()
+            try:
+                yield conn
+            except Exception:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+            finally:
+                # نفس سلوك إغلاق الاتصال سابقاً: ما لم يُحفظ صراحةً يُلغى
+                if conn.in_transaction:
+                    conn.rollback()
+                self.stats['writes'] += 1
+
+    # ========================================
+    # الواجهة غير المتزامنة
+    # ========================================
+
+    async def run_read(self, func: Callable[..., Any], *args) -> Any:
+        """تنفيذ func(conn, *args) على اتصال قراءة خارج حلقة الأحداث"""
+        def _run():
+            with self.reader() as conn:
+                return func(conn, *args)
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor, _run)
+
+    async def run_write(self, func: Callable[..., Any], *args) -> Any:
+        """تنفيذ func(conn, *args) على اتصال الكتابة خارج حلقة الأحداث"""
+        def _run():
+            with self.writer() as conn:
+                return func(conn, *args)
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor, _run)
+
+    async def fetchone(self, sql: str, params: tuple = ()) -> Optional[sqlite3.Row]:
+        """تنفيذ استعلام قراءة وإرجاع صف واحد"""
+        return await self.run_read(lambda conn: conn.execute(sql, params).fetchone())
+
+    async def fetchall(self, sql: str, params: tuple = ()) -> list:
+        """تنفيذ استعلام قراءة وإرجاع كل الصفوف"""
+        return await self.run_read(lambda conn: conn.execute(sql, params).fetchall())
+
+    async def execute(self, sql: str, params: tuple = ()) -> int:
+        """تنفيذ عبارة كتابة وحفظها، يعيد عدد الصفوف المتأثرة"""
+        def _execute(conn):
+            cursor = conn.execute(sql, params)
+            conn.commit()
+            return cursor.rowcount
+
+        return await self.run_write(_execute)
+
+    @asynccontextmanager
+    async def connection(self, write: bool = True):
+        """اتصال من التجمع لشيفرة قديمة تعمل على حلقة الأحداث مباشرة"""
+        loop = asyncio.get_running_loop()
+        manager = self.writer() if write else self.reader()
+        conn = await loop.run_in_executor(self._executor, manager.__enter__)
+        try:
+            yield conn
+        except BaseException as e:
+            manager.__exit__(type(e), e, e.__traceback__)
+            raise
+        else:
+            manager.__exit__(None, None, None)
+
+    def close(self):
+        """إغلاق جميع الاتصالات"""
+        self._closed = True
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+        self._executor.shutdown(wait=False)
+
+_pools: Dict[str, SQLitePool] = {}
+_pools_lock = threading.Lock()
+
+def get_pool(db_path: str, **options) -> SQLitePool:
+    """الحصول على التجمع المشترك لملف قاعدة البيانات (واحد لكل ملف)"""
+    key = os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool._closed:
+            pool = SQLitePool(db_path, **options)
+            _pools[key] = pool
+            LOGGER(__name__).info(f"🗄️ تم إنشاء تجمع اتصالات SQLite: {db_path} ({pool.readers_count} قارئ + كاتب)")
+        return pool
+
+def close_all_pools():
+    """إغلاق جميع التجمعات (عند إيقاف البوت)"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
@@ -9,6 +9,9 @@
 import asyncio
 import logging
 import os
+import random
+import time
+from contextlib import suppress
 from typing import Dict, List, Optional, Any
 from telethon import TelegramClient, events
 from telethon.sessions import StringSession
@@ -31,6 +34,11 @@ class TelethonClientManager:
         self.active_sessions: Dict[str, TelegramClient] = {}
         self.logger = logging.getLogger(__name__)
         
+        # حالة تشغيل المساعدين: يُضبط عند جاهزية أول مساعد (أو انتهاء التحميل)
+        self.assistants_ready = asyncio.Event()
+        self.startup_report: Dict[Any, Dict[str, Any]] = {}
+        self._startup_task: Optional[asyncio.Task] = None
+        
         # معلومات الاتصال
         self.api_id = config.API_ID
         self.api_hash = config.API_HASH
@@ -64,6 +72,10 @@ class TelethonClientManager:
             me = await self.bot_client.get_me()
             self.logger.info(f"✅ تم تسجيل دخول البوت: @{me.username} ({me.id})")
             
+            # اليوزر الفعلي لتمييز /command@username بدل القيمة في الإعدادات
+            from ZeMusic.core.command_handler import telethon_command_handler
+            telethon_command_handler.router.set_bot_username(me.username)
+            
             # إعداد معالجات الأحداث
             await self._setup_bot_handlers()
             
@@ -280,63 +292,134 @@ class TelethonClientManager:
             self.logger.error(f"❌ خطأ في التحقق من الكود: {e}")
             return {'success': False, 'error': str(e)}
     
-    async def load_assistants_from_db(self) -> int:
-        """تحميل الحسابات المساعدة من قاعدة البيانات"""
+    async def load_assistants_from_db(self, wait_all: bool = False) -> int:
+        """
+        تحميل الحسابات المساعدة من قاعدة البيانات بالتوازي
+        يعود بمجرد جاهزية أول مساعد (أو بعد اكتمال الكل إذا wait_all)، ويكمل الباقي في الخلفية
+        """
         try:
             from ZeMusic.core.database import db
             assistants = await db.get_assistants()
-            loaded_count = 0
-            
-            for assistant in assistants:
-                try:
-                    if assistant['session_string']:
-                        session = StringSession(assistant['session_string'])
-                    else:
-                        session = f"{self.sessions_dir}/assistant_{assistant['phone'].replace('+', '')}"
-                    
-                    assistant_client = TelegramClient(
-                        session=session,
-                        api_id=self.api_id,
-                        api_hash=self.api_hash,
-                        device_model=config.DEVICE_MODEL,
-                        system_version=config.SYSTEM_VERSION,
-                        app_version=config.APPLICATION_VERSION,
-                        lang_code="ar",
-                        system_lang_code="ar"
-                    )
-                    
-                    await assistant_client.connect()
-                    
-                    if await assistant_client.is_user_authorized():
-                        self.assistant_clients[assistant['id']] = assistant_client
-                        loaded_count += 1
-                        
-                        me = await assistant_client.get_me()
-                        self.logger.info(f"✅ تم تحميل المساعد: @{me.username or 'Unknown'} ({me.id})")
-                    else:
-                        self.logger.warning(f"⚠️ المساعد {assistant['phone']} غير مُصرح")
-                        
-                except Exception as e:
-                    self.logger.error(f"❌ خطأ في تحميل المساعد {assistant['phone']}: {e}")
-                    
-            self.logger.info(f"📊 تم تحميل {loaded_count} من {len(assistants)} حساب مساعد")
-            return loaded_count
-            
         except Exception as e:
             self.logger.error(f"❌ خطأ في تحميل المساعدين: {e}")
             return 0
-    
+
+        self.assistants_ready.clear()
+        self.startup_report = {}
+        started = time.monotonic()
+        semaphore = asyncio.Semaphore(max(1, config.ASSISTANT_STARTUP_CONCURRENCY))
+        tasks = [
+            asyncio.create_task(self._start_assistant(assistant, semaphore))
+            for assistant in assistants
+        ]
+
+        async def _finish():
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+            loaded = sum(1 for result in results if result is True)
+            self.assistants_ready.set()
+            self.logger.info(
+                f"📊 تم تحميل {loaded} من {len(assistants)} حساب مساعد في {time.monotonic() - started:.2f}s"
+            )
+            return loaded
+
+        self._startup_task = asyncio.create_task(_finish())
+        if wait_all or not tasks:
+            return await self._startup_task
+
+        # الاستمرار بمجرد جاهزية أول مساعد أو انتهاء التحميل كله (فشل الجميع)
+        ready = asyncio.create_task(self.assistants_ready.wait())
+        await asyncio.wait({ready, self._startup_task}, return_when=asyncio.FIRST_COMPLETED)
+        ready.cancel()
+        return len(self.assistant_clients)
+
+    async def _start_assistant(self, assistant: Dict[str, Any], semaphore: asyncio.Semaphore) -> bool:
+        """تشغيل مساعد واحد بمهلة، مع تسجيل زمن كل مرحلة في startup_report"""
+        name = assistant.get('phone') or assistant.get('id')
+        timings: Dict[str, Any] = {'status': 'pending'}
+        self.startup_report[name] = timings
+
+        async with semaphore:
+            # تأخير عشوائي صغير حتى لا تصل كل الاتصالات إلى تليجرام في نفس اللحظة
+            await asyncio.sleep(random.uniform(0, config.ASSISTANT_STARTUP_STAGGER))
+            assistant_client = None
+            try:
+                if assistant['session_string']:
+                    session = StringSession(assistant['session_string'])
+                else:
+                    session = f"{self.sessions_dir}/assistant_{assistant['phone'].replace('+', '')}"
+
+                assistant_client = TelegramClient(
+                    session=session,
+                    api_id=self.api_id,
+                    api_hash=self.api_hash,
+                    device_model=config.DEVICE_MODEL,
+                    system_version=config.SYSTEM_VERSION,
+                    app_version=config.APPLICATION_VERSION,
+                    lang_code="ar",
+                    system_lang_code="ar"
+                )
+
+                async def _steps():
+                    phase = time.monotonic()
+                    await assistant_client.connect()
+                    timings['connect'] = time.monotonic() - phase
+
+                    phase = time.monotonic()
+                    authorized = await assistant_client.is_user_authorized()
+                    timings['authorize'] = time.monotonic() - phase
+                    if not authorized:
+                        return None
+
+                    phase = time.monotonic()
+                    me = await assistant_client.get_me()
+                    timings['get_me'] = time.monotonic() - phase
+                    return me
+
+                start = time.monotonic()
+                me = await asyncio.wait_for(_steps(), timeout=config.ASSISTANT_CONNECT_TIMEOUT)
+                timings['total'] = time.monotonic() - start
+
+                if me is None:
+                    timings['status'] = 'unauthorized'
+                    self.logger.warning(f"⚠️ المساعد {assistant['phone']} غير مُصرح")
+                    await assistant_client.disconnect()
+                    return False
+
+                self.assistant_clients[assistant['id']] = assistant_client
+                timings['status'] = 'ready'
+                self.assistants_ready.set()
+                self.logger.info(
+                    f"✅ تم تحميل المساعد: @{me.username or 'Unknown'} ({me.id}) في {timings['total']:.2f}s"
+                )
+                return True
+
+            except asyncio.TimeoutError:
+                timings['status'] = 'timeout'
+                self.logger.error(
+                    f"⏱️ انتهت مهلة تشغيل المساعد {assistant['phone']} ({config.ASSISTANT_CONNECT_TIMEOUT}s)"
+                )
+            except Exception as e:
+                timings['status'] = 'error'
+                self.logger.error(f"❌ خطأ في تحميل المساعد {assistant['phone']}: {e}")
+
+            if assistant_client is not None:
+                with suppress(Exception):
+                    await assistant_client.disconnect()
+            return False
+
+    async def wait_assistants_loaded(self) -> int:
+        """انتظار اكتمال تحميل كل المساعدين (بعد عودة load_assistants_from_db مبكراً)"""
+        if self._startup_task is None:
+            return len(self.assistant_clients)
+        return await self._startup_task
+
     async def get_available_assistant(self, chat_id: int) -> Optional[TelegramClient]:
         """الحصول على حساب مساعد متاح"""
         try:
-            # التحقق من وجود مساعدين
-            if not self.assistant_clients:
-                return None
-            
-            # اختيار مساعد عشوائي
-            import random
-            assistant_id = random.choice(list(self.assistant_clients.keys()))
-            return self.assistant_clients[assistant_id]
+            # المساعد المرتبط بالمجموعة أو الأقل حملاً
+            from ZeMusic.core.assistant_scheduler import assistant_scheduler
+            assistant_id = await assistant_scheduler.assign(chat_id)
+            return assistant_scheduler.client(assistant_id)
             
         except Exception as e:
             self.logger.error(f"❌ خطأ في اختيار المساعد: {e}")
@@ -363,65 +446,16 @@ class TelethonClientManager:
                 except Exception as e:
                     self.logger.error(f"خطأ في معالج الcallbacks: {e}")
             
-            # تم نقل معالج البحث إلى handlers_registry.py لتجنب التكرار
-            # @self.bot_client.on(events.NewMessage(pattern=r'(?i)(song|/song|بحث|يوت)'))
-            # async def download_handler(event):
-            #     try:
-            #         from ZeMusic.plugins.play.download import smart_download_handler
-            #         await smart_download_handler(event)
-            #     except Exception as e:
-            #         self.logger.error(f"خطأ في معالج التحميل: {e}")
-            
-            # معالجات أوامر المطور للتخزين الذكي
-            @self.bot_client.on(events.NewMessage(pattern=r'/cache_stats'))
-            async def cache_stats_handler_event(event):
-                try:
-                    from ZeMusic.plugins.play.download import cache_stats_handler
-                    await cache_stats_handler(event)
-                except Exception as e:
-                    self.logger.error(f"خطأ في معالج cache_stats: {e}")
-            
-            @self.bot_client.on(events.NewMessage(pattern=r'/test_cache_channel'))
-            async def test_cache_channel_handler_event(event):
-                try:
-                    from ZeMusic.plugins.play.download import test_cache_channel_handler
-                    await test_cache_channel_handler(event)
-                except Exception as e:
-                    self.logger.error(f"خطأ في معالج test_cache_channel: {e}")
-            
-            @self.bot_client.on(events.NewMessage(pattern=r'/clear_cache'))
-            async def clear_cache_handler_event(event):
-                try:
-                    from ZeMusic.plugins.play.download import clear_cache_handler
-                    await clear_cache_handler(event)
-                except Exception as e:
-                    self.logger.error(f"خطأ في معالج clear_cache: {e}")
-            
-            @self.bot_client.on(events.NewMessage(pattern=r'/cache_help'))
-            async def cache_help_handler_event(event):
-                try:
-                    from ZeMusic.plugins.play.download import cache_help_handler
-                    await cache_help_handler(event)
-                except Exception as e:
-                    self.logger.error(f"خطأ في معالج cache_help: {e}")
-            
-            # معالج أمر /start
-            @self.bot_client.on(events.NewMessage(pattern=r'/start'))
-            async def start_handler(event):
-                try:
-                    from ZeMusic.plugins.bot.telethon_start import handle_start_command
-                    await handle_start_command(event)
-                except Exception as e:
-                    self.logger.error(f"خطأ في معالج /start: {e}")
-            
-            # معالج أمر /help
-            @self.bot_client.on(events.NewMessage(pattern=r'/help|/مساعده|المساعده'))
-            async def help_handler(event):
-                try:
-                    from ZeMusic.plugins.bot.telethon_help import handle_help_command
-                    await handle_help_command(event)
-                except Exception as e:
-                    self.logger.error(f"خطأ في معالج /help: {e}")
+            # أوامر المطور للتخزين الذكي و /start و /help تُوجَّه عبر موجّه الأوامر
+            # (معالج رسائل واحد يصنف الرسالة مرة واحدة بدلاً من معالج regex لكل أمر)
+            from ZeMusic.core.command_handler import telethon_command_handler
+            from ZeMusic.core.command_router import lazy_handler
+            router = telethon_command_handler.router
+            download_module = 'ZeMusic.plugins.play.download'
+            router.add(['cache_stats'], lazy_handler(download_module, 'cache_stats_handler'))
+            router.add(['test_cache_channel'], lazy_handler(download_module, 'test_cache_channel_handler'))
+            router.add(['clear_cache'], lazy_handler(download_module, 'clear_cache_handler'))
+            router.add(['cache_help'], lazy_handler(download_module, 'cache_help_handler'))
             
             self.logger.info("🎛️ تم إعداد معالجات أحداث Telethon مع وظائف التحميل والأوامر الأساسية")
             
@@ -456,6 +490,8 @@ class TelethonClientManager:
                 if assistant_client:
                     await assistant_client.disconnect()
                 del self.assistant_clients[assistant_id]
+                from ZeMusic.core.assistant_scheduler import assistant_scheduler
+                assistant_scheduler.forget_assistant(assistant_id)
                 self.logger.info(f"✅ تم حذف الحساب المساعد: {assistant_id}")
                 return True
             return False
@@ -477,6 +513,13 @@ class TelethonClientManager:
         try:
             self.logger.info("🛑 إيقاف جميع عملاء Telethon...")
             
+            # حفظ طابور الكتابة المؤجلة قبل الإيقاف
+            try:
+                from ZeMusic.core.database import db
+                await db.stop_write_behind()
+            except Exception as e:
+                self.logger.error(f"❌ خطأ في حفظ الكتابات المعلقة: {e}")
+            
             # إيقاف البوت الرئيسي
             if self.bot_client:
                 await self.bot_client.disconnect()
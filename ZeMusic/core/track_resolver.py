@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+مُحلّل المقاطع الخارجية (Spotify / Apple Music / Resso) إلى فيديوهات YouTube
+- ربط دائم في SQLite: (المصدر، معرف المقطع) -> video_id مع التفاصيل
+- القوائم تُحل دفعة واحدة: قراءة كل الروابط المعروفة باستعلام واحد ثم بحث متوازٍ لأول search_limit من الباقي
+- دمج الطلبات المتزامنة لنفس المقطع
+"""
+
+import time
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import config
+from ZeMusic.logging import LOGGER
+from ZeMusic.core.sqlite_pool import get_pool
+from ZeMusic.core.ttl_cache import TTLCache
+from ZeMusic.core.singleflight import SingleFlight
+from ZeMusic.core.metadata_cache import MMAP_SIZE
+
+# أقصى عدد معاملات في استعلام IN واحد
+LOOKUP_CHUNK = 500
+
+# الروابط التي لم يُعثر لها على نتيجة تُعاد محاولتها بعد هذه المدة
+MISS_TTL = 6 * 3600
+
+class TrackResolver:
+    """ربط مقاطع المنصات الخارجية بفيديوهات YouTube مع تخزين دائم"""
+
+    def __init__(self, db_path: str, concurrency: int = 8, memory_items: int = 5000):
+        self.db_path = db_path
+        self.concurrency = max(1, concurrency)
+        self._pool = None
+        self._memory = TTLCache(maxsize=memory_items, ttl=24 * 3600, name="track_map")
+        self._misses = TTLCache(maxsize=memory_items, ttl=MISS_TTL, name="track_map_misses")
+        self._flight = SingleFlight("track_map")
+        self.stats = {
+            'lookups': 0,
+            'mapped': 0,
+            'searched': 0,
+            'not_found': 0
+        }
+
+    async def _ensure_pool(self):
+        if self._pool is not None:
+            return self._pool
+
+        # نفس ملف كاش YouTube وبنفس إعدادات التجمع
+        pool = get_pool(self.db_path, readers=4, mmap_size=MMAP_SIZE)
+
+        def _create(conn):
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS track_map (
+                    source TEXT NOT NULL,
+                    source_id TEXT NOT NULL,
+                    video_id TEXT NOT NULL,
+                    title TEXT,
+                    duration_min TEXT,
+                    thumb TEXT,
+                    query TEXT,
+                    updated_at REAL,
+                    PRIMARY KEY (source, source_id)
+                )
+            ''')
+            conn.commit()
+
+        await pool.run_write(_create)
+        self._pool = pool
+        return pool
+
+    @staticmethod
+    async def run_sync(func: Callable, *args, **kwargs) -> Any:
+        """تشغيل استدعاء متزامن (مثل spotipy) خارج حلقة الأحداث"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: func(*args, **kwargs))
+
+    @staticmethod
+    def _details(video_id: str, title: str, duration_min: str, thumb: str) -> Dict[str, Any]:
+        return {
+            "title": title,
+            "link": f"https://www.youtube.com/watch?v={video_id}",
+            "vidid": video_id,
+            "duration_min": duration_min,
+            "thumb": thumb,
+        }
+
+    async def _load(self, source: str, source_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """قراءة الروابط المحفوظة لعدة مقاطع (الذاكرة أولاً ثم SQLite على دفعات)"""
+        found: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        for source_id in source_ids:
+            cached = self._memory.get((source, source_id))
+            if cached is not None:
+                found[source_id] = cached
+            else:
+                missing.append(source_id)
+        if not missing:
+            return found
+
+        pool = await self._ensure_pool()
+
+        def _read(conn):
+            rows = []
+            for start in range(0, len(missing), LOOKUP_CHUNK):
+                chunk = missing[start:start + LOOKUP_CHUNK]
+                rows.extend(conn.execute(
+                    f"SELECT source_id, video_id, title, duration_min, thumb FROM track_map "
+                    f"WHERE source = ? AND source_id IN ({','.join('?' * len(chunk))})",
+                    (source, *chunk)
+                ).fetchall())
+            return rows
+
+        for source_id, video_id, title, duration_min, thumb in await pool.run_read(_read):
+            details = self._details(video_id, title, duration_min, thumb)
+            self._memory.set((source, source_id), details)
+            found[source_id] = details
+        return found
+
+    async def _store(self, source: str, resolved: List[Tuple[str, str, Dict[str, Any]]]):
+        """حفظ الروابط الجديدة بعبارة واحدة"""
+        if not resolved:
+            return
+        pool = await self._ensure_pool()
+        now = time.time()
+        rows = [
+            (source, source_id, details["vidid"], details["title"], details["duration_min"],
+             details["thumb"], query, now)
+            for source_id, query, details in resolved
+        ]
+
+        def _write(conn):
+            conn.executemany('''
+                INSERT INTO track_map (source, source_id, video_id, title, duration_min, thumb, query, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(source, source_id) DO UPDATE SET
+                    video_id = excluded.video_id, title = excluded.title,
+                    duration_min = excluded.duration_min, thumb = excluded.thumb,
+                    query = excluded.query, updated_at = excluded.updated_at
+            ''', rows)
+            conn.commit()
+
+        try:
+            await pool.run_write(_write)
+        except Exception as e:
+            LOGGER(__name__).warning(f"⚠️ تعذر حفظ روابط المقاطع: {e}")
+
+    async def _search(self, source: str, source_id: str, query: str) -> Optional[Dict[str, Any]]:
+        """بحث YouTube لمقطع واحد (مدمج للطلبات المتزامنة)"""
+        async def search():
+            from ZeMusic.platforms import YouTube
+            self.stats['searched'] += 1
+            track_details, video_id = await YouTube.track(query)
+            if not video_id:
+                return None
+            return self._details(
+                video_id, track_details.get("title"), track_details.get("duration_min"), track_details.get("thumb")
+            )
+
+        details, _ = await self._flight.do((source, source_id), search)
+        return details
+
+    async def resolve_many(self, source: str, items: Sequence[Tuple[str, str]],
+                           search_limit: Optional[int] = None) -> List[Optional[Dict[str, Any]]]:
+        """
+        حل عدة مقاطع [(معرف المقطع، نص البحث)] مع الحفاظ على الترتيب
+        المعروف يُقرأ من الربط الدائم، والباقي يُبحث عنه بالتوازي (بحد أقصى concurrency)
+        search_limit: البحث فقط للمقاطع الأولى بهذا العدد، وما بعدها يُعاد None إن لم يكن معروفاً
+        """
+        self.stats['lookups'] += len(items)
+        known = await self._load(source, list({source_id for source_id, _ in items}))
+        self.stats['mapped'] += sum(1 for source_id, _ in items if source_id in known)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        resolved: List[Tuple[str, str, Dict[str, Any]]] = []
+
+        async def resolve(index: int, source_id: str, query: str) -> Optional[Dict[str, Any]]:
+            if source_id in known:
+                return known[source_id]
+            if search_limit is not None and index >= search_limit:
+                return None
+            if (source, source_id) in self._misses:
+                return None
+            async with semaphore:
+                # قد يكون تكرار لنفس المقطع في القائمة حُلّ أثناء الانتظار
+                if source_id in known:
+                    return known[source_id]
+                try:
+                    details = await self._search(source, source_id, query)
+                except Exception as e:
+                    LOGGER(__name__).debug(f"فشل البحث عن {query}: {e}")
+                    return None
+            if details is None:
+                self.stats['not_found'] += 1
+                self._misses.set((source, source_id), True)
+                return None
+            if source_id not in known:
+                known[source_id] = details
+                self._memory.set((source, source_id), details)
+                resolved.append((source_id, query, details))
+            return details
+
+        results = await asyncio.gather(*(
+            resolve(index, source_id, query) for index, (source_id, query) in enumerate(items)
+        ))
+        await self._store(source, resolved)
+        return list(results)
+
+    async def resolve(self, source: str, source_id: str, query: str) -> Optional[Dict[str, Any]]:
+        """حل مقطع واحد"""
+        return (await self.resolve_many(source, [(source_id, query)]))[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'in_flight': len(self._flight),
+            'memory': self._memory.get_stats()
+        }
+
+# مثيل عام مشترك بين Spotify و Apple Music و Resso
+track_resolver = TrackResolver(config.YOUTUBE_CACHE_DB, concurrency=config.TRACK_RESOLVE_CONCURRENCY)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+كاش محدود الحجم (LRU) مع مدة صلاحية (TTL)
+آمن للاستخدام من حلقة الأحداث ومن خيوط منفذ قاعدة البيانات معاً
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+_MISSING = object()
+
+class TTLCache:
+    """كاش LRU بحد أقصى للعناصر ومدة صلاحية لكل عنصر مع عدادات إصابة/إخفاق"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0, name: str = "cache"):
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl
+        self.name = name
+
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expired': 0
+        }
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """قراءة عنصر (يُحتسب كإصابة أو إخفاق)"""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.stats['misses'] += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.stats['hits'] += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """إضافة أو تحديث عنصر مع طرد الأقدم عند امتلاء الكاش"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """إبطال عنصر"""
+        with self._lock:
+            entry = self._data.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[0]
+
+    def clear(self):
+        """مسح جميع العناصر"""
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        """فحص الوجود دون التأثير على العدادات أو ترتيب LRU"""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            return entry is not _MISSING and entry[1] >= time.monotonic()
+
+    def items(self):
+        """نسخة من العناصر الصالحة [(المفتاح، القيمة)] دون التأثير على العدادات"""
+        now = time.monotonic()
+        with self._lock:
+            return [(key, value) for key, (value, expires_at) in self._data.items() if expires_at >= now]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """إحصائيات الكاش"""
+        total = self.stats['hits'] + self.stats['misses']
+        return {
+            'name': self.name,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            **self.stats,
+            'hit_rate': round(self.stats['hits'] / total * 100, 1) if total else 0.0
+        }
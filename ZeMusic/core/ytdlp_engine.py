@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+"""
+محرك yt-dlp بمجمع عمليات
+عمليات عاملة طويلة العمر تحتفظ بنسخ YoutubeDL مهيأة (لكل ملف كوكيز وإعدادات)
+وتستقبل المهام عبر طابور وترسل التقدم والنتائج عبر طابور آخر،
+فلا ينافس الاستخراج حلقة الأحداث على GIL ولا تُعاد تهيئة المستخرجات في كل طلب
+"""
+
+import os
+import json
+import time
+import queue
+import asyncio
+import itertools
+import threading
+import multiprocessing
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+try:
+    from yt_dlp import YoutubeDL
+except ImportError:
+    YoutubeDL = None
+
+import config
+from ZeMusic.logging import LOGGER
+
+# عدد العمليات العاملة (حسب المعالجات إذا لم يُحدد)
+YTDLP_WORKERS = getattr(config, "YTDLP_PROCESS_WORKERS", 0) or max(1, min(4, os.cpu_count() or 1))
+
+# أقصى عدد نسخ YoutubeDL مهيأة في كل عملية
+WARM_INSTANCES_PER_WORKER = 8
+
+# أقل فترة بين رسائل التقدم لنفس المهمة (ثوان)
+PROGRESS_INTERVAL = 0.5
+
+# خيارات تتغير لكل مهمة وتُطبق على النسخة المهيأة دون إعادة إنشائها
+# (format ليس منها: YoutubeDL يترجم محدد الصيغة مرة واحدة عند الإنشاء فيبقى جزءاً من مفتاح النسخة)
+DYNAMIC_OPTIONS = ('outtmpl',)
+
+# حقول ثقيلة لا حاجة لنقلها من العملية العاملة
+HEAVY_INFO_KEYS = (
+    'formats', 'thumbnails', 'automatic_captions', 'subtitles', 'heatmap',
+    'requested_formats', 'http_headers', 'fragments', 'chapters'
+)
+
+class YTDLPJobError(Exception):
+    """خطأ أثناء تنفيذ مهمة yt-dlp في عملية عاملة"""
+
+# ========================================
+# جانب العملية العاملة
+# ========================================
+
+def _instance_key(opts: Dict) -> tuple:
+    """مفتاح النسخة المهيأة: الإعدادات الثابتة + وقت تعديل ملف الكوكيز"""
+    static = {k: v for k, v in opts.items() if k not in DYNAMIC_OPTIONS}
+    cookie_file = opts.get('cookiefile')
+    mtime = os.path.getmtime(cookie_file) if cookie_file and os.path.exists(cookie_file) else 0
+    return json.dumps(static, sort_keys=True, default=str), mtime
+
+def _compact_info(ydl, info: Optional[Dict]) -> Optional[Dict]:
+    """معلومات قابلة للنقل بين العمليات بدون الحقول الثقيلة"""
+    if not info:
+        return None
+    info = ydl.sanitize_info(info)
+    for key in HEAVY_INFO_KEYS:
+        info.pop(key, None)
+    if info.get('requested_downloads'):
+        info['requested_downloads'] = [
+            {'filepath': item.get('filepath'), 'ext': item.get('ext')}
+            for item in info['requested_downloads']
+        ]
+    if info.get('entries'):
+        info['entries'] = [_compact_info(ydl, entry) for entry in info['entries'] if entry]
+    return info
+
+def _worker_main(jobs, results):
+    """حلقة العملية العاملة"""
+    instances: "OrderedDict[tuple, Any]" = OrderedDict()
+    current = {'job_id': None, 'last': 0.0}
+
+    def progress_hook(data):
+        now = time.monotonic()
+        if data.get('status') != 'finished' and now - current['last'] < PROGRESS_INTERVAL:
+            return
+        current['last'] = now
+        results.put(('progress', current['job_id'], {
+            key: data.get(key)
+            for key in ('status', 'downloaded_bytes', 'total_bytes', 'total_bytes_estimate', 'speed', 'eta')
+        }))
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+
+        job_id, url, opts, download = job
+        current['job_id'] = job_id
+        current['last'] = 0.0
+        results.put(('start', job_id, os.getpid()))
+
+        try:
+            key = _instance_key(opts)
+            ydl = instances.pop(key, None)
+            warm = ydl is not None
+            if ydl is None:
+                static = {k: v for k, v in opts.items() if k not in DYNAMIC_OPTIONS}
+                static['progress_hooks'] = [progress_hook]
+                ydl = YoutubeDL(static)
+            instances[key] = ydl
+            while len(instances) > WARM_INSTANCES_PER_WORKER:
+                _, old = instances.popitem(last=False)
+                old.close()
+
+            # الخيارات المتغيرة تُقرأ عند كل استخراج
+            outtmpl = opts.get('outtmpl', '%(title)s [%(id)s].%(ext)s')
+            ydl.params['outtmpl'].update(outtmpl if isinstance(outtmpl, dict) else {'default': outtmpl})
+
+            info = ydl.extract_info(url, download=download)
+            results.put(('done', job_id, _compact_info(ydl, info), warm))
+        except Exception as e:
+            results.put(('error', job_id, f"{type(e).__name__}: {e}"))
+        finally:
+            current['job_id'] = None
+
+    for ydl in instances.values():
+        try:
+            ydl.close()
+        except Exception:
+            pass
+
+# ========================================
+# جانب البوت
+# ========================================
+
+class YTDLPEngine:
+    """مجمع عمليات yt-dlp مع نسخ مهيأة وبث التقدم"""
+
+    def __init__(self, workers: int = YTDLP_WORKERS):
+        self.workers = max(1, workers)
+        self.enabled = getattr(config, "YTDLP_PROCESS_POOL", True) and YoutubeDL is not None
+
+        methods = multiprocessing.get_all_start_methods()
+        # fork: العملية العاملة ترث الوحدات المحملة دون إعادة تهيئة البوت
+        self._ctx = multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+        self._jobs = None
+        self._results = None
+        self._procs = []
+        self._pending: Dict[int, tuple] = {}
+        self._running: Dict[int, int] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._reader: Optional[threading.Thread] = None
+        self._started = False
+        self._stopping = False
+
+        self.stats = {
+            'jobs': 0,
+            'completed': 0,
+            'failed': 0,
+            'warm_hits': 0,
+            'restarts': 0,
+            'thread_fallbacks': 0,
+            'total_time': 0.0
+        }
+
+    def start(self):
+        """تشغيل العمليات العاملة (مرة واحدة)"""
+        with self._lock:
+            if self._started or not self.enabled:
+                return
+            self._jobs = self._ctx.Queue()
+            self._results = self._ctx.Queue()
+            for _ in range(self.workers):
+                self._spawn()
+            self._reader = threading.Thread(target=self._reader_loop, name="YTDLPEngineReader", daemon=True)
+            self._reader.start()
+            self._started = True
+        LOGGER(__name__).info(f"⚙️ تم تشغيل محرك yt-dlp: {self.workers} عملية عاملة")
+
+    def _spawn(self):
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(self._jobs, self._results),
+            name="YTDLPWorker",
+            daemon=True
+        )
+        proc.start()
+        self._procs.append(proc)
+
+    def _reader_loop(self):
+        """قراءة النتائج من العمليات وتسليمها لحلقات الأحداث"""
+        last_check = time.monotonic()
+        while not self._stopping:
+            try:
+                message = self._results.get(timeout=1.0)
+            except queue.Empty:
+                message = None
+            except (EOFError, OSError):
+                break
+
+            if time.monotonic() - last_check >= 1.0:
+                self._check_workers()
+                last_check = time.monotonic()
+            if message is None:
+                continue
+
+            kind, job_id = message[0], message[1]
+            if kind == 'start':
+                self._running[message[2]] = job_id
+                continue
+
+            entry = self._pending.get(job_id)
+            if kind == 'progress':
+                if entry and entry[2]:
+                    entry[0].call_soon_threadsafe(entry[2], message[2])
+                continue
+
+            for pid, running_id in list(self._running.items()):
+                if running_id == job_id:
+                    del self._running[pid]
+            if kind == 'done':
+                if message[3]:
+                    self.stats['warm_hits'] += 1
+                self._resolve(entry, result=message[2])
+            else:
+                self._resolve(entry, error=YTDLPJobError(message[2]))
+
+    def _check_workers(self):
+        """إعادة تشغيل العمليات المتوقفة وإفشال مهامها الجارية"""
+        for proc in list(self._procs):
+            if proc.is_alive():
+                continue
+            self._procs.remove(proc)
+            job_id = self._running.pop(proc.pid, None)
+            if job_id is not None:
+                self._resolve(self._pending.get(job_id), error=YTDLPJobError("توقفت العملية العاملة أثناء المهمة"))
+            if not self._stopping:
+                self.stats['restarts'] += 1
+                LOGGER(__name__).warning(f"⚠️ توقفت عملية yt-dlp ({proc.exitcode}) - إعادة التشغيل")
+                self._spawn()
+
+    def _resolve(self, entry: Optional[tuple], result: Any = None, error: Optional[Exception] = None):
+        if not entry:
+            return
+        loop, future = entry[0], entry[1]
+
+        def _set():
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+        loop.call_soon_threadsafe(_set)
+
+    async def extract_info(self, url: str, opts: Dict, download: bool = True,
+                           progress: Optional[Callable[[Dict], None]] = None) -> Optional[Dict]:
+        """
+        تنفيذ extract_info في عملية عاملة
+        progress: دالة تُستدعى على حلقة الأحداث بقاموس التقدم
+        """
+        start = time.monotonic()
+        self.stats['jobs'] += 1
+        try:
+            if not self.enabled:
+                result = await self._extract_in_thread(url, opts, download, progress)
+            else:
+                self.start()
+                loop = asyncio.get_running_loop()
+                future = loop.create_future()
+                job_id = next(self._ids)
+                self._pending[job_id] = (loop, future, progress)
+                try:
+                    self._jobs.put((job_id, url, dict(opts), download))
+                    result = await future
+                finally:
+                    self._pending.pop(job_id, None)
+            self.stats['completed'] += 1
+            return result
+        except Exception:
+            self.stats['failed'] += 1
+            raise
+        finally:
+            self.stats['total_time'] += time.monotonic() - start
+
+    async def _extract_in_thread(self, url: str, opts: Dict, download: bool,
+                                 progress: Optional[Callable[[Dict], None]]) -> Optional[Dict]:
+        """المسار البديل: YoutubeDL جديد في خيط (عند تعطيل مجمع العمليات)"""
+        self.stats['thread_fallbacks'] += 1
+        loop = asyncio.get_running_loop()
+        opts = dict(opts)
+        if progress:
+            opts['progress_hooks'] = [lambda data: loop.call_soon_threadsafe(progress, data)]
+
+        def _run():
+            with YoutubeDL(opts) as ydl:
+                return _compact_info(ydl, ydl.extract_info(url, download=download))
+
+        return await loop.run_in_executor(None, _run)
+
+    def shutdown(self):
+        """إيقاف العمليات العاملة"""
+        with self._lock:
+            if not self._started:
+                return
+            self._stopping = True
+            for _ in self._procs:
+                self._jobs.put(None)
+            for proc in self._procs:
+                proc.join(timeout=5)
+                if proc.is_alive():
+                    proc.terminate()
+            self._procs.clear()
+            self._started = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self.stats
+        return {
+            **stats,
+            'workers': len(self._procs),
+            'in_flight': len(self._pending),
+            'avg_time': round(stats['total_time'] / stats['jobs'], 2) if stats['jobs'] else 0.0
+        }
+
+# المثيل العام
+ytdlp_engine = YTDLPEngine()
@@ -7,6 +7,8 @@ except ImportError:
     heroku3 = None
 import config
 from .logging import LOGGER
+from .core.queue_store import queue_store
+from .core.queue_prefetcher import queue_prefetcher
 
 # قائمة السُوبر يوزرز (SUDOERS) - نظام بسيط مع Telethon
 class TelethonSudoers:
@@ -61,11 +63,12 @@ def dbb():
     تم استبدالها بنظام SQLite الجديد.
     """
     global db
-    db = {}
+    queue_store.clear()
+    db = queue_store
     LOGGER(__name__).info("Local Database Initialized.")
 
-# تهيئة db للتوافق مع الكود القديم
-db = {}
+# قوائم التشغيل لكل مجموعة (QueueStore بواجهة القاموس القديم) مع التحميل المسبق للمقاطع التالية
+db = queue_prefetcher.store
 
 
 async def sudo():
@@ -13,13 +13,9 @@ try:
 except ImportError:
     BS4_AVAILABLE = False
     BeautifulSoup = None
-try:
-    from youtubesearchpython.__future__ import VideosSearch
-except ImportError:
-    try:
-        from youtube_search import YoutubeSearch as VideosSearch
-    except ImportError:
-        VideosSearch = None
+
+import config
+from ZeMusic.core.track_resolver import track_resolver
 
 
 class AppleAPI:
@@ -52,21 +48,10 @@ class AppleAPI:
                 search = tag.get("content", None)
         if search is None:
             return False
-        results = VideosSearch(search, limit=1)
-        for result in (await results.next())["result"]:
-            title = result["title"]
-            ytlink = result["link"]
-            vidid = result["id"]
-            duration_min = result["duration"]
-            thumbnail = result["thumbnails"][0]["url"].split("?")[0]
-        track_details = {
-            "title": title,
-            "link": ytlink,
-            "vidid": vidid,
-            "duration_min": duration_min,
-            "thumb": thumbnail,
-        }
-        return track_details, vidid
+        track_details = await track_resolver.resolve("apple", url.split("?")[0], search)
+        if not track_details:
+            return False
+        return track_details, track_details["vidid"]
 
     async def playlist(self, url, playid: Union[bool, str] = None):
         if playid:
@@ -79,7 +64,7 @@ class AppleAPI:
                 html = await response.text()
         soup = BeautifulSoup(html, "html.parser")
         applelinks = soup.find_all("meta", attrs={"property": "music:song"})
-        results = []
+        items = []
         for item in applelinks:
             try:
                 xx = (((item["content"]).split("album/")[1]).split("/")[0]).replace(
@@ -87,5 +72,11 @@ class AppleAPI:
                 )
             except:
                 xx = ((item["content"]).split("album/")[1]).split("/")[0]
-            results.append(xx)
+            items.append((item["content"], xx))
+        # المقاطع المحلولة تُعاد كروابط YouTube والباقي كنص بحث (يُحل عند تشغيله)
+        resolved = await track_resolver.resolve_many("apple", items, search_limit=config.PLAYLIST_FETCH_LIMIT)
+        results = [
+            details["link"] if details else query
+            for (_, query), details in zip(items, resolved)
+        ]
         return results, playlist_id
@@ -13,13 +13,8 @@ try:
 except ImportError:
     BS4_AVAILABLE = False
     BeautifulSoup = None
-try:
-    from youtubesearchpython.__future__ import VideosSearch
-except ImportError:
-    try:
-        from youtube_search import YoutubeSearch as VideosSearch
-    except ImportError:
-        VideosSearch = None
+
+from ZeMusic.core.track_resolver import track_resolver
 
 
 class RessoAPI:
@@ -57,18 +52,7 @@ class RessoAPI:
                     pass
         if des == "":
             return
-        results = VideosSearch(title, limit=1)
-        for result in (await results.next())["result"]:
-            title = result["title"]
-            ytlink = result["link"]
-            vidid = result["id"]
-            duration_min = result["duration"]
-            thumbnail = result["thumbnails"][0]["url"].split("?")[0]
-        track_details = {
-            "title": title,
-            "link": ytlink,
-            "vidid": vidid,
-            "duration_min": duration_min,
-            "thumb": thumbnail,
-        }
-        return track_details, vidid
+        track_details = await track_resolver.resolve("resso", url.split("?")[0], title)
+        if not track_details:
+            return False
+        return track_details, track_details["vidid"]
@@ -8,15 +8,19 @@ except ImportError:
     spotipy = None
     SpotifyClientCredentials = None
     SPOTIPY_AVAILABLE = False
-try:
-    from youtubesearchpython.__future__ import VideosSearch
-except ImportError:
-    try:
-        from youtube_search import YoutubeSearch as VideosSearch
-    except ImportError:
-        VideosSearch = None
 
 import config
+from ZeMusic.core.track_resolver import track_resolver
+
+
+def _track_query(track) -> str:
+    """نص البحث في YouTube: اسم المقطع + الفنانين"""
+    info = track["name"]
+    for artist in track["artists"]:
+        fetched = f' {artist["name"]}'
+        if "Various Artists" not in fetched:
+            info += fetched
+    return info
 
 
 class SpotifyAPI:
@@ -40,54 +44,53 @@ class SpotifyAPI:
         else:
             return False
 
+    async def _call(self, method: str, *args, **kwargs):
+        """استدعاء spotipy (متزامن) خارج حلقة الأحداث"""
+        return await track_resolver.run_sync(getattr(self.spotify, method), *args, **kwargs)
+
+    async def _paginate(self, page) -> list:
+        """جمع عناصر كائن الصفحات مع متابعة الصفحات التالية حتى SPOTIFY_MAX_TRACKS"""
+        items = list(page["items"])
+        while page.get("next") and len(items) < config.SPOTIFY_MAX_TRACKS:
+            page = await self._call("next", page)
+            if not page:
+                break
+            items.extend(page["items"])
+        return items[:config.SPOTIFY_MAX_TRACKS]
+
+    async def _resolve(self, tracks) -> list:
+        """
+        ربط المقاطع بفيديوهات YouTube دفعة واحدة
+        المقاطع المحلولة تُعاد كروابط YouTube (تفاصيلها في الكاش مسبقاً) والباقي كنص بحث
+        البحث فقط لأول PLAYLIST_FETCH_LIMIT مقطع، والباقي يُحل عند تشغيله في مسار البث
+        """
+        tracks = [track for track in tracks if track and track.get("name")]
+        items = [(track.get("id") or _track_query(track), _track_query(track)) for track in tracks]
+        resolved = await track_resolver.resolve_many("spotify", items, search_limit=config.PLAYLIST_FETCH_LIMIT)
+        return [
+            details["link"] if details else query
+            for (_, query), details in zip(items, resolved)
+        ]
+
     async def track(self, link: str):
-        track = self.spotify.track(link)
-        info = track["name"]
-        for artist in track["artists"]:
-            fetched = f' {artist["name"]}'
-            if "Various Artists" not in fetched:
-                info += fetched
-        results = VideosSearch(info, limit=1)
-        for result in (await results.next())["result"]:
-            ytlink = result["link"]
-            title = result["title"]
-            vidid = result["id"]
-            duration_min = result["duration"]
-            thumbnail = result["thumbnails"][0]["url"].split("?")[0]
-        track_details = {
-            "title": title,
-            "link": ytlink,
-            "vidid": vidid,
-            "duration_min": duration_min,
-            "thumb": thumbnail,
-        }
-        return track_details, vidid
+        track = await self._call("track", link)
+        details = await track_resolver.resolve("spotify", track["id"], _track_query(track))
+        if not details:
+            return {}, None
+        return details, details["vidid"]
 
     async def playlist(self, url):
-        playlist = self.spotify.playlist(url)
+        playlist = await self._call("playlist", url)
         playlist_id = playlist["id"]
-        results = []
-        for item in playlist["tracks"]["items"]:
-            music_track = item["track"]
-            info = music_track["name"]
-            for artist in music_track["artists"]:
-                fetched = f' {artist["name"]}'
-                if "Various Artists" not in fetched:
-                    info += fetched
-            results.append(info)
+        items = await self._paginate(playlist["tracks"])
+        results = await self._resolve([item.get("track") for item in items])
         return results, playlist_id
 
     async def album(self, url):
-        album = self.spotify.album(url)
+        album = await self._call("album", url)
         album_id = album["id"]
-        results = []
-        for item in album["tracks"]["items"]:
-            info = item["name"]
-            for artist in item["artists"]:
-                fetched = f' {artist["name"]}'
-                if "Various Artists" not in fetched:
-                    info += fetched
-            results.append(info)
+        items = await self._paginate(album["tracks"])
+        results = await self._resolve(items)
 
         return (
             results,
@@ -95,16 +98,9 @@ class SpotifyAPI:
         )
 
     async def artist(self, url):
-        artistinfo = self.spotify.artist(url)
+        artistinfo = await self._call("artist", url)
         artist_id = artistinfo["id"]
-        results = []
-        artisttoptracks = self.spotify.artist_top_tracks(url)
-        for item in artisttoptracks["tracks"]:
-            info = item["name"]
-            for artist in item["artists"]:
-                fetched = f' {artist["name"]}'
-                if "Various Artists" not in fetched:
-                    info += fetched
-            results.append(info)
+        artisttoptracks = await self._call("artist_top_tracks", url)
+        results = await self._resolve(artisttoptracks["tracks"])
 
         return results, artist_id
@@ -18,11 +18,8 @@ import random
 import re
 import logging
 import time
-import hashlib
-import json
 from typing import Union, Dict, List, Optional, Tuple
 from itertools import cycle
-from datetime import datetime, timedelta
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -47,6 +44,8 @@ from ZeMusic import app
 from ZeMusic.utils.database import is_on_off
 from ZeMusic.utils.formatters import time_to_seconds, seconds_to_min
 from ZeMusic.utils.decorators import asyncify
+from ZeMusic.core.ytdlp_engine import ytdlp_engine
+from ZeMusic.core.metadata_cache import metadata_cache, make_key
 
 # =============================================================================
 # إعدادات النظام المتقدم
@@ -63,11 +62,6 @@ DOWNLOAD_SEMAPHORE = asyncio.Semaphore(15)  # زيادة الحد المسموح
 SEARCH_SEMAPHORE = asyncio.Semaphore(20)    # للبحث السريع
 CONCURRENT_DOWNLOADS = 10
 
-# إعدادات الكاش
-CACHE_DIR = Path("cache/youtube")
-CACHE_DIR.mkdir(parents=True, exist_ok=True)
-CACHE_DURATION = timedelta(hours=6)  # مدة صلاحية الكاش
-
 # إعدادات التحميل
 DOWNLOADS_DIR = Path("downloads")
 DOWNLOADS_DIR.mkdir(exist_ok=True)
@@ -123,30 +117,17 @@ async def cookies():
         return None
 
 def get_cache_key(query: str, query_type: str = "search") -> str:
-    """إنشاء مفتاح كاش فريد"""
-    content = f"{query_type}:{query}:{time.strftime('%Y-%m-%d-%H')}"
-    return hashlib.md5(content.encode()).hexdigest()
+    """إنشاء مفتاح كاش مُطبّع (بدون الساعة - الصلاحية تُدار في الكاش نفسه)"""
+    return make_key(query_type, query)
 
 async def get_from_cache(cache_key: str) -> Optional[Dict]:
-    """الحصول على البيانات من الكاش"""
+    """الحصول على البيانات الصالحة من الكاش (ذاكرة ثم SQLite)"""
     try:
-        cache_file = CACHE_DIR / f"{cache_key}.json"
-        
-        if not cache_file.exists():
-            return None
-        
-        # التحقق من صلاحية الكاش
-        file_time = datetime.fromtimestamp(cache_file.stat().st_mtime)
-        if datetime.now() - file_time > CACHE_DURATION:
-            cache_file.unlink()  # حذف الكاش المنتهي الصلاحية
-            return None
-        
-        with open(cache_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = await metadata_cache.get(cache_key)
+        if data is not None:
             performance_stats['cache_hits'] += 1
             logger.debug(f"📦 تم استخدام الكاش: {cache_key}")
-            return data
-            
+        return data
     except Exception as e:
         logger.error(f"❌ خطأ في قراءة الكاش: {str(e)}")
         return None
@@ -154,16 +135,35 @@ async def get_from_cache(cache_key: str) -> Optional[Dict]:
 async def save_to_cache(cache_key: str, data: Dict):
     """حفظ البيانات في الكاش"""
     try:
-        cache_file = CACHE_DIR / f"{cache_key}.json"
-        
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-            
+        await metadata_cache.set(cache_key, data)
         logger.debug(f"💾 تم حفظ الكاش: {cache_key}")
-        
     except Exception as e:
         logger.error(f"❌ خطأ في حفظ الكاش: {str(e)}")
 
+async def cached_fetch(query_type: str, query: str, fetch) -> Optional[Dict]:
+    """
+    قراءة من الكاش مع stale-while-revalidate أو الجلب عند عدم الوجود
+    fetch تعيد قاموس البيانات أو None عند الفشل
+    """
+    fetched = False
+
+    async def _fetch():
+        nonlocal fetched
+        fetched = True
+        return await fetch()
+
+    try:
+        data = await metadata_cache.get_or_fetch(query_type, query, _fetch)
+    except Exception as e:
+        if fetched:
+            raise
+        logger.error(f"❌ خطأ في قراءة الكاش: {str(e)}")
+        return await fetch()
+
+    if not fetched:
+        performance_stats['cache_hits'] += 1
+    return data
+
 async def shell_cmd(cmd: str, timeout: int = 300) -> str:
     """تنفيذ أمر shell مع معالجة متقدمة للأخطاء"""
     try:
@@ -371,48 +371,41 @@ class YouTubeAPI:
             if "&" in link:
                 link = link.split("&")[0]
             
-            # التحقق من الكاش أولاً
-            cache_key = get_cache_key(link, "details")
-            cached_data = await get_from_cache(cache_key)
+            async def fetch():
+                # البحث المتقدم
+                async with SEARCH_SEMAPHORE:
+                    results = VideosSearch(link, limit=1)
+                    search_result = await results.next()
+                    
+                    for result in search_result.get("result", []):
+                        duration_min = result.get("duration", "0:00")
+                        
+                        # تحويل المدة
+                        duration_sec = 0 if str(duration_min) == "None" else convert_duration(duration_min)
+                        if duration_sec == 0:
+                            duration_sec = time_to_seconds(duration_min) if duration_min else 0
+                        
+                        performance_stats['api_calls'] += 1
+                        return {
+                            'title': result.get("title", "Unknown"),
+                            'duration_min': duration_min,
+                            'duration_sec': duration_sec,
+                            'thumbnail': result.get("thumbnails", [{}])[0].get("url", "").split("?")[0],
+                            'vidid': result.get("id", "")
+                        }
+                return None
             
-            if cached_data:
+            # الكاش أولاً (مفتاحه معرف الفيديو للروابط)
+            data = await cached_fetch("details", link, fetch)
+            if data:
                 return (
-                    cached_data['title'],
-                    cached_data['duration_min'],
-                    cached_data['duration_sec'],
-                    cached_data['thumbnail'],
-                    cached_data['vidid']
+                    data['title'],
+                    data['duration_min'],
+                    data['duration_sec'],
+                    data['thumbnail'],
+                    data['vidid']
                 )
             
-            # البحث المتقدم
-            async with SEARCH_SEMAPHORE:
-                results = VideosSearch(link, limit=1)
-                search_result = await results.next()
-                
-                for result in search_result.get("result", []):
-                    title = result.get("title", "Unknown")
-                    duration_min = result.get("duration", "0:00")
-                    thumbnail = result.get("thumbnails", [{}])[0].get("url", "").split("?")[0]
-                    vidid = result.get("id", "")
-                    
-                    # تحويل المدة
-                    duration_sec = 0 if str(duration_min) == "None" else convert_duration(duration_min)
-                    if duration_sec == 0:
-                        duration_sec = time_to_seconds(duration_min) if duration_min else 0
-                    
-                    # حفظ في الكاش
-                    cache_data = {
-                        'title': title,
-                        'duration_min': duration_min,
-                        'duration_sec': duration_sec,
-                        'thumbnail': thumbnail,
-                        'vidid': vidid
-                    }
-                    await save_to_cache(cache_key, cache_data)
-                    
-                    performance_stats['api_calls'] += 1
-                    return title, duration_min, duration_sec, thumbnail, vidid
-            
             return None, None, None, None, None
             
         except Exception as e:
@@ -442,7 +435,7 @@ class YouTubeAPI:
             if "&" in link:
                 link = link.split("&")[0]
             
-            # التحقق من الكاش
+            # التحقق من الكاش (بدون تقديم روابط منتهية)
             cache_key = get_cache_key(link, "video_url")
             cached_data = await get_from_cache(cache_key)
             
@@ -487,6 +480,9 @@ class YouTubeAPI:
                 return 1, video_url
             
             error_msg = stderr.decode() if stderr else "خطأ غير معروف"
+            if cookie_file:
+                from ZeMusic.core.cookies_manager import report_cookie_failure
+                await report_cookie_failure(cookie_file, error_msg)
             logger.error(f"❌ فشل في الحصول على رابط الفيديو: {error_msg}")
             return 0, error_msg
             
@@ -518,31 +514,33 @@ class YouTubeAPI:
             if "&" in link:
                 link = link.split("&")[0]
             
-            # التحقق من الكاش
-            cache_key = get_cache_key(f"{link}:{limit}", "playlist")
-            cached_data = await get_from_cache(cache_key)
-            
-            if cached_data:
-                return cached_data.get('videos', [])
-            
-            cookie_file = cookies()
-            cmd = (
-                f"yt-dlp -i --compat-options no-youtube-unavailable-videos "
-                f"--get-id --flat-playlist --playlist-end {limit} --skip-download "
-                f'--no-warnings "{link}"'
-            )
-            
-            if cookie_file:
-                cmd += f" --cookies {cookie_file}"
-            
-            playlist_output = await shell_cmd(cmd)
-            video_ids = [vid_id.strip() for vid_id in playlist_output.split("\n") if vid_id.strip()]
-            
-            # حفظ في الكاش
-            cache_data = {'videos': video_ids}
-            await save_to_cache(cache_key, cache_data)
-            
-            return video_ids
+            async def fetch():
+                from ZeMusic.core.cookies_manager import cookies_manager
+                cookie_file = await cookies()
+                recorded = False
+                cmd = (
+                    f"yt-dlp -i --compat-options no-youtube-unavailable-videos "
+                    f"--get-id --flat-playlist --playlist-end {limit} --skip-download "
+                    f'--no-warnings "{link}"'
+                )
+
+                if cookie_file:
+                    cmd += f" --cookies {cookie_file}"
+
+                try:
+                    playlist_output = await shell_cmd(cmd)
+                    video_ids = [vid_id.strip() for vid_id in playlist_output.split("\n") if vid_id.strip()]
+                    if cookie_file:
+                        cookies_manager.record(cookie_file, bool(video_ids), "" if video_ids else playlist_output)
+                        recorded = True
+                    return {'videos': video_ids} if video_ids else None
+                finally:
+                    # تحرير الحجز عند الاستثناء أو الإلغاء
+                    if cookie_file and not recorded:
+                        cookies_manager.release(cookie_file)
+            
+            data = await cached_fetch("playlist", f"{link}:{limit}", fetch)
+            return data.get('videos', []) if data else []
             
         except Exception as e:
             logger.error(f"❌ خطأ في playlist: {str(e)}")
@@ -591,37 +589,42 @@ class YouTubeAPI:
     async def _track_from_search(self, query: str) -> Tuple[Dict, str]:
         """البحث عن المسار"""
         try:
-            # التحقق من الكاش
-            cache_key = get_cache_key(query, "track_search")
-            cached_data = await get_from_cache(cache_key)
-            
-            if cached_data:
-                return cached_data['track_details'], cached_data['video_id']
-            
-            async with SEARCH_SEMAPHORE:
-                results = VideosSearch(query, limit=1)
-                search_result = await results.next()
-                
-                for result in search_result.get("result", []):
-                    track_details = {
-                        "title": result.get("title", "Unknown"),
-                        "link": result.get("link", ""),
-                        "vidid": result.get("id", ""),
-                        "duration_min": result.get("duration", "0:00"),
-                        "duration_sec": convert_duration(result.get("duration", "0:00")),
-                        "thumb": result.get("thumbnails", [{}])[0].get("url", "").split("?")[0],
-                        "uploader": result.get("channel", {}).get("name", ""),
-                        "view_count": result.get("viewCount", {}).get("text", "0"),
-                    }
+            async def fetch():
+                async with SEARCH_SEMAPHORE:
+                    results = VideosSearch(query, limit=1)
+                    search_result = await results.next()
                     
-                    # حفظ في الكاش
-                    cache_data = {
-                        'track_details': track_details,
-                        'video_id': result.get("id", "")
-                    }
-                    await save_to_cache(cache_key, cache_data)
-                    
-                    return track_details, result.get("id", "")
+                    for result in search_result.get("result", []):
+                        track_details = {
+                            "title": result.get("title", "Unknown"),
+                            "link": result.get("link", ""),
+                            "vidid": result.get("id", ""),
+                            "duration_min": result.get("duration", "0:00"),
+                            "duration_sec": convert_duration(result.get("duration", "0:00")),
+                            "thumb": result.get("thumbnails", [{}])[0].get("url", "").split("?")[0],
+                            "uploader": result.get("channel", {}).get("name", ""),
+                            "view_count": result.get("viewCount", {}).get("text", "0"),
+                        }
+                        
+                        # نتيجة البحث تملأ كاش التفاصيل لنفس معرف الفيديو
+                        if track_details["vidid"]:
+                            await save_to_cache(get_cache_key(track_details["vidid"], "details"), {
+                                'title': track_details["title"],
+                                'duration_min': track_details["duration_min"],
+                                'duration_sec': track_details["duration_sec"],
+                                'thumbnail': track_details["thumb"],
+                                'vidid': track_details["vidid"]
+                            })
+                        
+                        return {
+                            'track_details': track_details,
+                            'video_id': result.get("id", "")
+                        }
+                return None
+            
+            data = await cached_fetch("track_search", query, fetch)
+            if data:
+                return data['track_details'], data['video_id']
                     
         except Exception as e:
             logger.error(f"❌ خطأ في البحث: {str(e)}")
@@ -638,12 +641,21 @@ class YouTubeAPI:
                 link = link.split("&")[0]
 
             ytdl_opts = self.base_ytdl_opts.copy()
-            cookie_file = cookies()
+            # داخل خيط: الحجز المتزامن من المجمع مباشرة
+            from ZeMusic.core.cookies_manager import cookies_manager
+            cookie_file = cookies_manager.acquire()
             if cookie_file:
                 ytdl_opts["cookiefile"] = cookie_file
 
             with YoutubeDL(ytdl_opts) as ydl:
-                info = ydl.extract_info(link, download=False)
+                try:
+                    info = ydl.extract_info(link, download=False)
+                except Exception as e:
+                    if cookie_file:
+                        cookies_manager.record(cookie_file, False, str(e))
+                    raise
+                if cookie_file:
+                    cookies_manager.record(cookie_file, True)
                 formats_available = []
                 
                 for fmt in info.get("formats", []):
@@ -692,41 +704,30 @@ class YouTubeAPI:
             if "&" in link:
                 link = link.split("&")[0]
             
-            # التحقق من الكاش
-            cache_key = get_cache_key(f"{link}:{query_type}", "slider")
-            cached_data = await get_from_cache(cache_key)
+            async def fetch():
+                async with SEARCH_SEMAPHORE:
+                    search = VideosSearch(link, limit=max(15, query_type + 5))
+                    results = await search.next()
+                    
+                    result_list = results.get("result", [])
+                    if result_list and len(result_list) > query_type:
+                        item = result_list[query_type]
+                        return {
+                            'title': item.get("title", ""),
+                            'duration': item.get("duration", ""),
+                            'thumbnail': item.get("thumbnails", [{}])[0].get("url", "").split("?")[0],
+                            'video_id': item.get("id", "")
+                        }
+                return None
             
-            if cached_data:
+            data = await cached_fetch("slider", f"{link}:{query_type}", fetch)
+            if data:
                 return (
-                    cached_data['title'],
-                    cached_data['duration'],
-                    cached_data['thumbnail'],
-                    cached_data['video_id']
+                    data['title'],
+                    data['duration'],
+                    data['thumbnail'],
+                    data['video_id']
                 )
-            
-            async with SEARCH_SEMAPHORE:
-                search = VideosSearch(link, limit=max(15, query_type + 5))
-                results = await search.next()
-                
-                result_list = results.get("result", [])
-                if result_list and len(result_list) > query_type:
-                    item = result_list[query_type]
-                    
-                    title = item.get("title", "")
-                    duration = item.get("duration", "")
-                    thumbnail = item.get("thumbnails", [{}])[0].get("url", "").split("?")[0]
-                    video_id = item.get("id", "")
-                    
-                    # حفظ في الكاش
-                    cache_data = {
-                        'title': title,
-                        'duration': duration,
-                        'thumbnail': thumbnail,
-                        'video_id': video_id
-                    }
-                    await save_to_cache(cache_key, cache_data)
-                    
-                    return title, duration, thumbnail, video_id
                     
         except Exception as e:
             logger.error(f"❌ خطأ في slider: {str(e)}")
@@ -778,63 +779,65 @@ class YouTubeAPI:
         if "&" in link:
             link = link.split("&")[0]
         
+        from ZeMusic.core.cookies_manager import cookies_manager
         loop = asyncio.get_running_loop()
-        cookie_file = cookies()
-        
-        # تحديد نوع التحميل والإعدادات
-        if songvideo:
-            return await self._download_song_video(link, format_id, title, cookie_file, loop)
-        elif songaudio:
-            return await self._download_song_audio(link, format_id, title, cookie_file, loop)
-        elif video:
-            return await self._download_video(link, videoid, cookie_file, loop)
-        else:
-            return await self._download_audio(link, cookie_file, loop)
+        cookie_file = await cookies()
+        recorded = False
+
+        try:
+            # تحديد نوع التحميل والإعدادات
+            if songvideo:
+                result = await self._download_song_video(link, format_id, title, cookie_file, loop)
+            elif songaudio:
+                result = await self._download_song_audio(link, format_id, title, cookie_file, loop)
+            elif video:
+                result = await self._download_video(link, videoid, cookie_file, loop)
+            else:
+                result = await self._download_audio(link, cookie_file, loop)
+
+            if cookie_file:
+                cookies_manager.record(cookie_file, result.success, result.error_message or "")
+                recorded = True
+            return result
+        finally:
+            # بدون نتيجة (استثناء أو إلغاء): تحرير الحجز فقط
+            if cookie_file and not recorded:
+                cookies_manager.release(cookie_file)
 
     async def _download_audio(self, link: str, cookie_file: str, loop) -> DownloadResult:
         """تحميل الصوت فقط"""
-        def audio_dl():
-            try:
-                ydl_opts = {
-                    "format": "bestaudio[ext=m4a]/bestaudio/best",
-                    "outtmpl": str(DOWNLOADS_DIR / "%(id)s.%(ext)s"),
-                    "geo_bypass": True,
-                    "nocheckcertificate": True,
-                    "quiet": True,
-                    "no_warnings": True,
-                    "extract_flat": False,
-                    "writethumbnail": False,
-                    "writeinfojson": False,
-                }
-                
-                if cookie_file:
-                    ydl_opts["cookiefile"] = cookie_file
-                
-                with YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(link, download=False)
-                    expected_filename = str(DOWNLOADS_DIR / f"{info['id']}.{info.get('ext', 'unknown')}")
-                    
-                    # التحقق من وجود الملف مسبقاً
-                    if os.path.exists(expected_filename):
-                        file_size = os.path.getsize(expected_filename)
-                        return DownloadResult(True, expected_filename, None, file_size)
-                    
-                    # تحميل الملف
-                    ydl.download([link])
-                    
-                    # العثور على الملف المحمل
-                    downloaded_files = list(DOWNLOADS_DIR.glob(f"{info['id']}.*"))
-                    if downloaded_files:
-                        file_path = str(downloaded_files[0])
-                        file_size = os.path.getsize(file_path)
-                        return DownloadResult(True, file_path, None, file_size)
-                    
-                    return DownloadResult(False, None, "لم يتم العثور على الملف المحمل")
-                    
-            except Exception as e:
-                return DownloadResult(False, None, f"خطأ في تحميل الصوت: {str(e)}")
-        
-        return await loop.run_in_executor(None, audio_dl)
+        try:
+            ydl_opts = {
+                "format": "bestaudio[ext=m4a]/bestaudio/best",
+                "outtmpl": str(DOWNLOADS_DIR / "%(id)s.%(ext)s"),
+                "geo_bypass": True,
+                "nocheckcertificate": True,
+                "quiet": True,
+                "no_warnings": True,
+                "extract_flat": False,
+                "writethumbnail": False,
+                "writeinfojson": False,
+            }
+            
+            if cookie_file:
+                ydl_opts["cookiefile"] = cookie_file
+            
+            # yt-dlp يتخطى التحميل إذا كان الملف موجوداً مسبقاً
+            info = await ytdlp_engine.extract_info(link, ydl_opts)
+            if not info:
+                return DownloadResult(False, None, "فشل في استخراج معلومات الصوت")
+            
+            # العثور على الملف المحمل
+            downloaded_files = list(DOWNLOADS_DIR.glob(f"{info['id']}.*"))
+            if downloaded_files:
+                file_path = str(downloaded_files[0])
+                file_size = os.path.getsize(file_path)
+                return DownloadResult(True, file_path, None, file_size)
+            
+            return DownloadResult(False, None, "لم يتم العثور على الملف المحمل")
+            
+        except Exception as e:
+            return DownloadResult(False, None, f"خطأ في تحميل الصوت: {str(e)}")
 
     async def _download_video(self, link: str, videoid: Union[bool, str], cookie_file: str, loop) -> DownloadResult:
         """تحميل الفيديو"""
@@ -852,131 +855,107 @@ class YouTubeAPI:
 
     async def _download_video_file(self, link: str, cookie_file: str, loop) -> DownloadResult:
         """تحميل ملف الفيديو الفعلي"""
-        def video_dl():
-            try:
-                ydl_opts = {
-                    "format": "(bestvideo[height<=?720][width<=?1280][ext=mp4])+(bestaudio[ext=m4a])/best[height<=?720]",
-                    "outtmpl": str(DOWNLOADS_DIR / "%(id)s.%(ext)s"),
-                    "geo_bypass": True,
-                    "nocheckcertificate": True,
-                    "quiet": True,
-                    "no_warnings": True,
-                    "merge_output_format": "mp4",
-                }
-                
-                if cookie_file:
-                    ydl_opts["cookiefile"] = cookie_file
-                
-                with YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(link, download=False)
-                    expected_filename = str(DOWNLOADS_DIR / f"{info['id']}.mp4")
-                    
-                    if os.path.exists(expected_filename):
-                        file_size = os.path.getsize(expected_filename)
-                        return DownloadResult(True, expected_filename, None, file_size)
-                    
-                    ydl.download([link])
-                    
-                    if os.path.exists(expected_filename):
-                        file_size = os.path.getsize(expected_filename)
-                        return DownloadResult(True, expected_filename, None, file_size)
-                    
-                    return DownloadResult(False, None, "فشل في تحميل الفيديو")
-                    
-            except Exception as e:
-                return DownloadResult(False, None, f"خطأ في تحميل الفيديو: {str(e)}")
-        
-        return await loop.run_in_executor(None, video_dl)
+        try:
+            ydl_opts = {
+                "format": "(bestvideo[height<=?720][width<=?1280][ext=mp4])+(bestaudio[ext=m4a])/best[height<=?720]",
+                "outtmpl": str(DOWNLOADS_DIR / "%(id)s.%(ext)s"),
+                "geo_bypass": True,
+                "nocheckcertificate": True,
+                "quiet": True,
+                "no_warnings": True,
+                "merge_output_format": "mp4",
+            }
+            
+            if cookie_file:
+                ydl_opts["cookiefile"] = cookie_file
+            
+            info = await ytdlp_engine.extract_info(link, ydl_opts)
+            if not info:
+                return DownloadResult(False, None, "فشل في استخراج معلومات الفيديو")
+            
+            expected_filename = str(DOWNLOADS_DIR / f"{info['id']}.mp4")
+            if os.path.exists(expected_filename):
+                file_size = os.path.getsize(expected_filename)
+                return DownloadResult(True, expected_filename, None, file_size)
+            
+            return DownloadResult(False, None, "فشل في تحميل الفيديو")
+            
+        except Exception as e:
+            return DownloadResult(False, None, f"خطأ في تحميل الفيديو: {str(e)}")
 
     async def _download_song_video(self, link: str, format_id: str, title: str, cookie_file: str, loop) -> DownloadResult:
         """تحميل فيديو الأغنية بجودة محددة"""
-        def song_video_dl():
-            try:
-                safe_title = re.sub(r'[^\w\s-]', '', title)[:50]
-                
-                ydl_opts = {
-                    "format": f"{format_id}+bestaudio/best",
-                    "outtmpl": str(DOWNLOADS_DIR / f"{safe_title}.%(ext)s"),
-                    "geo_bypass": True,
-                    "nocheckcertificate": True,
-                    "quiet": True,
-                    "no_warnings": True,
-                    "merge_output_format": "mp4",
-                }
-                
-                if cookie_file:
-                    ydl_opts["cookiefile"] = cookie_file
-                
-                with YoutubeDL(ydl_opts) as ydl:
-                    ydl.download([link])
-                
-                expected_path = DOWNLOADS_DIR / f"{safe_title}.mp4"
-                if expected_path.exists():
-                    file_size = expected_path.stat().st_size
-                    return DownloadResult(True, str(expected_path), None, file_size)
-                
-                return DownloadResult(False, None, "لم يتم العثور على ملف الفيديو")
-                
-            except Exception as e:
-                return DownloadResult(False, None, f"خطأ في تحميل فيديو الأغنية: {str(e)}")
-        
-        return await loop.run_in_executor(None, song_video_dl)
+        try:
+            safe_title = re.sub(r'[^\w\s-]', '', title)[:50]
+            
+            ydl_opts = {
+                "format": f"{format_id}+bestaudio/best",
+                "outtmpl": str(DOWNLOADS_DIR / f"{safe_title}.%(ext)s"),
+                "geo_bypass": True,
+                "nocheckcertificate": True,
+                "quiet": True,
+                "no_warnings": True,
+                "merge_output_format": "mp4",
+            }
+            
+            if cookie_file:
+                ydl_opts["cookiefile"] = cookie_file
+            
+            await ytdlp_engine.extract_info(link, ydl_opts)
+            
+            expected_path = DOWNLOADS_DIR / f"{safe_title}.mp4"
+            if expected_path.exists():
+                file_size = expected_path.stat().st_size
+                return DownloadResult(True, str(expected_path), None, file_size)
+            
+            return DownloadResult(False, None, "لم يتم العثور على ملف الفيديو")
+            
+        except Exception as e:
+            return DownloadResult(False, None, f"خطأ في تحميل فيديو الأغنية: {str(e)}")
 
     async def _download_song_audio(self, link: str, format_id: str, title: str, cookie_file: str, loop) -> DownloadResult:
         """تحميل صوت الأغنية بجودة محددة"""
-        def song_audio_dl():
-            try:
-                safe_title = re.sub(r'[^\w\s-]', '', title)[:50]
-                
-                ydl_opts = {
-                    "format": format_id,
-                    "outtmpl": str(DOWNLOADS_DIR / f"{safe_title}.%(ext)s"),
-                    "geo_bypass": True,
-                    "nocheckcertificate": True,
-                    "quiet": True,
-                    "no_warnings": True,
-                    "postprocessors": [{
-                        "key": "FFmpegExtractAudio",
-                        "preferredcodec": "mp3",
-                        "preferredquality": "192",
-                    }],
-                }
-                
-                if cookie_file:
-                    ydl_opts["cookiefile"] = cookie_file
-                
-                with YoutubeDL(ydl_opts) as ydl:
-                    ydl.download([link])
-                
-                expected_path = DOWNLOADS_DIR / f"{safe_title}.mp3"
-                if expected_path.exists():
-                    file_size = expected_path.stat().st_size
-                    return DownloadResult(True, str(expected_path), None, file_size)
-                
-                return DownloadResult(False, None, "لم يتم العثور على ملف الصوت")
-                
-            except Exception as e:
-                return DownloadResult(False, None, f"خطأ في تحميل صوت الأغنية: {str(e)}")
-        
-        return await loop.run_in_executor(None, song_audio_dl)
+        try:
+            safe_title = re.sub(r'[^\w\s-]', '', title)[:50]
+            
+            ydl_opts = {
+                "format": format_id,
+                "outtmpl": str(DOWNLOADS_DIR / f"{safe_title}.%(ext)s"),
+                "geo_bypass": True,
+                "nocheckcertificate": True,
+                "quiet": True,
+                "no_warnings": True,
+                "postprocessors": [{
+                    "key": "FFmpegExtractAudio",
+                    "preferredcodec": "mp3",
+                    "preferredquality": "192",
+                }],
+            }
+            
+            if cookie_file:
+                ydl_opts["cookiefile"] = cookie_file
+            
+            await ytdlp_engine.extract_info(link, ydl_opts)
+            
+            expected_path = DOWNLOADS_DIR / f"{safe_title}.mp3"
+            if expected_path.exists():
+                file_size = expected_path.stat().st_size
+                return DownloadResult(True, str(expected_path), None, file_size)
+            
+            return DownloadResult(False, None, "لم يتم العثور على ملف الصوت")
+            
+        except Exception as e:
+            return DownloadResult(False, None, f"خطأ في تحميل صوت الأغنية: {str(e)}")
 
     async def get_performance_stats(self) -> Dict:
         """الحصول على إحصائيات الأداء"""
         return get_performance_report()
 
-    async def cleanup_cache(self, max_age_hours: int = 24):
-        """تنظيف الكاش القديم"""
+    async def cleanup_cache(self, max_age_hours: Optional[int] = None):
+        """تنظيف الكاش القديم (حذف مفهرس في SQLite حسب نافذة كل نوع)"""
         try:
-            current_time = time.time()
-            deleted_count = 0
-            
-            for cache_file in CACHE_DIR.glob("*.json"):
-                file_age = current_time - cache_file.stat().st_mtime
-                if file_age > (max_age_hours * 3600):
-                    cache_file.unlink()
-                    deleted_count += 1
-            
-            logger.info(f"🧹 تم حذف {deleted_count} ملف كاش قديم")
+            deleted_count = await metadata_cache.cleanup(max_age_hours)
+            logger.info(f"🧹 تم حذف {deleted_count} عنصر كاش قديم")
             return deleted_count
             
         except Exception as e:
@@ -1023,7 +1002,7 @@ async def periodic_cleanup():
     while True:
         try:
             await asyncio.sleep(3600)  # كل ساعة
-            await youtube.cleanup_cache(24)  # حذف الكاش أقدم من 24 ساعة
+            await youtube.cleanup_cache()  # حذف المنتهي وغير المستخدم منذ أطول من نافذة نوعه
             await youtube.cleanup_downloads(2)  # حذف التحميلات أقدم من ساعتين
         except Exception as e:
             logger.error(f"❌ خطأ في التنظيف الدوري: {str(e)}")
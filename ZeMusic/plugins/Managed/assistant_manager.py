@@ -16,6 +16,8 @@ import time
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
 
+from telethon.errors import FloodWaitError
+
 from ZeMusic.pyrogram_compatibility import filters, Client
 from ZeMusic.pyrogram_compatibility import (
     Message, 
@@ -26,8 +28,9 @@ from ZeMusic.pyrogram_compatibility import (
 )
 from ZeMusic import app
 from ZeMusic.core.call import Mody
-from ZeMusic.utils.database import group_assistant, get_assistant, set_assistant
+from ZeMusic.utils.database import group_assistant, get_assistant
 from ZeMusic.core.telethon_client import telethon_manager
+from ZeMusic.core.assistant_scheduler import assistant_scheduler
 from ZeMusic.utils.decorators.admins import AdminRightsCheck
 
 # كاش لتتبع الحسابات المساعدة
@@ -87,16 +90,10 @@ async def get_chat_assistant_status(chat_id: int) -> Optional[AssistantStatus]:
     except Exception as e:
         return None
 
-async def find_available_assistant() -> Optional[int]:
-    """البحث عن حساب مساعد متاح"""
+async def find_available_assistant(chat_id: int) -> Optional[int]:
+    """البحث عن حساب مساعد متاح (المرتبط بالمجموعة أو الأقل حملاً)"""
     try:
-        # الحصول على قائمة الحسابات المساعدة من Telethon manager
-        available_assistants = telethon_manager.get_available_assistants()
-        
-        if available_assistants:
-            return available_assistants[0].assistant_id
-        
-        return None
+        return await assistant_scheduler.assign(chat_id)
     
     except Exception:
         return None
@@ -111,7 +108,7 @@ async def join_assistant_to_chat(chat_id: int, requested_by: int) -> Tuple[bool,
             return False, "موجود_بالفعل", existing_status
         
         # البحث عن حساب مساعد متاح
-        assistant_id = await find_available_assistant()
+        assistant_id = await find_available_assistant(chat_id)
         
         if not assistant_id:
             return False, "لا_توجد_حسابات_متاحة", None
@@ -129,7 +126,7 @@ async def join_assistant_to_chat(chat_id: int, requested_by: int) -> Tuple[bool,
             
             if join_result:
                 # تسجيل الحساب المساعد للمجموعة
-                await set_assistant(chat_id, assistant_id)
+                await assistant_scheduler.pin(chat_id, assistant_id)
                 
                 # إنشاء حالة الحساب المساعد
                 user_info = await assistant.get_me()
@@ -157,6 +154,10 @@ async def join_assistant_to_chat(chat_id: int, requested_by: int) -> Tuple[bool,
             else:
                 return False, "فشل_في_الانضمام", None
         
+        except FloodWaitError as e:
+            # المساعد مقيد مؤقتاً: المجدول يخفض أولويته ويوزع المجموعات الجديدة على غيره
+            assistant_scheduler.report_flood_wait(assistant_id, e.seconds)
+            return False, f"انتظار_{e.seconds}_ثانية", None
         except Exception as e:
             return False, f"خطأ_في_الانضمام_{str(e)[:30]}", None
     
@@ -184,7 +185,7 @@ async def remove_assistant_from_chat(chat_id: int, requested_by: int) -> Tuple[b
             
             if leave_result:
                 # إزالة التخصيص من قاعدة البيانات
-                await set_assistant(chat_id, None)
+                await assistant_scheduler.pin(chat_id, None)
                 
                 # إزالة من الكاش
                 if chat_id in assistant_cache:
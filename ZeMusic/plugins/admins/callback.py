@@ -9,6 +9,7 @@ from ZeMusic.pyrogram_compatibility import InlineKeyboardButton, InlineKeyboardM
 
 from ZeMusic import YouTube, app
 from ZeMusic.core.call import Mody
+from ZeMusic.core.playback_clock import playback_clock
 from ZeMusic.misc import SUDOERS, db
 from ZeMusic.utils.database import (
     get_active_chats,
@@ -207,13 +208,13 @@ async def del_back_playlist(client, CallbackQuery, _):
         streamtype = check[0]["streamtype"]
         videoid = check[0]["vidid"]
         status = True if str(streamtype) == "video" else None
-        db[chat_id][0]["played"] = 0
         exis = (check[0]).get("old_dur")
         if exis:
             db[chat_id][0]["dur"] = exis
             db[chat_id][0]["seconds"] = check[0]["old_second"]
             db[chat_id][0]["speed_path"] = None
             db[chat_id][0]["speed"] = 1.0
+        playback_clock.start(chat_id, db[chat_id][0]["seconds"])
         if "live_" in queued:
             n, link = await YouTube.video(videoid, True)
             if n == 0:
@@ -385,7 +386,7 @@ async def markup_timer():
                     buttons = stream_markup_timer(
                         _,
                         chat_id,
-                        seconds_to_min(playing[0]["played"]),
+                        seconds_to_min(playback_clock.played(chat_id)),
                         playing[0]["dur"],
                     )
                     await mystic.edit_reply_markup(
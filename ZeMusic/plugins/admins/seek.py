@@ -3,6 +3,7 @@ from ZeMusic.pyrogram_compatibility import Message
 
 from ZeMusic import YouTube, app
 from ZeMusic.core.call import Mody
+from ZeMusic.core.playback_clock import playback_clock
 from ZeMusic.misc import db
 from ZeMusic.utils import AdminRightsCheck, seconds_to_min
 from ZeMusic.utils.inline import close_markup
@@ -28,7 +29,7 @@ async def seek_comm(cli, message: Message, _, chat_id):
     if duration_seconds == 0:
         return await message.reply_text(_["admin_22"])
     file_path = playing[0]["file"]
-    duration_played = int(playing[0]["played"])
+    duration_played = playback_clock.played(chat_id)
     duration_to_skip = int(query)
     duration = playing[0]["dur"]
     if message.command[0][-2] == "c":
@@ -66,9 +67,9 @@ async def seek_comm(cli, message: Message, _, chat_id):
     except:
         return await mystic.edit_text(_["admin_26"], reply_markup=close_markup(_))
     if message.command[0][-2] == "c":
-        db[chat_id][0]["played"] -= duration_to_skip
+        playback_clock.seek(chat_id, duration_played - duration_to_skip)
     else:
-        db[chat_id][0]["played"] += duration_to_skip
+        playback_clock.seek(chat_id, duration_played + duration_to_skip)
     await mystic.edit_text(
         text=_["admin_25"].format(seconds_to_min(to_seek), message.from_user.mention),
         reply_markup=close_markup(_),
@@ -1,5 +1,3 @@
-import random
-
 from ZeMusic.pyrogram_compatibility import filters
 from ZeMusic.pyrogram_compatibility import Message
 
@@ -18,16 +16,10 @@ async def admins(Client, message: Message, _, chat_id):
     check = db.get(chat_id)
     if not check:
         return await message.reply_text(_["queue_2"])
-    try:
-        popped = check.pop(0)
-    except:
-        return await message.reply_text(_["admin_15"], reply_markup=close_markup(_))
-    check = db.get(chat_id)
-    if not check:
-        check.insert(0, popped)
+    if len(check) < 2:
         return await message.reply_text(_["admin_15"], reply_markup=close_markup(_))
-    random.shuffle(check)
-    check.insert(0, popped)
+    # خلط ما بعد المقطع الحالي في تمريرة واحدة
+    check.shuffle(keep_head=True)
     await message.reply_text(
         _["admin_16"].format(message.from_user.mention), reply_markup=close_markup(_)
     )
@@ -8,6 +8,7 @@ from ZeMusic.pyrogram_compatibility import InlineKeyboardMarkup, Message
 import config
 from ZeMusic import YouTube, app
 from ZeMusic.core.call import Mody
+from ZeMusic.core.playback_clock import playback_clock
 from ZeMusic.misc import db
 from ZeMusic.utils.database import get_loop
 from ZeMusic.utils.decorators import AdminRightsCheck
@@ -39,27 +40,21 @@ async def skip(cli, message: Message, _, chat_id):
                 if count > 2:
                     count = int(count - 1)
                     if 1 <= state <= count:
-                        for x in range(state):
-                            popped = None
+                        # سحب المقاطع المتخطاة دفعة واحدة
+                        for popped in db.skip(chat_id, state):
+                            await auto_clean(popped)
+                        if not check:
                             try:
-                                popped = check.pop(0)
+                                await message.reply_text(
+                                    text=_["admin_6"].format(
+                                        (message.from_user.mention if message.from_user else message.chat.title),
+                                        message.chat.title,
+                                    ),
+                                    reply_markup=close_markup(_),
+                                )
+                                await Mody.stop_stream(chat_id)
                             except:
-                                return await message.reply_text(_["admin_12"])
-                            if popped:
-                                await auto_clean(popped)
-                            if not check:
-                                try:
-                                    await message.reply_text(
-                                        text=_["admin_6"].format(
-                                            (message.from_user.mention if message.from_user else message.chat.title),
-                                            message.chat.title,
-                                        ),
-                                        reply_markup=close_markup(_),
-                                    )
-                                    await Mody.stop_stream(chat_id)
-                                except:
-                                    return
-                                break
+                                return
                     else:
                         return await message.reply_text(_["admin_11"].format(count))
                 else:
@@ -103,13 +98,13 @@ async def skip(cli, message: Message, _, chat_id):
     streamtype = check[0]["streamtype"]
     videoid = check[0]["vidid"]
     status = True if str(streamtype) == "video" else None
-    db[chat_id][0]["played"] = 0
     exis = (check[0]).get("old_dur")
     if exis:
         db[chat_id][0]["dur"] = exis
         db[chat_id][0]["seconds"] = check[0]["old_second"]
         db[chat_id][0]["speed_path"] = None
         db[chat_id][0]["speed"] = 1.0
+    playback_clock.start(chat_id, db[chat_id][0]["seconds"])
     if "live_" in queued:
         n, link = await YouTube.video(videoid, True)
         if n == 0:
@@ -278,27 +273,21 @@ async def skip(cli, message: Message):
                 if count > 2:
                     count = int(count - 1)
                     if 1 <= state <= count:
-                        for x in range(state):
-                            popped = None
+                        # سحب المقاطع المتخطاة دفعة واحدة
+                        for popped in db.skip(chat_id, state):
+                            await auto_clean(popped)
+                        if not check:
                             try:
-                                popped = check.pop(0)
+                                await message.reply_text(
+                                    text=_["admin_6"].format(
+                                        (message.from_user.mention if message.from_user else message.chat.title),
+                                        message.chat.title,
+                                    ),
+                                    reply_markup=close_markup(_),
+                                )
+                                await Mody.stop_stream(chat_id)
                             except:
-                                return await message.reply_text(_["admin_12"])
-                            if popped:
-                                await auto_clean(popped)
-                            if not check:
-                                try:
-                                    await message.reply_text(
-                                        text=_["admin_6"].format(
-                                            (message.from_user.mention if message.from_user else message.chat.title),
-                                            message.chat.title,
-                                        ),
-                                        reply_markup=close_markup(_),
-                                    )
-                                    await Mody.stop_stream(chat_id)
-                                except:
-                                    return
-                                break
+                                return
                     else:
                         return await message.reply_text(_["admin_11"].format(count))
                 else:
@@ -342,13 +331,13 @@ async def skip(cli, message: Message):
     streamtype = check[0]["streamtype"]
     videoid = check[0]["vidid"]
     status = True if str(streamtype) == "video" else None
-    db[chat_id][0]["played"] = 0
     exis = (check[0]).get("old_dur")
     if exis:
         db[chat_id][0]["dur"] = exis
         db[chat_id][0]["seconds"] = check[0]["old_second"]
         db[chat_id][0]["speed_path"] = None
         db[chat_id][0]["speed"] = 1.0
+    playback_clock.start(chat_id, db[chat_id][0]["seconds"])
     if "live_" in queued:
         n, link = await YouTube.video(videoid, True)
         if n == 0:
@@ -3,6 +3,7 @@ from ZeMusic.pyrogram_compatibility import Message
 
 from ZeMusic import app
 from ZeMusic.core.call import Mody
+from ZeMusic.core.playback_clock import playback_clock
 from ZeMusic.misc import SUDOERS, db
 from ZeMusic.utils import AdminRightsCheck
 from ZeMusic.utils.database import is_active_chat, is_nonadmin_chat
@@ -107,6 +108,7 @@ async def del_back_playlist(client, CallbackQuery, _):
         return await mystic.edit_text(_["admin_33"], reply_markup=close_markup(_))
     if chat_id in checker:
         checker.remove(chat_id)
+    playback_clock.set_speed(chat_id, float(speed))
     await mystic.edit_text(
         text=_["admin_34"].format(speed, CallbackQuery.from_user.mention),
         reply_markup=close_markup(_),
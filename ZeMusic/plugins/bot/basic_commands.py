@@ -6,7 +6,6 @@ from ZeMusic.logging import LOGGER
 from ZeMusic.core.telethon_client import telethon_manager
 from ZeMusic.core.database import db
 from ZeMusic.core.music_manager import telethon_music_manager as music_manager
-from ZeMusic.plugins.owner.owner_panel import owner_panel
 from ZeMusic.plugins.owner.admin_panel import admin_panel
 from ZeMusic.plugins.owner.stats_handler import stats_handler
 from ZeMusic.plugins.owner.broadcast_handler import broadcast_handler
@@ -317,6 +316,8 @@ class BasicCommandHandler:
         try:
             user_id = update.effective_user.id
             
+            # لوحة المالك تُستورد عند أول استخدام
+            from ZeMusic.plugins.owner.owner_panel import owner_panel
             result = await owner_panel.show_main_panel(user_id)
             
             if result['success']:
@@ -491,6 +492,7 @@ class BasicCommandHandler:
             
             elif callback_data.startswith('owner_'):
                 # معالجة أزرار إدارة الحسابات المساعدة
+                from ZeMusic.plugins.owner.owner_panel import owner_panel
                 result = await owner_panel.handle_callback(user_id, callback_data)
             
             # تحديث الرسالة إذا كان هناك نتيجة
@@ -1,14 +1,20 @@
 import asyncio
 import time
 import sqlite3
-from typing import Dict, List, Optional, Union, Any
-from dataclasses import dataclass
+from typing import Dict, Optional, Union, Any
+from dataclasses import dataclass, field
 from datetime import datetime
 
+from telethon.errors import FloodWaitError
+
 import config
 from ZeMusic.logging import LOGGER
 from ZeMusic.core.telethon_client import telethon_manager
 from ZeMusic.core.database import db
+from ZeMusic.core.sqlite_pool import get_pool
+from ZeMusic.core.broadcast_engine import (
+    CURSOR_START, BroadcastEngine, BroadcastStore, ThroughputMeter, TokenBucket
+)
 
 @dataclass
 class BroadcastSession:
@@ -25,6 +31,9 @@ class BroadcastSession:
     sent_count: int = 0
     failed_count: int = 0
     total_targets: int = 0
+    cursor: int = CURSOR_START  # آخر معرف اكتملت صفحته (للاستئناف)
+    flood_waits: int = 0
+    meter: ThroughputMeter = field(default_factory=ThroughputMeter)
 
 class BroadcastHandler:
     """معالج الإذاعة الشامل والاحترافي"""
@@ -34,6 +43,15 @@ class BroadcastHandler:
         self.pending_sessions = {}   # جلسات الإعداد
         self.broadcast_stats = {}    # إحصائيات الإذاعة
         
+        # محرك الإذاعة: دلو رموز مشترك بين كل الإذاعات (حدود تليجرام تخص البوت بالكامل)
+        self.limiter = TokenBucket(config.BROADCAST_RATE)
+        self.store = BroadcastStore(get_pool(config.DATABASE_PATH))
+        self.engine = BroadcastEngine(
+            self.limiter, self.store,
+            concurrency=config.BROADCAST_CONCURRENCY,
+            page_size=config.BROADCAST_PAGE_SIZE
+        )
+        
     async def show_broadcast_menu(self, user_id: int) -> Dict:
         """عرض قائمة الإذاعة الرئيسية"""
         if user_id != config.OWNER_ID:
@@ -446,13 +464,14 @@ class BroadcastHandler:
         progress_percent = (broadcast_session.sent_count / broadcast_session.total_targets * 100) if broadcast_session.total_targets > 0 else 0
         success_rate = (broadcast_session.sent_count / (broadcast_session.sent_count + broadcast_session.failed_count) * 100) if (broadcast_session.sent_count + broadcast_session.failed_count) > 0 else 100
         
-        # تقدير الوقت المتبقي
-        if broadcast_session.sent_count > 0:
-            avg_time_per_message = elapsed_time / (broadcast_session.sent_count + broadcast_session.failed_count)
-            remaining_messages = broadcast_session.total_targets - (broadcast_session.sent_count + broadcast_session.failed_count)
-            estimated_remaining = avg_time_per_message * remaining_messages
-        else:
-            estimated_remaining = 0
+        # المعدل الحي (آخر 10 ثوانٍ) وتقدير الوقت المتبقي على أساسه
+        processed = broadcast_session.sent_count + broadcast_session.failed_count
+        remaining_messages = max(0, broadcast_session.total_targets - processed)
+        live_rate = broadcast_session.meter.rate()
+        average_rate = processed / elapsed_time if elapsed_time > 0 else 0
+        current_rate = live_rate or average_rate
+        estimated_remaining = remaining_messages / current_rate if current_rate > 0 else 0
+        paused_for = self.limiter.paused_for
         
         keyboard = [
             [
@@ -482,6 +501,10 @@ class BroadcastHandler:
             
             f"⚡ **الأداء:**\n"
             f"📊 معدل النجاح: `{success_rate:.1f}%`\n"
+            f"🚀 السرعة الحالية: `{live_rate:.1f} رسالة/ث`\n"
+            f"📉 متوسط السرعة: `{average_rate:.1f} رسالة/ث`\n"
+            f"⏳ FloodWait: `{broadcast_session.flood_waits}`"
+            f"{f' (متوقفة {int(paused_for)} ث)' if paused_for else ''}\n"
             f"⏱️ الوقت المنقضي: `{self._format_duration(elapsed_time)}`\n"
             f"⏳ الوقت المتوقع المتبقي: `{self._format_duration(estimated_remaining)}`\n\n"
             
@@ -503,40 +526,24 @@ class BroadcastHandler:
         return await self.show_broadcast_menu(user_id)
     
     async def _execute_broadcast(self, broadcast_session: BroadcastSession):
-        """تنفيذ الإذاعة الفعلية"""
+        """تنفيذ الإذاعة الفعلية عبر محرك الإذاعة"""
         try:
             broadcast_session.is_active = True
             
-            # الحصول على قائمة الأهداف
-            targets = await self._get_broadcast_targets(broadcast_session.target_type)
+            LOGGER(__name__).info(
+                f"بدء إذاعة إلى {broadcast_session.total_targets} هدف من نوع {broadcast_session.target_type} "
+                f"({config.BROADCAST_CONCURRENCY} مرسلين، {config.BROADCAST_RATE} رسالة/ث)"
+            )
             
-            LOGGER(__name__).info(f"بدء إذاعة إلى {len(targets)} هدف من نوع {broadcast_session.target_type}")
+            async def send(target_id: int) -> bool:
+                return await self._send_broadcast_message(
+                    target_id,
+                    broadcast_session.message_content,
+                    broadcast_session.forward_mode,
+                    broadcast_session.pin_message
+                )
             
-            # إرسال الرسائل بشكل تدريجي
-            for target_id in targets:
-                if broadcast_session.is_cancelled:
-                    break
-                
-                try:
-                    # إرسال الرسالة
-                    success = await self._send_broadcast_message(
-                        target_id,
-                        broadcast_session.message_content,
-                        broadcast_session.forward_mode,
-                        broadcast_session.pin_message
-                    )
-                    
-                    if success:
-                        broadcast_session.sent_count += 1
-                    else:
-                        broadcast_session.failed_count += 1
-                    
-                    # تأخير لتجنب القيود
-                    await asyncio.sleep(0.5)  # نصف ثانية بين كل رسالة
-                    
-                except Exception as e:
-                    LOGGER(__name__).error(f"خطأ في إرسال رسالة إلى {target_id}: {e}")
-                    broadcast_session.failed_count += 1
+            await self.engine.run(broadcast_session, send)
             
             # إنهاء الإذاعة
             broadcast_session.is_active = False
@@ -545,29 +552,58 @@ class BroadcastHandler:
             await self._send_broadcast_completion_report(broadcast_session)
             
             # إزالة الجلسة
-            if broadcast_session.user_id in self.active_broadcasts:
+            if self.active_broadcasts.get(broadcast_session.user_id) is broadcast_session:
                 del self.active_broadcasts[broadcast_session.user_id]
             
         except Exception as e:
             LOGGER(__name__).error(f"خطأ في تنفيذ الإذاعة: {e}")
             broadcast_session.is_active = False
     
+    async def resume_broadcasts(self):
+        """استئناف الإذاعات التي انقطعت (إعادة تشغيل أو خطأ) من آخر مؤشر محفوظ"""
+        try:
+            for job in await self.store.pending():
+                if job['user_id'] in self.active_broadcasts:
+                    continue
+                
+                broadcast_session = BroadcastSession(
+                    user_id=job['user_id'],
+                    session_id=job['session_id'],
+                    target_type=job['target_type'],
+                    pin_message=bool(job['pin_message']),
+                    forward_mode=bool(job['forward_mode']),
+                    message_content=job['message_content'],
+                    start_time=job['started_at'] or time.time(),
+                    sent_count=job['sent_count'],
+                    failed_count=job['failed_count'],
+                    total_targets=job['total_targets'],
+                    cursor=job['cursor']
+                )
+                self.active_broadcasts[broadcast_session.user_id] = broadcast_session
+                asyncio.create_task(self._execute_broadcast(broadcast_session))
+                
+                LOGGER(__name__).info(
+                    f"🔁 استئناف الإذاعة {broadcast_session.session_id} بعد "
+                    f"{broadcast_session.sent_count + broadcast_session.failed_count:,} هدف"
+                )
+                
+        except Exception as e:
+            LOGGER(__name__).error(f"خطأ في استئناف الإذاعات: {e}")
+    
     async def _send_broadcast_message(self, target_id: int, message_content: Dict, 
                                     forward_mode: bool, pin_message: bool) -> bool:
         """إرسال رسالة الإذاعة لهدف محدد"""
         try:
             bot_client = telethon_manager.bot_client
-            if not bot_client or not bot_client.is_connected:
+            if not bot_client or not bot_client.is_connected():
                 return False
             
             # إرسال الرسالة حسب النوع
             if forward_mode:
                 # إعادة توجيه
-                result = await bot_client.client.call_method('forwardMessages', {
-                    'chat_id': target_id,
-                    'from_chat_id': message_content.get('chat_id'),
-                    'message_ids': [message_content.get('message_id')]
-                })
+                result = await bot_client.forward_messages(
+                    target_id, message_content.get('message_id'), message_content.get('chat_id')
+                )
             else:
                 # نسخ ونشر
                 if message_content.get('text'):
@@ -579,16 +615,17 @@ class BroadcastHandler:
             # تثبيت الرسالة إذا طُلب
             if pin_message and result:
                 try:
-                    await bot_client.client.call_method('pinChatMessage', {
-                        'chat_id': target_id,
-                        'message_id': result.get('id'),
-                        'disable_notification': True
-                    })
+                    await bot_client.pin_message(target_id, result, notify=False)
+                except FloodWaitError:
+                    raise
                 except:
                     pass  # تجاهل أخطاء التثبيت
             
             return bool(result)
             
+        except FloodWaitError:
+            # تُعالج في محرك الإذاعة (إيقاف عام ثم إعادة المحاولة)
+            raise
         except Exception as e:
             LOGGER(__name__).debug(f"فشل إرسال رسالة إلى {target_id}: {e}")
             return False
@@ -681,28 +718,6 @@ class BroadcastHandler:
         counts = await self._get_broadcast_targets_count()
         return counts.get(target_type, 0)
     
-    async def _get_broadcast_targets(self, target_type: str) -> List[int]:
-        """الحصول على قائمة أهداف الإذاعة"""
-        try:
-            with sqlite3.connect(config.DATABASE_PATH) as conn:
-                cursor = conn.cursor()
-                
-                if target_type == 'users':
-                    cursor.execute("SELECT user_id FROM users WHERE is_banned = 0")
-                elif target_type == 'groups':
-                    cursor.execute("SELECT chat_id FROM chats WHERE chat_type IN ('group', 'supergroup') AND is_blacklisted = 0")
-                elif target_type == 'channels':
-                    cursor.execute("SELECT chat_id FROM chats WHERE chat_type = 'channel' AND is_blacklisted = 0")
-                else:
-                    return []
-                
-                results = cursor.fetchall()
-                return [row[0] for row in results]
-                
-        except Exception as e:
-            LOGGER(__name__).error(f"خطأ في الحصول على أهداف الإذاعة: {e}")
-            return []
-    
     def _get_target_type_name(self, target_type: str) -> str:
         """الحصول على اسم نوع الهدف"""
         names = {
@@ -714,8 +729,8 @@ class BroadcastHandler:
     
     def _calculate_estimated_time(self, target_count: int) -> str:
         """حساب الوقت المتوقع للإذاعة"""
-        # متوسط نصف ثانية لكل رسالة
-        estimated_seconds = target_count * 0.5
+        # معدل دلو الرموز هو الحد الأعلى للسرعة
+        estimated_seconds = target_count / config.BROADCAST_RATE
         return self._format_duration(estimated_seconds)
     
     def _format_duration(self, seconds: float) -> str:
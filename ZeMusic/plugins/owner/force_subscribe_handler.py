@@ -1,4 +1,3 @@
-import asyncio
 import sqlite3
 import re
 from typing import Dict, Optional, Union
@@ -8,6 +7,7 @@ import config
 from ZeMusic.logging import LOGGER
 from ZeMusic.core.telethon_client import telethon_manager
 from ZeMusic.core.database import db
+from ZeMusic.core.membership_cache import membership_cache
 
 class ForceSubscribeHandler:
     """معالج الاشتراك الإجباري المتطور"""
@@ -18,8 +18,7 @@ class ForceSubscribeHandler:
         self.channel_username = None
         self.channel_link = None
         self.bot_is_admin = False
-        self.cache_duration = 300  # 5 دقائق كاش للعضوية
-        self.membership_cache = {}
+        self.cache_duration = membership_cache.ttl  # مدة كاش العضوية المشترك
         self.load_settings()
     
     def load_settings(self):
@@ -181,7 +180,7 @@ class ForceSubscribeHandler:
         self.save_settings()
         
         # مسح الكاش لبدء جديد
-        self.membership_cache.clear()
+        membership_cache.clear()
         
         keyboard = [
             [
@@ -223,7 +222,7 @@ class ForceSubscribeHandler:
         self.save_settings()
         
         # مسح الكاش
-        self.membership_cache.clear()
+        membership_cache.clear()
         
         keyboard = [
             [
@@ -380,49 +379,12 @@ class ForceSubscribeHandler:
         if not self.is_enabled or not self.channel_id:
             return True
         
-        # التحقق من الكاش أولاً
-        cache_key = f"user_{user_id}"
-        if cache_key in self.membership_cache:
-            cached_data = self.membership_cache[cache_key]
-            if asyncio.get_event_loop().time() - cached_data['timestamp'] < self.cache_duration:
-                return cached_data['is_member']
-        
         try:
-            bot_client = telethon_manager.bot_client
-            if not bot_client or not bot_client.is_connected:
-                return True  # السماح إذا كان البوت غير متصل
-            
-            # فحص عضوية المستخدم
-            try:
-                member_info = await bot_client.client.call_method('getChatMember', {
-                    'chat_id': int(self.channel_id),
-                    'member_id': {'@type': 'messageSenderUser', 'user_id': user_id}
-                })
-                
-                # التحقق من حالة العضوية
-                status = member_info.get('status', {}).get('@type', '')
-                is_member = status in [
-                    'chatMemberStatusMember',
-                    'chatMemberStatusAdministrator',
-                    'chatMemberStatusCreator',
-                    'chatMemberStatusRestricted'  # عضو محدود لكن لا يزال عضو
-                ]
-                
-                # فحص طلبات الانضمام إذا لم يكن عضو
-                if not is_member:
-                    is_member = await self._check_join_requests(user_id)
-                
-            except Exception:
-                # إذا فشل الفحص، نفترض أنه غير عضو
-                is_member = False
-            
-            # حفظ في الكاش
-            self.membership_cache[cache_key] = {
-                'is_member': is_member,
-                'timestamp': asyncio.get_event_loop().time()
-            }
-            
-            return is_member
+            # كاش العضوية المشترك (نتائج سلبية قصيرة + دمج الفحوصات المتزامنة)
+            # طالبو الانضمام مقبولون أيضاً
+            return await membership_cache.is_member(
+                self.channel_id, user_id, extra_check=self._check_join_requests
+            )
             
         except Exception as e:
             LOGGER(__name__).error(f"خطأ في فحص اشتراك المستخدم {user_id}: {e}")
@@ -469,9 +431,8 @@ class ForceSubscribeHandler:
     async def handle_subscription_check(self, user_id: int, user_name: str = "المستخدم") -> Dict:
         """معالجة فحص الاشتراك"""
         # مسح الكاش للمستخدم لفحص جديد
-        cache_key = f"user_{user_id}"
-        if cache_key in self.membership_cache:
-            del self.membership_cache[cache_key]
+        if self.channel_id:
+            membership_cache.invalidate(self.channel_id, user_id)
         
         is_subscribed = await self.check_user_subscription(user_id)
         
@@ -615,18 +576,17 @@ class ForceSubscribeHandler:
         
         try:
             # إحصائيات الكاش
+            shared_stats = membership_cache.get_stats()
             cache_stats = {
-                'total_cached': len(self.membership_cache),
+                'total_cached': shared_stats['cache']['size'],
                 'cache_hits': 0,
                 'active_members': 0
             }
             
-            current_time = asyncio.get_event_loop().time()
-            for cache_data in self.membership_cache.values():
-                if current_time - cache_data['timestamp'] < self.cache_duration:
-                    cache_stats['cache_hits'] += 1
-                    if cache_data['is_member']:
-                        cache_stats['active_members'] += 1
+            for _, is_member in membership_cache.cached_entries():
+                cache_stats['cache_hits'] += 1
+                if is_member:
+                    cache_stats['active_members'] += 1
             
             # معلومات القناة إن وجدت
             channel_stats = "غير متاح"
@@ -660,7 +620,10 @@ class ForceSubscribeHandler:
                 f"📦 إجمالي المحفوظ: `{cache_stats['total_cached']}`\n"
                 f"✅ صالح للاستخدام: `{cache_stats['cache_hits']}`\n"
                 f"👤 أعضاء نشطين: `{cache_stats['active_members']}`\n"
-                f"⏱️ مدة الكاش: `{self.cache_duration // 60} دقائق`\n\n"
+                f"⏱️ مدة الكاش: `{self.cache_duration // 60} دقائق`\n"
+                f"🎯 نسبة الإصابة: `{shared_stats['cache']['hit_rate']}%` | "
+                f"🔗 فحوصات مدمجة: `{shared_stats['coalesced']}` | "
+                f"👥 محمّلون جماعياً: `{shared_stats['bulk_loaded']}`\n\n"
                 
                 f"🔧 **حالة النظام:**\n"
                 f"{'🟢 مُفعل ويعمل' if self.is_enabled else '🔴 مُعطل'}\n"
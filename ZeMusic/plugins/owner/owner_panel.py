@@ -8,6 +8,7 @@ from ZeMusic.logging import LOGGER
 from ZeMusic.core.telethon_client import telethon_manager
 from ZeMusic.core.database import db
 from ZeMusic.core.music_manager import telethon_music_manager as music_manager
+from ZeMusic.core.assistant_scheduler import assistant_scheduler
 
 class OwnerPanel:
     """لوحة تحكم مالك البوت"""
@@ -323,7 +324,8 @@ class OwnerPanel:
                     pass
                 
                 status_emoji = "🟢" if is_connected else "🔴"
-                button_text = f"{status_emoji} {assistant.get('name', f'حساب {assistant['assistant_id']}')} ({assistant['assistant_id']})"
+                assistant_name = assistant.get('name', f"حساب {assistant['assistant_id']}")
+                button_text = f"{status_emoji} {assistant_name} ({assistant['assistant_id']})"
                 keyboard.append([{
                     'text': button_text,
                     'callback_data': f'remove_assistant_{assistant["assistant_id"]}'
@@ -562,8 +564,9 @@ class OwnerPanel:
             ]
             
             for assistant in inactive_assistants:
+                assistant_name = assistant.get('name', f"حساب {assistant['assistant_id']}")
                 message_parts.append(
-                    f"🔴 **{assistant.get('name', f'حساب {assistant['assistant_id']}')}** (ID: {assistant['assistant_id']})\n"
+                    f"🔴 **{assistant_name}** (ID: {assistant['assistant_id']})\n"
                 )
             
             message_parts.append(
@@ -1133,6 +1136,26 @@ class OwnerPanel:
         """الحصول على وقت آخر إعادة تشغيل"""
         return "غير متاح"
     
+    def _format_assistant_load(self) -> str:
+        """سطر لكل مساعد: المكالمات النشطة، المجموعات المرتبطة، FloodWait"""
+        rows = assistant_scheduler.distribution()
+        if not rows:
+            return "• لا توجد حسابات مساعدة"
+        lines = []
+        for row in rows:
+            status = "🟢" if row['healthy'] else ("🟡" if row['connected'] else "🔴")
+            line = (f"{status} مساعد `{row['assistant_id']}`: مكالمات `{row['active_calls']}` | "
+                    f"مجموعات `{row['chats']}`")
+            if row['recent_floods']:
+                line += f" | FloodWait `{row['recent_floods']}`"
+            if row['flood_remaining']:
+                line += f" (متبقي {row['flood_remaining']}ث)"
+            lines.append(line)
+        sched = assistant_scheduler.get_stats()
+        lines.append(f"• ثبات الارتباط: `{sched['sticky_hits']}` | توزيعات جديدة: `{sched['assignments']}` | "
+                     f"نقل: `{sched['reassigned']}`")
+        return "\n".join(lines)
+    
     async def _get_bot_stats(self) -> Dict:
         """الحصول على إحصائيات سريعة للبوت"""
         stats = await db.get_stats()
@@ -1171,6 +1194,9 @@ class OwnerPanel:
 • الحسابات المتصلة: `{stats.get('connected_assistants', 0)}`
 • الحسابات النشطة: `{stats.get('active_assistants', 0)}`
 
+⚖️ **توزيع الحمل:**
+{self._format_assistant_load()}
+
 🎵 **الجلسات الموسيقية:**
 • الجلسات النشطة: `{stats['active_sessions']}`
 • إجمالي التشغيلات: `{stats.get('total_plays', 0)}`
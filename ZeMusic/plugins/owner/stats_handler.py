@@ -388,6 +388,7 @@ class StatsHandler:
                     'table_stats': table_stats,
                     'integrity': integrity_result == 'ok',
                     'cache_enabled': config.ENABLE_DATABASE_CACHE,
+                    'cache_hit_rate': self._get_db_cache_hit_rate(),
                     'path': config.DATABASE_PATH
                 }
                 
@@ -395,6 +396,14 @@ class StatsHandler:
             LOGGER(__name__).error(f"خطأ في إحصائيات قاعدة البيانات: {e}")
             return {}
     
+    def _get_db_cache_hit_rate(self) -> float:
+        """نسبة إصابة كاش قاعدة البيانات (إعدادات + مستخدمين + مجموعات)"""
+        from ZeMusic.core.database import db
+        stats = db.get_cache_stats().values()
+        hits = sum(s['hits'] for s in stats)
+        total = hits + sum(s['misses'] for s in stats)
+        return round(hits / total * 100, 1) if total else 0.0
+    
     async def _get_performance_metrics(self) -> Dict:
         """الحصول على مقاييس الأداء"""
         try:
@@ -535,7 +544,8 @@ class StatsHandler:
             f"📂 حجم قاعدة البيانات: `{database.get('size_mb', 0)} MB`\n"
             f"📋 عدد الجداول: `{database.get('tables_count', 0)}`\n"
             f"✅ سلامة البيانات: `{'سليمة' if database.get('integrity', False) else 'تحتاج فحص'}`\n"
-            f"⚡ الكاش: `{'مفعل' if database.get('cache_enabled', False) else 'معطل'}`\n\n"
+            f"⚡ الكاش: `{'مفعل' if database.get('cache_enabled', False) else 'معطل'}` "
+            f"(إصابة `{database.get('cache_hit_rate', 0)}%`)\n\n"
             
             f"🔧 **حالة النظام:** `{bot.get('main_bot', {}).get('connected', False) and 'نشط' or 'خطأ'}`\n"
             f"📱 **إصدار البوت:** `{bot.get('main_bot', {}).get('version', 'غير متاح')}`\n"
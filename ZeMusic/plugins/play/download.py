@@ -34,7 +34,6 @@ import psutil
 import random
 import string
 import atexit
-from contextlib import asynccontextmanager
 import orjson
 
 # تطبيق UVLoop لتحسين أداء asyncio
@@ -102,6 +101,15 @@ from telethon.types import Message
 
 import config
 from ZeMusic.core.telethon_client import telethon_manager
+from ZeMusic.core.sqlite_pool import get_pool
+from ZeMusic.core.singleflight import SingleFlight
+from ZeMusic.core.download_scheduler import DownloadScheduler
+from ZeMusic.core.ytdlp_engine import ytdlp_engine
+from ZeMusic.core.cookies_manager import cookies_manager
+from ZeMusic.core.search_orchestrator import HedgedSearch
+from ZeMusic.core.channel_indexer import (
+    ChannelIndexer, attach_envelope, build_cache_envelope, parse_cache_caption
+)
 from ZeMusic.logging import LOGGER
 from ZeMusic.utils.database import is_search_enabled, is_search_enabled1
 # from ZeMusic.utils.monitoring import PerformanceMonitor
@@ -117,6 +125,9 @@ SMART_CACHE_CHANNEL = config.CACHE_CHANNEL_ID
 DATABASE_PATH = "zemusic.db"
 DB_FILE = DATABASE_PATH  # توحيد أسماء قواعد البيانات
 
+# تجمع الاتصالات المشترك (نفس تجمع ZeMusic.core.database لنفس الملف)
+DB_POOL = get_pool(DB_FILE)
+
 def normalize_arabic_text(text: str) -> str:
     """تطبيع النص العربي للبحث المحسن"""
     if not text:
@@ -129,6 +140,9 @@ def normalize_arabic_text(text: str) -> str:
     text = re.sub(r'\s+', ' ', text).strip()  # إزالة المسافات الزائدة
     return text
 
+# مُفهرس قناة التخزين التزايدي (يستبدل فحص القناة الدوري)
+channel_indexer = ChannelIndexer(DB_POOL, normalize_arabic_text)
+
 # إعدادات العرض
 channel = getattr(config, 'STORE_LINK', '')
 lnk = f"https://t.me/{channel}" if channel else None
@@ -140,10 +154,6 @@ API_KEYS_CYCLE = cycle(YT_API_KEYS) if YT_API_KEYS else None
 INVIDIOUS_SERVERS = config.INVIDIOUS_SERVERS
 INVIDIOUS_CYCLE = cycle(INVIDIOUS_SERVERS) if INVIDIOUS_SERVERS else None
 
-# تدوير ملفات الكوكيز
-COOKIES_FILES = config.COOKIES_FILES
-COOKIES_CYCLE = cycle(COOKIES_FILES) if COOKIES_FILES else None
-
 # --- إعدادات yt-dlp عالية الأداء ---
 def get_ytdlp_opts(cookies_file=None) -> Dict:
     """إعدادات متقدمة لـ yt-dlp مع تحسينات الأداء"""
@@ -204,7 +214,10 @@ os.makedirs("downloads", exist_ok=True)
 
 async def init_database():
     """تهيئة قاعدة البيانات بشكل غير متزامن"""
-    conn = sqlite3.connect(DB_FILE)
+    await DB_POOL.run_write(_init_database_sync)
+
+def _init_database_sync(conn):
+    """إنشاء جداول وفهارس التخزين الذكي (على اتصال الكتابة)"""
     cursor = conn.cursor()
     
     # تحسين هيكل الجدول
@@ -249,9 +262,150 @@ async def init_database():
     
     for index_sql in indexes:
         cursor.execute(index_sql)
-    
+
+    # فهرس النص الكامل FTS5 متزامن مع channel_index عبر المشغلات
+    init_channel_fts(cursor)
+
     conn.commit()
-    conn.close()
+
+# --- فهرس النص الكامل (FTS5) لجدول channel_index ---
+CHANNEL_FTS_TABLE = "channel_index_fts"
+
+# أوزان BM25 للأعمدة: العنوان، الفنان، الكلمات المفتاحية
+CHANNEL_FTS_WEIGHTS = (5.0, 3.0, 1.0)
+
+# الاختلافات الشائعة في الكتابة العربية
+ARABIC_VARIANTS = {
+    'وحشتني': ['وحشتني', 'وحشتيني', 'وحشني', 'وحشتنى'],
+    'احبك': ['احبك', 'أحبك', 'احبّك', 'أحبّك'],
+    'حبيبي': ['حبيبي', 'حبيبى'],
+    'عليك': ['عليك', 'عليكي'],
+    'انت': ['انت', 'أنت', 'إنت']
+}
+
+# كل صيغة تشير إلى مجموعتها الكاملة (البحث بأي صيغة يجد البقية)
+ARABIC_VARIANT_GROUPS = {
+    variant: variants
+    for variants in ARABIC_VARIANTS.values()
+    for variant in variants
+}
+
+def init_channel_fts(cursor):
+    """إنشاء جدول FTS5 ومشغلات المزامنة مع channel_index"""
+    cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
+        (CHANNEL_FTS_TABLE,)
+    )
+    fts_exists = cursor.fetchone() is not None
+
+    cursor.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {CHANNEL_FTS_TABLE} USING fts5(
+            title_normalized,
+            artist_normalized,
+            keywords_vector,
+            content='channel_index',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+    ''')
+
+    triggers = [
+        f'''CREATE TRIGGER IF NOT EXISTS channel_index_fts_ai AFTER INSERT ON channel_index BEGIN
+            INSERT INTO {CHANNEL_FTS_TABLE}(rowid, title_normalized, artist_normalized, keywords_vector)
+            VALUES (new.id, new.title_normalized, new.artist_normalized, new.keywords_vector);
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS channel_index_fts_ad AFTER DELETE ON channel_index BEGIN
+            INSERT INTO {CHANNEL_FTS_TABLE}({CHANNEL_FTS_TABLE}, rowid, title_normalized, artist_normalized, keywords_vector)
+            VALUES ('delete', old.id, old.title_normalized, old.artist_normalized, old.keywords_vector);
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS channel_index_fts_au
+            AFTER UPDATE OF title_normalized, artist_normalized, keywords_vector ON channel_index BEGIN
+            INSERT INTO {CHANNEL_FTS_TABLE}({CHANNEL_FTS_TABLE}, rowid, title_normalized, artist_normalized, keywords_vector)
+            VALUES ('delete', old.id, old.title_normalized, old.artist_normalized, old.keywords_vector);
+            INSERT INTO {CHANNEL_FTS_TABLE}(rowid, title_normalized, artist_normalized, keywords_vector)
+            VALUES (new.id, new.title_normalized, new.artist_normalized, new.keywords_vector);
+        END'''
+    ]
+    for trigger_sql in triggers:
+        cursor.execute(trigger_sql)
+
+    # فهرسة السجلات الموجودة مسبقاً عند إنشاء الجدول لأول مرة
+    if not fts_exists:
+        cursor.execute(f"INSERT INTO {CHANNEL_FTS_TABLE}({CHANNEL_FTS_TABLE}) VALUES ('rebuild')")
+        LOGGER(__name__).info("🗂️ تم بناء فهرس النص الكامل لقناة التخزين")
+
+def _fts_term(token: str, prefix: bool = False) -> str:
+    """تحويل كلمة إلى مصطلح FTS5 آمن"""
+    term = '"' + token.replace('"', '""') + '"'
+    return term + '*' if prefix else term
+
+def build_channel_fts_query(query: str, match_all: bool = True) -> str:
+    """بناء استعلام FTS5 من نص البحث مع الاختلافات العربية"""
+    tokens = [t for t in normalize_arabic_text(query).split() if len(t) > 1]
+    if not tokens:
+        return ""
+
+    groups = []
+    for i, token in enumerate(tokens):
+        # مطابقة البادئة للكلمة الأخيرة فقط (المستخدم قد لا يكمل الكلمة)
+        is_last = i == len(tokens) - 1
+        variants = ARABIC_VARIANT_GROUPS.get(token, [token])
+        terms = [_fts_term(v, prefix=is_last) for v in variants]
+        groups.append(terms[0] if len(terms) == 1 else f"({' OR '.join(terms)})")
+
+    return f" {'AND' if match_all else 'OR'} ".join(groups)
+
+def search_channel_index(conn, query: str, limit: int = 10) -> List[Dict]:
+    """بحث مرتب بـ BM25 في channel_index، يعيد قائمة مرشحين مرتبة"""
+    weights = ", ".join(str(w) for w in CHANNEL_FTS_WEIGHTS)
+    sql = f"""
+        SELECT ci.message_id, ci.file_id, ci.file_unique_id, ci.original_title, ci.original_artist,
+               ci.duration, ci.file_size, ci.access_count, ci.last_accessed, ci.popularity_rank,
+               ci.title_normalized, ci.artist_normalized, ci.keywords_vector,
+               bm25({CHANNEL_FTS_TABLE}, {weights}) AS rank
+        FROM {CHANNEL_FTS_TABLE}
+        JOIN channel_index ci ON ci.id = {CHANNEL_FTS_TABLE}.rowid
+        WHERE {CHANNEL_FTS_TABLE} MATCH ?
+        ORDER BY rank, ci.popularity_rank DESC
+        LIMIT ?
+    """
+    columns = (
+        'message_id', 'file_id', 'file_unique_id', 'original_title', 'original_artist',
+        'duration', 'file_size', 'access_count', 'last_accessed', 'popularity_rank',
+        'title_normalized', 'artist_normalized', 'keywords_vector', 'rank'
+    )
+
+    cursor = conn.cursor()
+    # كل الكلمات أولاً (انتقائي وسريع)، ثم أي كلمة كاحتياط
+    for match_all in (True, False):
+        fts_query = build_channel_fts_query(query, match_all=match_all)
+        if not fts_query:
+            return []
+        cursor.execute(sql, (fts_query, limit))
+        rows = cursor.fetchall()
+        if rows:
+            return [dict(zip(columns, row)) for row in rows]
+
+    return []
+
+def score_channel_candidate(candidate: Dict, query_words: set) -> float:
+    """حساب درجة التطابق المركبة لمرشح من الفهرس"""
+    if not query_words:
+        return 0.0
+
+    title_words = set((candidate.get('title_normalized') or '').split())
+    artist_words = set((candidate.get('artist_normalized') or '').split())
+    keywords_words = set((candidate.get('keywords_vector') or '').split())
+
+    title_match = len(query_words & title_words) / len(query_words)
+    artist_match = len(query_words & artist_words) / len(query_words)
+    keywords_match = len(query_words & keywords_words) / len(query_words)
+
+    # درجة مركبة مع أوزان + بونص للشعبية (أقصى 10%)
+    composite_score = title_match * 0.5 + artist_match * 0.3 + keywords_match * 0.2
+    composite_score += min((candidate.get('popularity_rank') or 0) / 10, 0.1)
+    return composite_score
 
 # تهيئة قاعدة البيانات عند بدء الوحدة
 # سيتم تهيئة قاعدة البيانات عند أول استخدام
@@ -276,7 +430,6 @@ class ConnectionManager:
             cls._instance = super().__new__(cls)
             cls._instance._session_pool = []
             cls._instance._executor_pool = None
-            cls._instance._db_connections = {}
         return cls._instance
     
     async def initialize(self):
@@ -327,16 +480,6 @@ class ConnectionManager:
             await self.initialize()
         return random.choice(self._session_pool)
     
-    @asynccontextmanager
-    async def db_connection(self):
-        """إدارة اتصالات قاعدة البيانات"""
-        conn = sqlite3.connect(DB_FILE, check_same_thread=False)
-        conn.row_factory = sqlite3.Row
-        try:
-            yield conn
-        finally:
-            conn.close()
-    
     async def close(self):
         """إغلاق جميع الموارد"""
         try:
@@ -368,13 +511,23 @@ class HyperSpeedDownloader:
         
         # إعداد إحصائيات الأداء
         self.method_performance = {
-            'youtube_api': {'avg_time': 0},
-            'invidious': {'avg_time': 0},
-            'youtube_search': {'avg_time': 0},
             'ytdlp_cookies': {'avg_time': 0},
             'ytdlp_no_cookies': {'avg_time': 0}
         }
         
+        # البحث المتحوط: الترتيب يُتعلم من زمن ونجاح كل مزود (التسجيل بترتيب الأولوية المبدئي)
+        self.search_orchestrator = HedgedSearch(
+            "external_search",
+            min_delay=config.SEARCH_HEDGE_MIN_DELAY,
+            max_delay=config.SEARCH_HEDGE_MAX_DELAY
+        )
+        if YoutubeSearch:
+            self.search_orchestrator.register('youtube_search', self.youtube_search_simple, timeout=REQUEST_TIMEOUT * 1.5, prior=1.0)
+        if API_KEYS_CYCLE:
+            self.search_orchestrator.register('youtube_api', self.youtube_api_search, timeout=REQUEST_TIMEOUT * 1.5, prior=1.2)
+        if INVIDIOUS_CYCLE:
+            self.search_orchestrator.register('invidious', self.invidious_search, timeout=REQUEST_TIMEOUT * 1.5, prior=1.5)
+        
         # إعداد مدير الاتصالات
         try:
             self.conn_manager = ConnectionManager()
@@ -390,20 +543,15 @@ class HyperSpeedDownloader:
         try:
             # البحث في قاعدة البيانات أولاً
             normalized_query = normalize_arabic_text(query)
+            pattern = f'%{normalized_query.lower()}%'
             
-            conn = sqlite3.connect(DATABASE_PATH)
-            cursor = conn.cursor()
-            
-            # البحث بالعنوان والفنان
-            cursor.execute("""
+            # البحث بالعنوان والفنان (خارج حلقة الأحداث عبر التجمع)
+            results = await DB_POOL.fetchall("""
                 SELECT video_id, title, artist, duration, file_path, thumb, message_id, keywords
                 FROM cached_audio 
                 WHERE LOWER(title) LIKE ? OR LOWER(artist) LIKE ? OR LOWER(keywords) LIKE ?
                 ORDER BY created_at DESC LIMIT 5
-            """, (f'%{normalized_query.lower()}%', f'%{normalized_query.lower()}%', f'%{normalized_query.lower()}%'))
-            
-            results = cursor.fetchall()
-            conn.close()
+            """, (pattern, pattern, pattern))
             
             if results:
                 result = results[0]  # أخذ أول نتيجة
@@ -488,61 +636,48 @@ class HyperSpeedDownloader:
             normalized_query = self.normalize_text(query)
             search_hash = self.create_search_hash(normalized_query)
             
-            async with self.conn_manager.db_connection() as conn:
-                cursor = conn.cursor()
-                
-                # بحث مباشر بالهاش
-                cursor.execute(
-                    "SELECT message_id, file_id, original_title, original_artist, duration "
-                    "FROM channel_index WHERE search_hash = ? LIMIT 1",
+            # بحث مباشر بالهاش (اتصال قراءة من التجمع خارج حلقة الأحداث)
+            result = await DB_POOL.fetchone(
+                "SELECT message_id, file_id, original_title, original_artist, duration "
+                "FROM channel_index WHERE search_hash = ? LIMIT 1",
+                (search_hash,)
+            )
+            
+            if result:
+                # تحديث إحصائيات الاستخدام
+                await DB_POOL.execute(
+                    "UPDATE channel_index SET access_count = access_count + 1, "
+                    "last_accessed = CURRENT_TIMESTAMP WHERE search_hash = ?",
                     (search_hash,)
                 )
-                result = cursor.fetchone()
-                
-                if result:
-                    # تحديث إحصائيات الاستخدام
-                    cursor.execute(
-                        "UPDATE channel_index SET access_count = access_count + 1, "
-                        "last_accessed = CURRENT_TIMESTAMP WHERE search_hash = ?",
-                        (search_hash,)
-                    )
-                    conn.commit()
-                    
-                    self.cache_hits += 1
-                    return {
-                        'message_id': result[0],
-                        'file_id': result[1],
-                        'title': result[2],
-                        'artist': result[3],
-                        'duration': result[4],
-                        'source': 'cache',
-                        'cached': True
-                    }
-                
-                # بحث تقريبي باستخدام فهرس الكلمات
-                keywords = normalized_query.split()
-                keyword_conditions = " OR ".join(["keywords_vector LIKE ?" for _ in keywords])
-                params = [f"%{kw}%" for kw in keywords]
-                
-                cursor.execute(
-                    f"SELECT message_id, file_id, original_title, original_artist, duration "
-                    f"FROM channel_index WHERE {keyword_conditions} "
-                    f"ORDER BY popularity_rank DESC LIMIT 1",
-                    params
-                )
-                result = cursor.fetchone()
                 
-                if result:
-                    self.cache_hits += 1
-                    return {
-                        'message_id': result[0],
-                        'file_id': result[1],
-                        'title': result[2],
-                        'artist': result[3],
-                        'duration': result[4],
-                        'source': 'cache_fuzzy',
-                        'cached': True
-                    }
+                self.cache_hits += 1
+                return {
+                    'message_id': result[0],
+                    'file_id': result[1],
+                    'title': result[2],
+                    'artist': result[3],
+                    'duration': result[4],
+                    'source': 'cache',
+                    'cached': True
+                }
+            
+            # بحث تقريبي مرتب باستخدام فهرس النص الكامل
+            candidates = await DB_POOL.run_read(search_channel_index, query, 5)
+            
+            if candidates:
+                best = candidates[0]
+                self.cache_hits += 1
+                return {
+                    'message_id': best['message_id'],
+                    'file_id': best['file_id'],
+                    'title': best['original_title'],
+                    'artist': best['original_artist'],
+                    'duration': best['duration'],
+                    'source': 'cache_fuzzy',
+                    'cached': True,
+                    'candidates': candidates
+                }
             
             self.cache_misses += 1
         except Exception as e:
@@ -557,7 +692,6 @@ class HyperSpeedDownloader:
             return None
         
         session = await self.conn_manager.get_session()
-        start_time = time.time()
         
         try:
             for attempt in range(len(YT_API_KEYS)):
@@ -601,11 +735,6 @@ class HyperSpeedDownloader:
                         
                         LOGGER(__name__).info(f"✅ YouTube API نجح: {title[:30]}...")
                         
-                        self.method_performance['youtube_api']['avg_time'] = (
-                            self.method_performance['youtube_api']['avg_time'] * 0.7 + 
-                            (time.time() - start_time) * 0.3
-                        )
-                        
                         return {
                             "video_id": video_id,
                             "title": title,
@@ -629,7 +758,6 @@ class HyperSpeedDownloader:
             return None
         
         session = await self.conn_manager.get_session()
-        start_time = time.time()
         
         try:
             for _ in range(len(INVIDIOUS_SERVERS)):
@@ -660,11 +788,6 @@ class HyperSpeedDownloader:
                         if not video:
                             continue
                         
-                        self.method_performance['invidious']['avg_time'] = (
-                            self.method_performance['invidious']['avg_time'] * 0.7 + 
-                            (time.time() - start_time) * 0.3
-                        )
-                        
                         return {
                             "video_id": video.get("videoId"),
                             "title": video.get("title", "")[:60],
@@ -691,8 +814,6 @@ class HyperSpeedDownloader:
         if not YoutubeSearch:
             return None
         
-        start_time = time.time()
-            
         try:
             # التحقق من توفر مكتبة البحث
             if not YoutubeSearch:
@@ -701,8 +822,8 @@ class HyperSpeedDownloader:
             
             # استخدام youtube_search
             LOGGER(__name__).info(f"🔍 بدء البحث في YouTube Search: {query}")
-            search = YoutubeSearch(query, max_results=1)
-            results = search.to_dict()
+            # المكتبة متزامنة: في خيط حتى لا توقف حلقة الأحداث (ولا البحث المتحوط)
+            results = await asyncio.to_thread(lambda: YoutubeSearch(query, max_results=1).to_dict())
             
             LOGGER(__name__).info(f"📊 عدد النتائج: {len(results) if results else 0}")
             
@@ -752,11 +873,6 @@ class HyperSpeedDownloader:
             if not video_id:
                 return None
             
-            self.method_performance['youtube_search']['avg_time'] = (
-                self.method_performance['youtube_search']['avg_time'] * 0.7 + 
-                (time.time() - start_time) * 0.3
-            )
-            
             return {
                 "video_id": video_id,
                 "title": title[:60],
@@ -787,89 +903,52 @@ class HyperSpeedDownloader:
         url = f"https://youtu.be/{video_id}"
         start_time = time.time()
         
-        # محاولة مع مدير الكوكيز الذكي
-        try:
-            from ZeMusic.core.cookies_manager import cookies_manager, report_cookie_success, report_cookie_failure
-            
-            # محاولة مع الكوكيز أولاً
-            for attempt in range(2):  # محاولة كوكيزين مختلفين
-                try:
-                    cookies_file = await cookies_manager.get_next_cookie()
-                    if not cookies_file:
-                        break
-                        
-                    opts = get_ytdlp_opts(cookies_file)
-                    
-                    loop = asyncio.get_running_loop()
-                    info = await loop.run_in_executor(
-                        self.conn_manager.executor_pool,
-                        lambda: yt_dlp.YoutubeDL(opts).extract_info(url, download=True)
-                    )
-                    
-                    if info:
-                        audio_path = f"downloads/{video_id}.mp3"
-                        if os.path.exists(audio_path):
-                            # تقرير نجاح وتحديث الأداء
-                            await report_cookie_success(cookies_file)
-                            self.method_performance['ytdlp_cookies']['avg_time'] = (
-                                self.method_performance['ytdlp_cookies']['avg_time'] * 0.7 + 
-                                (time.time() - start_time) * 0.3
-                            )
-                            
-                            return {
-                                "audio_path": audio_path,
-                                "title": info.get("title", video_info.get("title", ""))[:60],
-                                "artist": info.get("uploader", video_info.get("artist", "Unknown")),
-                                "duration": int(info.get("duration", 0)),
-                                "file_size": os.path.getsize(audio_path),
-                                "source": f"ytdlp_cookies_{Path(cookies_file).name}"
-                            }
+        # محاولة مع مجمع الكوكيز (الأعلى صحة أولاً)
+        for attempt in range(2):  # محاولة كوكيزين مختلفين
+            cookies_file = cookies_manager.acquire()
+            if not cookies_file:
+                break
+            recorded = False
+            try:
+                opts = get_ytdlp_opts(cookies_file)
                 
-                except Exception as e:
-                    # تقرير فشل
-                    if 'cookies_file' in locals() and cookies_file:
-                        await report_cookie_failure(cookies_file, str(e))
-                    LOGGER(__name__).warning(f"فشل yt-dlp مع كوكيز {cookies_file}: {e}")
-                    continue
-                    
-        except ImportError:
-            # العودة للنظام القديم إذا لم يكن المدير متاحاً
-            if COOKIES_CYCLE:
-                for _ in range(len(COOKIES_FILES)):
-                    try:
-                        cookies_file = next(COOKIES_CYCLE)
-                        opts = get_ytdlp_opts(cookies_file)
-                        
-                        loop = asyncio.get_running_loop()
-                        info = await loop.run_in_executor(
-                            self.conn_manager.executor_pool,
-                            lambda: yt_dlp.YoutubeDL(opts).extract_info(url, download=True)
-                        )
-                        
-                        if info:
-                            audio_path = f"downloads/{video_id}.mp3"
-                            if os.path.exists(audio_path):
-                                return {
-                                    "audio_path": audio_path,
-                                    "title": info.get("title", video_info.get("title", ""))[:60],
-                                    "artist": info.get("uploader", video_info.get("artist", "Unknown")),
-                                    "duration": int(info.get("duration", 0)),
-                                    "file_size": os.path.getsize(audio_path),
-                                    "source": f"ytdlp_cookies_{cookies_file}"
-                                }
+                info = await ytdlp_engine.extract_info(url, opts)
+                
+                audio_path = f"downloads/{video_id}.mp3"
+                if info and os.path.exists(audio_path):
+                    # تقرير نجاح وتحديث الأداء
+                    cookies_manager.record(cookies_file, True)
+                    recorded = True
+                    self.method_performance['ytdlp_cookies']['avg_time'] = (
+                        self.method_performance['ytdlp_cookies']['avg_time'] * 0.7 + 
+                        (time.time() - start_time) * 0.3
+                    )
                     
-                    except Exception as e:
-                        LOGGER(__name__).warning(f"فشل yt-dlp مع كوكيز {cookies_file}: {e}")
-                        continue
+                    return {
+                        "audio_path": audio_path,
+                        "title": info.get("title", video_info.get("title", ""))[:60],
+                        "artist": info.get("uploader", video_info.get("artist", "Unknown")),
+                        "duration": int(info.get("duration", 0)),
+                        "file_size": os.path.getsize(audio_path),
+                        "source": f"ytdlp_cookies_{Path(cookies_file).name}"
+                    }
+            
+            except Exception as e:
+                # تقرير فشل
+                if not recorded:
+                    cookies_manager.record(cookies_file, False, str(e))
+                    recorded = True
+                LOGGER(__name__).warning(f"فشل yt-dlp مع كوكيز {cookies_file}: {e}")
+                continue
+            finally:
+                # بدون نتيجة (لا ملف أو إلغاء): تحرير الحجز فقط
+                if not recorded:
+                    cookies_manager.release(cookies_file)
         
         # محاولة بدون كوكيز
         try:
             opts = get_ytdlp_opts()
-            loop = asyncio.get_running_loop()
-            info = await loop.run_in_executor(
-                self.conn_manager.executor_pool,
-                lambda: yt_dlp.YoutubeDL(opts).extract_info(url, download=True)
-            )
+            info = await ytdlp_engine.extract_info(url, opts)
             
             if info:
                 audio_path = f"downloads/{video_id}.mp3"
@@ -933,15 +1012,20 @@ class HyperSpeedDownloader:
             normalized_artist = self.normalize_text(artist)
             keywords = f"{normalized_title} {normalized_artist} {self.normalize_text(search_query)}"
             
-            async with self.conn_manager.db_connection() as conn:
+            # الحصول على file_id من Telethon
+            file_id = message.document.id if message.document else None
+            file_unique_id = getattr(message.document, 'access_hash', None)
+            
+            def _save(conn):
                 cursor = conn.cursor()
-                
-                # الحصول على file_id من Telethon
-                file_id = message.document.id if message.document else None
-                file_unique_id = getattr(message.document, 'access_hash', None)
-                
+
+                # حذف المتعارض صراحةً ليبقى فهرس FTS متزامناً
+                cursor.execute(
+                    "DELETE FROM channel_index WHERE message_id = ? OR file_id = ? OR search_hash = ?",
+                    (message.id, str(file_id), search_hash)
+                )
                 cursor.execute('''
-                    INSERT OR REPLACE INTO channel_index 
+                    INSERT INTO channel_index
                     (message_id, file_id, file_unique_id, search_hash, title_normalized, artist_normalized, 
                      keywords_vector, original_title, original_artist, duration, file_size)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
@@ -953,6 +1037,8 @@ class HyperSpeedDownloader:
                 
                 conn.commit()
             
+            await DB_POOL.run_write(_save)
+            
             LOGGER(__name__).info(f"✅ تم حفظ {title} في التخزين الذكي")
             return str(file_id)
             
@@ -986,62 +1072,16 @@ class HyperSpeedDownloader:
                     'cached': True
                 }
             
-            # خطوة 2: البحث عن معلومات الفيديو بالتوازي
-            search_methods = []
-            
-            # إضافة طرق البحث بترتيب الأولوية
-            
-            # أولوية 1: YouTube Search (الأكثر موثوقية)
-            try:
-                if YoutubeSearch:
-                    search_methods.append(self.youtube_search_simple(query))
-                    LOGGER(__name__).info(f"🔍 إضافة YouTube Search للبحث")
-            except Exception as e:
-                LOGGER(__name__).warning(f"⚠️ فشل في إضافة YouTube Search: {e}")
-            
-            # أولوية 2: YouTube API (إذا كان متاحاً)
-            if API_KEYS_CYCLE:
-                search_methods.append(self.youtube_api_search(query))
-                LOGGER(__name__).info(f"🔍 إضافة YouTube API للبحث")
-            
-            # أولوية 3: Invidious (كبديل)
-            if INVIDIOUS_CYCLE:
-                search_methods.append(self.invidious_search(query))
-                LOGGER(__name__).info(f"🔍 إضافة Invidious للبحث")
-            
-            if not search_methods:
+            # خطوة 2: البحث المتحوط عن معلومات الفيديو (الأسرع تاريخياً أولاً)
+            if not self.search_orchestrator.providers:
                 LOGGER(__name__).error(f"❌ لا توجد طرق بحث متاحة!")
                 return None
             
-            LOGGER(__name__).info(f"🚀 بدء البحث بـ {len(search_methods)} طريقة")
-            
-            # تشغيل جميع عمليات البحث بالتوازي
-            search_tasks = [asyncio.create_task(method) for method in search_methods]
-            done, pending = await asyncio.wait(
-                search_tasks,
-                timeout=REQUEST_TIMEOUT * 1.5,
-                return_when=asyncio.FIRST_COMPLETED
-            )
-            
-            # إلغاء المهام المتبقية
-            for task in pending:
-                task.cancel()
-            
-            # أخذ أول نتيجة ناجحة
-            video_info = None
-            for task in done:
-                try:
-                    result = task.result()
-                    if result:
-                        video_info = result
-                        LOGGER(__name__).info(f"✅ نجح البحث: {result.get('title', 'Unknown')} من {result.get('source', 'Unknown')}")
-                        break
-                except Exception as e:
-                    LOGGER(__name__).warning(f"⚠️ فشلت إحدى طرق البحث: {e}")
-            
+            video_info = await self.search_orchestrator.search(query)
             if not video_info:
                 LOGGER(__name__).error(f"❌ فشل جميع طرق البحث لـ: {query}")
                 return None
+            LOGGER(__name__).info(f"✅ نجح البحث: {video_info.get('title', 'Unknown')} من {video_info.get('source', 'Unknown')}")
             
             # خطوة 3: تحميل الصوت
             LOGGER(__name__).info(f"🎵 بدء تحميل الصوت: {video_info.get('title', 'Unknown')}")
@@ -1098,8 +1138,8 @@ class HyperSpeedDownloader:
             temp_dir = Path(self.downloads_folder)
             temp_dir.mkdir(parents=True, exist_ok=True)
             
-            # الحصول على ملفات الكوكيز المتاحة مع التدوير الذكي
-            cookies_files = get_available_cookies()
+            # ملفات الكوكيز المتاحة مرتبة حسب الصحة
+            cookies_files = cookies_manager.ranked()
             LOGGER(__name__).info(f"🍪 متاح: {len(cookies_files)} ملف كوكيز للتدوير")
             
             # إعداد محاولات التحميل مع الكوكيز المختلفة
@@ -1154,12 +1194,14 @@ class HyperSpeedDownloader:
             # جرب كل إعداد حتى ينجح أحدهم مع تتبع الكوكيز
             for i, ydl_opts in enumerate(ydl_configs, 1):
                 cookie_file = ydl_opts.get('_cookie_file')
+                recorded = False
+                
+                LOGGER(__name__).info(f"🔄 محاولة التحميل #{i}")
+                if cookie_file:
+                    cookies_manager.acquire(cookie_file)
+                    LOGGER(__name__).info(f"🍪 استخدام كوكيز: {os.path.basename(cookie_file)}")
                 
                 try:
-                    LOGGER(__name__).info(f"🔄 محاولة التحميل #{i}")
-                    if cookie_file:
-                        LOGGER(__name__).info(f"🍪 استخدام كوكيز: {os.path.basename(cookie_file)}")
-                    
                     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                         info = ydl.extract_info(
                             f"https://www.youtube.com/watch?v={video_id}",
@@ -1172,7 +1214,8 @@ class HyperSpeedDownloader:
                             
                             # تتبع نجاح الكوكيز
                             if cookie_file:
-                                track_cookie_usage(cookie_file, success=True)
+                                cookies_manager.record(cookie_file, True)
+                                recorded = True
                             
                             for file_path in temp_dir.glob(f"{video_id}*.*"):
                                 if file_path.suffix in ['.m4a', '.mp3', '.webm', '.mp4', '.opus']:
@@ -1188,26 +1231,22 @@ class HyperSpeedDownloader:
                             break
                             
                 except Exception as e:
-                    error_msg = str(e).lower()
                     LOGGER(__name__).warning(f"❌ فشلت المحاولة #{i}: {e}")
                     
-                    # تتبع فشل الكوكيز
-                    if cookie_file:
-                        track_cookie_usage(cookie_file, success=False)
-                    
-                    # فحص أخطاء الحظر والكوكيز المنتهية الصلاحية
-                    if cookie_file and any(keyword in error_msg for keyword in [
-                        'blocked', 'forbidden', '403', 'unavailable', 'cookies', 'expired',
-                        'sign in', 'login', 'authentication', 'token', 'session', 'captcha'
-                    ]):
-                        mark_cookie_as_blocked(cookie_file, f"خطأ: {str(e)[:50]}")
-                        LOGGER(__name__).warning(f"🚫 تم حظر الكوكيز بسبب: {str(e)[:50]}")
+                    # تتبع فشل الكوكيز (المجمع يبرّد المحظور منها)
+                    if cookie_file and not recorded:
+                        cookies_manager.record(cookie_file, False, str(e))
+                        recorded = True
                     
                     if i < len(ydl_configs):
                         LOGGER(__name__).info(f"🔄 جاري المحاولة التالية...")
                         continue
                     else:
                         LOGGER(__name__).error(f"❌ فشلت جميع محاولات التحميل")
+                finally:
+                    # بدون معلومات: تحرير الحجز فقط
+                    if cookie_file and not recorded:
+                        cookies_manager.release(cookie_file)
             
             LOGGER(__name__).error("❌ لم يتم العثور على ملف محمل")
             
@@ -1316,12 +1355,6 @@ class HyperSpeedDownloader:
             
         return None
 
-# نظام تتبع حالة ملفات الكوكيز
-COOKIES_STATUS = {}
-BLOCKED_COOKIES = set()
-COOKIES_USAGE_COUNT = {}
-LAST_COOKIE_USED = None
-
 # إحصائيات البحث المتوازي
 PARALLEL_SEARCH_STATS = {
     'database_wins': 0,
@@ -1336,9 +1369,12 @@ PARALLEL_SEARCH_STATS = {
 # نظام إدارة الحمولة العالية
 
 # إعدادات الحمولة العالية (محسنة للأداء)
-MAX_CONCURRENT_DOWNLOADS = 20          # حد معقول للتحميلات المتوازية
+MAX_CONCURRENT_DOWNLOADS = 20          # عمال تحميل yt-dlp المتوازية
 MAX_CONCURRENT_SEARCHES = 30           # حد معقول للبحث المتوازي
-MAX_QUEUE_SIZE = float('inf')          # لا حد أقصى للطابور
+MAX_CONCURRENT_CACHE_SENDS = 40        # عمال البحث في الكاش والإرسال منه
+MAX_QUEUED_DOWNLOADS = 200             # رفض طلبات التحميل الجديدة بعد هذا الحد
+MAX_QUEUED_CACHE_SENDS = 500           # رفض الطلبات الجديدة بعد هذا الحد
+MAX_QUEUED_PER_USER = 3                # أقصى طلبات معلقة لكل مستخدم
 RATE_LIMIT_WINDOW = 60                  # نافزة زمنية بالثواني
 MAX_REQUESTS_PER_WINDOW = 1000          # حد مرن للطلبات (مضاعف)
 
@@ -1347,6 +1383,21 @@ MAX_REQUESTS_PER_WINDOW = 1000          # حد مرن للطلبات (مضاعف
 # search_semaphore = None    # إزالة التحديد
 thread_pool = ThreadPoolExecutor(max_workers=100)  # زيادة عدد الخيوط
 
+# مجدول الطلبات: مرحلة الكاش (رخيصة) ومرحلة التحميل (مكلفة) بطوابير محدودة
+download_scheduler = DownloadScheduler(
+    cache_workers=MAX_CONCURRENT_CACHE_SENDS,
+    download_workers=MAX_CONCURRENT_DOWNLOADS,
+    cache_queue=MAX_QUEUED_CACHE_SENDS,
+    download_queue=MAX_QUEUED_DOWNLOADS,
+    max_per_user=MAX_QUEUED_PER_USER
+)
+
+QUEUE_FULL_MESSAGE = "🚦 **البوت مشغول حالياً بعدد كبير من الطلبات**\n\nيرجى المحاولة بعد قليل"
+
+def get_request_priority(user_id: int) -> int:
+    """أولوية الطلب في المجدول (الأصغر يُخدم أولاً)"""
+    return 0 if user_id == config.OWNER_ID else 1
+
 # تتبع معدل الطلبات (مرن)
 request_times = defaultdict(lambda: deque(maxlen=MAX_REQUESTS_PER_WINDOW))
 active_downloads = {}
@@ -1362,9 +1413,14 @@ PERFORMANCE_STATS = {
     'peak_concurrent': 0,
     'current_concurrent': 0,
     'queue_size': 0,
-    'rate_limited': 0
+    'rate_limited': 0,
+    'coalesced_requests': 0
 }
 
+# دمج الطلبات المتزامنة: بحث واحد لكل استعلام وتحميل/رفع واحد لكل video_id
+search_flight = SingleFlight("search")
+download_flight = SingleFlight("download")
+
 async def check_rate_limit(user_id: int) -> bool:
     """فحص معدل الطلبات للمستخدم (مرن)"""
     current_time = time.time()
@@ -1410,7 +1466,7 @@ async def update_performance_stats(success: bool, response_time: float, from_cac
     if current_concurrent > PERFORMANCE_STATS['peak_concurrent']:
         PERFORMANCE_STATS['peak_concurrent'] = current_concurrent
     
-    PERFORMANCE_STATS['queue_size'] = 0  # لا يوجد طابور - معالجة فورية
+    PERFORMANCE_STATS['queue_size'] = download_scheduler.queued
 
 def log_performance_stats():
     """تسجيل إحصائيات الأداء"""
@@ -1424,7 +1480,16 @@ def log_performance_stats():
         f"كاش: {cache_hit_rate:.1f}% | "
         f"متوسط: {stats['avg_response_time']:.2f}s | "
         f"متوازي: {stats['current_concurrent']}/{stats['peak_concurrent']} | "
-        f"طابور: {stats['queue_size']}"
+        f"طابور: {stats['queue_size']} | "
+        f"مدمج: {stats['coalesced_requests']}"
+    )
+
+    search_stats = downloader.search_orchestrator.get_stats()
+    LOGGER(__name__).info(
+        f"🔎 البحث: {search_stats['searches']} | "
+        f"احتياطي: {search_stats['hedges']} | "
+        f"ملغى: {search_stats['cancelled']} | "
+        f"الترتيب: {' > '.join(search_stats['order'])}"
     )
 
 async def process_unlimited_download(event, user_id: int, start_time: float):
@@ -1547,119 +1612,6 @@ async def process_normal_download(event, query: str, user_id: int, start_time: f
         except:
             pass
 
-def get_available_cookies():
-    """الحصول على قائمة ملفات الكوكيز المتاحة مع تدوير ذكي"""
-    try:
-        import glob
-        import os
-        cookies_pattern = "cookies/cookies*.txt"
-        all_cookies_files = glob.glob(cookies_pattern)
-        
-        # إزالة الملفات المحظورة
-        available_cookies = []
-        for cookie_file in all_cookies_files:
-            if cookie_file not in BLOCKED_COOKIES:
-                available_cookies.append(cookie_file)
-        
-        if not available_cookies:
-            LOGGER(__name__).warning("⚠️ جميع ملفات الكوكيز محظورة! جاري إعادة تعيين...")
-            BLOCKED_COOKIES.clear()
-            available_cookies = all_cookies_files
-        
-        # ترتيب ذكي: الأقل استخداماً أولاً
-        available_cookies.sort(key=lambda x: (
-            COOKIES_USAGE_COUNT.get(x, 0),  # عدد مرات الاستخدام
-            os.path.getmtime(x)  # تاريخ التعديل
-        ))
-        
-        LOGGER(__name__).info(f"🍪 متاح: {len(available_cookies)} | محظور: {len(BLOCKED_COOKIES)} ملف كوكيز")
-        return available_cookies
-    except Exception as e:
-        LOGGER(__name__).warning(f"❌ خطأ في قراءة ملفات الكوكيز: {e}")
-        return []
-
-def mark_cookie_as_blocked(cookie_file: str, reason: str = "حظر"):
-    """تمييز ملف كوكيز كمحظور وحذفه"""
-    try:
-        BLOCKED_COOKIES.add(cookie_file)
-        LOGGER(__name__).warning(f"🚫 تم حظر الكوكيز: {os.path.basename(cookie_file)} - {reason}")
-        
-        # نسخ احتياطي قبل الحذف
-        backup_name = f"{cookie_file}.blocked_{int(time.time())}"
-        if os.path.exists(cookie_file):
-            os.rename(cookie_file, backup_name)
-            LOGGER(__name__).info(f"💾 تم نسخ الكوكيز المحظور إلى: {os.path.basename(backup_name)}")
-        
-        # تنظيف الإحصائيات
-        if cookie_file in COOKIES_USAGE_COUNT:
-            del COOKIES_USAGE_COUNT[cookie_file]
-            
-    except Exception as e:
-        LOGGER(__name__).error(f"❌ خطأ في حظر الكوكيز: {e}")
-
-def track_cookie_usage(cookie_file: str, success: bool = True):
-    """تتبع استخدام ملف الكوكيز"""
-    global LAST_COOKIE_USED
-    
-    COOKIES_USAGE_COUNT[cookie_file] = COOKIES_USAGE_COUNT.get(cookie_file, 0) + 1
-    LAST_COOKIE_USED = cookie_file
-    
-    status = "✅" if success else "❌"
-    usage_count = COOKIES_USAGE_COUNT[cookie_file]
-    
-    LOGGER(__name__).info(f"{status} كوكيز: {os.path.basename(cookie_file)} (استخدام #{usage_count})")
-
-def get_next_cookie_with_rotation():
-    """الحصول على ملف الكوكيز التالي مع تدوير ذكي"""
-    available_cookies = get_available_cookies()
-    
-    if not available_cookies:
-        return None
-    
-    # تجنب استخدام نفس الكوكيز المستخدم مؤخراً
-    if LAST_COOKIE_USED and len(available_cookies) > 1:
-        try:
-            available_cookies.remove(LAST_COOKIE_USED)
-        except ValueError:
-            pass
-    
-    # اختيار الكوكيز الأقل استخداماً
-    next_cookie = available_cookies[0]
-    LOGGER(__name__).info(f"🔄 تدوير إلى كوكيز: {os.path.basename(next_cookie)}")
-    
-    return next_cookie
-
-def cleanup_blocked_cookies():
-    """تنظيف دوري للكوكيز المحظورة"""
-    try:
-        import glob
-        # إذا تم حظر أكثر من 70% من الكوكيز، اعد تعيين النظام
-        total_cookies = len(glob.glob("cookies/cookies*.txt"))
-        blocked_count = len(BLOCKED_COOKIES)
-        
-        if total_cookies > 0 and (blocked_count / total_cookies) > 0.7:
-            LOGGER(__name__).warning(f"⚠️ تم حظر {blocked_count}/{total_cookies} كوكيز - إعادة تعيين النظام")
-            BLOCKED_COOKIES.clear()
-            COOKIES_USAGE_COUNT.clear()
-            
-        # حذف ملفات الكوكيز الاحتياطية القديمة (أكثر من 24 ساعة)
-        import time
-        current_time = time.time()
-        
-        for backup_file in glob.glob("cookies/*.blocked_*"):
-            try:
-                file_time = os.path.getmtime(backup_file)
-                if current_time - file_time > 86400:  # 24 ساعة
-                    os.remove(backup_file)
-                    LOGGER(__name__).info(f"🗑️ تم حذف النسخة الاحتياطية القديمة: {os.path.basename(backup_file)}")
-            except Exception as e:
-                LOGGER(__name__).warning(f"❌ خطأ في حذف النسخة الاحتياطية: {e}")
-                
-        LOGGER(__name__).info(f"🧹 تنظيف الكوكيز: متاح={total_cookies-blocked_count} | محظور={blocked_count}")
-        
-    except Exception as e:
-        LOGGER(__name__).error(f"❌ خطأ في تنظيف الكوكيز: {e}")
-
 def calculate_cookies_distribution(total_count: int) -> Dict[str, int]:
     """حساب توزيع الكوكيز بشكل ديناميكي"""
     if total_count == 0:
@@ -1693,28 +1645,24 @@ def calculate_cookies_distribution(total_count: int) -> Dict[str, int]:
 def get_cookies_statistics():
     """إحصائيات استخدام الكوكيز مع التوزيع الديناميكي"""
     try:
-        import glob
-        total_cookies = len(glob.glob("cookies/cookies*.txt"))
-        available_cookies = len(get_available_cookies())
-        blocked_cookies = len(BLOCKED_COOKIES)
+        stats = cookies_manager.get_stats()
         
         # حساب التوزيع الديناميكي
-        distribution = calculate_cookies_distribution(available_cookies)
+        distribution = calculate_cookies_distribution(stats['available'])
         
         # أكثر الكوكيز استخداماً
-        most_used = max(COOKIES_USAGE_COUNT.items(), key=lambda x: x[1]) if COOKIES_USAGE_COUNT else ("لا يوجد", 0)
+        usage = {path: status.get('total_requests', 0) for path, status in cookies_manager.cookies_status.items()}
+        most_used = max(usage.items(), key=lambda x: x[1]) if usage else ("لا يوجد", 0)
         
-        stats = {
-            'total': total_cookies,
-            'available': available_cookies, 
-            'blocked': blocked_cookies,
+        return {
+            'total': stats['cookies'],
+            'available': stats['available'],
+            'blocked': stats['cookies'] - stats['available'],
             'distribution': distribution,
             'most_used_file': os.path.basename(most_used[0]) if most_used[0] != "لا يوجد" else "لا يوجد",
             'most_used_count': most_used[1],
-            'usage_distribution': dict(COOKIES_USAGE_COUNT)
+            'usage_distribution': usage
         }
-        
-        return stats
     except Exception as e:
         LOGGER(__name__).error(f"❌ خطأ في إحصائيات الكوكيز: {e}")
         return {}
@@ -1822,6 +1770,16 @@ async def parallel_search_with_monitoring(query: str, bot_client) -> Optional[Di
 
 # === نظام البحث في قاعدة البيانات الذكية ===
 
+async def record_channel_index_access(message_id: int):
+    """تحديث إحصائيات الوصول لسجل في الفهرس"""
+    await DB_POOL.execute("""
+        UPDATE channel_index 
+        SET access_count = access_count + 1, 
+            last_accessed = CURRENT_TIMESTAMP,
+            popularity_rank = popularity_rank + 0.1
+        WHERE message_id = ?
+    """, (message_id,))
+
 async def search_in_database_cache(query: str) -> Optional[Dict]:
     """البحث في قاعدة البيانات الذكية (الكاش)"""
     try:
@@ -1831,53 +1789,8 @@ async def search_in_database_cache(query: str) -> Optional[Dict]:
         
         LOGGER(__name__).info(f"🗄️ البحث في قاعدة البيانات: '{normalized_query}' (كلمات: {search_keywords})")
         
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        
-        # البحث الذكي المحسن مع معالجة الاختلافات في الكتابة العربية
-        search_conditions = []
-        search_params = []
-        
-        # إضافة البحث الدقيق أولاً
-        search_conditions.append("(title_normalized LIKE ? OR artist_normalized LIKE ?)")
-        search_params.extend([f"%{normalized_query}%", f"%{normalized_query}%"])
-        
-        # معالجة الاختلافات الشائعة في الكتابة العربية
-        arabic_variants = {
-            'وحشتني': ['وحشتني', 'وحشتيني', 'وحشني', 'وحشتنى'],
-            'احبك': ['احبك', 'أحبك', 'احبّك', 'أحبّك'],
-            'حبيبي': ['حبيبي', 'حبيبى'],
-            'عليك': ['عليك', 'عليكي'],
-            'انت': ['انت', 'أنت', 'إنت']
-        }
-        
-        # البحث بالمتغيرات العربية
-        for original_word in search_keywords:
-            if len(original_word) > 2:
-                variants = arabic_variants.get(original_word, [original_word])
-                for variant in variants:
-                    search_conditions.append("(title_normalized LIKE ? OR artist_normalized LIKE ? OR keywords_vector LIKE ?)")
-                    search_params.extend([f"%{variant}%", f"%{variant}%", f"%{variant}%"])
-        
-        # البحث العام بالكلمات المفردة (احتياطي)
-        for keyword in search_keywords:
-            if len(keyword) > 2:
-                search_conditions.append("(title_normalized LIKE ? OR artist_normalized LIKE ? OR keywords_vector LIKE ?)")
-                search_params.extend([f"%{keyword}%", f"%{keyword}%", f"%{keyword}%"])
-        
-        # استعلام البحث مع ترتيب حسب الشعبية وآخر وصول
-        query_sql = f"""
-        SELECT message_id, file_id, file_unique_id, original_title, original_artist, 
-               duration, file_size, access_count, last_accessed, popularity_rank,
-               title_normalized, artist_normalized
-        FROM channel_index 
-        WHERE ({' OR '.join(search_conditions)})
-        ORDER BY popularity_rank DESC, access_count DESC, last_accessed DESC
-        LIMIT 5
-        """
-        
-        cursor.execute(query_sql, search_params)
-        results = cursor.fetchall()
+        # بحث مرتب بـ BM25 عبر فهرس النص الكامل بدلاً من سلاسل LIKE
+        results = await DB_POOL.run_read(search_channel_index, normalized_query, 5)
         
         LOGGER(__name__).info(f"🔍 تم العثور على {len(results)} نتيجة في قاعدة البيانات")
         
@@ -1886,20 +1799,11 @@ async def search_in_database_cache(query: str) -> Optional[Dict]:
             best_result = results[0]
             
             # تحديث إحصائيات الوصول
-            cursor.execute("""
-                UPDATE channel_index 
-                SET access_count = access_count + 1, 
-                    last_accessed = CURRENT_TIMESTAMP,
-                    popularity_rank = popularity_rank + 0.1
-                WHERE message_id = ?
-            """, (best_result[0],))
-            
-            conn.commit()
-            conn.close()
+            await record_channel_index_access(best_result['message_id'])
             
             # حساب نسبة التطابق
-            title_words = set(best_result[10].split())  # title_normalized
-            artist_words = set(best_result[11].split())  # artist_normalized
+            title_words = set(best_result['title_normalized'].split())
+            artist_words = set(best_result['artist_normalized'].split())
             query_words = set(search_keywords)
             
             all_content_words = title_words | artist_words
@@ -1909,7 +1813,6 @@ async def search_in_database_cache(query: str) -> Optional[Dict]:
             MIN_MATCH_RATIO = 0.8
             if match_ratio < MIN_MATCH_RATIO:
                 LOGGER(__name__).info(f"❌ نسبة التطابق منخفضة جداً: {match_ratio:.1%} (الحد الأدنى: {MIN_MATCH_RATIO:.1%})")
-                conn.close()
                 return None
             
             LOGGER(__name__).info(f"✅ تم العثور على مطابقة قوية في قاعدة البيانات: {match_ratio:.1%}")
@@ -1918,18 +1821,18 @@ async def search_in_database_cache(query: str) -> Optional[Dict]:
                 'success': True,
                 'cached': True,
                 'from_database': True,
-                'message_id': best_result[0],
-                'file_id': best_result[1],
-                'file_unique_id': best_result[2],
-                'title': best_result[3],  # original_title
-                'uploader': best_result[4],  # original_artist
-                'duration': best_result[5],
-                'file_size': best_result[6],
-                'access_count': best_result[7] + 1,
-                'match_ratio': match_ratio
+                'message_id': best_result['message_id'],
+                'file_id': best_result['file_id'],
+                'file_unique_id': best_result['file_unique_id'],
+                'title': best_result['original_title'],
+                'uploader': best_result['original_artist'],
+                'duration': best_result['duration'],
+                'file_size': best_result['file_size'],
+                'access_count': best_result['access_count'] + 1,
+                'match_ratio': match_ratio,
+                'candidates': results
             }
         
-        conn.close()
         LOGGER(__name__).info("❌ لم يتم العثور على مطابقة في قاعدة البيانات")
         return None
         
@@ -2069,24 +1972,32 @@ async def save_to_database_cache(file_id: str, file_unique_id: str, message_id:
         # إنشاء هاش البحث
         search_hash = hashlib.md5((title_normalized + artist_normalized).encode()).hexdigest()
         
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        
-        # إدخال البيانات (أو تحديثها إذا كانت موجودة)
-        cursor.execute("""
-            INSERT OR REPLACE INTO channel_index 
-            (message_id, file_id, file_unique_id, search_hash, title_normalized, 
-             artist_normalized, keywords_vector, original_title, original_artist, 
-             duration, file_size, access_count, popularity_rank)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, 1.0)
-        """, (
-            message_id, file_id, file_unique_id, search_hash,
-            title_normalized, artist_normalized, keywords_vector,
-            title, artist, duration, file_size
-        ))
+        def _save(conn):
+            cursor = conn.cursor()
+            
+            # حذف السجلات المتعارضة صراحةً ليبقى فهرس FTS متزامناً
+            # (INSERT OR REPLACE لا يطلق مشغل الحذف بدون recursive_triggers)
+            cursor.execute(
+                "DELETE FROM channel_index WHERE message_id = ? OR file_id = ? OR search_hash = ?",
+                (message_id, file_id, search_hash)
+            )
+            
+            # إدخال البيانات
+            cursor.execute("""
+                INSERT INTO channel_index 
+                (message_id, file_id, file_unique_id, search_hash, title_normalized, 
+                 artist_normalized, keywords_vector, original_title, original_artist, 
+                 duration, file_size, access_count, popularity_rank)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, 1.0)
+            """, (
+                message_id, file_id, file_unique_id, search_hash,
+                title_normalized, artist_normalized, keywords_vector,
+                title, artist, duration, file_size
+            ))
+            
+            conn.commit()
         
-        conn.commit()
-        conn.close()
+        await DB_POOL.run_write(_save)
         
         LOGGER(__name__).info(f"✅ تم حفظ الملف في قاعدة البيانات: {title[:30]}")
         return True
@@ -2115,117 +2026,43 @@ async def search_in_telegram_cache(query: str, bot_client) -> Optional[Dict]:
         
         # الخطوة 1: البحث السريع في قاعدة البيانات أولاً (أسرع)
         try:
-            conn = sqlite3.connect(DB_FILE)
-            cursor = conn.cursor()
-            
-            # بحث متقدم بالكلمات المفتاحية مع معالجة الاختلافات العربية
-            search_conditions = []
-            search_params = []
-            
-            # إضافة البحث الدقيق أولاً
-            search_conditions.append("(title_normalized LIKE ? OR artist_normalized LIKE ?)")
-            search_params.extend([f"%{normalized_query}%", f"%{normalized_query}%"])
-            
-            # معالجة الاختلافات الشائعة في الكتابة العربية
-            arabic_variants = {
-                'وحشتني': ['وحشتني', 'وحشتيني', 'وحشني', 'وحشتنى'],
-                'احبك': ['احبك', 'أحبك', 'احبّك', 'أحبّك'],
-                'حبيبي': ['حبيبي', 'حبيبى'],
-                'عليك': ['عليك', 'عليكي'],
-                'انت': ['انت', 'أنت', 'إنت']
-            }
-            
-            # البحث بالمتغيرات العربية
-            for original_word in search_keywords:
-                if len(original_word) > 2:
-                    variants = arabic_variants.get(original_word, [original_word])
-                    for variant in variants:
-                        search_conditions.append("(title_normalized LIKE ? OR artist_normalized LIKE ? OR keywords_vector LIKE ?)")
-                        search_params.extend([f"%{variant}%", f"%{variant}%", f"%{variant}%"])
-            
-            # استعلام محسن مع ترتيب ذكي
-            query_sql = f"""
-            SELECT message_id, file_id, file_unique_id, original_title, original_artist, 
-                   duration, file_size, access_count, last_accessed, popularity_rank,
-                   title_normalized, artist_normalized, keywords_vector
-            FROM channel_index 
-            WHERE ({' OR '.join(search_conditions)})
-            ORDER BY 
-                -- أولوية للمطابقة الكاملة
-                CASE WHEN title_normalized LIKE '%{normalized_query}%' THEN 1 ELSE 2 END,
-                -- ثم حسب الشعبية
-                popularity_rank DESC, 
-                access_count DESC, 
-                last_accessed DESC
-            LIMIT 10
-            """
-            
-            cursor.execute(query_sql, search_params)
-            db_results = cursor.fetchall()
+            # بحث مرتب بـ BM25 عبر فهرس النص الكامل (مرشحون مرتبون بدلاً من سلاسل LIKE)
+            db_results = await DB_POOL.run_read(search_channel_index, normalized_query, 10)
+            best_match = None
             
             if db_results:
-                # حساب نسبة التطابق لكل نتيجة
-                best_match = None
+                # إعادة ترتيب المرشحين بدرجة التطابق المركبة
+                query_words = set(search_keywords)
                 best_score = 0
                 
-                for result in db_results:
-                    # حساب درجة التطابق المتقدمة
-                    title_words = set(result[10].split())  # title_normalized
-                    artist_words = set(result[11].split())  # artist_normalized
-                    keywords_words = set(result[12].split())  # keywords_vector
-                    query_words = set(search_keywords)
-                    
-                    # حساب التطابق المتعدد المستويات
-                    title_match = len(query_words & title_words) / len(query_words) if query_words else 0
-                    artist_match = len(query_words & artist_words) / len(query_words) if query_words else 0
-                    keywords_match = len(query_words & keywords_words) / len(query_words) if query_words else 0
-                    
-                    # درجة مركبة مع أوزان
-                    composite_score = (
-                        title_match * 0.5 +      # وزن العنوان 50%
-                        artist_match * 0.3 +     # وزن الفنان 30%
-                        keywords_match * 0.2     # وزن الكلمات المفتاحية 20%
-                    )
-                    
-                    # إضافة بونص للشعبية
-                    popularity_bonus = min(result[9] / 10, 0.1)  # أقصى بونص 10%
-                    composite_score += popularity_bonus
-                    
+                for candidate in db_results:
+                    composite_score = score_channel_candidate(candidate, query_words)
                     if composite_score > best_score and composite_score > 0.8:  # حد أدنى 80%
                         best_score = composite_score
-                        best_match = result
+                        best_match = candidate
                 
                 if best_match:
                     # تحديث إحصائيات الوصول
-                    cursor.execute("""
-                        UPDATE channel_index 
-                        SET access_count = access_count + 1, 
-                            last_accessed = CURRENT_TIMESTAMP,
-                            popularity_rank = popularity_rank + 0.1
-                        WHERE message_id = ?
-                    """, (best_match[0],))
-                    conn.commit()
+                    await record_channel_index_access(best_match['message_id'])
                     
                     LOGGER(__name__).info(f"✅ مطابقة قوية في التخزين الذكي: {best_score:.1%}")
                     
-                    conn.close()
                     return {
                         'success': True,
                         'cached': True,
                         'from_database': True,
-                        'message_id': best_match[0],
-                        'file_id': best_match[1],
-                        'file_unique_id': best_match[2],
-                        'title': best_match[3],
-                        'uploader': best_match[4],
-                        'duration': best_match[5],
-                        'file_size': best_match[6],
-                        'access_count': best_match[7] + 1,
-                        'match_ratio': best_score
+                        'message_id': best_match['message_id'],
+                        'file_id': best_match['file_id'],
+                        'file_unique_id': best_match['file_unique_id'],
+                        'title': best_match['original_title'],
+                        'uploader': best_match['original_artist'],
+                        'duration': best_match['duration'],
+                        'file_size': best_match['file_size'],
+                        'access_count': best_match['access_count'] + 1,
+                        'match_ratio': best_score,
+                        'candidates': db_results
                     }
             
-            conn.close()
-            
             # إذا لم نجد مطابقة قوية
             if not best_match:
                 LOGGER(__name__).info("❌ لم يتم العثور على مطابقة قوية في التخزين الذكي (الحد الأدنى: 80%)")
@@ -2354,63 +2191,16 @@ async def search_in_telegram_cache(query: str, bot_client) -> Optional[Dict]:
 normalize_search_text = normalize_arabic_text  # توحيد الدوال
 
 def extract_title_from_cache_text(text: str) -> str:
-    """استخراج العنوان من نص التخزين"""
-    try:
-        import re
-        
-        # البحث عن العنوان بعد 🎵
-        title_match = re.search(r'🎵\s*\*\*(.+?)\*\*', text)
-        if title_match:
-            return title_match.group(1).strip()
-        
-        # البحث عن العنوان بعد "العنوان:"
-        title_match = re.search(r'العنوان:\s*(.+?)(?:\n|$)', text)
-        if title_match:
-            return title_match.group(1).strip()
-        
-        return "Unknown Title"
-    except:
-        return "Unknown Title"
+    """استخراج العنوان من نص التخزين (الغلاف الآلي أولاً)"""
+    return parse_cache_caption(text).get('title') or "Unknown Title"
 
 def extract_duration_from_cache_text(text: str) -> int:
-    """استخراج المدة من نص التخزين"""
-    try:
-        import re
-        
-        # البحث عن المدة بصيغة mm:ss
-        duration_match = re.search(r'⏱️\s*\*\*(\d+):(\d+)\*\*', text)
-        if duration_match:
-            minutes = int(duration_match.group(1))
-            seconds = int(duration_match.group(2))
-            return minutes * 60 + seconds
-        
-        # البحث عن المدة بالثواني
-        duration_match = re.search(r'المدة:\s*(\d+)', text)
-        if duration_match:
-            return int(duration_match.group(1))
-        
-        return 0
-    except:
-        return 0
+    """استخراج المدة من نص التخزين (الغلاف الآلي أولاً)"""
+    return parse_cache_caption(text).get('duration') or 0
 
 def extract_uploader_from_cache_text(text: str) -> str:
-    """استخراج اسم الرافع من نص التخزين"""
-    try:
-        import re
-        
-        # البحث عن الفنان بعد 🎤
-        uploader_match = re.search(r'🎤\s*\*\*(.+?)\*\*', text)
-        if uploader_match:
-            return uploader_match.group(1).strip()
-        
-        # البحث عن الفنان بعد "الفنان:"
-        uploader_match = re.search(r'الفنان:\s*(.+?)(?:\n|$)', text)
-        if uploader_match:
-            return uploader_match.group(1).strip()
-        
-        return "Unknown Artist"
-    except:
-        return "Unknown Artist"
+    """استخراج اسم الرافع من نص التخزين (الغلاف الآلي أولاً)"""
+    return parse_cache_caption(text).get('artist') or "Unknown Artist"
 
 async def save_to_smart_cache(bot_client, file_path: str, result: Dict, query: str, thumb_path: str = None) -> bool:
     """حفظ الملف في قناة التخزين الذكي مع فهرسة متقدمة وتفصيل شامل"""
@@ -2491,6 +2281,14 @@ async def save_to_smart_cache(bot_client, file_path: str, result: Dict, query: s
 #{title_normalized.replace(' ', '_')[:30]} #{uploader_normalized.replace(' ', '_')[:20]}
 #{query_normalized.replace(' ', '_')[:30]} #هاش_{search_hash}"""
         
+        # الغلاف الآلي: يُقرأ خطياً عند إعادة بناء الفهرس بدلاً من الأنماط
+        video_id = result.get('video_id') or result.get('id') or ''
+        if not video_id and len(Path(file_path).stem) == 11:
+            video_id = Path(file_path).stem
+        cache_text = attach_envelope(cache_text, build_cache_envelope(
+            video_id, duration, search_hash, title, uploader, keywords_vector
+        ))
+        
         try:
             # رفع الملف في الخلفية لتحسين السرعة
             import asyncio
@@ -2553,6 +2351,8 @@ async def save_to_smart_cache(bot_client, file_path: str, result: Dict, query: s
                         )
                         if success:
                             LOGGER(__name__).info(f"💾 تم حفظ البيانات المحسنة في قاعدة البيانات")
+                            # الرفع مفهرس بالفعل: تقديم العلامة المائية للمفهرس دون إعادة جلبه
+                            await channel_indexer.observe(sent_message.id)
                         else:
                             LOGGER(__name__).warning(f"⚠️ فشل حفظ البيانات في قاعدة البيانات")
                     except Exception as e:
@@ -2592,47 +2392,48 @@ async def save_to_database_cache_enhanced(file_id: str, file_unique_id: str, mes
         # إنشاء هاش بحث إضافي
         combined_hash = hashlib.md5((title_normalized + artist_normalized + original_query).encode()).hexdigest()[:16]
         
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        
-        # التحقق من وجود السجل أولاً
-        cursor.execute("SELECT id FROM channel_index WHERE message_id = ? OR search_hash = ?", 
-                      (message_id, search_hash))
-        existing = cursor.fetchone()
+        def _save(conn):
+            cursor = conn.cursor()
+            
+            # التحقق من وجود السجل أولاً
+            cursor.execute("SELECT id FROM channel_index WHERE message_id = ? OR search_hash = ?", 
+                          (message_id, search_hash))
+            existing = cursor.fetchone()
+        
+            if existing:
+                # تحديث السجل الموجود
+                cursor.execute("""
+                    UPDATE channel_index 
+                    SET file_id = ?, file_unique_id = ?, title_normalized = ?, 
+                        artist_normalized = ?, keywords_vector = ?, original_title = ?, 
+                        original_artist = ?, duration = ?, file_size = ?, 
+                        access_count = access_count + 1, popularity_rank = popularity_rank + 0.5,
+                        last_accessed = CURRENT_TIMESTAMP
+                    WHERE message_id = ? OR search_hash = ?
+                """, (
+                    file_id, file_unique_id, title_normalized, artist_normalized, 
+                    keywords_vector, title, artist, duration, file_size, 
+                    message_id, search_hash
+                ))
+                LOGGER(__name__).info(f"🔄 تم تحديث السجل الموجود في قاعدة البيانات")
+            else:
+                # إدخال سجل جديد
+                cursor.execute("""
+                    INSERT INTO channel_index 
+                    (message_id, file_id, file_unique_id, search_hash, title_normalized, 
+                     artist_normalized, keywords_vector, original_title, original_artist, 
+                     duration, file_size, access_count, popularity_rank, phonetic_hash, partial_matches)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, 1.0, ?, ?)
+                """, (
+                    message_id, file_id, file_unique_id, search_hash,
+                    title_normalized, artist_normalized, keywords_vector,
+                    title, artist, duration, file_size, combined_hash, original_query
+                ))
+                LOGGER(__name__).info(f"➕ تم إضافة سجل جديد لقاعدة البيانات")
         
-        if existing:
-            # تحديث السجل الموجود
-            cursor.execute("""
-                UPDATE channel_index 
-                SET file_id = ?, file_unique_id = ?, title_normalized = ?, 
-                    artist_normalized = ?, keywords_vector = ?, original_title = ?, 
-                    original_artist = ?, duration = ?, file_size = ?, 
-                    access_count = access_count + 1, popularity_rank = popularity_rank + 0.5,
-                    last_accessed = CURRENT_TIMESTAMP
-                WHERE message_id = ? OR search_hash = ?
-            """, (
-                file_id, file_unique_id, title_normalized, artist_normalized, 
-                keywords_vector, title, artist, duration, file_size, 
-                message_id, search_hash
-            ))
-            LOGGER(__name__).info(f"🔄 تم تحديث السجل الموجود في قاعدة البيانات")
-        else:
-            # إدخال سجل جديد
-            cursor.execute("""
-                INSERT INTO channel_index 
-                (message_id, file_id, file_unique_id, search_hash, title_normalized, 
-                 artist_normalized, keywords_vector, original_title, original_artist, 
-                 duration, file_size, access_count, popularity_rank, phonetic_hash, partial_matches)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, 1.0, ?, ?)
-            """, (
-                message_id, file_id, file_unique_id, search_hash,
-                title_normalized, artist_normalized, keywords_vector,
-                title, artist, duration, file_size, combined_hash, original_query
-            ))
-            LOGGER(__name__).info(f"➕ تم إضافة سجل جديد لقاعدة البيانات")
+            conn.commit()
         
-        conn.commit()
-        conn.close()
+        await DB_POOL.run_write(_save)
         
         LOGGER(__name__).info(f"✅ تم حفظ البيانات المحسنة: {title[:30]}")
         return True
@@ -2722,6 +2523,8 @@ async def try_youtube_api_download(video_id: str, title: str) -> Optional[Dict]:
 
 async def download_with_api_info(video_id: str, snippet: dict, fallback_title: str) -> Optional[Dict]:
     """تحميل باستخدام معلومات من YouTube API"""
+    best_cookie = None
+    recorded = False
     try:
         title = snippet.get('title', fallback_title)
         
@@ -2730,8 +2533,7 @@ async def download_with_api_info(video_id: str, snippet: dict, fallback_title: s
         downloads_dir.mkdir(exist_ok=True)
         
         # استخدام أفضل ملف كوكيز متاح
-        cookies_files = get_available_cookies()
-        best_cookie = cookies_files[0] if cookies_files else None
+        best_cookie = cookies_manager.acquire()
         
         ydl_opts = {
             'format': 'bestaudio[filesize<30M]/best[filesize<30M]',  # حد أقصى للحجم
@@ -2756,6 +2558,10 @@ async def download_with_api_info(video_id: str, snippet: dict, fallback_title: s
                 download=True
             )
             
+            if best_cookie:
+                cookies_manager.record(best_cookie, bool(info))
+                recorded = True
+            
             if info:
                 # البحث عن الملف المحمل
                 for file_path in downloads_dir.glob(f"{video_id}_api.*"):
@@ -2773,8 +2579,14 @@ async def download_with_api_info(video_id: str, snippet: dict, fallback_title: s
         return None
         
     except Exception as e:
+        if best_cookie and not recorded:
+            cookies_manager.record(best_cookie, False, str(e))
+            recorded = True
         LOGGER(__name__).error(f"❌ خطأ في التحميل مع API: {e}")
         return None
+    finally:
+        if best_cookie and not recorded:
+            cookies_manager.release(best_cookie)
 
 # إنشاء مدير التحميل العالمي
 downloader = HyperSpeedDownloader()
@@ -2975,8 +2787,8 @@ async def try_alternative_downloads(video_id: str, title: str) -> Optional[Dict]
         if api_result and api_result.get('success'):
             return api_result
         
-        # محاولة 2: تدوير الكوكيز الذكي (الدفعة الثانية)
-        cookies_files = get_available_cookies()
+        # محاولة 2: الدفعة الثانية من الكوكيز مرتبة حسب الصحة
+        cookies_files = cookies_manager.ranked()
         
         # حساب التوزيع الديناميكي
         distribution = calculate_cookies_distribution(len(cookies_files))
@@ -2993,9 +2805,10 @@ async def try_alternative_downloads(video_id: str, title: str) -> Optional[Dict]
         LOGGER(__name__).info(f"🔄 استخدام {secondary_count} كوكيز ثانوي من المؤشر {start_index} إلى {end_index}")
         
         for i, cookie_file in enumerate(cookies_files[start_index:end_index], start_index + 1):
+            LOGGER(__name__).info(f"🍪 محاولة كوكيز بديل #{i}: {os.path.basename(cookie_file)}")
+            cookies_manager.acquire(cookie_file)
+            recorded = False
             try:
-                LOGGER(__name__).info(f"🍪 محاولة كوكيز بديل #{i}: {os.path.basename(cookie_file)}")
-                
                 downloads_dir = Path("downloads")
                 ydl_opts = {
                     'format': 'bestaudio[filesize<25M]/best[filesize<25M]',
@@ -3018,7 +2831,8 @@ async def try_alternative_downloads(video_id: str, title: str) -> Optional[Dict]
                     
                     if info:
                         # تتبع نجاح الكوكيز
-                        track_cookie_usage(cookie_file, success=True)
+                        cookies_manager.record(cookie_file, True)
+                        recorded = True
                         
                         for file_path in downloads_dir.glob(f"{video_id}_alt_{i}.*"):
                             if file_path.suffix in ['.m4a', '.mp3', '.webm', '.mp4', '.opus']:
@@ -3032,19 +2846,18 @@ async def try_alternative_downloads(video_id: str, title: str) -> Optional[Dict]
                                 }
                                 
             except Exception as e:
-                error_msg = str(e).lower()
                 LOGGER(__name__).warning(f"❌ فشل الكوكيز البديل #{i}: {e}")
                 
-                # تتبع فشل الكوكيز وحظر المشكوك فيها
-                track_cookie_usage(cookie_file, success=False)
-                
-                if any(keyword in error_msg for keyword in [
-                    'blocked', 'forbidden', '403', 'unavailable', 'cookies', 'expired',
-                    'sign in', 'login', 'authentication', 'token', 'session', 'captcha'
-                ]):
-                    mark_cookie_as_blocked(cookie_file, f"بديل: {str(e)[:50]}")
+                # تتبع فشل الكوكيز (المجمع يبرّد المحظور منها)
+                if not recorded:
+                    cookies_manager.record(cookie_file, False, str(e))
+                    recorded = True
                 
                 continue
+            finally:
+                # بدون معلومات: تحرير الحجز فقط
+                if not recorded:
+                    cookies_manager.release(cookie_file)
         
         return None
         
@@ -3056,7 +2869,7 @@ async def force_download_any_way(video_id: str, title: str) -> Optional[Dict]:
     """محاولة تحميل قسري بجميع الطرق المتاحة"""
     try:
         # محاولة جميع ملفات الكوكيز المتبقية (الدفعة الأخيرة)
-        cookies_files = get_available_cookies()
+        cookies_files = cookies_manager.ranked()
         
         # حساب التوزيع الديناميكي
         distribution = calculate_cookies_distribution(len(cookies_files))
@@ -3075,9 +2888,10 @@ async def force_download_any_way(video_id: str, title: str) -> Optional[Dict]:
         LOGGER(__name__).info(f"🚀 محاولة قسرية مع {len(remaining_files)} ملف كوكيز متبقي (من {start_index} إلى {end_index})")
         
         for i, cookie_file in enumerate(remaining_files, start_index + 1):
+            LOGGER(__name__).info(f"🚀 محاولة قسرية #{i}: {os.path.basename(cookie_file)}")
+            cookies_manager.acquire(cookie_file)
+            recorded = False
             try:
-                LOGGER(__name__).info(f"🚀 محاولة قسرية #{i}: {os.path.basename(cookie_file)}")
-                
                 downloads_dir = Path("downloads")
                 ydl_opts = {
                     'format': 'bestaudio[filesize<25M]/best[filesize<25M]',  # حد أقصى للحجم
@@ -3101,7 +2915,8 @@ async def force_download_any_way(video_id: str, title: str) -> Optional[Dict]:
                     
                     if info:
                         # تتبع نجاح الكوكيز في المحاولة القسرية
-                        track_cookie_usage(cookie_file, success=True)
+                        cookies_manager.record(cookie_file, True)
+                        recorded = True
                         
                         for file_path in downloads_dir.glob(f"{video_id}_force_{i}.*"):
                             if file_path.exists() and file_path.stat().st_size > 1000:
@@ -3116,21 +2931,18 @@ async def force_download_any_way(video_id: str, title: str) -> Optional[Dict]:
                                 }
                                 
             except Exception as e:
-                error_msg = str(e).lower()
                 LOGGER(__name__).warning(f"❌ فشل القسري #{i}: {e}")
                 
-                # تتبع فشل الكوكيز وحظر التالفة نهائياً
-                track_cookie_usage(cookie_file, success=False)
-                
-                if any(keyword in error_msg for keyword in [
-                    'blocked', 'forbidden', '403', 'unavailable', 'cookies', 'expired',
-                    'sign in', 'login', 'authentication', 'token', 'session', 'captcha',
-                    'invalid', 'corrupt'
-                ]):
-                    mark_cookie_as_blocked(cookie_file, f"قسري: {str(e)[:50]}")
-                    LOGGER(__name__).error(f"💀 كوكيز تالف نهائياً: {os.path.basename(cookie_file)}")
+                # تتبع فشل الكوكيز (المجمع يبرّد المحظور منها)
+                if not recorded:
+                    cookies_manager.record(cookie_file, False, str(e))
+                    recorded = True
                 
                 continue
+            finally:
+                # بدون معلومات: تحرير الحجز فقط
+                if not recorded:
+                    cookies_manager.release(cookie_file)
         
         return None
         
@@ -3197,8 +3009,8 @@ async def process_unlimited_download_enhanced(event, user_id: int, start_time: f
         
         LOGGER(__name__).info(f"🚀 بدء معالجة فورية محسنة للمستخدم {user_id} | المهمة: {task_id}")
         
-        # تنفيذ المعالجة الكاملة المحسنة في مهمة منفصلة - بدون انتظار
-        asyncio.create_task(execute_parallel_download_enhanced(event, user_id, start_time, task_id))
+        # التنفيذ داخل عامل المجدول حتى يبقى عدد العمليات النشطة صحيحاً
+        await execute_parallel_download_enhanced(event, user_id, start_time, task_id)
         
     except Exception as e:
         LOGGER(__name__).error(f"❌ خطأ في معالجة التحميل المتوازي المحسن: {e}")
@@ -3377,25 +3189,21 @@ async def cache_stats_handler(event):
         return
     
     try:
-        async with downloader.conn_manager.db_connection() as conn:
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT COUNT(*) FROM channel_index")
-            total_cached = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT SUM(access_count) FROM channel_index")
-            total_hits = cursor.fetchone()[0] or 0
-            
-            cursor.execute("SELECT original_title, access_count FROM channel_index ORDER BY access_count DESC LIMIT 5")
-            top_songs = cursor.fetchall()
-            
-            # إحصائيات النظام
-            mem_usage = psutil.virtual_memory().percent
-            cpu_usage = psutil.cpu_percent()
-            active_tasks = len(downloader.active_tasks)
-            cache_hit_rate = downloader.cache_hits / max(1, downloader.cache_hits + downloader.cache_misses) * 100
-            
-            stats_text = f"""📊 **إحصائيات التخزين الذكي المتقدمة**
+        totals = await DB_POOL.fetchone("SELECT COUNT(*), SUM(access_count) FROM channel_index")
+        total_cached = totals[0]
+        total_hits = totals[1] or 0
+        
+        top_songs = await DB_POOL.fetchall(
+            "SELECT original_title, access_count FROM channel_index ORDER BY access_count DESC LIMIT 5"
+        )
+        
+        # إحصائيات النظام
+        mem_usage = psutil.virtual_memory().percent
+        cpu_usage = psutil.cpu_percent()
+        active_tasks = len(downloader.active_tasks)
+        cache_hit_rate = downloader.cache_hits / max(1, downloader.cache_hits + downloader.cache_misses) * 100
+        
+        stats_text = f"""📊 **إحصائيات التخزين الذكي المتقدمة**
 
 💾 **المحفوظ:** {total_cached} ملف
 ⚡ **مرات الاستخدام:** {total_hits}
@@ -3408,12 +3216,12 @@ async def cache_stats_handler(event):
 • المهام النشطة: {active_tasks}
 
 🎵 **الأكثر طلباً:**"""
-            
-            for i, row in enumerate(top_songs, 1):
-                stats_text += f"\n{i}. {row[0][:30]}... ({row[1]})"
-            
-            await event.reply(stats_text)
-            
+        
+        for i, row in enumerate(top_songs, 1):
+            stats_text += f"\n{i}. {row[0][:30]}... ({row[1]})"
+        
+        await event.reply(stats_text)
+        
     except Exception as e:
         await event.reply(f"❌ خطأ: {e}")
 
@@ -3424,12 +3232,15 @@ async def clear_cache_handler(event):
         return
     
     try:
-        async with downloader.conn_manager.db_connection() as conn:
+        def _clear(conn):
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) FROM channel_index")
             total_before = cursor.fetchone()[0]
             cursor.execute("DELETE FROM channel_index")
             conn.commit()
+            return total_before
+        
+        total_before = await DB_POOL.run_write(_clear)
         
         downloader.cache_hits = 0
         downloader.cache_misses = 0
@@ -3478,6 +3289,15 @@ async def system_stats_handler(event):
 📶 **الشبكة:**
 • الاتصالات النشطة: {len(psutil.net_connections())}
 """
+        stats_text += "\n🚦 **مجدول الطلبات:**\n"
+        for stage_name, stage in download_scheduler.get_stats().items():
+            label = "الكاش" if stage_name == DownloadScheduler.CACHE else "التحميل"
+            stats_text += (
+                f"• {label}: نشط {stage['active']}/{stage['workers']} | طابور {stage['queued']}/{stage['max_queue']}\n"
+                f"  انتظار {stage['wait']['avg']:.2f}s (p95 {stage['wait']['p95']:.2f}s) | "
+                f"خدمة {stage['service']['avg']:.2f}s (p95 {stage['service']['p95']:.2f}s) | "
+                f"مرفوض {stage['shed'] + stage['shed_user_limit']}\n"
+            )
         await event.reply(stats_text)
         
     except Exception as e:
@@ -3539,15 +3359,65 @@ async def download_song_smart(message, query: str):
             if success:
                 return
         
-        # المرحلة 2: لم يتم العثور على المقطع - الانتقال للبحث الخارجي
-        LOGGER(__name__).info("🔍 لم يتم العثور في الكاش - بدء البحث الخارجي")
+        # المرحلة 2: لم يتم العثور على المقطع - تحويل الطلب لطابور التحميل
+        LOGGER(__name__).info("🔍 لم يتم العثور في الكاش - جدولة البحث الخارجي والتحميل")
+        await schedule_external_download(message, query, status_msg)
+        
+    except Exception as e:
+        LOGGER(__name__).error(f"خطأ في download_song_smart: {e}")
+        try:
+            await message.reply(
+                "❌ **خطأ في البحث**\n\n"
+                "حدث خطأ أثناء معالجة طلبك\n"
+                "يرجى المحاولة مرة أخرى"
+            )
+        except:
+            pass
+
+async def schedule_external_download(message, query: str, status_msg=None):
+    """إضافة البحث الخارجي والتحميل لطابور التحميل مع إبلاغ المستخدم بموقعه"""
+    user_id = getattr(message, 'sender_id', 0) or 0
+    ready = asyncio.Event()
+    
+    async def _job():
+        # انتظار إنشاء رسالة الحالة قبل البدء
+        await ready.wait()
+        await external_download_stage(message, query, status_msg)
+    
+    future, position = download_scheduler.submit(
+        DownloadScheduler.DOWNLOAD, user_id, _job, priority=get_request_priority(user_id)
+    )
+    if future is None:
+        LOGGER(__name__).warning(f"🚦 رفض تحميل للمستخدم {user_id} - طابور التحميل ممتلئ")
+        text = QUEUE_FULL_MESSAGE
+    elif position > 0:
+        text = f"⏳ **في طابور التحميل - موقعك: {position}**"
+    else:
+        text = "🔍 **جاري البحث في YouTube...**"
+    
+    try:
+        if not status_msg:
+            status_msg = await message.reply(text)
+        else:
+            await status_msg.edit(text)
+    finally:
+        ready.set()
+
+async def external_download_stage(message, query: str, status_msg=None):
+    """مرحلة التحميل: البحث الخارجي ثم التحميل والإرسال (تعمل داخل عمال طابور التحميل)"""
+    try:
+        # المرحلة 2: البحث الخارجي
         if not status_msg:
             status_msg = await message.reply("🔍 **جاري البحث في YouTube...**")
         else:
             await status_msg.edit("🔍 **جاري البحث في YouTube...**")
         
-        # البحث المتسلسل في الطرق الخارجية
-        video_info = await sequential_external_search(query)
+        # البحث المتحوط في الطرق الخارجية (بحث واحد للاستعلامات المتطابقة المتزامنة)
+        video_info, shared = await search_flight.do(
+            normalize_arabic_text(query), lambda: external_search(query)
+        )
+        if shared:
+            PERFORMANCE_STATS['coalesced_requests'] += 1
         
         if not video_info:
             if not status_msg:
@@ -3587,12 +3457,12 @@ async def download_song_smart(message, query: str):
                 )
         
     except Exception as e:
-        LOGGER(__name__).error(f"خطأ في download_song_smart: {e}")
+        LOGGER(__name__).error(f"خطأ في مرحلة التحميل: {e}")
         try:
             await message.reply(
-                "❌ **خطأ في البحث**\n\n"
-                "حدث خطأ أثناء معالجة طلبك\n"
-                "يرجى المحاولة مرة أخرى"
+                "❌ **فشل التحميل**\n\n"
+                "حدث خطأ أثناء تحميل المقطع\n"
+                "يرجى المحاولة مرة أخرى لاحقاً"
             )
         except:
             pass
@@ -3727,7 +3597,6 @@ async def parallel_cache_search(query: str, bot_client) -> Tuple[Optional[Dict],
 async def search_local_cache(query: str) -> Optional[Dict]:
     """البحث في الكاش المحلي (قاعدة البيانات) مع معالجة أخطاء دقيقة"""
     start_time = time.time()
-    conn = None
     
     try:
         LOGGER(__name__).info(f"📁 بدء البحث في الكاش المحلي: {query}")
@@ -3758,31 +3627,6 @@ async def search_local_cache(query: str) -> Optional[Dict]:
             LOGGER(__name__).warning(f"⚠️ قاعدة البيانات غير موجودة: {DATABASE_PATH}")
             return None
         
-        # الاتصال بقاعدة البيانات
-        try:
-            conn = sqlite3.connect(DATABASE_PATH, timeout=5.0)
-            cursor = conn.cursor()
-            LOGGER(__name__).debug("✅ تم الاتصال بقاعدة البيانات")
-            
-        except sqlite3.Error as db_error:
-            LOGGER(__name__).error(f"❌ خطأ في الاتصال بقاعدة البيانات: {db_error}")
-            return None
-        
-        # التحقق من وجود الجدول
-        try:
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='cached_audio'")
-            table_exists = cursor.fetchone()
-            
-            if not table_exists:
-                LOGGER(__name__).warning("⚠️ جدول cached_audio غير موجود")
-                return None
-                
-            LOGGER(__name__).debug("✅ جدول cached_audio موجود")
-            
-        except sqlite3.Error as e:
-            LOGGER(__name__).error(f"❌ خطأ في فحص الجدول: {e}")
-            return None
-        
         # بناء استعلام البحث المتقدم
         search_conditions = []
         search_params = []
@@ -3815,10 +3659,21 @@ async def search_local_cache(query: str) -> Optional[Dict]:
             LOGGER(__name__).error(f"❌ خطأ في بناء استعلام البحث: {e}")
             return None
         
-        # تنفيذ الاستعلام
-        try:
+        # تنفيذ الاستعلام على اتصال قراءة من التجمع (خارج حلقة الأحداث)
+        def _lookup(conn):
+            cursor = conn.cursor()
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='cached_audio'")
+            if not cursor.fetchone():
+                return None, False
             cursor.execute(query_sql, search_params)
-            result = cursor.fetchone()
+            return cursor.fetchone(), True
+        
+        try:
+            result, table_exists = await DB_POOL.run_read(_lookup)
+            
+            if not table_exists:
+                LOGGER(__name__).warning("⚠️ جدول cached_audio غير موجود")
+                return None
             
             if result:
                 # التحقق من صحة البيانات المسترجعة
@@ -3875,46 +3730,31 @@ async def search_local_cache(query: str) -> Optional[Dict]:
         import traceback
         LOGGER(__name__).error(f"📋 تفاصيل الخطأ الكاملة: {traceback.format_exc()}")
         return None
-        
-    finally:
-        # إغلاق الاتصال بقاعدة البيانات
-        if conn:
-            try:
-                conn.close()
-                LOGGER(__name__).debug("🔒 تم إغلاق الاتصال بقاعدة البيانات")
-            except Exception as e:
-                LOGGER(__name__).warning(f"⚠️ خطأ في إغلاق قاعدة البيانات: {e}")
 
-async def sequential_external_search(query: str) -> Optional[Dict]:
-    """البحث المتسلسل في المصادر الخارجية"""
+async def external_search(query: str) -> Optional[Dict]:
+    """البحث في المصادر الخارجية: بحث متحوط بين المزودين ثم النظام المختلط"""
     try:
-        LOGGER(__name__).info(f"🌐 بدء البحث الخارجي المتسلسل: {query}")
+        LOGGER(__name__).info(f"🌐 بدء البحث الخارجي: {query}")
         
-        # الطريقة 1: YouTube Search
+        # المزودون بترتيب متعلم مع طلبات احتياطية بعد p90 للمزود الجاري
         try:
-            LOGGER(__name__).info("🔍 محاولة YouTube Search...")
-            if YOUTUBE_SEARCH_AVAILABLE:
-                search = YoutubeSearch(query, max_results=1)
-                results = search.to_dict()
-                
-                if results:
-                    result = results[0]
-                    video_id = result.get('id', '')
-                    
-                    if video_id:
-                        LOGGER(__name__).info(f"✅ YouTube Search نجح: {result.get('title', 'غير محدد')}")
-                        return {
-                            'id': video_id,
-                            'title': result.get('title', 'غير محدد'),
-                            'channel': result.get('channel', 'غير محدد'),
-                            'duration': result.get('duration', '0:00'),
-                            'views': result.get('views', 'غير محدد'),
-                            'source': 'youtube_search'
-                        }
+            result = await downloader.search_orchestrator.search(query)
+            if result and result.get('video_id'):
+                LOGGER(__name__).info(f"✅ {result.get('source')} نجح: {result.get('title', 'غير محدد')}")
+                duration = int(result.get('duration') or 0)
+                return {
+                    'id': result['video_id'],
+                    'title': result.get('title', 'غير محدد'),
+                    'channel': result.get('artist', 'غير محدد'),
+                    'duration': f"{duration // 60}:{duration % 60:02d}",
+                    'views': 'غير محدد',
+                    'source': result.get('source', 'external'),
+                    'thumbnail': result.get('thumb') or ''
+                }
         except Exception as e:
-            LOGGER(__name__).warning(f"⚠️ YouTube Search فشل: {e}")
+            LOGGER(__name__).warning(f"⚠️ البحث المتحوط فشل: {e}")
         
-        # الطريقة 2: النظام المختلط (YouTube API + yt-dlp)
+        # الملاذ الأخير: النظام المختلط (YouTube API + yt-dlp) يبحث ويحمّل معاً فلا يُشغّل متحوطاً
         try:
             LOGGER(__name__).info("🔍 محاولة النظام المختلط (YouTube API + yt-dlp)...")
             from .youtube_api_downloader import download_youtube_hybrid
@@ -3936,25 +3776,6 @@ async def sequential_external_search(query: str) -> Optional[Dict]:
         except Exception as e:
             LOGGER(__name__).warning(f"⚠️ النظام المختلط فشل: {e}")
         
-        # الطريقة 3: YouTube API التقليدي (إذا كان متاحاً)
-        try:
-            LOGGER(__name__).info("🔍 محاولة YouTube API التقليدي...")
-            import config
-            
-            if hasattr(config, 'YOUTUBE_API_KEY') and config.YOUTUBE_API_KEY:
-                # يمكن إضافة YouTube API التقليدي هنا لاحقاً
-                pass
-        except Exception as e:
-            LOGGER(__name__).warning(f"⚠️ YouTube API فشل: {e}")
-        
-        # الطريقة 3: Invidious (إذا كان متاحاً)
-        try:
-            LOGGER(__name__).info("🔍 محاولة Invidious...")
-            # يمكن إضافة Invidious هنا لاحقاً
-            pass
-        except Exception as e:
-            LOGGER(__name__).warning(f"⚠️ Invidious فشل: {e}")
-        
         LOGGER(__name__).warning("❌ فشل جميع طرق البحث الخارجي")
         return None
         
@@ -4045,7 +3866,47 @@ async def send_telegram_cached_audio(message, telegram_result: Dict, status_msg)
         return False
 
 async def smart_download_and_send(message, video_info: Dict, status_msg) -> bool:
-    """التحميل الذكي مع cookies وحفظ في الكاش مع معالجة أخطاء دقيقة"""
+    """التحميل والإرسال مع دمج الطلبات المتزامنة لنفس video_id في تحميل ورفع واحد"""
+    video_id = (video_info or {}).get('id', '').strip()
+    if not video_id:
+        return bool(await _download_and_send_once(message, video_info, status_msg))
+    
+    if download_flight.in_flight(video_id):
+        try:
+            await status_msg.edit("⏳ **المقطع قيد التحميل لطلب آخر...**")
+        except Exception:
+            pass
+    
+    try:
+        sent_message, shared = await download_flight.do(
+            video_id, lambda: _download_and_send_once(message, video_info, status_msg)
+        )
+    except Exception as e:
+        LOGGER(__name__).error(f"❌ خطأ في التحميل المشترك {video_id}: {e}")
+        return False
+    
+    if not shared:
+        return sent_message is not None
+    
+    PERFORMANCE_STATS['coalesced_requests'] += 1
+    if sent_message is None or not getattr(sent_message, 'media', None):
+        return False
+    
+    # إعادة استخدام الملف المرفوع (file_id) دون تحميل أو رفع جديد
+    try:
+        await message.reply(file=sent_message.media, message=f"✦ @{config.BOT_USERNAME}")
+        try:
+            await status_msg.delete()
+        except:
+            pass
+        LOGGER(__name__).info(f"🔗 تم إرسال {video_id} من تحميل مشترك")
+        return True
+    except Exception as e:
+        LOGGER(__name__).error(f"❌ خطأ في إرسال الملف المشترك: {e}")
+        return False
+
+async def _download_and_send_once(message, video_info: Dict, status_msg):
+    """التحميل الذكي مع cookies وحفظ في الكاش مع معالجة أخطاء دقيقة (يعيد الرسالة المرسلة)"""
     start_time = time.time()
     downloaded_file = None
     
@@ -4088,7 +3949,7 @@ async def smart_download_and_send(message, video_info: Dict, status_msg) -> bool
                         
                         await status_msg.delete()
                         LOGGER(__name__).info("✅ تم إرسال الملف من النظام المختلط بنجاح")
-                        return True
+                        return sent_message
                         
                 except Exception as e:
                     LOGGER(__name__).warning(f"⚠️ خطأ في إرسال الملف المختلط: {e}")
@@ -4097,15 +3958,15 @@ async def smart_download_and_send(message, video_info: Dict, status_msg) -> bool
         # التحقق من صحة المدخلات
         if not video_info or not isinstance(video_info, dict):
             LOGGER(__name__).error("❌ خطأ: معلومات الفيديو غير صحيحة")
-            return False
+            return None
             
         if not message:
             LOGGER(__name__).error("❌ خطأ: كائن الرسالة غير متاح")
-            return False
+            return None
             
         if not status_msg:
             LOGGER(__name__).error("❌ خطأ: رسالة الحالة غير متاحة")
-            return False
+            return None
         
         # استخراج المعلومات مع التحقق من الصحة
         title = video_info.get('title', 'أغنية غير محددة').strip()
@@ -4116,7 +3977,7 @@ async def smart_download_and_send(message, video_info: Dict, status_msg) -> bool
         # التحقق من وجود video_id
         if not video_id:
             LOGGER(__name__).error("❌ خطأ: معرف الفيديو مفقود")
-            return False
+            return None
         
         LOGGER(__name__).info(
             f"📋 معلومات التحميل:\n"
@@ -4145,7 +4006,7 @@ async def smart_download_and_send(message, video_info: Dict, status_msg) -> bool
         # التحقق من توفر yt-dlp
         if not yt_dlp:
             LOGGER(__name__).error("❌ خطأ: مكتبة yt-dlp غير متاحة")
-            return False
+            return None
         
         # الحصول على ملف cookies مع معالجة أخطاء دقيقة
         cookie_file = None
@@ -4187,11 +4048,11 @@ async def smart_download_and_send(message, video_info: Dict, status_msg) -> bool
             # التحقق من الصلاحيات
             if not os.access(downloads_dir, os.W_OK):
                 LOGGER(__name__).error("❌ لا توجد صلاحية كتابة في مجلد التحميلات")
-                return False
+                return None
                 
         except Exception as e:
             LOGGER(__name__).error(f"❌ خطأ في إعداد مجلد التحميلات: {e}")
-            return False
+            return None
         
         # إعدادات التحميل المحسنة مع تحويل إلى MP3
         try:
@@ -4209,7 +4070,7 @@ async def smart_download_and_send(message, video_info: Dict, status_msg) -> bool
             
         except Exception as e:
             LOGGER(__name__).error(f"❌ خطأ في إعداد خيارات التحميل: {e}")
-            return False
+            return None
         
         # تحديث رسالة الحالة
         try:
@@ -4232,7 +4093,7 @@ async def smart_download_and_send(message, video_info: Dict, status_msg) -> bool
                 
                 if not downloaded_file:
                     LOGGER(__name__).error("❌ لم يتم العثور على الملف المحمل")
-                    return False
+                    return None
                 
                 # تحميل الصورة المصغرة
                 thumb_path = None
@@ -4295,7 +4156,7 @@ async def smart_download_and_send(message, video_info: Dict, status_msg) -> bool
                         pass
                 
                 LOGGER(__name__).info(f"✅ تم إرسال وحفظ الأغنية: {title}")
-                return True
+                return audio_message
                 
         except Exception as e:
             LOGGER(__name__).error(f"❌ خطأ في التحميل مع cookies: {e}")
@@ -4373,17 +4234,17 @@ async def smart_download_and_send(message, video_info: Dict, status_msg) -> bool
                                 pass
                         
                         LOGGER(__name__).info(f"✅ تم إرسال الأغنية بدون cookies: {title}")
-                        return True
+                        return audio_message
                         
             except Exception as e2:
                 LOGGER(__name__).error(f"❌ فشل التحميل بدون cookies أيضاً: {e2}")
-                return False
+                return None
         
-        return False
+        return None
         
     except Exception as e:
         LOGGER(__name__).error(f"❌ خطأ عام في التحميل الذكي: {e}")
-        return False
+        return None
 
 async def save_to_cache(video_id: str, title: str, artist: str, duration: int, file_path: str, audio_message, thumb_path: str = None) -> bool:
     """حفظ المقطع في الكاش المحلي وقناة التخزين"""
@@ -4392,11 +4253,8 @@ async def save_to_cache(video_id: str, title: str, artist: str, duration: int, f
         
         # حفظ في قاعدة البيانات المحلية
         try:
-            conn = sqlite3.connect(DATABASE_PATH)
-            cursor = conn.cursor()
-            
-            # إدراج أو تحديث السجل
-            cursor.execute("""
+            # إدراج أو تحديث السجل عبر اتصال الكتابة في التجمع
+            await DB_POOL.execute("""
                 INSERT OR REPLACE INTO cached_audio 
                 (video_id, title, artist, duration, file_path, thumb, message_id, keywords, created_at)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
@@ -4411,9 +4269,6 @@ async def save_to_cache(video_id: str, title: str, artist: str, duration: int, f
                 f"{title} {artist}".lower(),  # keywords
             ))
             
-            conn.commit()
-            conn.close()
-            
             LOGGER(__name__).info("✅ تم حفظ في قاعدة البيانات المحلية")
             
         except Exception as e:
@@ -4429,6 +4284,7 @@ async def save_to_cache(video_id: str, title: str, artist: str, duration: int, f
                 
                 # إعداد بيانات المقطع للحفظ
                 result_data = {
+                    'video_id': video_id,
                     'title': title,
                     'uploader': artist,
                     'duration': duration,
@@ -4461,172 +4317,24 @@ async def save_to_cache(video_id: str, title: str, artist: str, duration: int, f
 
 LOGGER(__name__).info("🚀 تم تحميل نظام التحميل الذكي الخارق المتطور V2")
 
-# إضافة نظام الفحص الدوري لقناة التخزين
-LAST_CHANNEL_SYNC = 0
-CHANNEL_SYNC_INTERVAL = 3600  # كل ساعة
+# مزامنة قناة التخزين عبر المفهرس التزايدي
+async def start_channel_indexer(bot_client):
+    """تهيئة جداول الفهرس وتشغيل مفهرس قناة التخزين"""
+    await ensure_database_initialized()
+    await channel_indexer.start(bot_client)
 
 async def sync_channel_to_database(bot_client, force_sync: bool = False) -> Dict:
-    """مزامنة قناة التخزين مع قاعدة البيانات بشكل ذكي"""
-    global LAST_CHANNEL_SYNC
-    
-    current_time = time.time()
-    
-    # فحص الحاجة للمزامنة
-    if not force_sync and (current_time - LAST_CHANNEL_SYNC) < CHANNEL_SYNC_INTERVAL:
-        return {'skipped': True, 'reason': 'لم تحن المزامنة بعد'}
-    
+    """
+    مزامنة قناة التخزين مع قاعدة البيانات
+    تعبئة من آخر رسالة مفهرسة، أو إعادة بناء كاملة قابلة للاستئناف عند force_sync
+    """
     try:
-        import config
-        
-        if not hasattr(config, 'CACHE_CHANNEL_ID') or not config.CACHE_CHANNEL_ID:
-            return {'error': 'قناة التخزين غير محددة'}
-        
-        cache_channel = config.CACHE_CHANNEL_ID
-        LOGGER(__name__).info(f"⚠️ مزامنة قناة التخزين معطلة مؤقتاً (قيود API للبوتات)")
-        return {'error': 'مزامنة القناة معطلة مؤقتاً'}
-        
-        # إحصائيات المزامنة
-        sync_stats = {
-            'processed': 0,
-            'added': 0,
-            'updated': 0,
-            'errors': 0,
-            'start_time': current_time
-        }
-        
-        # الحصول على آخر message_id في قاعدة البيانات
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT MAX(message_id) FROM channel_index")
-        last_db_message_id = cursor.fetchone()[0] or 0
-        
-        LOGGER(__name__).info(f"📊 آخر رسالة في قاعدة البيانات: {last_db_message_id}")
-        
-        # فحص الرسائل الجديدة في القناة
-        new_messages_found = 0
-        batch_size = 100
-        
-        async for message in bot_client.iter_messages(cache_channel, limit=1000):
-            if not (message.text and message.file):
-                continue
-                
-            sync_stats['processed'] += 1
-            
-            # تخطي الرسائل الموجودة بالفعل
-            if message.id <= last_db_message_id:
-                continue
-                
-            new_messages_found += 1
-            
-            try:
-                # استخراج المعلومات من الرسالة
-                title = extract_title_from_cache_text(message.text)
-                uploader = extract_uploader_from_cache_text(message.text)
-                duration = extract_duration_from_cache_text(message.text)
-                
-                # استخراج هاش البحث من النص إن وجد
-                import re
-                hash_match = re.search(r'هاش البحث.*?`([a-f0-9]+)`', message.text)
-                search_hash = hash_match.group(1) if hash_match else None
-                
-                # إنشاء هاش جديد إذا لم يوجد
-                if not search_hash:
-                    title_normalized = normalize_search_text(title)
-                    uploader_normalized = normalize_search_text(uploader)
-                    search_data = f"{title_normalized}|{uploader_normalized}"
-                    search_hash = hashlib.md5(search_data.encode()).hexdigest()[:12]
-                
-                # تطبيع النصوص
-                title_normalized = normalize_search_text(title)
-                uploader_normalized = normalize_search_text(uploader)
-                
-                # إنشاء vector الكلمات المفتاحية
-                keywords_vector = f"{title_normalized} {uploader_normalized}"
-                
-                # فحص وجود السجل
-                cursor.execute("SELECT id FROM channel_index WHERE message_id = ?", (message.id,))
-                existing = cursor.fetchone()
-                
-                if existing:
-                    # تحديث السجل
-                    cursor.execute("""
-                        UPDATE channel_index 
-                        SET file_id = ?, title_normalized = ?, artist_normalized = ?, 
-                            keywords_vector = ?, original_title = ?, original_artist = ?, 
-                            duration = ?, file_size = ?, search_hash = ?
-                        WHERE message_id = ?
-                    """, (
-                        message.file.id, title_normalized, uploader_normalized,
-                        keywords_vector, title, uploader, duration,
-                        message.file.size or 0, search_hash, message.id
-                    ))
-                    sync_stats['updated'] += 1
-                else:
-                    # إضافة سجل جديد
-                    cursor.execute("""
-                        INSERT INTO channel_index 
-                        (message_id, file_id, file_unique_id, search_hash, title_normalized, 
-                         artist_normalized, keywords_vector, original_title, original_artist, 
-                         duration, file_size, access_count, popularity_rank)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, 0.5)
-                    """, (
-                        message.id, message.file.id, getattr(message.file, 'unique_id', None),
-                        search_hash, title_normalized, uploader_normalized, keywords_vector,
-                        title, uploader, duration, message.file.size or 0
-                    ))
-                    sync_stats['added'] += 1
-                
-                # حفظ على دفعات
-                if sync_stats['processed'] % batch_size == 0:
-                    conn.commit()
-                    LOGGER(__name__).info(f"💾 تم حفظ دفعة: {sync_stats['processed']} رسالة معالجة")
-                
-            except Exception as msg_error:
-                sync_stats['errors'] += 1
-                LOGGER(__name__).warning(f"⚠️ خطأ في معالجة رسالة {message.id}: {msg_error}")
-                continue
-        
-        # حفظ نهائي
-        conn.commit()
-        conn.close()
-        
-        # تحديث وقت آخر مزامنة
-        LAST_CHANNEL_SYNC = current_time
-        
-        # حساب الإحصائيات النهائية
-        sync_stats['duration'] = time.time() - current_time
-        sync_stats['new_messages'] = new_messages_found
-        
-        LOGGER(__name__).info(
-            f"✅ اكتملت مزامنة القناة: "
-            f"معالج={sync_stats['processed']} | "
-            f"جديد={sync_stats['added']} | "
-            f"محدث={sync_stats['updated']} | "
-            f"أخطاء={sync_stats['errors']} | "
-            f"مدة={sync_stats['duration']:.2f}s"
-        )
-        
-        return sync_stats
-        
+        await ensure_database_initialized()
+        return await channel_indexer.backfill(bot_client, from_start=force_sync)
     except Exception as e:
         LOGGER(__name__).error(f"❌ خطأ في مزامنة القناة: {e}")
         return {'error': str(e)}
 
-async def auto_sync_channel_if_needed(bot_client):
-    """فحص تلقائي للحاجة لمزامنة القناة"""
-    try:
-        # فحص آخر مزامنة
-        current_time = time.time()
-        if (current_time - LAST_CHANNEL_SYNC) > CHANNEL_SYNC_INTERVAL:
-            LOGGER(__name__).info("🔄 بدء المزامنة التلقائية لقناة التخزين...")
-            
-            # تشغيل المزامنة في الخلفية
-            asyncio.create_task(sync_channel_to_database(bot_client, force_sync=False))
-            
-    except Exception as e:
-        LOGGER(__name__).error(f"❌ خطأ في المزامنة التلقائية: {e}")
-
 async def force_channel_sync_handler(event):
     """معالج أمر المطور لإجبار مزامنة القناة"""
     import config
@@ -4651,6 +4359,7 @@ async def force_channel_sync_handler(event):
 • سجلات محدثة: {result['updated']}
 • أخطاء: {result['errors']}
 • رسائل جديدة: {result['new_messages']}
+• آخر رسالة مفهرسة: {result['high_water']}
 • المدة: {result['duration']:.2f}s
 
 💾 تم تحديث قاعدة البيانات بنجاح"""
@@ -4660,6 +4369,34 @@ async def force_channel_sync_handler(event):
     except Exception as e:
         await event.reply(f"❌ **خطأ:** {e}")
 
+async def migrate_cache_captions_handler(event):
+    """معالج أمر المطور لترحيل نصوص قناة التخزين القديمة إلى الغلاف الآلي"""
+    import config
+    if event.sender_id != config.OWNER_ID:
+        return
+    
+    try:
+        await event.reply("🔁 **بدء ترحيل نصوص قناة التخزين...**\nيمكن إعادة الأمر للاستئناف من حيث توقف")
+        
+        result = await channel_indexer.migrate_captions(event.client)
+        
+        if 'error' in result:
+            await event.reply(f"❌ **خطأ في الترحيل:** {result['error']}")
+            return
+        
+        await event.reply(f"""✅ **اكتمل ترحيل النصوص!**
+
+📊 **الإحصائيات:**
+• رسائل مفحوصة: {result['scanned']}
+• تم ترحيلها: {result['migrated']}
+• مرحّلة مسبقاً: {result['skipped']}
+• فشل: {result['failed']}
+• آخر موضع: {result['position']}
+• المدة: {result['duration']:.2f}s""")
+        
+    except Exception as e:
+        await event.reply(f"❌ **خطأ:** {e}")
+
 # تحديث معالج البحث ليشمل المزامنة التلقائية
 
 # إضافة دالة فحص قناة التخزين
@@ -4825,16 +4562,10 @@ async def cache_channel_info_handler(event):
             
             # إضافة معلومات من قاعدة البيانات
             try:
-                conn = sqlite3.connect(DB_FILE)
-                cursor = conn.cursor()
-                
-                cursor.execute("SELECT COUNT(*) FROM channel_index")
-                total_cached = cursor.fetchone()[0]
-                
-                cursor.execute("SELECT COUNT(*) FROM channel_index WHERE last_accessed > datetime('now', '-7 days')")
-                recent_accessed = cursor.fetchone()[0]
-                
-                conn.close()
+                total_cached = (await DB_POOL.fetchone("SELECT COUNT(*) FROM channel_index"))[0]
+                recent_accessed = (await DB_POOL.fetchone(
+                    "SELECT COUNT(*) FROM channel_index WHERE last_accessed > datetime('now', '-7 days')"
+                ))[0]
                 
                 success_msg += f"\n💾 **قاعدة البيانات:**\n"
                 success_msg += f"• إجمالي المحفوظ: {total_cached}\n"
@@ -4926,13 +4657,6 @@ async def smart_download_handler(event):
         if PERFORMANCE_STATS['total_requests'] % 50 == 0:
             asyncio.create_task(verify_cache_channel_periodic(event.client))
         
-        # المزامنة التلقائية لقناة التخزين (في الخلفية)
-        asyncio.create_task(auto_sync_channel_if_needed(event.client))
-        
-        # تنظيف دوري للكوكيز المحظورة (كل 100 طلب)
-        if PERFORMANCE_STATS['total_requests'] % 100 == 0:
-            cleanup_blocked_cookies()
-        
         # عرض إحصائيات الأداء (كل 50 طلب)
         if PERFORMANCE_STATS['total_requests'] % 50 == 0:
             log_performance_stats()
@@ -4960,26 +4684,35 @@ async def smart_download_handler(event):
     # if len(active_downloads) % 50 == 0:
     #     asyncio.create_task(cleanup_old_downloads())
     
-    # تحكم ذكي في العمليات المتوازية
-    current_downloads = len(active_downloads)
+    # إضافة الطلب لطابور مرحلة الكاش (محدود مع عدالة بين المستخدمين)
+    queue_notice = None
+    # العامل قد يبدأ قبل إرسال رسالة الموقع: ينتظر حتى تُسند ليحذفها
+    notice_ready = asyncio.Event()
     
-    if current_downloads < MAX_CONCURRENT_DOWNLOADS:
-        # تنفيذ المعالجة الفورية المتوازية المحسنة
-        asyncio.create_task(process_unlimited_download_enhanced(event, user_id, start_time))
-        LOGGER(__name__).info(f"⚡ تم إنشاء مهمة متوازية محسنة للمستخدم {user_id} - العمليات النشطة: {current_downloads + 1}")
-    else:
-        # إذا تجاوزنا الحد، ننتظر قليلاً ثم نحاول مرة أخرى
-        LOGGER(__name__).info(f"⏳ تأجيل الطلب - العمليات النشطة: {current_downloads} (الحد الأقصى: {MAX_CONCURRENT_DOWNLOADS})")
-        
-        async def delayed_process():
-            await asyncio.sleep(0.5)  # انتظار نصف ثانية
-            if len(active_downloads) < MAX_CONCURRENT_DOWNLOADS:
-                await process_unlimited_download_enhanced(event, user_id, start_time)
-            else:
-                # إذا لا يزال مزدحماً، ننشئ المهمة بأي حال
-                asyncio.create_task(process_unlimited_download_enhanced(event, user_id, start_time))
-        
-        asyncio.create_task(delayed_process())
+    async def _job():
+        await notice_ready.wait()
+        if queue_notice:
+            try:
+                await queue_notice.delete()
+            except Exception:
+                pass
+        await process_unlimited_download_enhanced(event, user_id, start_time)
+    
+    future, position = download_scheduler.submit(
+        DownloadScheduler.CACHE, user_id, _job, priority=get_request_priority(user_id)
+    )
+    if future is None:
+        LOGGER(__name__).warning(f"🚦 رفض طلب المستخدم {user_id} - الطابور ممتلئ ({download_scheduler.queued})")
+        await update_performance_stats(False, time.time() - start_time)
+        await event.reply(QUEUE_FULL_MESSAGE)
+        return
+    
+    try:
+        if position > 0:
+            queue_notice = await event.reply(f"⏳ **طلبك في الطابور - موقعك: {position}**")
+    finally:
+        notice_ready.set()
+    LOGGER(__name__).info(f"⚡ تمت جدولة طلب المستخدم {user_id} - الموقع: {position} | النشطة: {download_scheduler.active}")
 
 async def cleanup_old_downloads():
     """تنظيف دوري للعمليات القديمة لمنع تراكمها"""
@@ -5030,22 +4763,17 @@ async def system_status_handler(event):
         
         # فحص قاعدة البيانات
         try:
-            conn = sqlite3.connect(DB_FILE)
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT COUNT(*) FROM channel_index")
-            total_cached = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM channel_index WHERE last_accessed > datetime('now', '-1 day')")
-            daily_accessed = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM channel_index WHERE created_at > datetime('now', '-1 day')")
-            daily_added = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT AVG(popularity_rank) FROM channel_index")
-            avg_popularity = cursor.fetchone()[0] or 0
-            
-            conn.close()
+            row = await DB_POOL.fetchone("""
+                SELECT COUNT(*),
+                       SUM(last_accessed > datetime('now', '-1 day')),
+                       SUM(created_at > datetime('now', '-1 day')),
+                       AVG(popularity_rank)
+                FROM channel_index
+            """)
+            total_cached = row[0]
+            daily_accessed = row[1] or 0
+            daily_added = row[2] or 0
+            avg_popularity = row[3] or 0
             
             db_status = {
                 'working': True,
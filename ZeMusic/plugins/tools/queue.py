@@ -7,6 +7,7 @@ from ZeMusic.pyrogram_compatibility import CallbackQuery, InputMediaPhoto, Messa
 
 import config
 from ZeMusic import app
+from ZeMusic.core.playback_clock import playback_clock
 from ZeMusic.misc import db
 from ZeMusic.utils import ModyBin, get_channeplayCB, seconds_to_min
 from ZeMusic.utils.database import get_cmode, is_active_chat, is_music_playing
@@ -92,7 +93,7 @@ async def get_queue(client, message: Message, _):
             DUR,
             "c" if cplay else "g",
             videoid,
-            seconds_to_min(got[0]["played"]),
+            seconds_to_min(playback_clock.played(chat_id)),
             got[0]["dur"],
         )
     )
@@ -111,7 +112,7 @@ async def get_queue(client, message: Message, _):
                                     DUR,
                                     "c" if cplay else "g",
                                     videoid,
-                                    seconds_to_min(db[chat_id][0]["played"]),
+                                    seconds_to_min(playback_clock.played(chat_id)),
                                     db[chat_id][0]["dur"],
                                 )
                                 await mystic.edit_reply_markup(reply_markup=buttons)
@@ -232,7 +233,7 @@ async def queue_back(client, CallbackQuery: CallbackQuery, _):
             DUR,
             cplay,
             videoid,
-            seconds_to_min(got[0]["played"]),
+            seconds_to_min(playback_clock.played(chat_id)),
             got[0]["dur"],
         )
     )
@@ -253,7 +254,7 @@ async def queue_back(client, CallbackQuery: CallbackQuery, _):
                                     DUR,
                                     cplay,
                                     videoid,
-                                    seconds_to_min(db[chat_id][0]["played"]),
+                                    seconds_to_min(playback_clock.played(chat_id)),
                                     db[chat_id][0]["dur"],
                                 )
                                 await mystic.edit_reply_markup(reply_markup=buttons)
@@ -1,9 +1,10 @@
-import random
 from typing import Dict, List, Union
 
 # استخدام Telethon فقط
 from ZeMusic.core.telethon_client import telethon_manager
 from ZeMusic.core.database import db
+from ZeMusic.core.assistant_scheduler import assistant_scheduler
+from ZeMusic.core.playback_clock import playback_clock
 
 # متغيرات الذاكرة للحالات المؤقتة (كما في الكود الأصلي)
 active = []
@@ -119,86 +120,39 @@ async def set_assistant_new(chat_id, number):
     """تعيين مساعد جديد"""
     number = int(number)
     assistantdict[chat_id] = number
-    await db.update_chat_setting(chat_id, assistant_id=number)
+    await assistant_scheduler.pin(chat_id, number)
 
 async def set_assistant(chat_id):
-    """تعيين مساعد عشوائي - Telethon version"""
+    """تعيين مساعد للمجموعة (المرتبط بها أو الأقل حملاً) - Telethon version"""
     try:
-        # الحصول على قائمة المساعدين المتصلين
-        connected_assistants = []
-        for assistant_id, assistant_client in telethon_manager.assistant_clients.items():
-            if assistant_client.is_connected():
-                connected_assistants.append(assistant_id)
-        
-        if not connected_assistants:
+        selected_assistant_id = await assistant_scheduler.assign(chat_id)
+        if selected_assistant_id is None:
             return None
         
-        # اختيار مساعد عشوائي
-        selected_assistant_id = random.choice(connected_assistants)
-        selected_assistant = telethon_manager.assistant_clients[selected_assistant_id]
-        
         assistantdict[chat_id] = selected_assistant_id
-        await db.update_chat_setting(chat_id, assistant_id=selected_assistant_id)
-        
-        return selected_assistant
+        return assistant_scheduler.client(selected_assistant_id)
     except Exception:
         return None
 
 async def get_assistant(chat_id: int) -> str:
     """الحصول على المساعد - Telethon version"""
     try:
-        assistant = assistantdict.get(chat_id)
-        if assistant:
-            return assistant
-        
-        settings = await db.get_chat_settings(chat_id)
-        got_assis = settings.assistant_id
-        if got_assis:
+        # المساعد المرتبط بالمجموعة (المحفوظ في chat_settings) أو الأقل حملاً
+        got_assis = await assistant_scheduler.assign(chat_id)
+        if got_assis is not None:
             assistantdict[chat_id] = got_assis
-            return got_assis
-        else:
-            # اختيار مساعد متاح من Telethon
-            available_assistants = []
-            for assistant_id, assistant_client in telethon_manager.assistant_clients.items():
-                if assistant_client.is_connected():
-                    available_assistants.append(assistant_id)
-            
-            if available_assistants:
-                ran_assistant = random.choice(available_assistants)
-                assistantdict[chat_id] = ran_assistant
-                await db.update_chat_setting(chat_id, assistant_id=ran_assistant)
-                return ran_assistant
-            else:
-                return None
+        return got_assis
     except Exception:
         return None
 
 async def get_assistant_details(chat_id: int) -> str:
     """الحصول على تفاصيل المساعد - Telethon version"""
     try:
-        assistant = assistantdict.get(chat_id)
-        if assistant:
-            return assistant
-        
-        settings = await db.get_chat_settings(chat_id)
-        got_assis = settings.assistant_id
-        if got_assis:
+        # المساعد المرتبط بالمجموعة (المحفوظ في chat_settings) أو الأقل حملاً
+        got_assis = await assistant_scheduler.assign(chat_id)
+        if got_assis is not None:
             assistantdict[chat_id] = got_assis
-            return got_assis
-        else:
-            # اختيار مساعد متاح من Telethon
-            available_assistants = []
-            for assistant_id, assistant_client in telethon_manager.assistant_clients.items():
-                if assistant_client.is_connected():
-                    available_assistants.append(assistant_id)
-            
-            if available_assistants:
-                ran_assistant = random.choice(available_assistants)
-                assistantdict[chat_id] = ran_assistant
-                await db.update_chat_setting(chat_id, assistant_id=ran_assistant)
-                return ran_assistant
-            else:
-                return None
+        return got_assis
     except Exception:
         return None
 
@@ -334,10 +288,12 @@ async def is_music_playing(chat_id: int) -> bool:
 async def music_on(chat_id: int):
     """تشغيل الموسيقى"""
     pause[chat_id] = False
+    playback_clock.resume(chat_id)
 
 async def music_off(chat_id: int):
     """إيقاف الموسيقى مؤقتاً"""
     pause[chat_id] = True
+    playback_clock.pause(chat_id)
 
 # وظائف المستخدمين والمديرين
 async def get_userss(user_id: int) -> bool:
@@ -524,8 +480,8 @@ async def add_active_chat(chat_id: int):
 
 async def remove_active_chat(chat_id: int):
     """إزالة محادثة نشطة"""
-    # نظام مبسط - لا حاجة لتطبيق
-    pass
+    # نظام مبسط - يكفي إيقاف ساعة التشغيل
+    playback_clock.stop(chat_id)
 
 async def get_served_users() -> list:
     """الحصول على جميع المستخدمين المخدومين"""
@@ -1,15 +1,14 @@
 import os
 
-from config import autoclean
+from ZeMusic.core.queue_store import queue_store
 
 
 async def auto_clean(popped):
     try:
         rem = popped["file"]
-        autoclean.remove(rem)
-        count = autoclean.count(rem)
-        if count == 0:
-            if "vid_" not in rem or "live_" not in rem or "index_" not in rem:
+        # يُحذف الملف عند خروج آخر عنصر في القوائم يستخدمه
+        if queue_store.files.release(rem) == 0:
+            if "vid_" not in rem and "live_" not in rem and "index_" not in rem:
                 try:
                     os.remove(rem)
                 except:
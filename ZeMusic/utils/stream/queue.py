@@ -1,9 +1,10 @@
 import asyncio
 from typing import Union
 
+from ZeMusic.core.playback_clock import playback_clock
 from ZeMusic.misc import db
 from ZeMusic.utils.formatters import check_duration, seconds_to_min
-from config import autoclean, time_to_seconds
+from config import time_to_seconds
 
 
 async def put_queue(
@@ -23,28 +24,23 @@ async def put_queue(
         duration_in_seconds = time_to_seconds(duration) - 3
     except:
         duration_in_seconds = 0
-    put = {
-        "title": title,
-        "dur": duration,
-        "streamtype": stream,
-        "by": user,
-        "user_id": user_id,
-        "chat_id": original_chat_id,
-        "file": file,
-        "vidid": vidid,
-        "seconds": duration_in_seconds,
-        "played": 0,
-    }
-    if forceplay:
-        check = db.get(chat_id)
-        if check:
-            check.insert(0, put)
-        else:
-            db[chat_id] = []
-            db[chat_id].append(put)
-    else:
-        db[chat_id].append(put)
-    autoclean.append(file)
+    put = db.enqueue(
+        chat_id,
+        {
+            "title": title,
+            "dur": duration,
+            "streamtype": stream,
+            "by": user,
+            "user_id": user_id,
+            "chat_id": original_chat_id,
+            "file": file,
+            "vidid": vidid,
+            "seconds": duration_in_seconds,
+        },
+        front=bool(forceplay),
+    )
+    if db[chat_id][0] is put:
+        playback_clock.start(chat_id, duration_in_seconds)
 
 
 async def put_queue_index(
@@ -69,23 +65,19 @@ async def put_queue_index(
             dur = 0
     else:
         dur = 0
-    put = {
-        "title": title,
-        "dur": duration,
-        "streamtype": stream,
-        "by": user,
-        "chat_id": original_chat_id,
-        "file": file,
-        "vidid": vidid,
-        "seconds": dur,
-        "played": 0,
-    }
-    if forceplay:
-        check = db.get(chat_id)
-        if check:
-            check.insert(0, put)
-        else:
-            db[chat_id] = []
-            db[chat_id].append(put)
-    else:
-        db[chat_id].append(put)
+    put = db.enqueue(
+        chat_id,
+        {
+            "title": title,
+            "dur": duration,
+            "streamtype": stream,
+            "by": user,
+            "chat_id": original_chat_id,
+            "file": file,
+            "vidid": vidid,
+            "seconds": dur,
+        },
+        front=bool(forceplay),
+    )
+    if db[chat_id][0] is put:
+        playback_clock.start(chat_id, dur)
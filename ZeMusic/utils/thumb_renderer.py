@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+"""
+نظام رسم الصور المصغرة للتشغيل
+- الخطوط والقناع الدائري تُحمّل مرة واحدة في كل عملية عاملة
+- الرسم في مجمع عمليات خارج حلقة الأحداث
+- كاش على القرص بعنوان المحتوى (video_id + إصدار القالب) مع حد أقصى للحجم وطرد الأقدم استخداماً
+- دمج طلبات الرسم المتزامنة لنفس الفيديو
+"""
+
+import os
+import time
+import random
+import asyncio
+import hashlib
+import threading
+import concurrent.futures
+from typing import Any, Dict, Optional
+
+try:
+    from PIL import Image, ImageDraw, ImageEnhance, ImageFilter, ImageFont, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+    Image = ImageDraw = ImageEnhance = ImageFilter = ImageFont = ImageOps = None
+
+import config
+from ZeMusic.logging import LOGGER
+from ZeMusic.core.singleflight import SingleFlight
+
+# يُرفع عند أي تغيير في شكل الصورة (يبطل الكاش القديم تلقائياً)
+TEMPLATE_VERSION = 2
+
+FONT_PATH = "ZeMusic/assets/font.ttf"
+FONT2_PATH = "ZeMusic/assets/font2.ttf"
+
+DEV = "Dev : @F_A_6"
+
+# التمويه يتم على نسخة مصغرة بهذا المعامل ثم تُكبّر (نفس النتيجة البصرية لتمويه بنصف قطر 30)
+BLUR_SCALE = 4
+
+# الطرد حتى هذه النسبة من الحجم الأقصى لتجنب الطرد مع كل كتابة
+EVICT_TARGET_RATIO = 0.9
+
+# ========================================
+# الرسم (يعمل داخل العمليات العاملة)
+# ========================================
+
+_assets: Dict[str, Any] = {}
+
+def _load_assets():
+    """تحميل الخطوط والقناع الدائري مرة واحدة لكل عملية"""
+    if _assets:
+        return _assets
+    mask = Image.new("L", (720, 720), 0)
+    ImageDraw.Draw(mask).pieslice([(0, 0), (720, 720)], 0, 360, fill=255, outline="white")
+    _assets.update({
+        'mask': mask,
+        'font1': ImageFont.truetype(FONT_PATH, 30),
+        'font2': ImageFont.truetype(FONT2_PATH, 70),
+        'font3': ImageFont.truetype(FONT2_PATH, 40),
+        'font4': ImageFont.truetype(FONT2_PATH, 35),
+    })
+    return _assets
+
+def truncate(text):
+    words = text.split(" ")
+    text1 = ""
+    text2 = ""
+    for word in words:
+        if len(text1) + len(word) < 30:
+            text1 += " " + word
+        elif len(text2) + len(word) < 30:
+            text2 += " " + word
+    return [text1.strip(), text2.strip()]
+
+def render_thumbnail(source_path: str, output_path: str, meta: Dict[str, str]) -> str:
+    """رسم الصورة المصغرة من صورة يوتيوب وحفظها (دالة نقية تعمل في أي عملية)"""
+    assets = _load_assets()
+
+    with Image.open(source_path) as youtube:
+        image1 = youtube.convert("RGB").resize((1280, 720))
+
+    # خلفية مموهة ومعتمة
+    small = image1.resize((1280 // BLUR_SCALE, 720 // BLUR_SCALE))
+    small = small.filter(ImageFilter.BoxBlur(30 / BLUR_SCALE))
+    background = ImageEnhance.Brightness(small.resize((1280, 720), Image.BILINEAR)).enhance(0.6).convert("RGBA")
+
+    # صورة دائرية
+    circular_thumb = image1.crop((280, 0, 1000, 720)).convert("RGBA")
+    circular_thumb.putalpha(assets['mask'])
+    circular_thumb = circular_thumb.resize((600, 600))
+    background.paste(circular_thumb, (50, 70), mask=circular_thumb)
+
+    draw = ImageDraw.Draw(background)
+    draw.text((20, 10), f" {DEV}", fill="white", font=assets['font1'], align="left")
+    draw.text((680, 150), "زي ميوزك", fill="white", font=assets['font2'], stroke_width=2, stroke_fill="white", align="left")
+
+    title1 = truncate(meta['title'])
+    draw.text((680, 300), text=title1[0], fill="white", stroke_width=1, stroke_fill="white", font=assets['font3'], align="left")
+    draw.text((680, 350), text=title1[1], fill="white", stroke_width=1, stroke_fill="white", font=assets['font3'], align="left")
+
+    draw.text((680, 450), text=f"المشاهدات : {meta['views']}", fill="white", font=assets['font4'], align="left")
+    draw.text((680, 500), text=f"المدة : {meta['duration']} دقيقة", fill="white", font=assets['font4'], align="left")
+    draw.text((680, 550), text="القناة : @F_A_6", fill="white", font=assets['font4'], align="left")
+
+    border = (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
+    image2 = ImageOps.expand(background, border=6, fill=border).convert("RGB")
+
+    # كتابة ذرية: لا يرى القارئ ملفاً نصف مكتوب
+    temp_path = f"{output_path}.{os.getpid()}.tmp"
+    image2.save(temp_path, "JPEG", quality=90)
+    os.replace(temp_path, output_path)
+    return output_path
+
+# ========================================
+# كاش القرص بعنوان المحتوى
+# ========================================
+
+class ThumbnailCache:
+    """ملفات مسماة بتجزئة (video_id، إصدار القالب) مع حد أقصى للحجم"""
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._total_bytes: Optional[int] = None
+        self._lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'evicted': 0
+        }
+
+    def path_for(self, video_id: str) -> str:
+        digest = hashlib.sha1(f"{video_id}:{TEMPLATE_VERSION}".encode()).hexdigest()
+        return os.path.join(self.root, digest[:2], f"{digest}.jpg")
+
+    def lookup(self, video_id: str) -> Optional[str]:
+        """المسار إن وُجد (مع تحديث وقت الوصول لترتيب الطرد)"""
+        path = self.path_for(video_id)
+        try:
+            os.utime(path)
+        except OSError:
+            self.stats['misses'] += 1
+            return None
+        self.stats['hits'] += 1
+        return path
+
+    def _scan(self) -> int:
+        total = 0
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(directory, name))
+                except OSError:
+                    pass
+        return total
+
+    def added(self, path: str):
+        """احتساب ملف جديد والطرد عند تجاوز الحد (يعمل خارج حلقة الأحداث)"""
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan()
+            else:
+                try:
+                    self._total_bytes += os.path.getsize(path)
+                except OSError:
+                    pass
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        entries = []
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                full = os.path.join(directory, name)
+                try:
+                    stat = os.stat(full)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, full))
+        entries.sort()
+
+        target = self.max_bytes * EVICT_TARGET_RATIO
+        total = sum(size for _, size, _ in entries)
+        for _, size, full in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(full)
+                total -= size
+                self.stats['evicted'] += 1
+            except OSError:
+                pass
+        self._total_bytes = total
+        LOGGER(__name__).debug(f"🧹 كاش الصور المصغرة: {total / 1024 / 1024:.1f}MB بعد الطرد")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'size_mb': round((self._total_bytes or 0) / 1024 / 1024, 1),
+            'max_mb': round(self.max_bytes / 1024 / 1024, 1)
+        }
+
+# ========================================
+# المُنسق (حلقة الأحداث)
+# ========================================
+
+class ThumbnailRenderer:
+    """رسم الصور في مجمع عمليات مع كاش ودمج الطلبات المتزامنة"""
+
+    def __init__(self, cache: ThumbnailCache, workers: int = 2):
+        self.cache = cache
+        self.workers = max(1, workers)
+        self._executor: Optional[concurrent.futures.Executor] = None
+        self._flight = SingleFlight("thumbnails")
+        self.stats = {
+            'rendered': 0,
+            'failed': 0,
+            'render_ms': 0.0
+        }
+
+    def _get_executor(self) -> concurrent.futures.Executor:
+        if self._executor is None:
+            try:
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.workers, initializer=_load_assets
+                )
+            except Exception as e:
+                LOGGER(__name__).warning(f"⚠️ تعذر إنشاء مجمع العمليات للصور المصغرة، استخدام الخيوط: {e}")
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="ThumbRender"
+                )
+        return self._executor
+
+    async def get(self, video_id: str, source_path_factory, meta_factory) -> Optional[str]:
+        """
+        مسار الصورة المصغرة من الكاش أو برسمها مرة واحدة لكل فيديو
+        source_path_factory: coroutine تعيد مسار صورة يوتيوب الأصلية
+        meta_factory: coroutine تعيد {title, duration, views}
+        """
+        cached = self.cache.lookup(video_id)
+        if cached:
+            return cached
+
+        async def render():
+            # قد يكون طلب سابق أنهى الرسم بين الفحص والدخول
+            cached = self.cache.lookup(video_id)
+            if cached:
+                return cached
+
+            source_path, meta = await asyncio.gather(source_path_factory(), meta_factory())
+            if not source_path:
+                return None
+
+            output_path = self.cache.path_for(video_id)
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            loop = asyncio.get_running_loop()
+            start = time.perf_counter()
+            try:
+                await loop.run_in_executor(self._get_executor(), render_thumbnail, source_path, output_path, meta)
+            except concurrent.futures.process.BrokenProcessPool:
+                # عملية عاملة انهارت: مجمع جديد في الطلب التالي
+                self._executor = None
+                raise
+            self.stats['rendered'] += 1
+            self.stats['render_ms'] += (time.perf_counter() - start) * 1000
+            await loop.run_in_executor(None, self.cache.added, output_path)
+            return output_path
+
+        try:
+            path, _ = await self._flight.do(video_id, render)
+            return path
+        except Exception as e:
+            self.stats['failed'] += 1
+            LOGGER(__name__).error(f"❌ فشل رسم الصورة المصغرة {video_id}: {e}")
+            return None
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        rendered = self.stats['rendered']
+        return {
+            **self.stats,
+            'avg_render_ms': round(self.stats['render_ms'] / rendered, 1) if rendered else 0.0,
+            'coalesced': self._flight.stats['coalesced'],
+            'cache': self.cache.get_stats()
+        }
+
+thumbnail_renderer = ThumbnailRenderer(
+    ThumbnailCache(config.THUMB_CACHE_DIR, config.THUMB_CACHE_MAX_MB * 1024 * 1024),
+    workers=config.THUMB_RENDER_WORKERS
+)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📊 قياس أداء تصنيف الرسائل
+=====================================
+يقارن عدد الرسائل المصنفة في الثانية على رسائل مجموعة واقعية (عربي/إنجليزي) بين:
+- قبل: قائمة كلمات البوت مع `in` + قاموس الأوامر + أوامر التشغيل بالمطابقة الجزئية
+  + تمرير الرسالة على كل أنماط regex المسجلة كمعالجات منفصلة
+- بعد: CommandRouter (تصنيف واحد بشجرة البادئات + نمط كلمات مجمّع)
+
+التشغيل:
+    python benchmarks/bench_command_router.py [عدد_الرسائل]
+"""
+
+import os
+import re
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ZeMusic.core.command_router import CommandRouter
+
+BOT_USERNAME = "ZeMusicBot"
+
+BOT_KEYWORDS = [
+    'شغل', 'تشغيل', 'play', 'ايقاف', 'وقف', 'stop', 'pause', 'resume',
+    'تخطي', 'skip', 'next', 'تالي', 'قائمة', 'queue', 'موسيقى', 'music',
+    'صوت', 'audio', 'video', 'فيديو', 'بحث', 'search'
+]
+
+COMMANDS = ['/start', '/help', '/play', '/pause', '/resume', '/stop', '/skip',
+            '/current', '/queue', '/owner', '/stats', '/admin']
+
+PLAY_COMMANDS = ['play', 'تشغيل', 'شغل', 'vplay', 'cplay']
+
+# أنماط المعالجات المنفصلة القديمة (كانت تُفحص لكل رسالة)
+OLD_PATTERNS = [re.compile(p) for p in [
+    r'^/?(بحث|search|song|يوت|اغنية|تحميل)\s+(.+)$',
+    r'^/sync_cache$', r'^/migrate_cache$', r'^/cache_info$', r'^/test_cache$', r'^/system_status$',
+    r'/cache_stats', r'/test_cache_channel', r'/clear_cache', r'/cache_help',
+    r'/start', r'/help|/مساعده|المساعده',
+]]
+
+CHATTER = [
+    "السلام عليكم ورحمة الله", "هلا والله", "كيف حالكم يا شباب", "صباح الخير",
+    "وين الناس اليوم؟", "ههههههه", "تمام الحمد لله", "مين صاحي؟", "👍", "😂😂",
+    "good morning everyone", "lol", "anyone online?", "did you watch the match",
+    "الله يسعدكم", "تصبحون على خير", "نورت المجموعة", "شكرا لك", "ok", "brb",
+    "this display is broken again", "اليوم الجو حار جدا", "https://example.com/article",
+    "مساء الورد على الجميع", "who is playing tonight", "جيبو لنا أغنية حلوة",
+    "شغلي اليوم كثير والله", "playing fifa later?", "تشغيلة الفريق امس كانت سيئة",
+]
+
+REQUESTS = [
+    "شغل عمرو دياب تملي معاك", "تشغيل فيروز صباح الخير", "/play adele hello",
+    "play the weeknd blinding lights", "بحث محمد عبده الأماكن", "/song coldplay yellow",
+    "يوت راشد الماجد", "اغنية ماجد المهندس", "/skip", "/stop", "/queue", "/help",
+    "/start", f"/play@{BOT_USERNAME} nancy", "/vplay كاظم الساهر", "المساعده",
+    "/pause", "/resume", "/current", "تحميل ام كلثوم انت عمري",
+]
+
+def build_corpus(count: int) -> list:
+    """مجموعة رسائل واقعية: غالبيتها دردشة عادية وحوالي 15% طلبات للبوت"""
+    rng = random.Random(7)
+    return [rng.choice(REQUESTS) if rng.random() < 0.15 else rng.choice(CHATTER) for _ in range(count)]
+
+def old_classify(text: str):
+    """التصنيف القديم كما كان في handle_message ومعالجات regex المنفصلة"""
+    text_lower = text.lower()
+    keyword = any(k in text_lower for k in BOT_KEYWORDS)
+    routed = []
+    for pattern in OLD_PATTERNS:
+        if pattern.match(text):
+            routed.append(pattern.pattern)
+    if text.startswith('/'):
+        command = text.split()[0].split('@')[0]
+        if command in COMMANDS:
+            routed.append(command)
+            return keyword, routed
+    for play_cmd in PLAY_COMMANDS:
+        if text_lower.startswith(play_cmd) or f'/{play_cmd}' in text_lower:
+            routed.append(play_cmd)
+            break
+    return keyword, routed
+
+async def _noop(*args):
+    return None
+
+def build_router() -> CommandRouter:
+    router = CommandRouter(BOT_USERNAME)
+    router.add(['start'], _noop)
+    router.add(['help', 'مساعده'], _noop, name='help')
+    router.add(['المساعده'], _noop, name='help', slash=False, bare=True)
+    for command in COMMANDS:
+        router.add([command], _noop, pass_event=False)
+    router.add(PLAY_COMMANDS, _noop, name='play', bare=True, pass_event=False, with_query=True)
+    router.set_keywords(BOT_KEYWORDS)
+    for command in ['cache_stats', 'test_cache_channel', 'clear_cache', 'cache_help',
+                    'sync_cache', 'migrate_cache', 'cache_info', 'test_cache', 'system_status']:
+        router.add([command], _noop)
+    router.add(['بحث', 'search', 'song', 'يوت', 'اغنية', 'تحميل'], _noop, name='search', bare=True,
+               pattern=r'^/?(بحث|search|song|يوت|اغنية|تحميل)\s+(.+)$')
+    return router
+
+def new_classify(router: CommandRouter, text: str):
+    matched = router.classify(text)
+    return router.has_keyword(text), matched
+
+def bench(func, corpus: list, rounds: int = 5) -> float:
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for text in corpus:
+            func(text)
+        best = min(best, time.perf_counter() - start)
+    return len(corpus) / best
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    corpus = build_corpus(count)
+    router = build_router()
+
+    multi = sum(1 for text in corpus if len(old_classify(text)[1]) > 1)
+    false_play = sum(1 for text in corpus if set(PLAY_COMMANDS) & set(old_classify(text)[1]) and router.classify(text) is None)
+
+    before = bench(old_classify, corpus)
+    after = bench(lambda text: new_classify(router, text), corpus)
+
+    print(f"📨 الرسائل: {count} | 🌳 مشغلات: {router.get_stats()['slash_triggers']} بشرطة، "
+          f"{router.get_stats()['bare_triggers']} بدون شرطة")
+    print(f"⏪ قبل: {before:,.0f} رسالة/ث | رسائل وصلت لأكثر من معالج: {multi} | تشغيل خاطئ بالمطابقة الجزئية: {false_play}")
+    print(f"⏩ بعد: {after:,.0f} رسالة/ث | معالج واحد لكل رسالة")
+    print(f"🚀 التحسن: x{after / before:.1f}")
+
+if __name__ == "__main__":
+    main()
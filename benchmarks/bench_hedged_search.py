@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📊 محاكاة البحث المتحوط عبر عدة مزودين
+=====================================
+مزودون وهميون بتوزيعات زمن ونجاح ثابتة البذرة (نفس السحب لكل استراتيجية) على حلقة أحداث
+بزمن افتراضي: الانتظار يقدّم الساعة فوراً فتكون النتائج حتمية وتُحسب آلاف عمليات البحث في ثوان.
+يقارن بين:
+- قبل: تسلسلي بترتيب ثابت (كل مزود حتى مهلته ثم التالي)
+- الكل معاً: إطلاق جميع المزودين وأخذ أول نتيجة ناجحة (ضعف الطلبات)
+- بعد: HedgedSearch (الأسرع تاريخياً أولاً، احتياطي بعد p90، إلغاء الخاسرين)
+سيناريوهان لإظهار إعادة الترتيب المتعلمة في منتصف المحاكاة:
+- نفاد الحصة: YouTube API تبدأ بالفشل السريع
+- تباطؤ: YouTube API تبقى ناجحة لكن زمنها يقفز من ~50ms إلى ~2s (تُلغى كخاسرة فلا تتراجع إلا بتسجيل الخاسرين المتأخرين)
+
+التشغيل:
+    python benchmarks/bench_hedged_search.py [عدد_عمليات_البحث] [البذرة]
+"""
+
+import os
+import sys
+import random
+import asyncio
+import selectors
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ZeMusic.core.search_orchestrator import HedgedSearch
+
+# نفس مهلة المزود في download.py (REQUEST_TIMEOUT * 1.5)
+TIMEOUT = 12.0
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    """حلقة أحداث بزمن افتراضي: انتظار المؤقتات يقدّم الساعة بدل النوم"""
+
+    def __init__(self):
+        super().__init__(selectors.DefaultSelector())
+        self._now = 0.0
+        select = self._selector.select
+
+        def virtual_select(timeout=None):
+            events = select(0)
+            if not events and timeout:
+                self._now += timeout
+            return events
+
+        self._selector.select = virtual_select
+
+    def time(self) -> float:
+        return self._now
+
+def draw(rng: random.Random, median: float, sigma: float, success: float, tail: float = 0.0,
+         tail_range=(0.0, 0.0), fail_latency: float = 0.0):
+    """(الزمن، نجاح) لطلب واحد"""
+    if rng.random() >= success:
+        return (fail_latency or median * rng.lognormvariate(0, sigma)), False
+    if rng.random() < tail:
+        return rng.uniform(*tail_range), True
+    return median * rng.lognormvariate(0, sigma), True
+
+def youtube_api_draw(rng: random.Random, scenario: str, second_half: bool):
+    """YouTube API: سريعة مع فشل سريع أحياناً، ثم تنفد الحصة أو تتباطأ في النصف الثاني"""
+    if second_half and scenario == 'quota':
+        return draw(rng, 0.35, 0.3, 0.1, fail_latency=0.2)
+    if scenario == 'slowdown':
+        # نسخة قريبة (50ms) تتعطل فتصبح ~2s مع بقاء نجاحها
+        return draw(rng, 2.0 if second_half else 0.05, 0.2, 0.95, fail_latency=0.2)
+    return draw(rng, 0.35, 0.3, 0.8, fail_latency=0.2)
+
+def make_draws(searches: int, seed: int, scenario: str):
+    """سحب مسبق لكل بحث ولكل مزود حتى ترى كل استراتيجية نفس الظروف"""
+    rng = random.Random(seed)
+    draws = []
+    for index in range(searches):
+        draws.append({
+            # مكتبة youtube_search: موثوقة مع ذيل بطيء أحياناً
+            'youtube_search': draw(rng, 0.9, 0.5, 0.97, 0.05, (4.0, 7.0)),
+            'youtube_api': youtube_api_draw(rng, scenario, index >= searches // 2),
+            # Invidious: خوادم عامة بعضها بطيء جداً
+            'invidious': draw(rng, 0.6, 0.4, 0.9, 0.25, (5.0, 15.0)),
+        })
+    return draws
+
+PROVIDERS = ('youtube_search', 'youtube_api', 'invidious')
+
+class Simulation:
+    def __init__(self, draws):
+        self.draws = draws
+        self.requests = 0
+
+    def provider(self, name: str):
+        async def search(query: str):
+            self.requests += 1
+            latency, ok = self.draws[int(query)][name]
+            await asyncio.sleep(latency)
+            return {'video_id': query, 'source': name} if ok else None
+        return search
+
+async def run_sequential(sim: Simulation, query: str):
+    for name in PROVIDERS:
+        try:
+            result = await asyncio.wait_for(sim.provider(name)(query), TIMEOUT)
+        except asyncio.TimeoutError:
+            continue
+        if result:
+            return result
+    return None
+
+async def run_all(sim: Simulation, query: str):
+    tasks = [asyncio.ensure_future(asyncio.wait_for(sim.provider(name)(query), TIMEOUT)) for name in PROVIDERS]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                result = await next_done
+            except asyncio.TimeoutError:
+                continue
+            if result:
+                return result
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
+
+def make_hedged(sim: Simulation) -> HedgedSearch:
+    search = HedgedSearch("bench")
+    # نفس ترتيب التسجيل والأزمنة المبدئية في download.py
+    for name, prior in zip(PROVIDERS, (1.0, 1.2, 1.5)):
+        search.register(name, sim.provider(name), timeout=TIMEOUT, prior=prior)
+    return search
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def simulate(draws, strategy: str):
+    sim = Simulation(draws)
+    loop = VirtualClockLoop()
+    hedged = make_hedged(sim) if strategy == 'hedged' else None
+    latencies, found, orders, leaders = [], 0, [], []
+
+    async def main():
+        nonlocal found
+        for index in range(len(draws)):
+            if hedged is not None:
+                leaders.append(hedged.order()[0].name)
+                if index in (len(draws) // 2 - 1, len(draws) - 1):
+                    orders.append(' > '.join(provider.name for provider in hedged.order()))
+            start = loop.time()
+            if strategy == 'sequential':
+                result = await run_sequential(sim, str(index))
+            elif strategy == 'all':
+                result = await run_all(sim, str(index))
+            else:
+                result = await hedged.search(str(index))
+            latencies.append(loop.time() - start)
+            found += bool(result)
+            # فاصل بين عمليات البحث حتى تنتهي المهام الملغاة
+            await asyncio.sleep(0)
+
+        # انتظار المهام الملغاة المتبقية قبل إغلاق الحلقة
+        leftover = asyncio.all_tasks() - {asyncio.current_task()}
+        await asyncio.gather(*leftover, return_exceptions=True)
+
+    try:
+        loop.run_until_complete(main())
+    finally:
+        loop.close()
+
+    # عدد عمليات البحث بعد التغيير حتى يفقد المزود المتصدر الصدارة
+    relearned = None
+    if leaders:
+        half = len(draws) // 2
+        relearned = next((index - half for index in range(half, len(draws)) if leaders[index] != leaders[half - 1]), None)
+    return latencies, found, sim.requests, orders, hedged, relearned
+
+def main():
+    searches = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 7
+
+    print(f"🔎 عمليات البحث: {searches:,} | البذرة: {seed} | مهلة المزود: {TIMEOUT:.0f}s")
+    scenarios = {'quota': 'نفاد حصة YouTube API', 'slowdown': 'تباطؤ YouTube API (0.05s → 2s)'}
+    names = {'sequential': 'قبل (تسلسلي)', 'all': 'الكل معاً', 'hedged': 'بعد (متحوط)'}
+    for scenario, title in scenarios.items():
+        draws = make_draws(searches, seed, scenario)
+        print(f"\n📉 السيناريو: {title}")
+        for strategy in ('sequential', 'all', 'hedged'):
+            latencies, found, requests, orders, hedged, relearned = simulate(draws, strategy)
+            second_half = latencies[searches // 2:]
+            print(
+                f"• {names[strategy]}: متوسط {sum(latencies) / len(latencies):.2f}s | "
+                f"p50 {percentile(latencies, 0.5):.2f}s | p90 {percentile(latencies, 0.9):.2f}s | "
+                f"p99 {percentile(latencies, 0.99):.2f}s | نجاح {found / searches:.1%} | "
+                f"طلبات/بحث {requests / searches:.2f} | متوسط النصف الثاني {sum(second_half) / len(second_half):.2f}s"
+            )
+            if hedged is not None:
+                stats = hedged.get_stats()
+                late = sum(provider['late'] for provider in stats['providers'].values())
+                print(f"  ↳ احتياطي: {stats['hedges']:,} | ملغى: {stats['cancelled']:,} | متأخر مسجل: {late:,}")
+                print(f"  ↳ الترتيب المتعلم: قبل التغيير [{orders[0]}] | بعده [{orders[1]}]")
+                print(f"  ↳ تراجع المتصدر بعد: {relearned if relearned is not None else '—'} بحث من التغيير")
+
+if __name__ == "__main__":
+    main()
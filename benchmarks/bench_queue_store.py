@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📊 قياس أداء مخزن قوائم التشغيل
+=====================================
+يقارن الإضافة والتخطي مع 10 آلاف مجموعة نشطة بين:
+- قبل: قاموس من list مع قائمة autoclean عامة (remove و count على كل تخطٍ، pop(0) في حلقة لتخطي N)
+- بعد: QueueStore (deque لكل مجموعة + عداد مراجع للملفات + تخطي N دفعة واحدة)
+ثم يقيس زمن حفظ القوائم المعدلة في SQLite واستعادتها
+
+التشغيل:
+    python benchmarks/bench_queue_store.py [عدد_المجموعات] [مقاطع_لكل_مجموعة]
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ZeMusic.core.queue_store import QueueStore
+
+# التخطي القديم يمسح autoclean كاملة في كل مرة، لذا يُقاس على عينة
+BEFORE_SKIP_SAMPLE = 2000
+BULK_SKIP = 5
+
+def make_entry(chat_id: int, index: int) -> dict:
+    vidid = f"v{random.randint(0, 50000)}"
+    return {
+        "title": f"Track {index}",
+        "dur": "3:45",
+        "streamtype": "audio",
+        "by": "user",
+        "user_id": chat_id,
+        "chat_id": chat_id,
+        "file": f"downloads/{vidid}.m4a",
+        "vidid": vidid,
+        "seconds": 222,
+    }
+
+def bench_before(chats: int, per_chat: int):
+    db = {}
+    autoclean = []
+
+    def auto_clean(popped):
+        rem = popped["file"]
+        autoclean.remove(rem)
+        autoclean.count(rem)
+
+    start = time.perf_counter()
+    for chat_id in range(chats):
+        db[chat_id] = []
+        for index in range(per_chat):
+            put = make_entry(chat_id, index)
+            db[chat_id].append(put)
+            autoclean.append(put["file"])
+    enqueue = chats * per_chat / (time.perf_counter() - start)
+
+    # نصف المحادثات للتخطي الفردي والنصف الآخر للتخطي المتعدد
+    sample = min(BEFORE_SKIP_SAMPLE, chats // 2)
+
+    start = time.perf_counter()
+    for chat_id in range(sample):
+        auto_clean(db[chat_id].pop(0))
+    skip = sample / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for chat_id in range(sample, 2 * sample):
+        for _ in range(BULK_SKIP):
+            auto_clean(db[chat_id].pop(0))
+    bulk = sample / (time.perf_counter() - start)
+    return enqueue, skip, bulk
+
+def bench_after(store: QueueStore, chats: int, per_chat: int):
+    start = time.perf_counter()
+    for chat_id in range(chats):
+        store[chat_id] = []
+        for index in range(per_chat):
+            store.enqueue(chat_id, make_entry(chat_id, index))
+    enqueue = chats * per_chat / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for chat_id in range(chats):
+        popped = store[chat_id].pop(0)
+        store.files.release(popped["file"])
+    skip = chats / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for chat_id in range(chats):
+        for popped in store.skip(chat_id, BULK_SKIP):
+            store.files.release(popped["file"])
+    bulk = chats / (time.perf_counter() - start)
+    return enqueue, skip, bulk
+
+async def bench_persistence(path: str, chats: int, per_chat: int):
+    store = QueueStore(path, persist=True, flush_interval=3600)
+    for chat_id in range(chats):
+        for index in range(per_chat):
+            store.enqueue(chat_id, make_entry(chat_id, index))
+
+    start = time.perf_counter()
+    await store.flush()
+    flush = time.perf_counter() - start
+
+    restored = QueueStore(path, persist=True)
+    start = time.perf_counter()
+    count = await restored.restore()
+    restore = time.perf_counter() - start
+    return flush, restore, count
+
+def main():
+    chats = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    per_chat = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    random.seed(7)
+
+    before = bench_before(chats, per_chat)
+    after = bench_after(QueueStore(":memory:"), chats, per_chat)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        flush, restore, count = asyncio.run(bench_persistence(os.path.join(tmp, "queues.db"), chats, per_chat))
+
+    print(f"💬 المجموعات: {chats:,} | 🎵 مقاطع لكل مجموعة: {per_chat} | 📦 الإجمالي: {chats * per_chat:,}")
+    for name, old, new in zip(("إضافة", "تخطي", f"تخطي {BULK_SKIP}"), before, after):
+        print(f"• {name}: قبل {old:,.0f}/ث | بعد {new:,.0f}/ث | x{new / old:.1f}")
+    print(f"💾 حفظ {count:,} مقطع: {flush * 1000:.0f}ms | استعادة: {restore * 1000:.0f}ms")
+
+if __name__ == "__main__":
+    main()
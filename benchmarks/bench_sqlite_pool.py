@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📊 قياس أداء تجمع اتصالات SQLite
+=====================================
+يقارن عدد عمليات البحث في الثانية تحت 200 بحث متزامن:
+- قبل: اتصال جديد + PRAGMA + إغلاق لكل بحث على حلقة الأحداث
+- بعد: SQLitePool (قرّاء دائمون خارج حلقة الأحداث)
+
+التشغيل:
+    python benchmarks/bench_sqlite_pool.py [عدد_الصفوف] [عدد_البحث_لكل_مهمة]
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import sqlite3
+import hashlib
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ZeMusic.core.sqlite_pool import SQLitePool
+
+CONCURRENCY = 200
+LOOKUP_SQL = (
+    "SELECT message_id, file_id, original_title, original_artist, duration "
+    "FROM channel_index WHERE search_hash = ? LIMIT 1"
+)
+
+def build_database(path: str, rows: int):
+    """إنشاء قاعدة تجريبية بجدول channel_index"""
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('''
+        CREATE TABLE channel_index (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            message_id INTEGER UNIQUE,
+            file_id TEXT UNIQUE,
+            search_hash TEXT UNIQUE,
+            original_title TEXT,
+            original_artist TEXT,
+            duration INTEGER
+        )
+    ''')
+    conn.executemany(
+        "INSERT INTO channel_index (message_id, file_id, search_hash, original_title, original_artist, duration) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            (i, f"file_{i}", hashlib.md5(str(i).encode()).hexdigest()[:12], f"title {i}", f"artist {i % 500}", 200)
+            for i in range(rows)
+        )
+    )
+    conn.commit()
+    conn.close()
+
+async def run_before(path: str, hashes: list, per_task: int) -> float:
+    """النمط القديم: اتصال لكل بحث على حلقة الأحداث"""
+    async def worker():
+        for _ in range(per_task):
+            conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            try:
+                conn.execute(LOOKUP_SQL, (random.choice(hashes),)).fetchone()
+            finally:
+                conn.close()
+            await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    return time.perf_counter() - start
+
+async def run_after(pool: SQLitePool, hashes: list, per_task: int) -> float:
+    """النمط الجديد: قرّاء التجمع خارج حلقة الأحداث"""
+    async def worker():
+        for _ in range(per_task):
+            await pool.fetchone(LOOKUP_SQL, (random.choice(hashes),))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    return time.perf_counter() - start
+
+async def measure_loop_lag(coro) -> float:
+    """أقصى تأخير لحلقة الأحداث أثناء تنفيذ الحمل"""
+    max_lag = 0.0
+    done = False
+
+    async def probe():
+        nonlocal max_lag
+        while not done:
+            t = time.perf_counter()
+            await asyncio.sleep(0.005)
+            max_lag = max(max_lag, time.perf_counter() - t - 0.005)
+
+    probe_task = asyncio.create_task(probe())
+    elapsed = await coro
+    done = True
+    await probe_task
+    return elapsed, max_lag
+
+async def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    per_task = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    total = CONCURRENCY * per_task
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        build_database(path, rows)
+        hashes = [hashlib.md5(str(i).encode()).hexdigest()[:12] for i in range(rows)]
+
+        before, before_lag = await measure_loop_lag(run_before(path, hashes, per_task))
+
+        pool = SQLitePool(path)
+        try:
+            # تسخين الاتصالات
+            await run_after(pool, hashes, 1)
+            after, after_lag = await measure_loop_lag(run_after(pool, hashes, per_task))
+        finally:
+            pool.close()
+
+    print(f"📦 الصفوف: {rows} | 🔀 التزامن: {CONCURRENCY} | 🔍 عمليات البحث: {total}")
+    print(f"⏪ قبل: {total / before:,.0f} بحث/ث | أقصى تأخير للحلقة: {before_lag * 1000:.1f}ms")
+    print(f"⏩ بعد: {total / after:,.0f} بحث/ث | أقصى تأخير للحلقة: {after_lag * 1000:.1f}ms")
+    print(f"🚀 التحسن: x{before / after:.1f}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📊 قياس أداء رسم الصور المصغرة
+=====================================
+يقارن عدد الصور المرسومة في الثانية على صور يوتيوب مصطنعة (1280x720) بين:
+- قبل: الرسم داخل get_thumb (تحميل الخطوط والقناع لكل صورة، numpy للقناع، تمويه بنصف قطر 30
+  على الصورة كاملة، وتنفيذ تسلسلي على حلقة الأحداث)
+- بعد: ThumbnailRenderer (أصول محمّلة مرة لكل عملية، تمويه على نسخة مصغرة، مجمع عمليات)
+ثم يقيس قراءات الكاش في الثانية ودمج الطلبات المتزامنة لنفس الفيديو
+
+التشغيل:
+    python benchmarks/bench_thumbnails.py [عدد_الصور] [عدد_العمليات]
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# مسارات الخطوط نسبية لجذر المشروع
+os.chdir(ROOT)
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageEnhance, ImageFilter, ImageFont, ImageOps
+
+from ZeMusic.utils.thumb_renderer import ThumbnailCache, ThumbnailRenderer, truncate
+
+META = {'title': "Some Very Long Song Title Official Music Video", 'duration': "3:45", 'views': "1.2M views"}
+
+def make_sources(directory: str, count: int):
+    """صور مصطنعة بتدرج وأشكال عشوائية (قريبة من صور يوتيوب في التعقيد)"""
+    paths = []
+    for i in range(count):
+        image = Image.linear_gradient("L").resize((1280, 720)).convert("RGB")
+        draw = ImageDraw.Draw(image)
+        for _ in range(40):
+            x, y = random.randint(0, 1200), random.randint(0, 650)
+            draw.rectangle([x, y, x + random.randint(20, 200), y + random.randint(20, 200)],
+                           fill=(random.randint(0, 255), random.randint(0, 255), random.randint(0, 255)))
+        path = os.path.join(directory, f"thumb{i}.jpg")
+        image.save(path, quality=90)
+        paths.append(path)
+    return paths
+
+def old_render(source_path: str, output_path: str):
+    """نسخة من مسار الرسم القديم في get_thumb"""
+    youtube = Image.open(source_path)
+    image1 = youtube.resize((1280, 720))
+    image2 = image1.convert("RGBA")
+    background = image2.filter(filter=ImageFilter.BoxBlur(30))
+    image2 = ImageEnhance.Brightness(background).enhance(0.6)
+
+    lum_img = Image.new("L", [720, 720], 0)
+    ImageDraw.Draw(lum_img).pieslice([(0, 0), (720, 720)], 0, 360, fill=255, outline="white")
+    img_arr = np.array(image1.crop((280, 0, 1000, 720)))
+    final_img_arr = np.dstack((img_arr, np.array(lum_img)))
+    circular_thumb = Image.fromarray(final_img_arr).resize((600, 600))
+    image2.paste(circular_thumb, (50, 70), mask=circular_thumb)
+
+    font1 = ImageFont.truetype("ZeMusic/assets/font.ttf", 30)
+    font2 = ImageFont.truetype("ZeMusic/assets/font2.ttf", 70)
+    font3 = ImageFont.truetype("ZeMusic/assets/font2.ttf", 40)
+    font4 = ImageFont.truetype("ZeMusic/assets/font2.ttf", 35)
+
+    draw = ImageDraw.Draw(image2)
+    draw.text((20, 10), " Dev : @F_A_6", fill="white", font=font1, align="left")
+    draw.text((680, 150), "زي ميوزك", fill="white", font=font2, stroke_width=2, stroke_fill="white", align="left")
+    title1 = truncate(META['title'])
+    draw.text((680, 300), text=title1[0], fill="white", stroke_width=1, stroke_fill="white", font=font3, align="left")
+    draw.text((680, 350), text=title1[1], fill="white", stroke_width=1, stroke_fill="white", font=font3, align="left")
+    draw.text((680, 450), text=f"المشاهدات : {META['views']}", fill="white", font=font4, align="left")
+    draw.text((680, 500), text=f"المدة : {META['duration']} دقيقة", fill="white", font=font4, align="left")
+    draw.text((680, 550), text="القناة : @F_A_6", fill="white", font=font4, align="left")
+
+    image2 = ImageOps.expand(image2, border=6, fill=(1, 2, 3)).convert("RGB")
+    image2.save(output_path)
+
+async def bench_before(sources, out_dir: str) -> float:
+    start = time.perf_counter()
+    for i, source in enumerate(sources):
+        # كان الرسم يتم مباشرة داخل الدالة غير المتزامنة
+        old_render(source, os.path.join(out_dir, f"old{i}.jpg"))
+        await asyncio.sleep(0)
+    return len(sources) / (time.perf_counter() - start)
+
+async def bench_after(sources, cache_dir: str, workers: int):
+    renderer = ThumbnailRenderer(ThumbnailCache(cache_dir, 500 * 1024 * 1024), workers=workers)
+
+    async def meta():
+        return META
+
+    def source_factory(path):
+        async def factory():
+            return path
+        return factory
+
+    # تسخين المجمع (إنشاء العمليات وتحميل الخطوط) خارج القياس
+    await renderer.get("warmup", source_factory(sources[0]), meta)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        renderer.get(f"video{i}", source_factory(source), meta) for i, source in enumerate(sources)
+    ))
+    rendered = len(sources) / (time.perf_counter() - start)
+
+    # قراءات الكاش
+    lookups = len(sources) * 50
+    start = time.perf_counter()
+    for n in range(lookups):
+        await renderer.get(f"video{n % len(sources)}", source_factory(sources[0]), meta)
+    hits = lookups / (time.perf_counter() - start)
+
+    # 50 طلباً متزامناً لفيديو لم يُرسم بعد
+    before = renderer.stats['rendered']
+    await asyncio.gather(*(renderer.get("hot", source_factory(sources[0]), meta) for _ in range(50)))
+    coalesced = renderer.stats['rendered'] - before
+
+    renderer.shutdown()
+    return rendered, hits, coalesced
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    random.seed(7)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sources = make_sources(tmp, count)
+        before = asyncio.run(bench_before(sources, tmp))
+        after, hits, renders_for_hot = asyncio.run(bench_after(sources, os.path.join(tmp, "thumbs"), workers))
+
+    print(f"🖼️ الصور: {count} | ⚙️ العمليات: {workers} | 🧮 المعالجات: {os.cpu_count()}")
+    print(f"⏪ قبل: {before:.1f} صورة/ث (تسلسلي على حلقة الأحداث)")
+    print(f"⏩ بعد: {after:.1f} صورة/ث")
+    print(f"🚀 التحسن: x{after / before:.1f}")
+    print(f"💾 قراءات الكاش: {hits:,.0f} صورة/ث")
+    print(f"🔗 50 طلباً متزامناً لنفس الفيديو: {renders_for_hot} رسم")
+
+if __name__ == "__main__":
+    main()
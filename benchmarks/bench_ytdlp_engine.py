@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📊 قياس أداء محرك yt-dlp
+=====================================
+يقارن معدل إنجاز المهام وتأخير حلقة الأحداث بين:
+- قبل: YoutubeDL جديد لكل مهمة داخل run_in_executor(None, ...)
+- بعد: ytdlp_engine (عمليات عاملة بنسخ YoutubeDL مهيأة)
+
+يعمل بدون إنترنت: خادم HTTP محلي يقدم ملفات صوتية تجريبية
+قبل القياس يتحقق أن طلب الصوت فقط عبر النسخ المهيأة يختار فعلاً الصيغة الصوتية من قائمة HLS
+
+التشغيل:
+    python benchmarks/bench_ytdlp_engine.py [عدد_المهام] [حجم_الملف_KB]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from yt_dlp import YoutubeDL
+from ZeMusic.core.ytdlp_engine import YTDLPEngine
+
+CONCURRENCY = 16
+
+# قائمة HLS رئيسية بصيغة فيديو وأخرى صوت فقط (لا تُحمّل، يكفي اختيار الصيغة)
+MASTER_PLAYLIST = """#EXTM3U
+#EXT-X-STREAM-INF:BANDWIDTH=800000,RESOLUTION=640x360,CODECS="avc1.4d401e,mp4a.40.2"
+video.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=64000,CODECS="mp4a.40.2"
+audio.m3u8
+"""
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+class QuietServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # المستخرج العام يغلق الاتصال مبكراً عند فحص نوع الملف
+        pass
+
+def start_server(root: str) -> ThreadingHTTPServer:
+    server = QuietServer(("127.0.0.1", 0), partial(QuietHandler, directory=root))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def make_opts(out_dir: str) -> dict:
+    return {
+        "format": "bestaudio/best",
+        "outtmpl": os.path.join(out_dir, "%(id)s.%(ext)s"),
+        "quiet": True,
+        "no_warnings": True,
+        "noprogress": True,
+        "nocheckcertificate": True,
+    }
+
+async def check_selected_format(engine: YTDLPEngine, url: str):
+    """نفس النسخة المهيأة تخدم طلبات بصيغ مختلفة: كل طلب يجب أن يحصل على صيغته"""
+    base = {"quiet": True, "no_warnings": True}
+    for fmt, want_video in (("bestaudio", False), ("best", True), ("bestaudio", False)):
+        info = await engine.extract_info(url, {**base, "format": fmt}, download=False)
+        has_video = info.get("vcodec") not in (None, "none")
+        assert has_video == want_video, f"الصيغة {fmt} اختارت {info.get('format_id')} ({info.get('vcodec')})"
+
+async def run_jobs(urls: list, extract) -> float:
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def one(url):
+        async with semaphore:
+            await extract(url)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(url) for url in urls))
+    return time.perf_counter() - start
+
+async def measure(coro):
+    """زمن التنفيذ وأقصى تأخير لحلقة الأحداث"""
+    max_lag = 0.0
+    done = False
+
+    async def probe():
+        nonlocal max_lag
+        while not done:
+            t = time.perf_counter()
+            await asyncio.sleep(0.005)
+            max_lag = max(max_lag, time.perf_counter() - t - 0.005)
+
+    probe_task = asyncio.create_task(probe())
+    elapsed = await coro
+    done = True
+    await probe_task
+    return elapsed, max_lag
+
+async def main():
+    jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    size_kb = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+
+    with tempfile.TemporaryDirectory() as root:
+        media = os.path.join(root, "media")
+        os.makedirs(media)
+        for i in range(jobs):
+            with open(os.path.join(media, f"track_{i}.mp3"), "wb") as f:
+                f.write(os.urandom(size_kb * 1024))
+        with open(os.path.join(media, "master.m3u8"), "w") as f:
+            f.write(MASTER_PLAYLIST)
+
+        server = start_server(media)
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        urls = [f"{base}/track_{i}.mp3" for i in range(jobs)]
+
+        # قبل: نسخة جديدة في خيط لكل مهمة
+        before_dir = os.path.join(root, "before")
+        before_opts = make_opts(before_dir)
+
+        def thread_extract(url):
+            with YoutubeDL(before_opts) as ydl:
+                return ydl.extract_info(url, download=True)
+
+        async def before_extract(url):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, thread_extract, url)
+
+        before, before_lag = await measure(run_jobs(urls, before_extract))
+
+        # بعد: مجمع العمليات
+        after_dir = os.path.join(root, "after")
+        after_opts = make_opts(after_dir)
+        engine = YTDLPEngine()
+        engine.enabled = True
+        engine.start()
+        try:
+            await check_selected_format(engine, f"{base}/master.m3u8")
+            # تسخين النسخ في كل عملية
+            await run_jobs(urls[:engine.workers * 2], lambda url: engine.extract_info(url, after_opts, download=False))
+            after, after_lag = await measure(run_jobs(urls, lambda url: engine.extract_info(url, after_opts)))
+            stats = engine.get_stats()
+        finally:
+            engine.shutdown()
+            server.shutdown()
+
+        downloaded = len(os.listdir(after_dir))
+
+    print(f"📦 المهام: {jobs} × {size_kb}KB | 🔀 التزامن: {CONCURRENCY} | ⚙️ العمليات: {engine.workers}")
+    print(f"⏪ خيوط + YoutubeDL جديد: {jobs / before:.1f} مهمة/ث | أقصى تأخير للحلقة: {before_lag * 1000:.1f}ms")
+    print(f"⏩ مجمع العمليات: {jobs / after:.1f} مهمة/ث | أقصى تأخير للحلقة: {after_lag * 1000:.1f}ms")
+    print(f"🔥 إعادة استخدام النسخ المهيأة: {stats['warm_hits']}/{stats['jobs']} | ملفات: {downloaded}")
+    print(f"🚀 التحسن: x{before / after:.1f}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
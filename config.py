@@ -35,6 +35,17 @@ OWNER_ID = int(getenv("OWNER_ID", "7345311113"))
 FORCE_SUB_CHANNEL = getenv("FORCE_SUB_CHANNEL", None)  # اتركه None لتعطيل الاشتراك الإجباري
 FORCE_SUB_TEXT = getenv("FORCE_SUB_TEXT", None)  # نص رسالة الاشتراك الإجباري
 
+# كاش عضوية الاشتراك الإجباري (مشترك بين جميع الفحوصات)
+MEMBERSHIP_CACHE_SIZE = int(getenv("MEMBERSHIP_CACHE_SIZE", "20000"))  # الحد الأقصى للمستخدمين المحفوظين
+MEMBERSHIP_CACHE_TTL = int(getenv("MEMBERSHIP_CACHE_TTL", "600"))  # صلاحية نتيجة "مشترك" بالثواني
+MEMBERSHIP_NEGATIVE_TTL = int(getenv("MEMBERSHIP_NEGATIVE_TTL", "60"))  # صلاحية نتيجة "غير مشترك" بالثواني
+MEMBERSHIP_REFRESH_INTERVAL = int(getenv("MEMBERSHIP_REFRESH_INTERVAL", "900"))  # تحميل أعضاء القناة كل (0 للتعطيل)
+
+# محرك الإذاعة
+BROADCAST_RATE = float(getenv("BROADCAST_RATE", "25"))  # رسائل في الثانية (حد تليجرام للبوت حوالي 30)
+BROADCAST_CONCURRENCY = int(getenv("BROADCAST_CONCURRENCY", "8"))  # عدد المرسلين المتزامنين
+BROADCAST_PAGE_SIZE = int(getenv("BROADCAST_PAGE_SIZE", "500"))  # أهداف لكل صفحة من قاعدة البيانات
+
 # Support chat - will be defined later with correct value
 
 # ============================================
@@ -43,6 +54,10 @@ FORCE_SUB_TEXT = getenv("FORCE_SUB_TEXT", None)  # نص رسالة الاشتر
 DATABASE_PATH = getenv("DATABASE_PATH", "zemusic.db")
 DATABASE_TYPE = getenv("DATABASE_TYPE", "sqlite")
 ENABLE_DATABASE_CACHE = getenv("ENABLE_DATABASE_CACHE", "True").lower() == "true"
+DATABASE_CACHE_SIZE = int(getenv("DATABASE_CACHE_SIZE", "5000"))  # أقصى عدد عناصر لكل كاش
+DATABASE_CACHE_TTL = int(getenv("DATABASE_CACHE_TTL", "600"))  # مدة صلاحية عناصر الكاش بالثواني
+DB_WRITE_FLUSH_INTERVAL_MS = int(getenv("DB_WRITE_FLUSH_INTERVAL_MS", "500"))  # فترة تفريغ طابور كتابة المستخدمين/المجموعات
+DB_WRITE_BATCH_SIZE = int(getenv("DB_WRITE_BATCH_SIZE", "200"))  # تفريغ فوري عند بلوغ هذا العدد
 
 # ============================================
 # إعدادات Telethon فقط
@@ -62,6 +77,11 @@ ASSISTANT_MANAGEMENT_ENABLED = True
 MAX_ASSISTANTS = int(getenv("MAX_ASSISTANTS", "10"))
 MIN_ASSISTANTS = int(getenv("MIN_ASSISTANTS", "0"))  # 0 = اختياري
 ENABLE_ASSISTANT_AUTO_MANAGEMENT = getenv("ENABLE_ASSISTANT_AUTO_MANAGEMENT", "True").lower() == "true"
+ASSISTANT_MAX_CALLS = int(getenv("ASSISTANT_MAX_CALLS", "25"))  # أقصى مكالمات نشطة للمساعد قبل تجاوزه (0 = بلا حد)
+ASSISTANT_FLOOD_REASSIGN = int(getenv("ASSISTANT_FLOOD_REASSIGN", "60"))  # FloodWait أطول من هذا (ثوان) تنقل المجموعة لمساعد آخر
+ASSISTANT_STARTUP_CONCURRENCY = int(getenv("ASSISTANT_STARTUP_CONCURRENCY", "4"))  # مساعدون يُشغلون بالتوازي عند البدء
+ASSISTANT_STARTUP_STAGGER = float(getenv("ASSISTANT_STARTUP_STAGGER", "0.5"))  # تأخير عشوائي أقصى قبل كل اتصال (ثوان)
+ASSISTANT_CONNECT_TIMEOUT = int(getenv("ASSISTANT_CONNECT_TIMEOUT", "20"))  # مهلة تشغيل المساعد الواحد (ثوان)
 
 # للتوافق مع الكود القديم (اختياري)
 STRING1 = getenv("STRING_SESSION", None)
@@ -99,6 +119,11 @@ if CACHE_CHANNEL_USERNAME:
         # صيغة ID مباشرة
         CACHE_CHANNEL_ID = CACHE_CHANNEL_USERNAME
 
+# مُفهرس قناة التخزين (تعبئة الفهرس على دفعات قابلة للاستئناف)
+CACHE_INDEX_BATCH_SIZE = int(getenv("CACHE_INDEX_BATCH_SIZE", "100"))  # رسائل لكل طلب (الحد الأقصى 100)
+CACHE_INDEX_BACKFILL_RATE = int(getenv("CACHE_INDEX_BACKFILL_RATE", "200"))  # أقصى رسائل مفحوصة في الثانية
+CACHE_INDEX_EMPTY_BATCHES = int(getenv("CACHE_INDEX_EMPTY_BATCHES", "20"))  # دفعات فارغة متتالية قبل اعتبارها نهاية القناة (عند تعذر معرفة آخر رسالة)
+
 # ============================================
 # YouTube Data API Keys (متعددة للتدوير)
 # ============================================
@@ -174,6 +199,39 @@ if not COOKIES_FILES:
 COOKIE_METHOD = "browser"
 COOKIE_FILE = COOKIES_FILES[0] if COOKIES_FILES else "cookies.txt"
 
+# ============================================
+# إعدادات مجمع الكوكيز
+# ============================================
+COOKIE_MAX_CONCURRENCY = int(getenv("COOKIE_MAX_CONCURRENCY", 3))  # أقصى استخدامات متزامنة لكل ملف كوكيز
+COOKIE_COOLDOWN = int(getenv("COOKIE_COOLDOWN", 60))  # أول فترة تبريد بعد الإخفاقات المتتالية (ثوان) وتتضاعف بعدها
+COOKIE_SAVE_DELAY = float(getenv("COOKIE_SAVE_DELAY", 10))  # تأجيل حفظ حالة الكوكيز لتجميع التغييرات (ثوان)
+
+# ============================================
+# إعدادات محرك yt-dlp (مجمع العمليات)
+# ============================================
+YTDLP_PROCESS_POOL = getenv("YTDLP_PROCESS_POOL", "True").lower() == "true"  # تعطيله يعيد التنفيذ للخيوط
+YTDLP_PROCESS_WORKERS = int(getenv("YTDLP_PROCESS_WORKERS", "0"))  # 0 = حسب عدد المعالجات
+
+# ============================================
+# إعدادات كاش بيانات يوتيوب (ذاكرة + SQLite)
+# ============================================
+YOUTUBE_CACHE_DB = getenv("YOUTUBE_CACHE_DB", "cache/youtube_cache.db")  # ملف المخزن الدائم
+YOUTUBE_CACHE_MEMORY_ITEMS = int(getenv("YOUTUBE_CACHE_MEMORY_ITEMS", "2000"))  # عناصر الطبقة الأولى في الذاكرة
+YOUTUBE_CACHE_MAX_MB = int(getenv("YOUTUBE_CACHE_MAX_MB", "64"))  # الحجم الأقصى للمخزن قبل طرد الأقل استخداماً
+THUMB_CACHE_DIR = getenv("THUMB_CACHE_DIR", "cache/thumbs")  # كاش الصور المصغرة المرسومة
+THUMB_CACHE_MAX_MB = int(getenv("THUMB_CACHE_MAX_MB", "200"))  # الحجم الأقصى قبل طرد الأقدم استخداماً
+THUMB_RENDER_WORKERS = int(getenv("THUMB_RENDER_WORKERS", "2"))  # عمليات رسم الصور المصغرة
+TRACK_RESOLVE_CONCURRENCY = int(getenv("TRACK_RESOLVE_CONCURRENCY", "8"))  # بحث YouTube متوازٍ لمقاطع Spotify/Apple/Resso
+SPOTIFY_MAX_TRACKS = int(getenv("SPOTIFY_MAX_TRACKS", "500"))  # أقصى مقاطع تُقرأ من قائمة Spotify (على صفحات)
+SEARCH_HEDGE_MIN_DELAY = float(getenv("SEARCH_HEDGE_MIN_DELAY", "0.15"))  # أقل انتظار قبل الطلب الاحتياطي للمزود التالي (ثوان)
+SEARCH_HEDGE_MAX_DELAY = float(getenv("SEARCH_HEDGE_MAX_DELAY", "3"))  # أقصى انتظار (p90 للمزود يُحصر بين الحدين)
+
+# ============================================
+# إعدادات قوائم التشغيل
+# ============================================
+QUEUE_PERSIST = getenv("QUEUE_PERSIST", "False").lower() == "true"  # حفظ القوائم في SQLite لتبقى بعد إعادة التشغيل
+QUEUE_FLUSH_INTERVAL = float(getenv("QUEUE_FLUSH_INTERVAL", "5"))  # ثوان بين تعديل القائمة وحفظها
+
 # ============================================
 # إعدادات القنوات والدعم
 # ============================================
@@ -220,6 +278,12 @@ SPOTIFY_CLIENT_SECRET = getenv("SPOTIFY_CLIENT_SECRET", None)
 # إعدادات الملفات والحدود
 # ============================================
 PLAYLIST_FETCH_LIMIT = int(getenv("PLAYLIST_FETCH_LIMIT", 25))
+PLAYLIST_RESOLVE_CONCURRENCY = int(getenv("PLAYLIST_RESOLVE_CONCURRENCY", 5))  # جلب تفاصيل مقاطع القائمة بالتوازي
+QUEUE_PREFETCH_AHEAD = int(getenv("QUEUE_PREFETCH_AHEAD", getenv("PLAYLIST_PREFETCH", 2)))  # عدد المقاطع التالية في الطابور التي تُحمّل مسبقاً لكل مجموعة
+QUEUE_PREFETCH_CONCURRENCY = int(getenv("QUEUE_PREFETCH_CONCURRENCY", 4))  # أقصى تحميلات مسبقة متزامنة لكل المجموعات
+DOWNLOAD_MIN_SEGMENTS = int(getenv("DOWNLOAD_MIN_SEGMENTS", 2))  # أقل عدد أجزاء Range متوازية للملف الواحد
+DOWNLOAD_MAX_SEGMENTS = int(getenv("DOWNLOAD_MAX_SEGMENTS", 8))  # يُزاد العدد حتى هذا الحد طالما يرتفع المعدل
+DOWNLOAD_SEGMENT_RETRIES = int(getenv("DOWNLOAD_SEGMENT_RETRIES", 4))  # محاولات الجزء الواحد قبل فشل التحميل
 TG_AUDIO_FILESIZE_LIMIT = int(getenv("TG_AUDIO_FILESIZE_LIMIT", 104857600))
 TG_VIDEO_FILESIZE_LIMIT = int(getenv("TG_VIDEO_FILESIZE_LIMIT", 1073741824))
 
@@ -258,7 +322,6 @@ SPOTIFY_PLAYLIST_IMG_URL = "https://te.legra.ph/file/95b3ca7993bbfaf993dcb.jpg"
 adminlist = {}
 lyrical = {}
 votemode = {}
-autoclean = []
 confirmer = {}
 
 def time_to_seconds(time):